@@ -200,9 +200,10 @@ def evaluate_board_advanced(pieces):
     
     return score
 
-def get_best_move(pieces, legal_moves, safe_moves):
+def get_best_move(pieces, legal_moves, safe_moves, rng=None):
     """
     評価関数を使って最善手を選択（Hard難易度用）
+    同点手は rng（省略時は random モジュール）で選ぶ
     """
     best_score = float('-inf')
     best_moves = []
@@ -235,7 +236,7 @@ def get_best_move(pieces, legal_moves, safe_moves):
             elif score == best_score:
                 best_moves.append(move_dict)
     
-    return random.choice(best_moves) if best_moves else None
+    return (rng or random).choice(best_moves) if best_moves else None
 
 def minimax_evaluation(pieces, depth, maximizing_player, alpha, beta):
     """
@@ -305,10 +306,10 @@ def minimax_evaluation(pieces, depth, maximizing_player, alpha, beta):
                     break
         return min_eval if min_eval != float('inf') else evaluate_board_advanced(pieces)
 
-def get_expert_move(pieces, legal_moves, safe_moves):
+def get_expert_move(pieces, legal_moves, safe_moves, rng=None):
     """
     ミニマックス法で最善手を選択（Expert難易度用）
-    2手先まで読む
+    2手先まで読む。同点手は rng（省略時は random モジュール）で選ぶ
     """
     best_score = float('-inf')
     best_moves = []
@@ -352,25 +353,16 @@ def get_expert_move(pieces, legal_moves, safe_moves):
             elif score == best_score:
                 best_moves.append(move_dict)
     
-    return random.choice(best_moves) if best_moves else None
+    return (rng or random).choice(best_moves) if best_moves else None
 
-def main():
-    # 標準入力から盤面情報を受け取る
-    board_json = sys.stdin.readline()
-    # 最小限のウェイトに短縮（サブプロセス間の同期のための僅かな待ち）
-    time.sleep(0.05)
+def choose_move(pieces, black_in_check, difficulty=AI_DIFFICULTY, seed=None):
+    """黒の手を1つ選んで move_dict を返す（手がなければ None）。
 
-    # --- main.pyからの新しい入力形式に対応 ---
-    data = json.loads(board_json)
-    if isinstance(data, dict) and "pieces" in data:
-        pieces = data["pieces"]
-        black_in_check = data.get("black_in_check", False)
-        # 難易度設定を受け取る（指定がなければデフォルト値を使用）
-        difficulty = data.get("difficulty", AI_DIFFICULTY)
-    else:
-        pieces = data
-        black_in_check = is_in_check(pieces, 'black')
-        difficulty = AI_DIFFICULTY
+    seed を指定すると同点手やランダム手の選択が再現可能になる。
+    乱数生成器は呼び出しごとに作るので、並行する呼び出し同士で状態を共有しない。
+    """
+    global SEARCH_DEADLINE
+    rng = random.Random(seed)
 
     legal_moves = []
     safe_moves = []
@@ -396,49 +388,72 @@ def main():
     
     if difficulty == 1:  # Easy: 完全ランダム
         if legal_moves:
-            move = random.choice(legal_moves)
+            move = rng.choice(legal_moves)
     
     elif difficulty == 2:  # Medium: チェック回避のみ考慮
         # チェック中ならsafe_movesから選ぶ。なければlegal_movesから選ぶ
         if black_in_check and safe_moves:
-            move = random.choice(safe_moves)
+            move = rng.choice(safe_moves)
         elif black_in_check and legal_moves:
             # チェック中でsafe_movesがない場合、詰みなのでランダム
-            move = random.choice(legal_moves)
+            move = rng.choice(legal_moves)
         elif legal_moves:
-            move = random.choice(legal_moves)
+            move = rng.choice(legal_moves)
     
     elif difficulty == 3:  # Hard: 評価関数による最善手選択
         if black_in_check and safe_moves:
             # チェック中は安全な手の中から最善手を選ぶ
-            move = get_best_move(pieces, legal_moves, safe_moves)
+            move = get_best_move(pieces, legal_moves, safe_moves, rng)
         elif black_in_check and legal_moves:
             # 詰みの場合はランダム
-            move = random.choice(legal_moves)
+            move = rng.choice(legal_moves)
         elif legal_moves:
             # 通常時は評価関数で最善手を選ぶ
-            move = get_best_move(pieces, legal_moves, safe_moves)
+            move = get_best_move(pieces, legal_moves, safe_moves, rng)
     
     elif difficulty == 4:  # Expert: 2手先読み + 高度な評価関数
         if black_in_check and safe_moves:
             # チェック中は安全な手の中からミニマックスで最善手を選ぶ
-            move = get_expert_move(pieces, legal_moves, safe_moves)
+            move = get_expert_move(pieces, legal_moves, safe_moves, rng)
         elif black_in_check and legal_moves:
             # 詰みの場合はランダム
-            move = random.choice(legal_moves)
+            move = rng.choice(legal_moves)
         elif legal_moves:
             # 通常時はミニマックス法で最善手を選ぶ
-            move = get_expert_move(pieces, legal_moves, safe_moves)
+            move = get_expert_move(pieces, legal_moves, safe_moves, rng)
     
     else:  # 不正な難易度の場合はMediumとして動作
         if black_in_check and safe_moves:
-            move = random.choice(safe_moves)
+            move = rng.choice(safe_moves)
         elif legal_moves:
-            move = random.choice(legal_moves)
+            move = rng.choice(legal_moves)
     
     # 応答前に探索デッドラインをクリア
-    global SEARCH_DEADLINE
     SEARCH_DEADLINE = 0
+    return move
+
+
+def main():
+    # 標準入力から盤面情報を受け取る
+    board_json = sys.stdin.readline()
+    # 最小限のウェイトに短縮（サブプロセス間の同期のための僅かな待ち）
+    time.sleep(0.05)
+
+    # --- main.pyからの新しい入力形式に対応 ---
+    data = json.loads(board_json)
+    seed = None
+    if isinstance(data, dict) and "pieces" in data:
+        pieces = data["pieces"]
+        black_in_check = data.get("black_in_check", False)
+        # 難易度設定を受け取る（指定がなければデフォルト値を使用）
+        difficulty = data.get("difficulty", AI_DIFFICULTY)
+        seed = data.get("seed")
+    else:
+        pieces = data
+        black_in_check = is_in_check(pieces, 'black')
+        difficulty = AI_DIFFICULTY
+
+    move = choose_move(pieces, black_in_check, difficulty, seed)
 
     print(json.dumps(move))
     sys.stdout.flush()
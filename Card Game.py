@@ -6,16 +6,18 @@ import traceback
 import os
 import json
 import logging
+import copy
+from collections import OrderedDict
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 try:
-    from .card_core import new_game_with_sample_deck, new_game_with_rule_deck, PlayerState, make_rule_cards_deck, PendingAction, Card, Game
+    from .card_core import new_game_with_sample_deck, new_game_with_rule_deck, PlayerState, make_rule_cards_deck, PendingAction, Game, card_from_name, card_from_id, card_spec, decode_deck_code, ai_card_preference, CARD_REGISTRY, CARD_HEAT, CARD_FREEZE, CARD_STORM, CARD_LIGHTNING, CARD_DRAW2, CARD_ALCHEMY
 except Exception:
     # 直接実行用パス解決（フォルダ直接実行時）
     try:
-        from card_core import new_game_with_sample_deck, new_game_with_rule_deck, PlayerState, make_rule_cards_deck, PendingAction, Card, Game
+        from card_core import new_game_with_sample_deck, new_game_with_rule_deck, PlayerState, make_rule_cards_deck, PendingAction, Game, card_from_name, card_from_id, card_spec, decode_deck_code, ai_card_preference, CARD_REGISTRY, CARD_HEAT, CARD_FREEZE, CARD_STORM, CARD_LIGHTNING, CARD_DRAW2, CARD_ALCHEMY
     except Exception:
         logger.exception("Failed to import card_core module")
         raise
@@ -30,6 +32,36 @@ except Exception:
         logger.exception("Failed to import chess_engine module")
         raise
 
+try:
+    from .dirty_renderer import DirtyRenderer
+except Exception:
+    from dirty_renderer import DirtyRenderer
+
+try:
+    from .frame_profiler import FrameProfiler
+except Exception:
+    from frame_profiler import FrameProfiler
+
+try:
+    from .frame_scheduler import FrameScheduler
+except Exception:
+    from frame_scheduler import FrameScheduler
+
+try:
+    from .ai_worker import AIWorker
+except Exception:
+    from ai_worker import AIWorker
+
+try:
+    from .ai_ponder import MoveCache, Ponderer
+except Exception:
+    from ai_ponder import MoveCache, Ponderer
+
+try:
+    from .asset_pipeline import AssetLibrary, AssetPreloader, SpriteAnimation, sprite_sheet_path
+except Exception:
+    from asset_pipeline import AssetLibrary, AssetPreloader, SpriteAnimation, sprite_sheet_path
+
 
 pygame.init()
 
@@ -50,18 +82,24 @@ else:
     pygame.display.set_caption("Chess-Card-Battle β")
 clock = pygame.time.Clock()
 
+# フレーム時間プロファイラ（F10 でオーバーレイ表示を切替）。
+# CCB_PROFILE=1 で起動時から有効、CCB_PROFILE_JSONL=パス で1フレーム1行の JSONL を追記する。
+PROFILE_JSONL = os.environ.get('CCB_PROFILE_JSONL') or None
+profiler = FrameProfiler(enabled=os.environ.get('CCB_PROFILE', '0') == '1' or PROFILE_JSONL is not None,
+                         jsonl_path=PROFILE_JSONL)
+
+# 適応フレームレート: アニメーション中だけ固定 fps で回し、静止画面では入力待ちでブロックする。
+# CCB_ADAPTIVE_FPS=0 で従来どおり常に固定 fps。
+ADAPTIVE_FPS = os.environ.get('CCB_ADAPTIVE_FPS', '1') != '0'
+IDLE_FRAME_TIMEOUT = 0.25  # 静止中でもこの間隔（秒）で1回は起きて時間依存の状態を確認する
+frame_scheduler = FrameScheduler(idle_timeout=IDLE_FRAME_TIMEOUT, enabled=ADAPTIVE_FPS)
+
 # Base UI resolution used for consistent scaling between windowed and fullscreen
 BASE_UI_W = 1200
 BASE_UI_H = 800
 
-FONT = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", 20)
-SMALL = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", 18)
-TINY = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", 16)
-# Help/operation text: slightly bolder and with more spacing for readability
-HELP_FONT = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", 20, bold=True)
-
 # Simple cache for pygame fonts to avoid repeated SysFont calls each frame.
-# Keyed by (family, size, bold).
+# Keyed by (family, size, bold). All font construction goes through here.
 FONT_CACHE = {}
 def get_font(size: int, bold: bool = False, family: str = "Noto Sans JP, Meiryo, MS Gothic"):
     key = (family, int(size), bool(bold))
@@ -75,10 +113,63 @@ def get_font(size: int, bold: bool = False, family: str = "Noto Sans JP, Meiryo,
         try:
             f = pygame.font.Font(None, int(size))
         except Exception:
-            f = FONT
+            f = globals().get('FONT')
     FONT_CACHE[key] = f
     return f
 
+FONT = get_font(20)
+SMALL = get_font(18)
+TINY = get_font(16)
+# Help/operation text: slightly bolder and with more spacing for readability
+HELP_FONT = get_font(20, bold=True)
+
+# LRU cache of rendered text surfaces keyed by (text, font, color, letter_spacing).
+# Most UI strings are identical from frame to frame, so they are rendered once.
+TEXT_CACHE_SIZE = 1024
+_text_cache = OrderedDict()
+# Per-font glyph advance table used by wrap_text: font -> {char: width}
+_glyph_advances = {}
+
+
+def render_text(font, text, color=(20, 20, 20), letter_spacing=0):
+    """Return an anti-aliased surface for `text` (cached, LRU).
+
+    With letter_spacing > 0 the characters are laid out with that many extra
+    pixels between them and composed into a single surface.
+    """
+    key = (text, font, tuple(color), letter_spacing)
+    surf = _text_cache.get(key)
+    if surf is not None:
+        _text_cache.move_to_end(key)
+        return surf
+    with profiler.span('text'):
+        if letter_spacing <= 0 or not text:
+            surf = font.render(text, True, color)
+        else:
+            glyphs = [render_text(font, ch, color) for ch in text]
+            w = sum(g.get_width() for g in glyphs) + letter_spacing * len(glyphs)
+            h = max(g.get_height() for g in glyphs)
+            surf = pygame.Surface((w, h), pygame.SRCALPHA)
+            cur_x = 0
+            for g in glyphs:
+                surf.blit(g, (cur_x, 0))
+                cur_x += g.get_width() + letter_spacing
+    _text_cache[key] = surf
+    if len(_text_cache) > TEXT_CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return surf
+
+
+def glyph_advance(font, ch):
+    """Width of a single character in `font` (cached per font)."""
+    table = _glyph_advances.get(font)
+    if table is None:
+        table = _glyph_advances[font] = {}
+    w = table.get(ch)
+    if w is None:
+        w = table[ch] = font.size(ch)[0]
+    return w
+
 # ギミック発動方式: 'number_key' | 'click_enlarged' | 'double_click'
 gimmick_activation_mode = 'number_key'
 # When top-level "カードをクリックして発動" is selected we keep a submode
@@ -149,6 +240,9 @@ bgm_volume = 0.8
 # track current logical bgm mode so callers can reapply when toggling
 current_bgm_mode = None
 
+# 乱数シード: 環境変数 CCB_SEED が設定されていれば対戦の乱数（山札・カード効果・AI）を再現可能にする
+GAME_SEED = int(os.environ['CCB_SEED']) if os.environ.get('CCB_SEED', '').strip().lstrip('-').isdigit() else None
+
 # Deck selection mode: 'fixed' uses the rule deck (24 cards),
 # 'custom' uses the created deck (20 cards). This is set after the
 # difficulty + deck choice modal.
@@ -175,8 +269,10 @@ def list_custom_decks():
 
 
 def load_custom_deck_by_name(name: str):
-    """Load a custom deck (list of card names) from decks/<name>.json.
+    """Load a custom deck from decks/<name>.json.
 
+    The file holds either a list of card names / card IDs, or an object
+    with a compact "code" (see card_core.encode_deck_code).
     Returns list of card names or None on error.
     """
     d = _custom_decks_dir()
@@ -184,8 +280,14 @@ def load_custom_deck_by_name(name: str):
     try:
         with open(path, 'r', encoding='utf-8') as f:
             data = json.load(f)
+            if isinstance(data, dict) and data.get('code'):
+                return [c.name for c in decode_deck_code(data['code'])]
             if isinstance(data, list):
-                return [str(x) for x in data]
+                out = []
+                for x in data:
+                    spec = card_spec(x) if isinstance(x, int) else None
+                    out.append(spec.name if spec is not None else str(x))
+                return out
     except Exception:
         logger.exception("Failed to load custom deck: %s", path)
     return None
@@ -194,76 +296,22 @@ def load_custom_deck_by_name(name: str):
 def build_game_from_card_names(names):
     """Build a Game whose player's deck contains cards named in `names`.
 
-    This maps names to prototypes from make_rule_cards_deck(); unknown
-    names are skipped. On failure, fall back to new_game_with_mode('custom').
+    Names (or card IDs) are resolved through the card_core registry, which
+    also covers the build-only cards; unknown names are skipped. On
+    failure, fall back to new_game_with_mode('custom').
     """
     try:
-        proto_deck = make_rule_cards_deck()
-        proto_map = {c.name: c for c in proto_deck.cards}
-        # build a normalization map for prototypes to improve matching robustness
-        def _norm_key(s: str) -> str:
-            try:
-                ss = str(s)
-            except Exception:
-                ss = s
-            ss = ss.replace('\u3000', ' ')
-            ss = ' '.join(ss.split())
-            return ss
-        proto_map_norm = {}
-        for c in proto_deck.cards:
-            k = _norm_key(c.name)
-            proto_map_norm[k] = c
-            proto_map_norm[k.replace(' ', '')] = c
-
+        import random as _random
+        rng = _random.Random(GAME_SEED)
         pool = []
-        # allow some cards that are build-only (not included in make_rule_cards_deck)
-        extra_map = {}
-        try:
-            import card_core as cc
-            extra_map = {
-                '命がけのギャンブル': getattr(cc, 'eff_risky_gamble', None),
-                '負けるわけないだろwww': getattr(cc, 'eff_no_lose', None),
-                '鉄壁': getattr(cc, 'eff_iron_wall', None),
-                'ハンです☆': getattr(cc, 'eff_hand_discard', None),
-            }
-        except Exception:
-            extra_map = {}
-
-        def _norm(n: str) -> str:
-            # normalize whitespace and common fullwidth space variants
-            try:
-                s = str(n)
-            except Exception:
-                s = n
-            s = s.replace('\u3000', ' ')  # fullwidth space -> normal
-            # collapse multiple whitespace and strip ends
-            s = ' '.join(s.split())
-            return s
-
         unmatched = []
         for nm in names:
-            norm_nm = _norm(nm)
-            # prefer normalized prototype lookup to avoid mismatch
-            p = proto_map.get(nm) or proto_map.get(norm_nm) or proto_map.get(norm_nm.replace(' ', '')) or proto_map_norm.get(norm_nm) or proto_map_norm.get(norm_nm.replace(' ', ''))
-            if p is None:
-                # try extra_map fallback with normalized keys
-                eff = extra_map.get(nm) or extra_map.get(norm_nm) or extra_map.get(norm_nm.replace(' ', ''))
-                if eff:
-                    try:
-                        pool.append(Card(norm_nm, 3 if norm_nm == '命がけのギャンブル' else (4 if norm_nm == '負けるわけないだろwww' else 2), eff))
-                        continue
-                    except Exception:
-                        pass
+            # registry lookup: names (aliases / whitespace variants accepted) or card IDs
+            c = card_from_id(nm) if isinstance(nm, int) else card_from_name(nm)
+            if c is None:
                 unmatched.append(nm)
                 continue
-            try:
-                # clone prototype (best-effort)
-                pool.append(Card(p.name, p.cost, p.effect, getattr(p, 'precheck', None)))
-            except Exception:
-                try:
-                    pool.append(Card(p.name, p.cost, p.effect))
-                except Exception:
-                    continue
+            pool.append(c)
 
         # debug: report unmatched names and how many matched
         try:
@@ -274,7 +322,7 @@ def build_game_from_card_names(names):
 
         if not pool:
             print(f"DEBUG: build_game_from_card_names - no pool built from names, unmatched={unmatched if 'unmatched' in locals() else []}")
-            deck = build_deck_for_mode('custom')
+            deck = build_deck_for_mode('custom', rng)
         else:
             # Import Deck robustly: prefer absolute import (script mode),
             # fall back to relative import (package mode).
@@ -291,7 +339,7 @@ def build_game_from_card_names(names):
                 print(f"DEBUG: pool types sample={types_info}")
             except Exception:
                 pass
-            deck = Deck(pool)
+            deck = Deck(pool, rng=rng)
             try:
                 deck_names_before = [(getattr(c,'name',None), id(c)) for c in deck.cards[:20]]
                 print(f"DEBUG: deck names before shuffle={deck_names_before}")
@@ -310,7 +358,7 @@ def build_game_from_card_names(names):
 
         deck.shuffle()
         player = PlayerState(deck=deck)
-        g = Game(player=player)
+        g = Game(player=player, rng=rng, seed=GAME_SEED)
         try:
             g.setup_battle()
         except Exception:
@@ -409,14 +457,16 @@ def set_bgm_mode(mode: str | None) -> None:
         pass
 
 
-def build_deck_for_mode(mode: str):
+def build_deck_for_mode(mode: str, rng=None):
     """Return a Deck object appropriate for the chosen deck mode.
 
     - 'fixed' -> full rule deck (24 cards)
     - 'custom' -> trimmed deck (20 cards)
+
+    `rng` is the per-game random.Random used for shuffling (optional).
     """
     try:
-        deck = make_rule_cards_deck()
+        deck = make_rule_cards_deck(rng)
         # make_rule_cards_deck already shuffles its pool; for custom decks
         # we trim to 20 and reshuffle so randomness is preserved.
         if mode == 'custom':
@@ -429,15 +479,19 @@ def build_deck_for_mode(mode: str):
     except Exception:
         # fallback: return whatever rule deck returns or raise
         try:
-            return make_rule_cards_deck()
+            return make_rule_cards_deck(rng)
         except Exception:
             return None
 
 
 def build_ai_player(mode: str):
-    """Create and return a PlayerState for the AI matching the deck mode."""
+    """Create and return a PlayerState for the AI matching the deck mode.
+
+    The AI deck shares the current game's RNG so a seeded game stays
+    reproducible on both sides.
+    """
     try:
-        deck = build_deck_for_mode(mode)
+        deck = build_deck_for_mode(mode, getattr(game, 'rng', None))
         if deck is None:
             return None
         p = PlayerState(deck=deck)
@@ -455,20 +509,24 @@ def build_ai_player(mode: str):
         return None
 
 
-def new_game_with_mode(mode: str):
+def new_game_with_mode(mode: str, seed=None):
     """Create a new Game with player's deck and return the Game object.
 
     This mirrors new_game_with_rule_deck but allows trimming the deck
-    based on the selected mode.
+    based on the selected mode. `seed` (default: GAME_SEED) makes the
+    game's RNG reproducible.
     """
     try:
-        deck = build_deck_for_mode(mode)
+        import random as _random
+        seed = GAME_SEED if seed is None else seed
+        rng = _random.Random(seed)
+        deck = build_deck_for_mode(mode, rng)
         if deck is None:
             # fallback to rule deck
-            deck = make_rule_cards_deck()
+            deck = make_rule_cards_deck(rng)
         deck.shuffle()
         player = PlayerState(deck=deck)
-        game = Game(player=player)
+        game = Game(player=player, rng=rng, seed=seed)
         try:
             game.setup_battle()
         except Exception:
@@ -477,7 +535,7 @@ def new_game_with_mode(mode: str):
     except Exception:
         # Last resort, call existing helper
         try:
-            return new_game_with_rule_deck()
+            return new_game_with_rule_deck(seed)
         except Exception:
             return None
 
@@ -526,7 +584,7 @@ def show_deck_choice_modal(screen):
     while True:
         # get current window size each frame so UI components position correctly
         win_w, win_h = screen.get_size()
-        for ev in pygame.event.get():
+        for ev in frame_scheduler.get():
             if ev.type == pygame.QUIT:
                 pygame.quit(); sys.exit(0)
             if ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE:
@@ -555,9 +613,8 @@ def show_deck_choice_modal(screen):
                     return True
 
         # draw overlay/modal
-        overlay = pygame.Surface((W, H), pygame.SRCALPHA)
         # make overlay darker so underlying UI (前の画面) is not visible/clickable
-        overlay.fill((0,0,0,220))
+        overlay = get_overlay_surface((W, H), (0, 0, 0, 220))
         screen.blit(overlay, (0,0))
 
         surf = pygame.Surface((w, h))
@@ -595,23 +652,144 @@ def show_deck_choice_modal(screen):
 
         screen.blit(surf, (x,y))
         pygame.display.flip()
-        clk.tick(30)
+        frame_scheduler.wait(clk, 30)
 
 # CPU 難易度 (1=Easy,2=Medium,3=Hard,4=Expert)
 CPU_DIFFICULTY = 2
 
+# リプレイ記録: 環境変数 CCB_REPLAY_DIR が設定されている場合、対戦ごとに
+# replay_YYYYmmdd_HHMMSS.jsonl.gz を記録する（replay.py で再生可能）
+REPLAY_DIR = os.environ.get('CCB_REPLAY_DIR')
+replay_recorder = None
+
+
+def start_replay_recording():
+    """Start recording the current battle when REPLAY_DIR is configured."""
+    global replay_recorder
+    if replay_recorder is not None:
+        try:
+            replay_recorder.close()
+        except Exception:
+            pass
+        replay_recorder = None
+    if not REPLAY_DIR or game is None:
+        return
+    try:
+        try:
+            from .replay import ReplayRecorder
+        except Exception:
+            from replay import ReplayRecorder
+        import datetime as _dt
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        path = os.path.join(REPLAY_DIR, _dt.datetime.now().strftime('replay_%Y%m%d_%H%M%S.jsonl.gz'))
+        replay_recorder = ReplayRecorder(path, seed=GAME_SEED)
+        replay_recorder.attach(game, lambda: globals().get('ai_player'))
+    except Exception:
+        logger.exception("Failed to start replay recording")
+        replay_recorder = None
+
+# 対戦ログの JSONL 出力: 環境変数 CCB_LOG_JSONL=パス が設定されている場合、対戦ごとに
+# game.log の各イベントを1行ずつ追記する（再戦時は前の対戦のストリームを閉じる）
+LOG_JSONL = os.environ.get('CCB_LOG_JSONL') or None
+_log_stream_game = None
+
+
+def start_log_stream():
+    """Stream the current battle's log to LOG_JSONL, closing the previous battle's stream."""
+    global _log_stream_game
+    if _log_stream_game is not None:
+        try:
+            _log_stream_game.log.close_stream()
+        except Exception:
+            pass
+        _log_stream_game = None
+    if not LOG_JSONL or game is None:
+        return
+    try:
+        game.log.open_stream(LOG_JSONL)
+        _log_stream_game = game
+    except Exception:
+        logger.exception("Failed to open the game log stream")
+
 # 画像の読み込み（カード名と同じファイル名.png を images 配下から探す）
 IMG_DIR = os.path.join(os.path.dirname(__file__), "images")
-_image_cache = {}
+# 画像が無いカードのプレースホルダ（サイズ別）。実画像は asset_library の LRU にだけ置く
+# （ここで持つとアトラスを追い出してもシート全体が解放されないため）。VIDEORESIZE で破棄する
+_placeholder_cache = {}
 card_rects = []  # カードのクリック判定用矩形リスト
-_piece_image_cache = {}
+# 画像マニフェスト＋サイズ別テクスチャアトラス（カード／駒）
+asset_library = AssetLibrary(IMG_DIR, card_names=[spec.name for spec in CARD_REGISTRY.values()])
+# 画像・GIF の先読み（ワーカースレッドでデコード → メインスレッドで convert_alpha）
+asset_preloader = AssetPreloader()
+asset_library.prefetched = lambda name: asset_preloader.result(('src', name))
 chess_log = []  # チェス専用ログ（カード用の game.log と分離）
 
 # プレイ画面用背景画像の候補とキャッシュ
 PLAY_BG_FILENAME = "ChatGPT Image 2025年11月4日 11_12_06.png"
-play_bg_img = None      # 元画像を保持（リサイズ用）
+START_BG_PATH = os.path.join(IMG_DIR, "ChatGPT Image 2025年10月21日 14_06_32.png")
 play_bg_surf = None     # 現在のウィンドウサイズに合わせたスケール済みサーフ
 
+# 背景・全画面オーバーレイのキャッシュ（ウィンドウサイズ別）。
+# smoothscale は毎フレーム行わず、サイズが変わったとき（VIDEORESIZE）だけ作り直す。
+_bg_source_cache = {}   # path -> 読み込んだ元画像（失敗時 None）
+_bg_scaled_cache = {}   # (path, size, tints) -> スケール・合成済みサーフェス
+_overlay_cache = {}     # (size, rgba) -> 塗りつぶし済み SRCALPHA サーフェス
+
+
+def get_scaled_background(path, size, tints=()):
+    """path の画像を size に拡大縮小し、tints (RGBA の並び) を重ねたサーフェスを返す。
+
+    結果はサイズ別にキャッシュする。画像が無い・読めない場合は None。
+    """
+    key = (path, tuple(size), tuple(tints))
+    if key in _bg_scaled_cache:
+        return _bg_scaled_cache[key]
+    with profiler.span('asset'):
+        surf = _build_scaled_background(path, size, tints)
+    _bg_scaled_cache[key] = surf
+    return surf
+
+
+def _build_scaled_background(path, size, tints):
+    """get_scaled_background のキャッシュミス時の処理（元画像の取得・縮小・着色）。"""
+    if path not in _bg_source_cache:
+        # 先読み済み（または読み込み中）ならその結果を使う
+        img = asset_preloader.result(path)
+        try:
+            if img is None and path and os.path.exists(path):
+                img = pygame.image.load(path)
+        except Exception:
+            img = None
+        _bg_source_cache[path] = img
+    img = _bg_source_cache[path]
+    surf = None
+    if img is not None:
+        try:
+            surf = pygame.transform.smoothscale(img, tuple(size)).convert()
+            for rgba in tints:
+                surf.blit(get_overlay_surface(size, rgba), (0, 0))
+        except Exception:
+            surf = None
+    return surf
+
+
+def get_overlay_surface(size, rgba):
+    """size 全体を rgba で塗った半透明サーフェス（モーダル背景の暗幕など）をキャッシュして返す。"""
+    key = (tuple(size), tuple(rgba))
+    surf = _overlay_cache.get(key)
+    if surf is None:
+        surf = pygame.Surface(tuple(size), pygame.SRCALPHA)
+        surf.fill(rgba)
+        _overlay_cache[key] = surf
+    return surf
+
+
+def invalidate_background_cache():
+    """ウィンドウサイズ変更時に古いサイズのスケール済みサーフェスを破棄する。"""
+    _bg_scaled_cache.clear()
+    _overlay_cache.clear()
+    _placeholder_cache.clear()
+
 # クリックターゲットなどのグローバル初期値（未定義参照による例外を防止）
 confirm_yes_rect = None
 confirm_no_rect = None
@@ -628,7 +806,8 @@ heat_choice_unfreeze_rect = None
 heat_choice_block_rect = None
 
 # GIF animation cache / player for heat effect (Image_F.gif)
-heat_gif_frames_cache = None  # list of pygame.Surface frames or single-surface fallback
+# *_gif_frames_cache は全フレームを1枚にまとめた SpriteAnimation（描画時はマスサイズに事前縮小した版から切り出す）
+heat_gif_frames_cache = None  # SpriteAnimation
 heat_gif_durations = None  # list of per-frame durations (ms)
 heat_gif_anim = {
     'playing': False,
@@ -722,14 +901,47 @@ IC_GIF_SPEED_FACTOR = 2.5
 # Scale multiplier for ice GIF when rendering over a tile (1.0 = tile size)
 IC_GIF_SCALE = 1.4
 
+@profiler.timed('asset')
 def _load_gif_frames(path: str):
+    """Load a GIF as one sprite sheet: returns (SpriteAnimation, durations_ms) or (None, None).
+
+    A sheet converted offline (``python asset_pipeline.py build``) is used when
+    present; otherwise the GIF frames are decoded and packed at load time.
+    """
+    sheet_path = sprite_sheet_path(IMG_DIR, path)
+    if os.path.exists(sheet_path):
+        # 先読み結果は take() で受け取り、元シートを先読み側に残さない
+        anim = SpriteAnimation.load(sheet_path, asset_preloader.take(sheet_path))
+        if anim is not None:
+            return anim, list(anim.durations)
+    frames, durations = _decode_gif_frames(path)
+    if not frames:
+        return None, None
+    anim = SpriteAnimation.from_frames(frames, durations or [1000] * len(frames))
+    # 変換済みシートが無い場合は GIF をデコードし直して元シートを作り直す
+    anim.reload = lambda: _pack_gif_sheet(path)
+    return anim, list(anim.durations)
+
+
+def _pack_gif_sheet(path: str):
+    frames, durations = _decode_gif_frames(path)
+    if not frames:
+        return None
+    return SpriteAnimation.from_frames(frames, durations or [1000] * len(frames)).sheet
+
+
+def _decode_gif_frames(path: str):
     """Try to load GIF frames using Pillow if available, fallback to single surface.
 
     Returns (frames_list, durations_list). frames_list is a list of pygame.Surface.
     durations_list is list of durations in milliseconds.
     If Pillow is not available or loading fails, returns ([surface], [1000]).
     """
-    global heat_gif_frames_cache, heat_gif_durations
+    # 先読み対象ならワーカーのデコード結果を使う（未完了なら完了を待つ）
+    if asset_preloader.knows(path):
+        pre = asset_preloader.take(path)
+        if pre and pre[0]:
+            return list(pre[0]), list(pre[1])
     try:
         from PIL import Image
     except Exception:
@@ -791,7 +1003,7 @@ def _ensure_mg_gif_loaded():
         # fallback: try pygame.image.load as a single-surface fallback
         try:
             surf = pygame.image.load(gif_path).convert_alpha()
-            mg_gif_frames_cache = [surf]
+            mg_gif_frames_cache = SpriteAnimation.from_frames([surf], [1000])
             mg_gif_durations = [1000]
             mg_gif_total_duration = 1.0
             mg_gif_load_success = True
@@ -807,6 +1019,44 @@ def _ensure_mg_gif_loaded():
         mg_gif_total_duration = len(durations) * 0.1 if durations else 0.0
     mg_gif_load_success = True
 
+# 先読みする演出用 GIF（_load_gif_frames がパスで結果を引く）
+PRELOAD_GIFS = ('Image_F.gif', 'Image_MG.gif', 'Image_MG_2P.gif', 'Image_ic (1).gif')
+
+
+def start_asset_preload():
+    """駒・カード画像、背景、演出 GIF の先読みジョブを登録してワーカーを起動する。"""
+    if asset_preloader.started:
+        return
+    for name, path in asset_library.pending_sources().items():
+        asset_preloader.add(('src', name), path, on_ready=lambda surf, n=name: asset_library.put_source(n, surf))
+    for path in (START_BG_PATH, os.path.join(IMG_DIR, PLAY_BG_FILENAME)):
+        if os.path.exists(path):
+            asset_preloader.add(path, path, on_ready=lambda surf, p=path: _bg_source_cache.setdefault(p, surf))
+    for fn in PRELOAD_GIFS:
+        path = os.path.join(IMG_DIR, fn)
+        sheet_path = sprite_sheet_path(IMG_DIR, path)
+        if os.path.exists(sheet_path):
+            # オフライン変換済みのスプライトシートは1枚の画像として読む
+            asset_preloader.add(sheet_path, sheet_path)
+        elif os.path.exists(path):
+            asset_preloader.add(path, path, kind='gif')
+    asset_preloader.start()
+
+
+def draw_preload_progress(surface):
+    """先読みが終わるまで画面下部に進捗バーを描く。"""
+    if asset_preloader.done():
+        return
+    sw, sh = surface.get_size()
+    bar_w, bar_h = min(360, sw - 40), 10
+    x, y = (sw - bar_w) // 2, sh - 28
+    pygame.draw.rect(surface, (40, 40, 40), (x, y, bar_w, bar_h))
+    pygame.draw.rect(surface, (230, 200, 120), (x, y, int(bar_w * asset_preloader.progress()), bar_h))
+    pygame.draw.rect(surface, (200, 200, 200), (x, y, bar_w, bar_h), 1)
+    label = render_text(TINY, f"読み込み中… {asset_preloader.completed}/{asset_preloader.total}", (230, 230, 230))
+    surface.blit(label, (x, y - label.get_height() - 4))
+
+
 def play_heat_gif_at(row: int, col: int):
     """Start playing the heat GIF animation centered at board square (row,col)."""
     global heat_gif_frames_cache, heat_gif_durations, heat_gif_anim
@@ -814,9 +1064,7 @@ def play_heat_gif_at(row: int, col: int):
     if heat_gif_frames_cache is None or heat_gif_durations is None:
         frames, durations = _load_gif_frames(gif_path)
         heat_gif_frames_cache = frames
-
-
-
+        heat_gif_durations = durations
     frames = heat_gif_frames_cache
     durations = heat_gif_durations
     if not frames:
@@ -869,7 +1117,7 @@ def _ensure_ic_gif_loaded():
         try:
             path = os.path.join(IMG_DIR, 'Image_ic (1).gif')
             surf = pygame.image.load(path).convert_alpha()
-            frames = [surf]
+            frames = SpriteAnimation.from_frames([surf], [1000])
             durations = [1000]
             # suppress GIF load logging (internal asset loading)
             ic_gif_load_success = True
@@ -892,6 +1140,8 @@ def _ensure_ic_gif_loaded():
             ic_gif_anim['total_duration'] = sum(durations) / 1000.0
         except Exception:
             ic_gif_anim['total_duration'] = len(durations) * 0.1 if durations else 0.0
+    # シート側のタイミングもスロー再生に合わせる
+    ic_gif_frames_cache = frames.with_durations(ic_gif_durations or durations)
     ic_gif_load_success = True
 
 
@@ -925,23 +1175,14 @@ except Exception:
 
 def get_piece_image_surface(name: str, color: str, size: tuple):
     """Return a pygame.Surface for the given piece (name like 'K','Q', color 'white'/'black').
-    Cache scaled images by (name,color,size). If file not found, return None to indicate fallback.
+    Scaled images are cached by asset_library's per-size atlas LRU. If file not found, return None to indicate fallback.
     """
-    key = (name, color, size)
-    if key in _piece_image_cache:
-        return _piece_image_cache[key]
-    # Filename convention: Chess_{letter_lower}_{color}.png (as used elsewhere)
-    fname = f"Chess_{name.lower()}_{color}.png"
-    path = os.path.join(IMG_DIR, fname)
-    surf = None
+    # Chess_{letter_lower}_{color}.png をマニフェスト経由で駒アトラスから取得
     try:
-        if os.path.exists(path):
-            img = pygame.image.load(path).convert_alpha()
-            surf = pygame.transform.smoothscale(img, size)
+        with profiler.span('asset'):
+            return asset_library.piece(name, color, size)
     except Exception:
-        surf = None
-    _piece_image_cache[key] = surf
-    return surf
+        return None
 
 
 def draw_dashed_rect(surf, color, rect, dash=6, gap=4, width=2):
@@ -1199,6 +1440,10 @@ def restart_game():
     selected_piece = None
     highlight_squares = []
     cpu_wait = False
+    # 思考中の AI の結果は破棄する
+    ai_worker.cancel()
+    ai_ponderer.cancel()
+    ai_move_cache.clear()
     
     # カードゲーム部分もリセット
     global game, ai_player
@@ -1252,9 +1497,11 @@ def restart_game():
             except Exception:
                 ai_player = None
     log_scroll_offset = 0
+    start_log_stream()
     
     game.log.append("=== ゲームを再開しました ===")
     game.log.append("白のターンです。")
+    start_replay_recording()
 
 
 def _prepare_new_battle_after_deck_already_selected():
@@ -1289,6 +1536,10 @@ def _prepare_new_battle_after_deck_already_selected():
     selected_piece = None
     highlight_squares = []
     cpu_wait = False
+    # 思考中の AI の結果は破棄する
+    ai_worker.cancel()
+    ai_ponderer.cancel()
+    ai_move_cache.clear()
 
     # Ensure game/ai_player exist; do not recreate them here
     try:
@@ -1302,12 +1553,14 @@ def _prepare_new_battle_after_deck_already_selected():
         pass
 
     log_scroll_offset = 0
+    start_log_stream()
     try:
         if game is not None:
             game.log.append("=== ゲームを再開しました ===")
             game.log.append("白のターンです。")
     except Exception:
         pass
+    start_replay_recording()
 
 def create_pieces():
     # 互換のためのエイリアス（将来的に削除予定）
@@ -1321,31 +1574,22 @@ def show_start_screen():
     # 選択結果をグローバルに反映
     global CPU_DIFFICULTY, W, H, screen
     # Prefer a repo-local background image (if present), otherwise fall back to user's Downloads
-    repo_bg_path = os.path.join(IMG_DIR, "ChatGPT Image 2025年10月21日 14_06_32.png")
+    repo_bg_path = START_BG_PATH
     user_bg_path = r"c:\Users\Student\Downloads\ChatGPT Image 2025年10月21日 14_06_32.png"
-    bg_surf = None
-    repo_bg_used = False
-    try:
-        if os.path.exists(repo_bg_path):
-            img = pygame.image.load(repo_bg_path)
-            bg_surf = pygame.transform.smoothscale(img, (W, H)).convert()
-            repo_bg_used = True
-        elif os.path.exists(user_bg_path):
-            img = pygame.image.load(user_bg_path)
-            bg_surf = pygame.transform.smoothscale(img, (W, H)).convert()
-    except Exception:
-        bg_surf = None
-
-    # normalize names and prepare UI metrics/fonts used below
-    bg = bg_surf
-    # keep the original loaded image (if any) for rescaling on resize
-    bg_img = locals().get('img', None)
+    repo_bg_used = os.path.exists(repo_bg_path)
+    bg_path = repo_bg_path if repo_bg_used else user_bg_path
+    # If repo image is used, it's likely already properly exposed; apply a tiny brighten.
+    # For user-provided images, apply stronger brighten to reach the desired level.
+    # Both get a gentle dark overlay to maintain contrast.
+    bg_tints = (((255, 255, 255, 20) if repo_bg_used else (255, 255, 255, 100)), (0, 0, 0, 80))
 
     # Try to play title BGM (non-fatal if audio subsystem or file missing)
     try:
         set_bgm_mode('title')
     except Exception:
         pass
+    # 駒・カード画像と演出用 GIF をバックグラウンドで読み込み開始
+    start_asset_preload()
 
     while True:
         # Use the actual current surface size from the passed-in screen so the
@@ -1366,7 +1610,7 @@ def show_start_screen():
         # create a larger vertical gap between title and buttons per user request
         start_y = title_y + title_font.get_height() + 240
 
-        for event in pygame.event.get():
+        for event in frame_scheduler.get():
             if event.type == pygame.QUIT:
                 pygame.quit(); sys.exit(0)
             if event.type == pygame.VIDEORESIZE:
@@ -1374,12 +1618,8 @@ def show_start_screen():
                 try:
                     W, H = max(200, event.w), max(200, event.h)
                     screen = pygame.display.set_mode((W, H), pygame.RESIZABLE)
-                    # rescale background image if we have the original loaded image
-                    if bg_img is not None:
-                        try:
-                            bg = pygame.transform.smoothscale(bg_img, (W, H)).convert()
-                        except Exception:
-                            bg = bg_surf
+                    # background is rescaled lazily for the new size
+                    invalidate_background_cache()
                 except Exception:
                     pass
             # keyboard selection (1-4)
@@ -1474,26 +1714,14 @@ def show_start_screen():
                     show_deck_modal(screen)
 
         # draw background (image if available) - prefer sepia image
+        bg = get_scaled_background(bg_path, (W, H), bg_tints)
         if bg is not None:
             screen.blit(bg, (0,0))
-            # If repo image is used, it's likely already properly exposed; apply a tiny brighten.
-            if repo_bg_used:
-                bright = pygame.Surface((W, H), pygame.SRCALPHA)
-                bright.fill((255,255,255,20))
-                screen.blit(bright, (0,0))
-            else:
-                # For user-provided images, apply stronger brighten to reach the desired level
-                bright = pygame.Surface((W, H), pygame.SRCALPHA)
-                bright.fill((255,255,255,100))
-                screen.blit(bright, (0,0))
         else:
             # lighter sepia fallback
             screen.fill((150, 100, 50))
-
-        # gentle dark overlay to maintain contrast but keep background visible
-        overlay = pygame.Surface((W, H), pygame.SRCALPHA)
-        overlay.fill((0,0,0,80))
-        screen.blit(overlay, (0,0))
+            # gentle dark overlay to maintain contrast
+            screen.blit(get_overlay_surface((W, H), (0, 0, 0, 80)), (0,0))
 
         # Title with outline (dark fill with light outline to match screenshot)
         title_text = "CPUの難易度を設定してください"
@@ -1550,7 +1778,7 @@ def show_start_screen():
             credit_text = "BGM:MusMus様"
             # create a bold variant for slightly thicker text
             try:
-                credit_font = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", SMALL.get_height(), bold=True)
+                credit_font = get_font(SMALL.get_height(), bold=True)
             except Exception:
                 credit_font = SMALL
             # darker fill color for "濃く"
@@ -1579,8 +1807,13 @@ def show_start_screen():
         except Exception:
             pass
 
+        # 先読みの進捗（完了までのみ表示）
+        asset_preloader.poll()
+        draw_preload_progress(screen)
+
         pygame.display.flip()
-        clock.tick(30)
+        # 先読み中（進捗バー表示中）だけ 30fps、それ以外は入力待ちで休む
+        frame_scheduler.wait(clock, 30, active=not asset_preloader.done())
 
 
 # === デッキ管理システム ===
@@ -1647,7 +1880,7 @@ def show_deck_modal(screen, battle_select_mode=False):
         win_w, win_h = screen.get_size()
         # load saved decks each frame so external edits are reflected immediately
         decks = load_saved_decks()
-        for ev in pygame.event.get():
+        for ev in frame_scheduler.get():
             if ev.type == pygame.QUIT:
                 pygame.quit(); sys.exit(0)
             if ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE:
@@ -1782,7 +2015,7 @@ def show_deck_modal(screen, battle_select_mode=False):
                                back_rect.y + (back_rect.height - back_text.get_height()) // 2))
 
         pygame.display.flip()
-        clk.tick(30)
+        frame_scheduler.wait(clk, 30)
     # end of modal
 
 
@@ -1791,7 +2024,7 @@ def show_deck_options(screen, deck):
     clock = pygame.time.Clock()
     
     while True:
-        for event in pygame.event.get():
+        for event in frame_scheduler.get():
             if event.type == pygame.QUIT:
                 pygame.quit(); sys.exit(0)
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
@@ -1814,8 +2047,7 @@ def show_deck_options(screen, deck):
                     return 'delete'
         
         # 暗転オーバーレイ
-        overlay = pygame.Surface((W, H), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 160))
+        overlay = get_overlay_surface((W, H), (0, 0, 0, 160))
         screen.blit(overlay, (0, 0))
         
         # ダイアログ
@@ -1846,7 +2078,7 @@ def show_deck_options(screen, deck):
         
         screen.blit(dialog_surf, (dialog_x, dialog_y))
         pygame.display.flip()
-        clock.tick(30)
+        frame_scheduler.wait(clock, 30)
 
 
 def show_deck_battle_confirm(screen, deck, slot_idx):
@@ -1861,7 +2093,7 @@ def show_deck_battle_confirm(screen, deck, slot_idx):
     title_font = get_font(28)
 
     while True:
-        for ev in pygame.event.get():
+        for ev in frame_scheduler.get():
             if ev.type == pygame.QUIT:
                 pygame.quit(); sys.exit(0)
             if ev.type == pygame.KEYDOWN:
@@ -1896,8 +2128,7 @@ def show_deck_battle_confirm(screen, deck, slot_idx):
                     return True
 
         # draw
-        overlay = pygame.Surface((W, H), pygame.SRCALPHA)
-        overlay.fill((0,0,0,160))
+        overlay = get_overlay_surface((W, H), (0, 0, 0, 160))
         screen.blit(overlay, (0,0))
         box = pygame.Surface((w, h))
         box.fill((245,245,250))
@@ -1931,7 +2162,7 @@ def show_deck_battle_confirm(screen, deck, slot_idx):
 
         screen.blit(box, (x, y))
         pygame.display.flip()
-        clk.tick(30)
+        frame_scheduler.wait(clk, 30)
 
 
 def show_deck_editor(screen, existing_deck, slot_idx):
@@ -1946,20 +2177,7 @@ def show_deck_editor(screen, existing_deck, slot_idx):
         作成/編集されたデッキ辞書、またはNone（キャンセル時）
     """
     # 利用可能な全カード（ゲーム内で使用されるカードリスト）
-    available_cards = [
-        {'name': '灼熱', 'cost': 2},
-        {'name': '氷結', 'cost': 2},
-        {'name': '暴風', 'cost': 3},
-        {'name': '迅雷', 'cost': 3},
-        {'name': '2ドロー', 'cost': 1},
-        {'name': '錬成', 'cost': 0},
-        {'name': '墓地ルーレット', 'cost': 1},
-        {'name': '摂取', 'cost': 1},
-        {'name': '命がけのギャンブル', 'cost': 3},
-        {'name': '負けるわけないだろwww', 'cost': 4},
-        {'name': '鉄壁', 'cost': 2},
-        {'name': 'ハンです☆', 'cost': 2},
-    ]
+    available_cards = [{'name': spec.name, 'cost': spec.cost} for spec in CARD_REGISTRY.values() if spec.in_deck_builder]
     
     # 現在のデッキカード
     if existing_deck:
@@ -1982,7 +2200,7 @@ def show_deck_editor(screen, existing_deck, slot_idx):
     while True:
         # update current window size each frame (used for layout)
         win_w, win_h = screen.get_size()
-        for event in pygame.event.get():
+        for event in frame_scheduler.get():
             if event.type == pygame.QUIT:
                 pygame.quit(); sys.exit(0)
             
@@ -2053,7 +2271,7 @@ def show_deck_editor(screen, existing_deck, slot_idx):
                             pygame.draw.rect(dialog_surf, (200, 100, 100), (0, 0, dialog_w, dialog_h), 4)
 
                             # メッセージ
-                            warn_font = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", 18, bold=True)
+                            warn_font = get_font(18, bold=True)
                             msg1 = warn_font.render("20枚未満なのでバトルで使用できません。", True, (30, 30, 30))
                             msg2 = warn_font.render("このまま保存しますか？ (バトルでは使用不可)", True, (30, 30, 30))
                             dialog_surf.blit(msg1, ((dialog_w - msg1.get_width()) // 2, 40))
@@ -2170,7 +2388,7 @@ def show_deck_editor(screen, existing_deck, slot_idx):
                     break
             if name_font is None:
                 # フォールバック: システムフォント
-                name_font = pygame.font.SysFont("msgothic,meiryo", 24)
+                name_font = get_font(24, family="msgothic,meiryo")
         except:
             # 最終フォールバック
             name_font = pygame.font.Font(None, 24)
@@ -2254,7 +2472,7 @@ def show_deck_editor(screen, existing_deck, slot_idx):
                                  cancel_rect.y + (cancel_rect.height - cancel_text.get_height()) // 2))
         
         pygame.display.flip()
-        clock.tick(30)
+        frame_scheduler.wait(clock, 30)
 
 
 def show_deck_modal_old(screen):
@@ -2284,8 +2502,7 @@ def show_deck_modal_old(screen):
                 return
 
         # dim background
-        overlay = pygame.Surface((W, H), pygame.SRCALPHA)
-        overlay.fill((0,0,0,160))
+        overlay = get_overlay_surface((W, H), (0, 0, 0, 160))
         screen.blit(overlay, (0,0))
         screen.blit(modal_surf, (x,y))
         # draw list
@@ -2344,7 +2561,7 @@ def show_custom_deck_selection(screen):
     start_y = y + 64
 
     while True:
-        for ev in pygame.event.get():
+        for ev in frame_scheduler.get():
             if ev.type == pygame.QUIT:
                 pygame.quit(); sys.exit(0)
             if ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE:
@@ -2419,8 +2636,7 @@ def show_custom_deck_selection(screen):
                         return
 
         # draw overlay and modal
-        overlay = pygame.Surface((W, H), pygame.SRCALPHA)
-        overlay.fill((0,0,0,160))
+        overlay = get_overlay_surface((W, H), (0, 0, 0, 160))
         screen.blit(overlay, (0,0))
 
         surf = pygame.Surface((w, h))
@@ -2462,7 +2678,7 @@ def show_custom_deck_selection(screen):
 
         screen.blit(surf, (x,y))
         pygame.display.flip()
-        clk.tick(30)
+        frame_scheduler.wait(clk, 30)
 
 
 def show_deck_action_modal(screen, deck, slot_idx):
@@ -2472,8 +2688,8 @@ def show_deck_action_modal(screen, deck, slot_idx):
     x = (W - w) // 2
     y = (H - h) // 2
     # Use Japanese-capable fonts to avoid tofu (□) when rendering deck names
-    title_font = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", 28)
-    btn_font = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", 22)
+    title_font = get_font(28)
+    btn_font = get_font(22)
     deck_name = deck.get('name', f'デッキ{slot_idx+1}')
 
     # build short preview lines for the deck (first few card names)
@@ -2485,7 +2701,7 @@ def show_deck_action_modal(screen, deck, slot_idx):
             preview_lines.append(str(c))
 
     while True:
-        for ev in pygame.event.get():
+        for ev in frame_scheduler.get():
             if ev.type == pygame.QUIT:
                 pygame.quit(); sys.exit(0)
             if ev.type == pygame.KEYDOWN:
@@ -2535,9 +2751,8 @@ def show_deck_action_modal(screen, deck, slot_idx):
                         confirm_w, confirm_h = 420, 160
                         cx = x + (w - confirm_w)//2
                         cy = y + (h - confirm_h)//2
-                        overlay = pygame.Surface((W, H), pygame.SRCALPHA)
                         # darken fully so the background deck list is not visible
-                        overlay.fill((0,0,0,220))
+                        overlay = get_overlay_surface((W, H), (0, 0, 0, 220))
                         screen.blit(overlay, (0,0))
 
                         # redraw modal box under confirm
@@ -2580,7 +2795,7 @@ def show_deck_action_modal(screen, deck, slot_idx):
                         confirm_surf = pygame.Surface((confirm_w, confirm_h))
                         confirm_surf.fill((250,250,250))
                         pygame.draw.rect(confirm_surf, (80,80,80), (0,0,confirm_w,confirm_h), 3)
-                        q_font = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", 20)
+                        q_font = get_font(20)
                         qtxt = q_font.render("本当にこのデッキを削除しますか？", True, (30,30,30))
                         confirm_surf.blit(qtxt, ((confirm_w - qtxt.get_width())//2, 20))
                         yes_rect = pygame.Rect(60, confirm_h - 64, 120, 44)
@@ -2634,8 +2849,7 @@ def show_deck_action_modal(screen, deck, slot_idx):
                     # end confirmation loop
 
         # 描画
-        overlay = pygame.Surface((W, H), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 160))
+        overlay = get_overlay_surface((W, H), (0, 0, 0, 160))
         screen.blit(overlay, (0, 0))
         box = pygame.Surface((w, h))
         box.fill((250, 250, 250))
@@ -2679,7 +2893,7 @@ def show_deck_action_modal(screen, deck, slot_idx):
 
         screen.blit(box, (x, y))
         pygame.display.flip()
-        clk.tick(30)
+        frame_scheduler.wait(clk, 30)
 
 
 def show_deck_contents_overlay(screen, deck):
@@ -2691,9 +2905,9 @@ def show_deck_contents_overlay(screen, deck):
     y = (H - h)//2
     # Use a Japanese-capable font for the title to avoid garbled text
     try:
-        title_font = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", 28)
+        title_font = get_font(28)
     except Exception:
-        title_font = pygame.font.SysFont(None, 28)
+        title_font = get_font(28, family=None)
 
     # build card name lines
     lines = []
@@ -2704,7 +2918,7 @@ def show_deck_contents_overlay(screen, deck):
             lines.append(str(c))
 
     while True:
-        for ev in pygame.event.get():
+        for ev in frame_scheduler.get():
             if ev.type == pygame.QUIT:
                 pygame.quit(); sys.exit(0)
             if ev.type == pygame.MOUSEBUTTONDOWN and ev.button == 1:
@@ -2721,8 +2935,7 @@ def show_deck_contents_overlay(screen, deck):
             if ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE:
                 return
 
-        overlay = pygame.Surface((W, H), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
+        overlay = get_overlay_surface((W, H), (0, 0, 0, 180))
         screen.blit(overlay, (0,0))
 
         box = pygame.Surface((w, h))
@@ -2751,7 +2964,7 @@ def show_deck_contents_overlay(screen, deck):
         box.blit(hint, (w - hint.get_width() - 12, h - 28))
         screen.blit(box, (x, y))
         pygame.display.flip()
-        clk.tick(30)
+        frame_scheduler.wait(clk, 30)
 
 
 # Note: the detailed deck editor implementation lives earlier in this file
@@ -2784,7 +2997,7 @@ def show_settings_screen(screen):
     slider_h = 6
 
     while True:
-        for ev in pygame.event.get():
+        for ev in frame_scheduler.get():
             if ev.type == pygame.QUIT:
                 pygame.quit(); sys.exit(0)
             if ev.type == pygame.KEYDOWN:
@@ -2898,8 +3111,7 @@ def show_settings_screen(screen):
                 
 
         # draw modal
-        overlay = pygame.Surface((W, H), pygame.SRCALPHA)
-        overlay.fill((0,0,0,160))
+        overlay = get_overlay_surface((W, H), (0, 0, 0, 160))
         screen.blit(overlay, (0,0))
 
         surf = pygame.Surface((w, h))
@@ -3010,7 +3222,7 @@ def show_settings_screen(screen):
         try:
             credit_text = "フリーBGM・音楽素材:MusMus様"
             try:
-                credit_font = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", max(14, SMALL.get_height()-2), bold=True)
+                credit_font = get_font(max(14, SMALL.get_height()-2), bold=True)
             except Exception:
                 credit_font = SMALL
             fill_color = (120, 120, 120)
@@ -3028,11 +3240,7 @@ def show_settings_screen(screen):
 
         screen.blit(surf, (x, y))
         pygame.display.flip()
-        clk.tick(30)
-
-        pygame.display.flip()
-        clock.tick(30)
-
+        frame_scheduler.wait(clk, 30)
 
 
 def get_piece_at(row, col):
@@ -3042,8 +3250,8 @@ def get_piece_at(row, col):
 def on_board(r,c):
     return 0 <= r < 8 and 0 <= c < 8
 
-def simulate_move(src_piece, to_r, to_c):
-    return chess.simulate_move(src_piece, to_r, to_c)
+def simulate_move(src_piece, to_r, to_c, pcs=None):
+    return chess.simulate_move(src_piece, to_r, to_c, pcs)
 
 def is_in_check_for_display(pcs, color):
     """
@@ -3233,8 +3441,30 @@ def can_attack_king_with_cards(pcs, color):
         return False
     return False
 
+def _is_tile_blocked(rr, cc, color):
+    # If a blocked tile applies to this color, disallow moving there
+    try:
+        # Prefer model helper if available (handles multi-entry representation)
+        if getattr(game, 'is_tile_blocked_for', None) is not None:
+            try:
+                # game.is_tile_blocked_for(tile, color) -> True if blocked for that color
+                if game.is_tile_blocked_for((rr, cc), color):
+                    return True
+            except Exception:
+                pass
+        # Fallback to legacy single-owner mapping
+        if getattr(game, 'blocked_tiles_owner', None) is not None:
+            owner = game.blocked_tiles_owner.get((rr, cc))
+            if owner == color:
+                return True
+    except Exception:
+        pass
+    return False
+
+@profiler.timed('movegen')
 def get_valid_moves(piece, pcs=None, ignore_check=False):
-    # pcs: list of piece dicts; if None, use global pieces
+    # pcs: board to generate on (list of pieces); if None, use the live chess.pieces.
+    # AI の先読みは盤面のコピーを渡すので、占有判定・凍結判定・自殺手判定はすべて pcs 上で行う。
     if pcs is None:
         # prefer local 'pieces' (dict-style) if present, otherwise fall back to chess.pieces
         pcs = globals().get('pieces', chess.pieces)
@@ -3262,7 +3492,7 @@ def get_valid_moves(piece, pcs=None, ignore_check=False):
     engine_piece = None
     try:
         if prow is not None and pcol is not None:
-            engine_piece = chess.get_piece_at(int(prow), int(pcol))
+            engine_piece = chess.get_piece_at(int(prow), int(pcol), pcs)
     except Exception:
         engine_piece = None
 
@@ -3294,30 +3524,14 @@ def get_valid_moves(piece, pcs=None, ignore_check=False):
     r, c = _pget(piece, 'row'), _pget(piece, 'col')
     color = _pget(piece, 'color')
 
+    def get_piece_at(rr, cc):
+        return chess.get_piece_at(rr, cc, pcs)
     def occupied(rr,cc):
         return get_piece_at(rr,cc) is not None
     def occupied_by_color(rr,cc,color):
         p = get_piece_at(rr,cc)
         return p is not None and _pget(p, 'color')==color
-    def is_blocked_tile(rr, cc, color):
-        # If a blocked tile applies to this color, disallow moving there
-        try:
-            # Prefer model helper if available (handles multi-entry representation)
-            if getattr(game, 'is_tile_blocked_for', None) is not None:
-                try:
-                    # game.is_tile_blocked_for(tile, color) -> True if blocked for that color
-                    if game.is_tile_blocked_for((rr, cc), color):
-                        return True
-                except Exception:
-                    pass
-            # Fallback to legacy single-owner mapping
-            if getattr(game, 'blocked_tiles_owner', None) is not None:
-                owner = game.blocked_tiles_owner.get((rr, cc))
-                if owner == color:
-                    return True
-        except Exception:
-            pass
-        return False
+    is_blocked_tile = _is_tile_blocked
 
     if name == 'P':
         dir = -1 if color == 'white' else 1
@@ -3451,7 +3665,7 @@ def get_valid_moves(piece, pcs=None, ignore_check=False):
     if not ignore_check and not globals().get('simul_check_active', False):
         legal = []
         try:
-            self_in_check = is_in_check(chess.pieces, color)
+            self_in_check = is_in_check(pcs, color)
         except Exception:
             self_in_check = False
         # 迅雷の有効判定（白=player、黒=AI）
@@ -3469,7 +3683,7 @@ def get_valid_moves(piece, pcs=None, ignore_check=False):
             debug_card_gate = False
         opp = 'black' if color == 'white' else 'white'
         for mv in moves:
-            newp = simulate_move(piece, mv[0], mv[1])
+            newp = simulate_move(piece, mv[0], mv[1], pcs)
             # 通常: 自駒がチェックでない局面にできる手のみ
             if not is_in_check(newp, color):
                 legal.append(mv)
@@ -3523,9 +3737,18 @@ def has_legal_moves_with_cards(color):
 def apply_move(piece, to_r, to_c):
     return chess.apply_move(piece, to_r, to_c)
 
+@profiler.timed('ai')
 def ai_make_move():
+    """AI の1手を同期的に行う（ターン開始・カード使用 → 指し手選択 → 適用）。"""
+    ai_begin_turn()
+    ai_apply_choice(ai_choose_move())
+
+
+def ai_begin_turn():
+    """AI のターン開始処理とカード使用。盤面・カード状態を変更するのでメインスレッドで呼ぶ。"""
     # AI difficulty-aware move selection (black)
-    import random
+    # All random choices use the per-game RNG so seeded games are reproducible
+    rng = game.rng
     global CPU_DIFFICULTY
     global ai_player, ai_next_move_can_jump, ai_extra_moves_this_turn, ai_consecutive_turns
 
@@ -3538,13 +3761,9 @@ def ai_make_move():
             # This is an extra consecutive AI move; do not reset PP or draw.
             ai_continuation = False
         else:
-            ai_player.reset_pp()
-            # draw 1 card if available and hand limit not exceeded
-            if len(ai_player.hand.cards) < getattr(ai_player, 'hand_limit', 7):
-                c = ai_player.deck.draw()
-                if c:
-                    ai_player.hand.add(c)
-                    game.log.append("AI: ターン開始で1枚ドローしました。")
+            # PP 回復と 1 枚ドロー（手札上限まで）。リプレイ記録のため game 側で行う
+            if game.start_ai_turn(ai_player):
+                game.log.append("AI: ターン開始で1枚ドローしました。")
     except Exception:
         # defensive: ignore if ai_player not properly initialized
         pass
@@ -3590,26 +3809,26 @@ def ai_make_move():
         max_attempts = {1: 1, 2: 2, 3: 3, 4: 4}.get(CPU_DIFFICULTY, 2)
         attempts = 0
         made_any = False
-        played_names = set()  # avoid repeating the same card multiple times in one AI think session
+        played_ids = set()  # avoid repeating the same card multiple times in one AI think session
         while attempts < max_attempts:
             # if random roll fails, stop trying further plays
-            if random.random() > p_play:
+            if rng.random() > p_play:
                 break
 
             # recompute playable indices according to current PP
-            playable = [i for i, c in enumerate(ai_player.hand.cards) if c.can_play(ai_player) and c.name not in played_names]
+            playable = [i for i, c in enumerate(ai_player.hand.cards) if c.can_play(ai_player) and c.card_id not in played_ids]
             if not playable:
                 break
 
             # prefer list (disruptive first), but adjust order by simple board heuristics
-            names = [ai_player.hand.cards[i].name for i in playable]
-            prefer = ['氷結', '灼熱', '暴風', '迅雷', '2ドロー', '錬成']
+            ids = [ai_player.hand.cards[i].card_id for i in playable]
+            prefer = ai_card_preference()
             # If opponent has much higher mobility, prefer blocking (灼熱)
             if opp_move_count > my_move_count + 4:
-                prefer.remove('灼熱') if '灼熱' in prefer else None
-                prefer.insert(0, '灼熱')
+                prefer.remove(CARD_HEAT) if CARD_HEAT in prefer else None
+                prefer.insert(0, CARD_HEAT)
             # If AI has low mobility, prefer buffs that grant movement (暴風/迅雷)
-            if '暴風' in prefer:
+            if CARD_STORM in prefer:
                 # Estimate whether 暴風 (jump) would actually increase AI mobility.
                 try:
                     # compute moves with jump enabled by temporarily toggling flag
@@ -3652,36 +3871,36 @@ def ai_make_move():
                                 pass
                     # prefer 暴風 only if it yields at least one extra legal move
                     if my_move_count < opp_move_count and added > 0:
-                        prefer.remove('暴風')
-                        prefer.insert(0, '暴風')
+                        prefer.remove(CARD_STORM)
+                        prefer.insert(0, CARD_STORM)
                     elif my_move_count < opp_move_count and added <= 0:
                         # don't aggressively pick 暴風 if it doesn't increase mobility
-                        if '暴風' in prefer:
-                            prefer.remove('暴風')
+                        if CARD_STORM in prefer:
+                            prefer.remove(CARD_STORM)
                             # reinsert lower in preference
-                            pref_tail = ['迅雷', '2ドロー', '錬成']
+                            pref_tail = [CARD_LIGHTNING, CARD_DRAW2, CARD_ALCHEMY]
                             for t in pref_tail:
                                 if t in prefer:
-                                    prefer.insert(prefer.index(t), '暴風')
+                                    prefer.insert(prefer.index(t), CARD_STORM)
                                     break
                 except Exception:
                     # fallback to original behavior if any error
-                    if my_move_count < opp_move_count and '暴風' in prefer:
-                        prefer.remove('暴風')
-                        prefer.insert(0, '暴風')
+                    if my_move_count < opp_move_count and CARD_STORM in prefer:
+                        prefer.remove(CARD_STORM)
+                        prefer.insert(0, CARD_STORM)
             # If there are no good non-king targets, deprioritize 氷結 (avoid always freezing the king)
             try:
                 opp_non_king_exists = any(getattr(p, 'color', None) == 'white' and getattr(p, 'name', None) != 'K' for p in chess.pieces)
             except Exception:
                 opp_non_king_exists = False
-            if not opp_non_king_exists and '氷結' in prefer:
+            if not opp_non_king_exists and CARD_FREEZE in prefer:
                 # move 氷結 to the end so AI won't pick it unless nothing better
-                prefer = [x for x in prefer if x != '氷結'] + ['氷結']
+                prefer = [x for x in prefer if x != CARD_FREEZE] + [CARD_FREEZE]
             # If opponent has a high-value piece, prioritize 氷結
             if highest_opp_val >= 5:
-                if '氷結' in prefer:
-                    prefer.remove('氷結')
-                    prefer.insert(0, '氷結')
+                if CARD_FREEZE in prefer:
+                    prefer.remove(CARD_FREEZE)
+                    prefer.insert(0, CARD_FREEZE)
             chosen_idx = None
             # Difficulty-aware selection: for Normal+ use a scoring function to pick the best card
             if CPU_DIFFICULTY >= 2:
@@ -3743,48 +3962,43 @@ def ai_make_move():
                 except Exception:
                     capture_ops = 0
 
+                def best_freeze_value():
+                    # prefer freezing non-king high-value pieces
+                    best_v = 0
+                    for p in chess.pieces:
+                        if getattr(p, 'color', None) == 'white' and getattr(p, 'name', '') != 'K':
+                            v = {'P':1,'N':3,'B':3,'R':5,'Q':9}.get(getattr(p, 'name', ''), 0)
+                            best_v = max(best_v, v)
+                    return best_v
+
+                # カード別の加点（カードIDで引く）
+                card_bonus = {
+                    # reward 暴風 if jump actually increases mobility
+                    CARD_STORM: lambda: max(0, estimate_jump_added()) * 8,
+                    CARD_FREEZE: lambda: best_freeze_value() * 6,
+                    # 灼熱 is useful when opponent mobility >> ours
+                    CARD_HEAT: lambda: max(0, opp_move_count - my_move_count) * 6,
+                    # 迅雷: capture opportunities, or AI mobility lower than opponent
+                    CARD_LIGHTNING: lambda: capture_ops * 8 + (6 if my_move_count < opp_move_count else 0),
+                    CARD_DRAW2: lambda: 20 if len(ai_player.hand.cards) <= 2 else 0,
+                    # small preference to generate immediate value
+                    CARD_ALCHEMY: lambda: 5,
+                }
+
                 for idx in playable:
                     try:
-                        card = ai_player.hand.cards[idx]
-                        name = card.name
+                        cid = ai_player.hand.cards[idx].card_id
                         # base score from preference order (higher better)
-                        base = 0
-                        if name in prefer:
-                            base = (len(prefer) - prefer.index(name)) * 10
+                        if cid in prefer:
+                            score = (len(prefer) - prefer.index(cid)) * 10
                         else:
-                            base = 5
-                        score = base
-                        # heuristics per card
-                        if name == '暴風':
-                            added = estimate_jump_added()
-                            # reward if jump actually increases mobility
-                            score += max(0, added) * 8
-                        elif name == '氷結':
-                            # prefer freezing non-king high-value pieces
+                            score = 5
+                        bonus = card_bonus.get(cid)
+                        if bonus is not None:
                             try:
-                                best_v = 0
-                                for p in chess.pieces:
-                                    if getattr(p, 'color', None) == 'white' and getattr(p, 'name', '') != 'K':
-                                        v = {'P':1,'N':3,'B':3,'R':5,'Q':9}.get(getattr(p, 'name', ''), 0)
-                                        best_v = max(best_v, v)
-                                score += best_v * 6
+                                score += bonus()
                             except Exception:
                                 pass
-                        elif name == '灼熱':
-                            # useful when opponent mobility >> ours
-                            score += max(0, opp_move_count - my_move_count) * 6
-                        elif name == '迅雷':
-                            # prefer if capture opportunities exist or we have mobility to exploit
-                            score += capture_ops * 8
-                            # also prefer when AI mobility is lower than opponent
-                            if my_move_count < opp_move_count:
-                                score += 6
-                        elif name == '2ドロー':
-                            if len(ai_player.hand.cards) <= 2:
-                                score += 20
-                        elif name == '錬成':
-                            # small preference to generate immediate value
-                            score += 5
                         scores[idx] = score
                     except Exception:
                         scores[idx] = 0
@@ -3794,47 +4008,47 @@ def ai_make_move():
                     best_idx = max(scores, key=scores.get)
                     if CPU_DIFFICULTY == 2:
                         # Normal: 80% pick best, 20% choose random among playable
-                        if random.random() < 0.8:
+                        if rng.random() < 0.8:
                             chosen_idx = best_idx
                         else:
-                            chosen_idx = random.choice(playable)
+                            chosen_idx = rng.choice(playable)
                     elif CPU_DIFFICULTY == 3:
                         # Hard: 95% pick best
-                        if random.random() < 0.95:
+                        if rng.random() < 0.95:
                             chosen_idx = best_idx
                         else:
-                            chosen_idx = random.choice(playable)
+                            chosen_idx = rng.choice(playable)
                     else:
                         # Very-hard: always pick best
                         chosen_idx = best_idx
                 else:
-                    chosen_idx = random.choice(playable)
+                    chosen_idx = rng.choice(playable)
             else:
                 # Easy: keep original simple preference/random behavior
                 for pref in prefer:
-                    if pref in names:
-                        chosen_idx = playable[names.index(pref)]
+                    if pref in ids:
+                        chosen_idx = playable[ids.index(pref)]
                         break
                 if chosen_idx is None:
-                    chosen_idx = random.choice(playable)
+                    chosen_idx = rng.choice(playable)
 
             # attempt play via unified resolver so AI follows same rules as player
             try:
+                card_id = ai_player.hand.cards[chosen_idx].card_id if 0 <= chosen_idx < len(ai_player.hand.cards) else None
                 ok, msg = game.play_card_for(ai_player, chosen_idx)
-                card_name = ai_player.hand.cards[chosen_idx].name if 0 <= chosen_idx < len(ai_player.hand.cards) else None
                 if ok:
                     made_any = True
                     # record that we've just used this card to avoid repeating it
-                    if card_name:
-                        played_names.add(card_name)
+                    if card_id:
+                        played_ids.add(card_id)
                 else:
                     try:
                         game.log.append(f"AI: カードの使用に失敗しました: {msg}")
                     except Exception:
                         pass
                     # if failed due to unusable context, avoid retrying same card
-                    if card_name:
-                        played_names.add(card_name)
+                    if card_id:
+                        played_ids.add(card_id)
             except Exception as e:
                 try:
                     game.log.append(f"AI: カード使用中に例外が発生しました: {e}")
@@ -3859,66 +4073,186 @@ def ai_make_move():
             pass
         pass
 
+
+
+def ai_move_pool(pcs=None):
+    """AI (黒) が指し手を選ぶ候補集合を難易度に応じて返す（乱数は使わない）。動ける手が無ければ []。
+
+    pcs を渡すとその盤面（先読み用のコピー）上で求める。盤面は変更しない（自殺手の判定は simulate_move 上で行う）。
+    """
+    board = chess.pieces if pcs is None else pcs
     # (animation rendering moved to draw_panel where board metrics are available)
     candidates = []  # list of (piece, move)
-    for p in chess.pieces:
+    for p in board:
         if p.color != 'black':
             continue
         # Use wrapper to respect freeze/blocked tiles; ignore self-check here and handle per difficulty
-        v = get_valid_moves(p, ignore_check=True)
+        v = get_valid_moves(p, pcs, ignore_check=True)
         for mv in v:
             candidates.append((p, mv))
 
     if not candidates:
-        game.log.append('AI: 動ける手がありません')
-        return
+        return []
 
     # Difficulty 1: fully random
     if CPU_DIFFICULTY == 1:
-        sel = random.choice(candidates)
+        return candidates
 
     # Difficulty 2: avoid moves that leave black in check; otherwise random
-    elif CPU_DIFFICULTY == 2:
+    if CPU_DIFFICULTY == 2:
         safe = []
         for p, mv in candidates:
-            newp = simulate_move(p, mv[0], mv[1])
+            newp = simulate_move(p, mv[0], mv[1], pcs)
             if not is_in_check(newp, 'black'):
                 safe.append((p, mv))
-        sel = random.choice(safe) if safe else random.choice(candidates)
+        return safe or candidates
 
+    values = {'P':1,'N':3,'B':3,'R':5,'Q':9,'K':100}
     # Difficulty 3: prefer captures (highest piece value captured)
-    elif CPU_DIFFICULTY == 3:
+    if CPU_DIFFICULTY == 3:
         best = []
         best_score = -999
-        values = {'P':1,'N':3,'B':3,'R':5,'Q':9,'K':100}
         for p, mv in candidates:
-            tgt = chess.get_piece_at(mv[0], mv[1])
+            tgt = chess.get_piece_at(mv[0], mv[1], pcs)
             score = values.get(tgt.name,0) if tgt else 0
             if score > best_score:
                 best_score = score
                 best = [(p,mv)]
             elif score == best_score:
                 best.append((p,mv))
-        sel = random.choice(best)
+        return best
 
     # Difficulty 4: prefer captures, avoid self-check, and favor higher-value captures
-    else:
-        best = []
-        best_score = -999
-        values = {'P':1,'N':3,'B':3,'R':5,'Q':9,'K':100}
-        for p, mv in candidates:
-            newp = simulate_move(p, mv[0], mv[1])
-            if is_in_check(newp, 'black'):
+    best = []
+    best_score = -999
+    for p, mv in candidates:
+        newp = simulate_move(p, mv[0], mv[1], pcs)
+        if is_in_check(newp, 'black'):
+            continue
+        tgt = chess.get_piece_at(mv[0], mv[1], pcs)
+        score = values.get(tgt.name,0) if tgt else 0
+        if score > best_score:
+            best_score = score
+            best = [(p,mv)]
+        elif score == best_score:
+            best.append((p,mv))
+    return best or candidates
+
+
+def ai_choose_move():
+    """現在の盤面から AI (黒) の指し手 (piece, (row, col)) を難易度に応じて選ぶ。動ける手が無ければ None。
+
+    先読み（ポンダリング）で同じ局面の候補が求まっていればそれを使う。
+    盤面は変更しないので、AI ワーカースレッドからも呼べる。
+    """
+    pool = _ai_cached_pool()
+    if pool is None:
+        pool = ai_move_pool()
+    return game.rng.choice(pool) if pool else None
+
+
+# --- AI の先読み（ポンダリング） ---
+# プレイヤーの手番中に、白の着手候補ごとの「その後の黒の候補集合」をワーカースレッドで求めて
+# ai_move_cache に入れておく。実際の局面がキャッシュにあれば AI の探索は省略される。
+# キーには黒の指し手生成に効く状態（駒配置・凍結・封鎖・ジャンプ・アンパサン・難易度）をすべて含めるので、
+# 予測が外れた局面やカード使用で前提が変わった局面とは一致しない。
+
+def _ai_status_key():
+    """盤面以外で黒の候補集合に影響する状態。"""
+    ep = getattr(chess, 'en_passant_target', None)
+    if ep is not None and ep[0] != 5:
+        # 黒が取れるのは白ポーンの2マス前進（通過マスが5段目）だけ
+        ep = None
+    try:
+        jump = bool(getattr(game, 'ai_next_move_can_jump', globals().get('ai_next_move_can_jump', False)))
+    except Exception:
+        jump = False
+    tiles = set(getattr(game, 'blocked_tiles', None) or {}) | set(getattr(game, 'blocked_tiles_owner', None) or {})
+    blocked = tuple(sorted((t for t in tiles if _is_tile_blocked(t[0], t[1], 'black')), key=repr))
+    return (CPU_DIFFICULTY, ep, jump, blocked)
+
+
+def _ai_board_key(pcs):
+    frozen_map = getattr(game, 'frozen_pieces', {}) or {}
+    return tuple(sorted(
+        (q.row, q.col, q.name, q.color, bool(getattr(q, 'has_moved', False)),
+         frozen_map.get(id(q), 0) > 0 or (getattr(q, 'frozen_turns', 0) or 0) > 0)
+        for q in pcs))
+
+
+def _ai_search_key(pcs=None):
+    return (_ai_status_key(), _ai_board_key(chess.pieces if pcs is None else pcs))
+
+
+def _ai_cached_pool():
+    """現局面の先読み結果を、ai_move_pool() と同じ順序の (piece, move) リストで返す。無ければ None。"""
+    entry = ai_move_cache.get(_ai_search_key())
+    if entry is None:
+        return None
+    # 候補は chess.pieces の並び順に依存するので、実盤面の並びに合わせ直す（乱数で選ぶ手を同期実行と揃える）
+    order = {(q.row, q.col): i for i, q in enumerate(chess.pieces)}
+    pool = []
+    for (row, col), mv in sorted(entry, key=lambda e: order.get(e[0], len(order))):
+        p = chess.get_piece_at(row, col)
+        if p is None:
+            return None
+        pool.append((p, mv))
+    return pool
+
+
+def _ai_snapshot_board():
+    """先読み用の盤面コピー（凍結は駒の frozen_turns に写す。id ベースの凍結表はコピーに効かないため）。"""
+    frozen_map = getattr(game, 'frozen_pieces', {}) or {}
+    board = []
+    for q in chess.pieces:
+        c = copy.copy(q)
+        turns = frozen_map.get(id(q), 0)
+        if turns > 0:
+            c.frozen_turns = max(getattr(c, 'frozen_turns', 0) or 0, turns)
+        board.append(c)
+    return board
+
+
+def _ai_ponder_positions(board, status):
+    """白の着手候補（駒を取る手が先）ごとに、その後の黒の候補集合を (キー, [(from, move), ...]) で返す。"""
+    values = {'P':1,'N':3,'B':3,'R':5,'Q':9,'K':100}
+    replies = []
+    for p in board:
+        if p.color != 'white':
+            continue
+        for mv in get_valid_moves(p, board):
+            # 2マス前進（アンパサン）・昇格・キャスリングは simulate_move が実際の局面を再現しないので読まない
+            if p.name == 'P' and (abs(mv[0] - p.row) == 2 or mv[0] == 0):
                 continue
-            tgt = chess.get_piece_at(mv[0], mv[1])
-            score = values.get(tgt.name,0) if tgt else 0
-            if score > best_score:
-                best_score = score
-                best = [(p,mv)]
-            elif score == best_score:
-                best.append((p,mv))
-        sel = random.choice(best) if best else random.choice(candidates)
+            if p.name == 'K' and abs(mv[1] - p.col) == 2:
+                continue
+            tgt = chess.get_piece_at(mv[0], mv[1], board)
+            replies.append((-(values.get(tgt.name, 0) if tgt else 0), p, mv))
+    replies.sort(key=lambda r: r[0])
+    for _, p, mv in replies:
+        after = simulate_move(p, mv[0], mv[1], board)
+        pool = ai_move_pool(after)
+        if _ai_status_key() != status:
+            # カード使用などで前提が変わった: この先読みは捨てる
+            return
+        if pool:
+            yield (status, _ai_board_key(after)), [((q.row, q.col), m) for q, m in pool]
+
+
+def ai_ponder():
+    """プレイヤーの手番中に毎フレーム呼ぶ。局面が変わっていれば先読みをやり直す。"""
+    status = _ai_status_key()
+    key = (status, _ai_board_key(chess.pieces))
+    if key != ai_ponderer.key:
+        ai_ponderer.start(_ai_ponder_positions, _ai_snapshot_board(), status, key=key)
 
+
+def ai_apply_choice(sel):
+    """ai_choose_move の結果を盤面へ適用する（メインスレッド）。"""
+    global ai_next_move_can_jump
+    if sel is None:
+        game.log.append('AI: 動ける手がありません')
+        return
     p, mv = sel
     apply_move(p, mv[0], mv[1])
     game.log.append(f"AI({CPU_DIFFICULTY}): {p.name} を {mv} に移動")
@@ -3942,47 +4276,29 @@ def ai_make_move():
 
 
 def get_card_image(name: str, size=(72, 96)):
+    # マニフェスト（名前→ファイル）で解決し、サイズ別カードアトラスから切り出す
+    # （キャッシュはアトラス側の LRU）
+    try:
+        with profiler.span('asset'):
+            surf = asset_library.card(name, size)
+    except Exception:
+        surf = None
+    if surf is not None:
+        return surf
     key = (name, size)
-    if key in _image_cache:
-        return _image_cache[key]
-    surf = None
-    # 1) 直接候補
-    candidates = [f"{name}.png", f"{name}.PNG", f"{name}.jpg", f"{name}.jpeg", f"{name}.webp", f"{name}.bmp"]
-    for cand in candidates:
-        path = os.path.join(IMG_DIR, cand)
-        if os.path.exists(path):
-            try:
-                img = pygame.image.load(path).convert_alpha()
-                surf = pygame.transform.smoothscale(img, size)
-                break
-            except Exception:
-                pass
-    # 2) 再帰的にベース名一致を探索（拡張子/大文字小文字を無視）
-    if surf is None and os.path.isdir(IMG_DIR):
-        base_l = name.lower()
-        for root, _dirs, files in os.walk(IMG_DIR):
-            for f in files:
-                fn, ext = os.path.splitext(f)
-                if fn.lower() == base_l and ext.lower() in [".png", ".jpg", ".jpeg", ".webp", ".bmp"]:
-                    try:
-                        path = os.path.join(root, f)
-                        img = pygame.image.load(path).convert_alpha()
-                        surf = pygame.transform.smoothscale(img, size)
-                        break
-                    except Exception:
-                        continue
+    if key in _placeholder_cache:
+        return _placeholder_cache[key]
     # If no image was found, create a simple placeholder surface so callers can blit safely
-    if surf is None:
-        surf = pygame.Surface(size, pygame.SRCALPHA)
-        surf.fill((220, 220, 230))
-        pygame.draw.rect(surf, (80, 80, 80), (0, 0, size[0], size[1]), 2)
-        try:
-            txt = SMALL.render(name, True, (30, 30, 30))
-            surf.blit(txt, ((size[0]-txt.get_width())//2, (size[1]-txt.get_height())//2))
-        except Exception:
-            pass
+    surf = pygame.Surface(size, pygame.SRCALPHA)
+    surf.fill((220, 220, 230))
+    pygame.draw.rect(surf, (80, 80, 80), (0, 0, size[0], size[1]), 2)
+    try:
+        txt = SMALL.render(name, True, (30, 30, 30))
+        surf.blit(txt, ((size[0]-txt.get_width())//2, (size[1]-txt.get_height())//2))
+    except Exception:
+        pass
 
-    _image_cache[key] = surf
+    _placeholder_cache[key] = surf
     return surf
 
 HELP_LINES = [
@@ -4006,14 +4322,13 @@ def draw_text(surf, text, x, y, color=(20, 20, 20), bold=False, letter_spacing=0
     - letter_spacing: extra pixels to insert between characters (int)
 
     Backwards-compatible: default behavior is unchanged.
+    Rendered surfaces come from the render_text LRU cache.
     Returns the rect of the rendered text on the surface.
     """
     try:
         # fast path: no bold and no special spacing -> use global FONT directly
         if not bold and (letter_spacing == 0) and float(scale) == 1.0:
-            img = FONT.render(text, True, color)
-            rect = surf.blit(img, (x, y))
-            return rect
+            return surf.blit(render_text(FONT, text, color), (x, y))
 
         # choose a font for rendering; scale the base FONT height by 'scale'
         base_size = max(10, FONT.get_height())
@@ -4021,24 +4336,11 @@ def draw_text(surf, text, x, y, color=(20, 20, 20), bold=False, letter_spacing=0
         # Use cached font to avoid repeated SysFont invocations
         font = get_font(size, bold=bold)
 
-        if letter_spacing <= 0:
-            img = font.render(text, True, color)
-            rect = surf.blit(img, (x, y))
-            return rect
-
-        # Render per-character with spacing
-        cur_x = x
-        max_h = 0
         # scale letter spacing as well so spacing is proportional on large screens
-        spacing_px = max(0, int(letter_spacing * float(scale)))
-        for ch in text:
-            ch_surf = font.render(ch, True, color)
-            surf.blit(ch_surf, (cur_x, y))
-            cur_x += ch_surf.get_width() + spacing_px
-            max_h = max(max_h, ch_surf.get_height())
-
-        total_w = cur_x - x
-        return pygame.Rect(x, y, total_w, max_h)
+        spacing_px = max(0, int(letter_spacing * float(scale))) if letter_spacing > 0 else 0
+        img = render_text(font, text, color, spacing_px)
+        rect = surf.blit(img, (x, y))
+        return rect
     except Exception:
         # fallback to simple rendering to avoid crashing UI
         img = FONT.render(text, True, color)
@@ -4047,22 +4349,77 @@ def draw_text(surf, text, x, y, color=(20, 20, 20), bold=False, letter_spacing=0
 
 
 def wrap_text(text: str, max_width: int):
-    """Return list of lines wrapped to fit max_width using FONT metrics."""
+    """Return list of lines wrapped to fit max_width using FONT metrics.
+
+    Widths are accumulated from the per-character advance table, so each
+    line is measured in a single pass.
+    """
     lines = []
     cur = ""
+    cur_w = 0
     for ch in text:
-        test = cur + ch
-        w, _ = FONT.size(test)
-        if w <= max_width or cur == "":
-            cur = test
+        w = glyph_advance(FONT, ch)
+        if cur_w + w <= max_width or cur == "":
+            cur += ch
+            cur_w += w
         else:
             lines.append(cur)
             cur = ch
+            cur_w = w
     if cur:
         lines.append(cur)
     return lines
 
 
+# Per-event wrap cache for the log panel: seq -> wrapped lines at `width`.
+# Each log event is wrapped once; the panel only blits the visible window.
+_log_wrap_cache = {'width': None, 'lines': {}}
+
+
+def _wrapped_log_event(ev, max_width: int):
+    cache = _log_wrap_cache
+    if cache['width'] != max_width:
+        cache['width'] = max_width
+        cache['lines'] = {}
+    lines = cache['lines'].get(ev.seq)
+    if lines is None:
+        lines = wrap_text(f"• {ev.text}", max_width)
+        cache['lines'][ev.seq] = lines
+    return lines
+
+
+def get_wrapped_log_counts(max_width: int):
+    """Return wrapped line counts for each buffered log event (oldest first)."""
+    events = game.log.events()
+    counts = [len(_wrapped_log_event(ev, max_width)) for ev in events]
+    # forget events that have dropped out of the ring buffer
+    lines = _log_wrap_cache['lines']
+    if events and len(lines) > len(events):
+        first_seq = events[0].seq
+        for k in [k for k in lines if k < first_seq]:
+            del lines[k]
+    return counts
+
+
+def get_visible_log_lines(max_width: int, max_lines: int, scroll_offset: int):
+    """Return the wrapped lines visible in the log panel (newest at bottom).
+
+    Walks the log from the newest event backwards and stops as soon as the
+    visible window (plus scroll offset) is filled.
+    """
+    if max_lines <= 0:
+        return []
+    need = max_lines + max(0, scroll_offset)
+    collected = []
+    for ev in game.log.iter_newest():
+        collected[:0] = _wrapped_log_event(ev, max_width)
+        if len(collected) >= need:
+            break
+    end = len(collected) - max(0, scroll_offset)
+    start = max(0, end - max_lines)
+    return collected[start:max(0, end)]
+
+
 def compute_layout(win_w: int, win_h: int):
     """Compute common layout metrics used by draw_panel and input handling.
     Returns a dict with keys:
@@ -4192,25 +4549,12 @@ def compute_layout(win_w: int, win_h: int):
 
 def draw_panel():
     # 背景画像があればそれを描画し、なければ従来の塗りつぶしを行う
-    global log_toggle_rect, play_bg_img, play_bg_surf
+    global log_toggle_rect, play_bg_surf
     try:
-        # 初回: 画像ファイルがあればロードしてキャッシュ
-        if play_bg_img is None and play_bg_surf is None:
-            try:
-                bg_path = os.path.join(IMG_DIR, PLAY_BG_FILENAME)
-                if os.path.exists(bg_path):
-                    play_bg_img = pygame.image.load(bg_path)
-            except Exception:
-                play_bg_img = None
-
-        # play_bg_img が存在すれば現在のウィンドウサイズに合わせてスケールして描画
-        if play_bg_img is not None:
-            try:
-                play_bg_surf = pygame.transform.smoothscale(play_bg_img, (W, H)).convert()
-                screen.blit(play_bg_surf, (0, 0))
-            except Exception:
-                # スケーリングや描画に失敗した場合は単色で塗りつぶす
-                screen.fill((240, 240, 245))
+        # ウィンドウサイズ別にキャッシュしたスケール済み背景を描画（無ければ塗りつぶし）
+        play_bg_surf = get_scaled_background(os.path.join(IMG_DIR, PLAY_BG_FILENAME), (W, H))
+        if play_bg_surf is not None:
+            screen.blit(play_bg_surf, (0, 0))
         else:
             screen.fill((240, 240, 245))
     except Exception:
@@ -4220,6 +4564,8 @@ def draw_panel():
         except Exception:
             pass
 
+    profiler.lap('draw.background')
+
     # === レイアウト設定: 左側に基本情報、その右にチェス盤を画面上部から配置 ===
     # Use shared responsive layout so left/right panels and board stay balanced
     layout = compute_layout(W, H)
@@ -4336,8 +4682,8 @@ def draw_panel():
     # Scale the button label so it follows the UI scale used on the right-side rendering
     ui_scale = layout.get('scale', 1.0)
     try:
-        lab_font = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", max(12, int(FONT.get_height() * ui_scale)), bold=True)
-        lab = lab_font.render("バトル開始 (T)", True, (255,255,255))
+        lab_font = get_font(max(12, int(FONT.get_height() * ui_scale)), bold=True)
+        lab = render_text(lab_font, "バトル開始 (T)", (255,255,255))
         screen.blit(lab, (start_turn_rect.x + (btn_w - lab.get_width())//2, start_turn_rect.y + (btn_h - lab.get_height())//2))
     except Exception:
         lab = FONT.render("バトル開始 (T)", True, (255,255,255))
@@ -4376,6 +4722,8 @@ def draw_panel():
         # add more vertical gap between items for improved readability
         help_y += 40
 
+    profiler.lap('draw.info')
+
     # === チェス盤エリア: 左側パネルの右、画面上部から開始 ===
     board_area_left = layout['central_left']
     board_area_top = layout['board_top']
@@ -4425,6 +4773,8 @@ def draw_panel():
                 label = SMALL.render(p.name, True, (255,255,255))
             screen.blit(label, (cx - label.get_width()//2, cy - label.get_height()//2))
 
+    profiler.lap('draw.board')
+
     # --- カード効果の視覚化オーバーレイ ---
     # 表示: 封鎖マス (赤の半透明)、凍結駒 (青の半透明に「凍」マーク)
     try:
@@ -4496,37 +4846,21 @@ def draw_panel():
         if heat_gif_anim.get('playing') and heat_gif_anim.get('frames'):
             elapsed = _ct_time.time() - heat_gif_anim.get('start_time', 0.0)
             total = heat_gif_anim.get('total_duration', 0.0)
-            frames = heat_gif_anim.get('frames')
-            durations = heat_gif_anim.get('durations') or [1000]
+            anim = heat_gif_anim.get('frames')
             if elapsed >= total:
                 # stop animation
                 heat_gif_anim['playing'] = False
             else:
                 # determine current frame by elapsed ms
-                acc = 0.0
-                elapsed_ms = elapsed * 1000.0
-                idx = 0
-                for i, d in enumerate(durations):
-                    acc += d
-                    if elapsed_ms < acc:
-                        idx = i
-                        break
-                frame = frames[idx]
+                idx = anim.frame_at(elapsed * 1000.0)
                 # compute position centered on target square
                 pos = heat_gif_anim.get('pos')
                 if pos is not None:
                     r, c = pos
                     fx = board_left + c * square_w
                     fy = board_top + r * square_h
-                    # scale animation to exactly the square size so it fits the tile
-                    try:
-                        fw = int(square_w)
-                        fh = int(square_h)
-                        f_surf = pygame.transform.smoothscale(frame, (fw, fh))
-                    except Exception:
-                        f_surf = frame
-                    # draw aligned to the tile's top-left so it occupies the tile area
-                    screen.blit(f_surf, (fx, fy))
+                    # マスサイズに事前縮小したシートから該当フレームだけを描く
+                    anim.scaled((square_w, square_h)).blit(screen, (fx, fy), idx)
     except Exception:
         # Don't let animation errors break UI
         pass
@@ -4536,27 +4870,18 @@ def draw_panel():
         if ic_gif_anim.get('playing') and ic_gif_anim.get('frames'):
             elapsed = _ct_time.time() - ic_gif_anim.get('start_time', 0.0)
             total = ic_gif_anim.get('total_duration', 0.0)
-            frames = ic_gif_anim.get('frames')
-            durations = ic_gif_anim.get('durations') or [1000]
+            anim = ic_gif_anim.get('frames')
             if elapsed >= total:
                 ic_gif_anim['playing'] = False
             else:
                 # determine current frame
-                acc = 0.0
-                elapsed_ms = elapsed * 1000.0
-                idx = 0
-                for i, d in enumerate(durations):
-                    acc += d
-                    if elapsed_ms < acc:
-                        idx = i
-                        break
-                frame = frames[idx]
+                idx = anim.frame_at(elapsed * 1000.0)
                 pos = ic_gif_anim.get('pos')
                 if pos is not None:
                     r, c = pos
                     # scale animation so it FITS INSIDE the tile while preserving aspect ratio
                     try:
-                        fw0, fh0 = frame.get_width(), frame.get_height()
+                        fw0, fh0 = anim.frame_size
                         # compute max allowed scale to fit inside tile
                         max_w = max(1, square_w)
                         max_h = max(1, square_h)
@@ -4571,15 +4896,14 @@ def draw_panel():
                             sf = 1.0
                         fw = max(1, int(fw0 * sf))
                         fh = max(1, int(fh0 * sf))
-                        f_surf = pygame.transform.smoothscale(frame, (fw, fh))
+                        scaled = anim.scaled((fw, fh))
                     except Exception:
-                        f_surf = frame
-                        fw = f_surf.get_width()
-                        fh = f_surf.get_height()
+                        scaled = anim
+                        fw, fh = anim.frame_size
                     # center the scaled animation INSIDE the tile
                     fx = board_left + c * square_w + (square_w - fw) // 2
                     fy = board_top + r * square_h + (square_h - fh) // 2
-                    screen.blit(f_surf, (fx, fy))
+                    scaled.blit(screen, (fx, fy), idx)
     except Exception:
         pass
 
@@ -4634,40 +4958,19 @@ def draw_panel():
             except Exception:
                 use_2p = False
 
-            frames_cache = mg_gif_2p_frames_cache if use_2p and mg_gif_2p_frames_cache else mg_gif_frames_cache
-            durations = mg_gif_2p_durations if use_2p and mg_gif_2p_durations else mg_gif_durations
-
-            if not frames_cache or not durations:
+            anim = mg_gif_2p_frames_cache if use_2p and mg_gif_2p_frames_cache else mg_gif_frames_cache
+            if not anim:
                 continue
 
-            try:
-                total_ms = int(sum(durations))
-            except Exception:
-                total_ms = max(1, int((mg_gif_2p_total_duration if use_2p else mg_gif_total_duration) * 1000))
-
             # frame index by modulo looping
-            if total_ms > 0:
-                tmod = now_ms % total_ms
-                acc = 0
-                idx = 0
-                for i, d in enumerate(durations):
-                    acc += d
-                    if tmod < acc:
-                        idx = i
-                        break
-            else:
-                idx = 0
-
-            frame = frames_cache[idx]
-            try:
-                f_surf = pygame.transform.smoothscale(frame, (square_w, square_h))
-            except Exception:
-                f_surf = frame
-            # draw on tile top-left so it covers the tile area
-            screen.blit(f_surf, (bx, by))
+            idx = anim.frame_at(now_ms, loop=True)
+            # draw on tile top-left so it covers the tile area (pre-scaled to the square size)
+            anim.scaled((square_w, square_h)).blit(screen, (bx, by), idx)
     except Exception:
         pass
 
+    profiler.lap('draw.effects')
+
     # --- ターン表示テロップ（中央・1秒表示） ---
     try:
         if turn_telop_msg and _ct_time.time() < turn_telop_until:
@@ -4676,10 +4979,10 @@ def draw_panel():
             bx = board_left
             by = board_top
             telop_font_size = max(28, bs // 8)
-            telop_font = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", telop_font_size, bold=True)
-            telop_surf = telop_font.render(turn_telop_msg, True, (255, 255, 255))
+            telop_font = get_font(telop_font_size, bold=True)
+            telop_surf = render_text(telop_font, turn_telop_msg, (255, 255, 255))
             # drop shadow
-            shadow = telop_font.render(turn_telop_msg, True, (0, 0, 0))
+            shadow = render_text(telop_font, turn_telop_msg, (0, 0, 0))
             tx = bx + (bs - telop_surf.get_width()) // 2
             ty = by + (bs - telop_surf.get_height()) // 2
             screen.blit(shadow, (tx + 2, ty + 2))
@@ -4693,9 +4996,9 @@ def draw_panel():
             # small semi-transparent box near top-center of board
             box_w = min(500, board_size - 40)
             notice_font_size = max(16, board_size // 24)
-            notice_font = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", notice_font_size, bold=True)
-            notice_surf = notice_font.render(notice_msg, True, (255, 230, 180))
-            shadow = notice_font.render(notice_msg, True, (0,0,0))
+            notice_font = get_font(notice_font_size, bold=True)
+            notice_surf = render_text(notice_font, notice_msg, (255, 230, 180))
+            shadow = render_text(notice_font, notice_msg, (0,0,0))
             bx = board_left + (board_size - notice_surf.get_width()) // 2
             by = board_top + 8
             # background box
@@ -4865,8 +5168,8 @@ def draw_panel():
             
             for idx, color in enumerate(draw_panel.last_check_colors):
                 msg = f"{'白' if color == 'white' else '黒'}チェック中"
-                check_font = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", 20, bold=True)
-                check_text = check_font.render(msg, True, (255, 165, 0))
+                check_font = get_font(20, bold=True)
+                check_text = render_text(check_font, msg, (255, 165, 0))
                 
                 text_w = check_text.get_width()
                 text_h = check_text.get_height()
@@ -4884,6 +5187,7 @@ def draw_panel():
 
     # === 右側エリア: ログ（切替式）===
     global scrollbar_rect, dragging_scrollbar, drag_start_y, drag_start_offset
+    profiler.lap('draw.highlights')
     if show_log:
         # Preferred log panel sits to the right of the board when enough room exists.
         # Make the preferred width a bit larger so normal windows get a readable panel.
@@ -5042,12 +5346,10 @@ def draw_panel():
         # 見出しのすぐ下にスクロールのヒントを表示
         draw_text(screen, "↑↓ / ホイールでスクロール", log_panel_left + 10, log_panel_top + 30 + top_line_h, (100, 100, 120))
 
-        # ログの折り返し処理
-        wrapped_lines = []
+        # ログの折り返し処理（イベント単位でキャッシュし、可視範囲のみ描画する）
         max_log_width = log_panel_width - 30
-        for line in game.log:
-            for wline in wrap_text(f"• {line}", max_log_width):
-                wrapped_lines.append(wline)
+        wrapped_counts = get_wrapped_log_counts(max_log_width)
+        total_wrapped = sum(wrapped_counts)
 
         # スクロールオフセットの範囲制限
         global log_scroll_offset
@@ -5058,16 +5360,11 @@ def draw_panel():
         # 下部に余白を設けて見やすくする（最後の行が枠にくっつかないように）
         bottom_padding_px = 28  # ここを調整すると余白サイズを変更できます
         max_lines_visible = max(0, (log_panel_height - 50 - bottom_padding_px) // line_step)
-        max_scroll = max(0, len(wrapped_lines) - max_lines_visible)
+        max_scroll = max(0, total_wrapped - max_lines_visible)
         log_scroll_offset = max(0, min(log_scroll_offset, max_scroll))
 
-        # 表示範囲を計算（最新が下）
-        if len(wrapped_lines) <= max_lines_visible:
-            visible_lines = wrapped_lines
-        else:
-            start_idx = len(wrapped_lines) - max_lines_visible - log_scroll_offset
-            start_idx = max(0, start_idx)
-            visible_lines = wrapped_lines[start_idx:start_idx + max_lines_visible]
+        # 表示範囲を計算（最新が下）: 最新側から必要な分だけ取り出す
+        visible_lines = get_visible_log_lines(max_log_width, max_lines_visible, log_scroll_offset)
 
         # ログ描画開始位置（見出しとヒントの下）
         # 先ほどタイトルの上に1行分の余白を入れたので、描画開始位置も同じ分だけ下げる
@@ -5089,7 +5386,7 @@ def draw_panel():
             pygame.draw.rect(screen, (200, 200, 200), 
                            (scrollbar_x, scrollbar_y, scrollbar_width, scrollbar_height))
             # スクロール位置を計算
-            total_lines = len(wrapped_lines)
+            total_lines = total_wrapped
             scroll_ratio = log_scroll_offset / max_scroll if max_scroll > 0 else 0
             # つまみのサイズと位置
             thumb_height = max(20, scrollbar_height * max_lines_visible / total_lines)
@@ -5105,12 +5402,14 @@ def draw_panel():
         # ログ非表示時のヒント (右パネルに寄せる)
         # Make the label more visible by using a bolder font if available.
         try:
-            lbl_font = HELP_FONT if HELP_FONT else pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", 20, bold=True)
-            lbl_s = lbl_font.render("[L] ログ表示", True, (80, 80, 110))
+            lbl_font = HELP_FONT if HELP_FONT else get_font(20, bold=True)
+            lbl_s = render_text(lbl_font, "[L] ログ表示", (80, 80, 110))
             screen.blit(lbl_s, (layout['right_panel_x'] + 12, board_area_top + board_area_height - 30))
         except Exception:
             draw_text(screen, "[L] ログ表示", layout['right_panel_x'] + 12, board_area_top + board_area_height - 30, (100, 100, 120))
 
+    profiler.lap('draw.log')
+
     # === 下部エリア: 手札（左から横並び最大7枚） ===
     # ボードの下に左詰めで横並びで表示
     card_area_top = layout['card_area_top']
@@ -5217,6 +5516,8 @@ def draw_panel():
     # if game.player.next_move_can_jump:
     #     draw_text(screen, "次: 飛越可", state_x, state_y, (0, 120, 0))
 
+    profiler.lap('draw.hand')
+
     # === 墓地オーバーレイ ===
     if show_grave:
         overlay_w = 600
@@ -5315,9 +5616,7 @@ def draw_panel():
         enlarged_y = (H - enlarged_h) // 2
         
         # 背景暗転
-        dark_overlay = pygame.Surface((W, H))
-        dark_overlay.fill((0, 0, 0))
-        dark_overlay.set_alpha(150)
+        dark_overlay = get_overlay_surface((W, H), (0, 0, 0, 150))
         screen.blit(dark_overlay, (0, 0))
         
         # 拡大画像のみ表示
@@ -5330,9 +5629,7 @@ def draw_panel():
         enlarged_x = (W - enlarged_w) // 2
         enlarged_y = (H - enlarged_h) // 2
 
-        dark_overlay = pygame.Surface((W, H))
-        dark_overlay.fill((0, 0, 0))
-        dark_overlay.set_alpha(150)
+        dark_overlay = get_overlay_surface((W, H), (0, 0, 0, 150))
         screen.blit(dark_overlay, (0, 0))
 
         large_img = get_card_image(enlarged_card_name, size=(enlarged_w, enlarged_h))
@@ -5506,8 +5803,8 @@ def draw_panel():
         pygame.draw.rect(screen, (245,245,245), (box_x, box_y, box_w, box_h))
         pygame.draw.rect(screen, (80,80,80), (box_x, box_y, box_w, box_h), 2)
         # ヘッダ
-        header_font = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", 28)
-        hdr = header_font.render("昇格する駒を選択", True, (40,40,40))
+        header_font = get_font(28)
+        hdr = render_text(header_font, "昇格する駒を選択", (40,40,40))
         screen.blit(hdr, (box_x + (box_w - hdr.get_width())//2, box_y + 8))
 
         # 選択肢を横並びに描画（駒画像を使う）
@@ -5549,8 +5846,8 @@ def draw_panel():
             msg = "思考中" + "." * dots
             # choose font size relative to board to avoid overflow
             font_size = max(20, bs // 12)
-            msg_font = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", font_size, bold=True)
-            txt = msg_font.render(msg, True, (250,250,250))
+            msg_font = get_font(font_size, bold=True)
+            txt = render_text(msg_font, msg, (250,250,250))
             # center within board area
             txt_x = bx + (bs - txt.get_width())//2
             txt_y = by + (bs - txt.get_height())//2
@@ -5561,12 +5858,11 @@ def draw_panel():
     # --- ゲーム終了画面（勝敗表示と再戦ボタン） ---
     if game_over:
         # 半透明オーバーレイを全画面に表示
-        overlay = pygame.Surface((W, H), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
+        overlay = get_overlay_surface((W, H), (0, 0, 0, 180))
         screen.blit(overlay, (0, 0))
         
         # 勝敗メッセージ
-        title_font = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", 48, bold=True)
+        title_font = get_font(48, bold=True)
         
         # game_over_winnerがNoneの場合、キングの存在から勝者を推定
         current_winner = game_over_winner
@@ -5593,17 +5889,17 @@ def draw_panel():
             msg = "引き分け"
             color = (200, 200, 200)
         
-        title_surf = title_font.render(msg, True, color)
+        title_surf = render_text(title_font, msg, color)
         title_rect = title_surf.get_rect(center=(W//2, H//3))
         screen.blit(title_surf, title_rect)
         
         # 再戦ボタン
-        btn_font = pygame.font.SysFont("Noto Sans JP, Meiryo, MS Gothic", 32, bold=True)
+        btn_font = get_font(32, bold=True)
         restart_text = "再戦 (R)"
         quit_text = "終了 (ESC)"
         
-        restart_surf = btn_font.render(restart_text, True, (255, 255, 255))
-        quit_surf = btn_font.render(quit_text, True, (255, 255, 255))
+        restart_surf = render_text(btn_font, restart_text, (255, 255, 255))
+        quit_surf = render_text(btn_font, quit_text, (255, 255, 255))
         
         btn_w = max(restart_surf.get_width(), quit_surf.get_width()) + 40
         btn_h = 60
@@ -5653,19 +5949,16 @@ def start_player_turn(ai_end_msg: str = None):
         if ai_end_msg:
             # If caller provided an AI-end message, capture new log entries
             # produced by start_turn so we can reorder draw-related lines
-            prev_log_len = len(game.log)
+            # game.log is a ring buffer, so bookmark by sequence number rather
+            # than by list length (indices shift once old entries drop out)
+            prev_log_seq = game.log.next_seq
             game.start_turn()
-            # extract newly added entries
-            new_entries = game.log[prev_log_len:]
-            # identify draw-only entries produced by draw_to_hand() which start with "ドロー:"
-            draw_entries = [e for e in new_entries if isinstance(e, str) and e.strip().startswith("ドロー:")]
-            # keep other new entries (including the full "ターンN開始: ...ドロー...PP..." message)
-            non_draw_new = [e for e in new_entries if e not in draw_entries]
-            # rebuild game.log keeping only non-draw new entries (we will NOT append draw_entries or the AI-end message)
+            # drop draw-only entries produced by draw_to_hand() which start with "ドロー:"
+            # and keep other new entries (including the full "ターンN開始: ...ドロー...PP..." message)
             try:
-                game.log = game.log[:prev_log_len] + non_draw_new
+                game.log.discard(lambda e: e.seq >= prev_log_seq and e.text.strip().startswith("ドロー:"))
             except Exception:
-                # fallback: if direct assignment fails, leave as-is
+                # fallback: if the log can't be filtered, leave as-is
                 pass
         else:
             game.start_turn()
@@ -5784,6 +6077,11 @@ def handle_keydown(key):
     if key == pygame.K_F5:
         debug_setup_checkmate()
         return
+    # F10: フレーム時間プロファイラのオーバーレイ表示切替
+    if key == pygame.K_F10:
+        profiler.toggle()
+        frame_renderer.invalidate()
+        return
     # F8とF9のデバッグ機能を無効化（通常プレイ時に誤操作を防ぐため）
     # if key == pygame.K_F8:
     #     debug_setup_counter_check_white()
@@ -5815,10 +6113,8 @@ def handle_keydown(key):
         if chess.promotion_pending is not None and 0 <= idx <= 3:
             opts = ['Q','R','B','N']
             sel = opts[idx]
-            piece = chess.promotion_pending['piece']
-            piece.name = sel
+            chess.complete_promotion(sel)
             game.log.append(f"昇格: ポーンを{sel}に昇格させました。")
-            chess.promotion_pending = None
             return
         # pending中: discardのみ選択を許可し、それ以外は行動不可
         if getattr(game, 'pending', None) is not None:
@@ -5929,13 +6225,12 @@ def handle_keydown(key):
                     hand_idx = game.pending.info.get('hand_index')
                     if hand_idx is not None and 0 <= hand_idx < len(game.player.hand.cards):
                         # 墓地が空でない場合の墓地ルーレット実行
-                        import random
                         if game.player.graveyard:
-                            idx = random.randrange(len(game.player.graveyard))
+                            idx = game.rng.randrange(len(game.player.graveyard))
                             recovered = game.player.graveyard.pop(idx)
                             game.player.hand.add(recovered)
                             game.log.append(f"墓地から『{recovered.name}』を回収。")
-            game.pending = None
+            game.resolve_pending(choice='yes')
             log_scroll_offset = 0
             return
         if key in (pygame.K_n, pygame.K_ESCAPE):
@@ -5946,7 +6241,7 @@ def handle_keydown(key):
                 game.log.append("確認: いいえ → キャンセル（カードは消費されません）")
             else:
                 game.log.append("確認: いいえ → キャンセル（効果なし）")
-            game.pending = None
+            game.resolve_pending(choice='no')
             log_scroll_offset = 0
             return
     
@@ -5973,7 +6268,7 @@ def handle_keydown(key):
                         if items:
                             game.log.append("ドロー: " + ", ".join(items))
                 # 保留をクリア
-                game.pending = None
+                game.resolve_pending(index=sel)
                 log_scroll_offset = 0  # 保留解決後は最新ログへ
                 return
             else:
@@ -6244,13 +6539,12 @@ def handle_mouse_click(pos):
                     hand_idx = game.pending.info.get('hand_index')
                     if hand_idx is not None and 0 <= hand_idx < len(game.player.hand.cards):
                         # 墓地が空でない場合の墓地ルーレット実行
-                        import random
                         if game.player.graveyard:
-                            idx = random.randrange(len(game.player.graveyard))
+                            idx = game.rng.randrange(len(game.player.graveyard))
                             recovered = game.player.graveyard.pop(idx)
                             game.player.hand.add(recovered)
                             game.log.append(f"墓地から『{recovered.name}』を回収。")
-            game.pending = None
+            game.resolve_pending(choice='yes')
             return
         if confirm_no_rect and confirm_no_rect.collidepoint(pos):
             confirm_id = game.pending.info.get('id')
@@ -6260,7 +6554,7 @@ def handle_mouse_click(pos):
                 game.log.append("確認: いいえ → キャンセル（カードは消費されません）")
             else:
                 game.log.append("確認: いいえ → キャンセル（効果なし）")
-            game.pending = None
+            game.resolve_pending(choice='no')
             return
 
     # 灼熱の二択ボタンのクリック処理（保留が heat_choice のとき）
@@ -6360,11 +6654,9 @@ def handle_mouse_click(pos):
         for r, o in draw_panel.promo_rects:
             if r.collidepoint(pos):
                 # 選択された昇格駒で置き換え
-                piece = chess.promotion_pending.get('piece')
+                piece = chess.complete_promotion(o)
                 if piece is not None:
-                    piece.name = o
                     game.log.append(f"昇格: ポーンを{o}に昇格させました。")
-                chess.promotion_pending = None
                 # clear selection/highlights just in case
                 selected_piece = None
                 highlight_squares = []
@@ -6431,7 +6723,7 @@ def handle_mouse_click(pos):
                     except Exception:
                         pass
                     game.log.append(f"封鎖: {(row,col)} を {turns} ターン封鎖 (対象: {applies_to})")
-                    game.pending = None
+                    game.resolve_pending(tiles=[[row, col]])
                 else:
                     game.log.append("そのマスは空ではありません。別のマスを選んでください。")
                     return
@@ -6478,7 +6770,7 @@ def handle_mouse_click(pos):
                                         game.blocked_tiles[(r, c)] = turns
                                         applied.append((r, c))
                             game.log.append(f"封鎖: {applied if applied else sel} を {turns} ターン封鎖 (対象: {applies_to})")
-                            game.pending = None
+                            game.resolve_pending(tiles=[list(t) for t in applied])
                         return
                 else:
                     game.log.append("そのマスは空ではありません。別のマスを選んでください。")
@@ -6526,7 +6818,7 @@ def handle_mouse_click(pos):
                         except Exception:
                             name = clicked.get('name', str(clicked)) if clicked is not None else '駒'
                         game.log.append(f"凍結解除: {name} の凍結を解除しました。")
-                        game.pending = None
+                        game.resolve_pending()
                     else:
                         game.log.append("その駒は凍結されていません。自分の凍結駒を選択してください。")
                 else:
@@ -6570,7 +6862,7 @@ def handle_mouse_click(pos):
                             applied = game.apply_freeze_piece(engine_piece, turns, target_color=getattr(engine_piece, 'color', None), source_color=game.pending.info.get('source_color'), source_card_name=game.pending.info.get('source_card_name'))
                             if not applied:
                                 game.log.append(f"鉄壁が効果を防ぎました。{engine_piece} の凍結は適用されませんでした。")
-                                game.pending = None
+                                game.resolve_pending()
                                 return
                         except Exception:
                             try:
@@ -6588,7 +6880,7 @@ def handle_mouse_click(pos):
                             applied = game.apply_freeze_piece(clicked, turns, target_color=getattr(clicked, 'color', None) if hasattr(clicked, 'color') else (clicked.get('color') if isinstance(clicked, dict) else None), source_color=game.pending.info.get('source_color'), source_card_name=game.pending.info.get('source_card_name'))
                             if not applied:
                                 game.log.append(f"鉄壁が効果を防ぎました。{clicked} の凍結は適用されませんでした。")
-                                game.pending = None
+                                game.resolve_pending()
                                 return
                         except Exception:
                             try:
@@ -6623,7 +6915,7 @@ def handle_mouse_click(pos):
                             play_ic_gif_at(int(tr), int(tc))
                     except Exception:
                         pass
-                    game.pending = None
+                    game.resolve_pending()
                 else:
                     game.log.append("相手の駒を選んでください。")
                 return
@@ -6921,6 +7213,233 @@ def handle_mouse_click(pos):
         return
 
 
+# --- 差分描画（dirty rect） ---
+# 変化のあった領域だけを再描画・転送する。CCB_DIRTY_RENDER=0 で従来の全画面描画に戻す。
+DIRTY_RENDER = os.environ.get('CCB_DIRTY_RENDER', '1') != '0'
+frame_renderer = DirtyRenderer()
+
+
+def _frame_regions(layout):
+    """描画レイヤー（名前付き領域）を layout から求める"""
+    bl, bt, bs = layout['board_left'], layout['board_top'], layout['board_size']
+    hand_top = max(0, layout['card_area_top'] - int(20 * layout.get('scale', 1.0)))
+    return {
+        'info': (0, 0, bl, hand_top),
+        'board': (bl, bt, bs, bs),
+        'log': (layout['central_right'], 0, max(0, W - layout['central_right']), hand_top),
+        'hand': (0, hand_top, W, max(0, H - hand_top)),
+    }
+
+
+def _frame_signature():
+    """描画内容に影響する状態をまとめたタプル。変化すれば全体を再描画する。"""
+    try:
+        g = game
+        p = g.player
+        pend = g.pending
+        ai = ai_player
+        return (
+            id(g), g.turn, g.turn_active, p.pp_current, p.pp_max,
+            len(p.deck.cards), len(p.graveyard), tuple(id(c) for c in p.hand.cards),
+            getattr(g.log, 'next_seq', len(g.log)),
+            (pend.kind, len(pend.info.get('selected') or ())) if pend is not None else None,
+            g.player_consecutive_turns, g.ai_consecutive_turns, p.next_move_can_jump,
+            getattr(p, 'iron_wall_active', False), getattr(g, 'ai_iron_wall_active', False),
+            tuple(g.statuses.now(c) for c in ('white', 'black', None)), len(g.statuses),
+            (len(ai.hand.cards), ai.pp_current, len(ai.graveyard)) if ai is not None else None,
+            tuple((q.row, q.col, q.name, q.color) for q in chess.pieces),
+            chess.promotion_pending is not None,
+            chess_current_turn, cpu_wait, game_over, game_over_winner,
+            id(selected_piece) if selected_piece is not None else None, tuple(highlight_squares or ()),
+            enlarged_card_index, enlarged_card_name, log_scroll_offset,
+            show_log, show_grave, show_opponent_hand,
+        )
+    except Exception:
+        # 取得できない場合は毎フレーム全体を再描画（安全側）
+        return object()
+
+
+def _frame_animated_rects(layout):
+    """時間で変化する描画（GIF・テロップ・思考中表示）の領域。None は全画面。"""
+    now = _ct_time.time()
+    if (turn_telop_msg and now < turn_telop_until) or (notice_msg and now < notice_until):
+        return None
+    bl, bt, bs = layout['board_left'], layout['board_top'], layout['board_size']
+    board = (bl, bt, bs, bs)
+    rects = []
+    if heat_gif_anim.get('playing') or ic_gif_anim.get('playing'):
+        rects.append(board)
+    elif cpu_wait and THINKING_ENABLED:
+        rects.append(board)
+    else:
+        # 封鎖タイルのループGIFはそのマスだけ
+        sq = bs // 8
+        for (br, bc) in getattr(game, 'blocked_tiles', {}):
+            rects.append((bl + bc * sq, bt + br * sq, sq, sq))
+    return rects
+
+
+def _ui_is_animating():
+    """時間で画面が変わる要素（GIF・テロップ・思考中・先読み等）があれば True。"""
+    now = _ct_time.time()
+    try:
+        return bool(
+            cpu_wait
+            or heat_gif_anim.get('playing') or ic_gif_anim.get('playing')
+            or (turn_telop_msg and now < turn_telop_until)
+            or (notice_msg and now < notice_until)
+            or getattr(game, 'blocked_tiles', None)
+            or dragging_scrollbar
+            or profiler.enabled
+            or not asset_preloader.done()
+        )
+    except Exception:
+        return True
+
+
+def _draw_frame():
+    draw_panel()
+    # draw_panel 内の最後の区間以降（モーダル類のオーバーレイ）
+    profiler.lap('draw.overlays')
+    profiler.draw_overlay(screen, TINY)
+
+
+def render_frame():
+    """draw_panel の結果を画面へ反映する。変化がなければ描画も転送もしない。"""
+    if not DIRTY_RENDER:
+        _draw_frame()
+        pygame.display.flip()
+        profiler.lap('present')
+        return
+    layout = compute_layout(W, H)
+    frame_renderer.set_regions((W, H), _frame_regions(layout))
+    frame_renderer.track(_frame_signature())
+    animated = _frame_animated_rects(layout)
+    if profiler.enabled and animated is not None:
+        # オーバーレイは毎フレーム更新する
+        animated.append(profiler.overlay_rect(TINY))
+    frame_renderer.animate(animated)
+    frame_renderer.render(screen, _draw_frame)
+    profiler.lap('present')
+
+
+# --- AI の非同期思考 ---
+# 指し手探索はワーカースレッドで行い、UI（思考中表示など）は動かし続ける。CCB_AI_THREAD=0 で従来の同期実行。
+AI_WORKER_ENABLED = os.environ.get('CCB_AI_THREAD', '1') != '0'
+ai_worker = AIWorker()
+# プレイヤーの手番中の先読み。CCB_AI_PONDER=0 で無効（キャッシュは空のまま＝従来どおり毎回探索）。
+AI_PONDER_ENABLED = os.environ.get('CCB_AI_PONDER', '1') != '0'
+ai_move_cache = MoveCache(maxsize=256)
+ai_ponderer = Ponderer(ai_move_cache)
+
+
+def _ai_position_key():
+    """探索開始時と結果適用時で盤面が同じかを確かめるためのキー。"""
+    return tuple((id(q), q.row, q.col, q.name, q.color) for q in chess.pieces)
+
+
+def _on_ai_result(event):
+    """ワーカーから届いた AI の候補集合（盤面コピー上）から、メインスレッドで指し手を選んで適用する。"""
+    if game_over or not cpu_wait:
+        return
+    if event.error is not None or event.key != _ai_position_key():
+        # 思考中に盤面が変わった／探索で例外 → 現在の盤面で選び直す
+        sel = ai_choose_move()
+    else:
+        # コピーの駒を実盤面の駒に戻す（並び順はコピー元と同じなので、乱数で選ぶ手は同期実行と一致する）
+        pool = [(chess.get_piece_at(q.row, q.col), mv) for q, mv in event.result]
+        sel = game.rng.choice(pool) if pool else None
+    with profiler.span('ai'):
+        ai_apply_choice(sel)
+    _after_ai_move()
+
+
+def _after_ai_move():
+    """AI の指し手適用後の処理: 迅雷の追加手番があれば次の思考を予約し、無ければプレイヤーへ手番を戻す。"""
+    global cpu_wait, cpu_wait_start, chess_current_turn, turn_telop_msg, turn_telop_until
+    # After AI move, check if AI has extra consecutive turns (迅雷)
+    # Determine AI extra-turns (迅雷) robustly: prefer the global
+    # counter if present, otherwise fall back to a game attribute.
+    try:
+        a_cct = globals().get('ai_consecutive_turns', None)
+        if a_cct is None:
+            a_cct = getattr(game, 'ai_consecutive_turns', 0)
+    except Exception:
+        a_cct = 0
+
+    if a_cct and a_cct > 0:
+        # consume one AI extra-turn and schedule another AI think cycle
+        try:
+            if 'ai_consecutive_turns' in globals():
+                globals()['ai_consecutive_turns'] = max(0, globals().get('ai_consecutive_turns', 0) - 1)
+            else:
+                # fall back to mutating game attribute when global not used
+                game.ai_consecutive_turns = max(0, a_cct - 1)
+        except Exception:
+            try:
+                setattr(game, 'ai_consecutive_turns', max(0, a_cct-1))
+            except Exception:
+                pass
+        # keep AI's turn so it moves again
+        chess_current_turn = 'black'
+        # Mark that the next AI move is a continuation of the '迅雷' extra-turn
+        # so that start-of-turn effects (draw/PP reset) are skipped.
+        try:
+            globals()['ai_continuation'] = True
+        except Exception:
+            pass
+        # schedule next AI move after the think delay
+        cpu_wait = True
+        cpu_wait_start = _ct_time.time()
+    else:
+        # no extra AI turns -> restore player turn
+        cpu_wait = False
+        chess_current_turn = 'white'
+        # プレイヤーターン開始テロップを1秒表示
+        try:
+            turn_telop_msg = "YOUR TURN"
+            turn_telop_until = _ct_time.time() + 1.0
+        except Exception:
+            pass
+        # Apply decay for time-limited card effects now that the opponent's turn finished.
+        # We pass the ended color ('black' here) so only statuses that apply to that
+        # color are decremented. This prevents freezes applied to white by the AI
+        # from being decremented immediately when the AI finishes its move.
+        try:
+            game.decay_statuses('black')
+        except Exception:
+            pass
+
+        # 自動ターン開始（2ターン目以降）
+        # プレイヤーが既に1ターン以上開始している場合、AIの手が終わったら
+        # 自動でプレイヤーのターン開始とドローを行います（Tキー不要）。
+        try:
+            # game.turn は start_turn() が呼ばれると 1,2,... と増えるため
+            # ここでは既にプレイヤーが1ターン以上開始している場合のみ自動開始する。
+            # auto-start if either the player already had at least one
+            # started turn OR a caller requested forcing the start after AI
+            should_auto = getattr(game, 'turn', 0) >= 1 or getattr(game, '_force_start_player_after_ai', False)
+            if should_auto:
+                # pending がある、または既に turn_active の場合は自動開始しない
+                if getattr(game, 'pending', None) is None and not getattr(game, 'turn_active', False):
+                    try:
+                        start_player_turn("AI終了: 自動でターン開始と1枚ドローを行いました。")
+                    except Exception:
+                        pass
+                # Clear the force-start flag so it doesn't persist
+                try:
+                    if getattr(game, '_force_start_player_after_ai', False):
+                        delattr(game, '_force_start_player_after_ai')
+                except Exception:
+                    try:
+                        if '_force_start_player_after_ai' in game.__dict__:
+                            del game.__dict__['_force_start_player_after_ai']
+                    except Exception:
+                        pass
+        except Exception:
+            pass
+
+
 def main_loop():
     global log_scroll_offset, cpu_wait, cpu_wait_start, chess_current_turn, game_over, game_over_winner
     # スクロール関連の初期化（ローカル扱いによるUnboundLocalErrorを防止）
@@ -6946,9 +7465,25 @@ def main_loop():
             pass
     except Exception:
         pass
+    # スタート画面を経由しない起動でも先読みを開始（開始済みなら何もしない）
+    start_asset_preload()
 
     while True:
-        for event in pygame.event.get():
+        profiler.next_frame()
+        # 残っている先読み結果を少しずつ取り込む（1 フレーム数 ms まで）
+        with profiler.span('asset'):
+            asset_preloader.poll()
+        for event in frame_scheduler.get():
+            if event.type == ai_worker.event_type:
+                if ai_worker.accept(event):
+                    _on_ai_result(event)
+                frame_renderer.invalidate()
+                continue
+            # クリック・キー入力は画面のどこでも変えうるので全体を再描画対象に
+            if event.type == pygame.MOUSEWHEEL:
+                frame_renderer.invalidate('log')
+            elif event.type != pygame.MOUSEMOTION:
+                frame_renderer.invalidate()
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit(0)
@@ -6960,6 +7495,7 @@ def main_loop():
                     global W, H, screen
                     W, H = max(200, event.w), max(200, event.h)
                     screen = pygame.display.set_mode((W, H), pygame.RESIZABLE)
+                    invalidate_background_cache()
                 except Exception:
                     # If resizing fails for any reason, ignore and continue with previous size
                     pass
@@ -7257,7 +7793,6 @@ def main_loop():
         if getattr(game, 'pending', None) is not None:
             # ハンです☆: 相手の手札をランダムで墓地に送る
             if game.pending.kind == 'discard_opponent_hand':
-                import random
                 # Check for iron wall on the target (ai_player) which blocks one incoming effect
                 try:
                     source_color = game.pending.info.get('source_color') if game.pending and isinstance(game.pending.info, dict) else None
@@ -7269,20 +7804,20 @@ def main_loop():
                     if getattr(ai_player, 'iron_wall_active', False) and source_color != 'black':
                         ai_player.iron_wall_active = False
                         game.log.append("『鉄壁』が効果を防いだ（相手の『ハンです☆』）。")
-                        game.pending = None
+                        game.resolve_pending()
                     else:
                         if ai_player.hand.cards:
-                            idx = random.randrange(len(ai_player.hand.cards))
+                            idx = game.rng.randrange(len(ai_player.hand.cards))
                             discarded_card = ai_player.hand.cards[idx]
                             ai_player.hand.remove_at(idx)
                             ai_player.graveyard.append(discarded_card)
                             game.log.append(f"『ハンです☆』: 相手の手札から『{discarded_card.name}』をランダムで墓地に送りました。")
                         else:
                             game.log.append("『ハンです☆』: 相手の手札が空です。")
-                        game.pending = None
+                        game.resolve_pending()
                 except Exception:
                     # on error, clear pending to avoid locking UI
-                    game.pending = None
+                    game.resolve_pending()
             
             # 命がけのギャンブル: ルーク・キング以外の駒をクイーンに変える
             elif game.pending.kind == 'gamble_promote':
@@ -7305,7 +7840,7 @@ def main_loop():
                         # Only consume iron_wall if the effect is incoming (origin color != target color)
                         target_player.iron_wall_active = False
                         game.log.append("『鉄壁』が効果を防いだ（命がけのギャンブル）。")
-                        game.pending = None
+                        game.resolve_pending()
                         # Skip promotion processing
                         promoted_count = 0
                     else:
@@ -7354,7 +7889,7 @@ def main_loop():
                         traceback.print_exc()
                     except Exception:
                         print(f'DEBUG: exception during gamble_promote overall handling: {e}')
-                    game.pending = None
+                    game.resolve_pending()
                 # end of promotion loop / iron_wall handling
 
                 if success:
@@ -7380,10 +7915,10 @@ def main_loop():
                             pass
                         game.log.append("自ターンをスキップします。")
 
-                game.pending = None
+                game.resolve_pending()
 
-        draw_panel()
-        pygame.display.flip()
+        profiler.lap('events')
+        render_frame()
 
         # Non-blocking AI wait handling (ゲーム終了時は無効化)
         if cpu_wait and THINKING_ENABLED and not game_over:
@@ -7395,91 +7930,31 @@ def main_loop():
                 # reset timer so AI wait restarts after promotion is handled
                 cpu_wait_start = time.time()
             elif time.time() - cpu_wait_start >= AI_THINK_DELAY:
-                # call AI move
-                ai_make_move()
-                # After AI move, check if AI has extra consecutive turns (迅雷)
-                # Determine AI extra-turns (迅雷) robustly: prefer the global
-                # counter if present, otherwise fall back to a game attribute.
-                try:
-                    a_cct = globals().get('ai_consecutive_turns', None)
-                    if a_cct is None:
-                        a_cct = getattr(game, 'ai_consecutive_turns', 0)
-                except Exception:
-                    a_cct = 0
-
-                if a_cct and a_cct > 0:
-                    # consume one AI extra-turn and schedule another AI think cycle
-                    try:
-                        if 'ai_consecutive_turns' in globals():
-                            globals()['ai_consecutive_turns'] = max(0, globals().get('ai_consecutive_turns', 0) - 1)
-                        else:
-                            # fall back to mutating game attribute when global not used
-                            game.ai_consecutive_turns = max(0, a_cct - 1)
-                    except Exception:
-                        try:
-                            setattr(game, 'ai_consecutive_turns', max(0, a_cct-1))
-                        except Exception:
-                            pass
-                    # keep AI's turn so it moves again
-                    chess_current_turn = 'black'
-                    # Mark that the next AI move is a continuation of the '迅雷' extra-turn
-                    # so that start-of-turn effects (draw/PP reset) are skipped.
-                    try:
-                        globals()['ai_continuation'] = True
-                    except Exception:
-                        pass
-                    # schedule next AI move after the think delay
-                    cpu_wait = True
-                    cpu_wait_start = time.time()
-                else:
-                    # no extra AI turns -> restore player turn
-                    cpu_wait = False
-                    chess_current_turn = 'white'
-                    # プレイヤーターン開始テロップを1秒表示
-                    try:
-                        turn_telop_msg = "YOUR TURN"
-                        turn_telop_until = _ct_time.time() + 1.0
-                    except Exception:
-                        pass
-                    # Apply decay for time-limited card effects now that the opponent's turn finished.
-                    # We pass the ended color ('black' here) so only statuses that apply to that
-                    # color are decremented. This prevents freezes applied to white by the AI
-                    # from being decremented immediately when the AI finishes its move.
-                    try:
-                        game.decay_statuses('black')
-                    except Exception:
-                        pass
-
-                    # 自動ターン開始（2ターン目以降）
-                    # プレイヤーが既に1ターン以上開始している場合、AIの手が終わったら
-                    # 自動でプレイヤーのターン開始とドローを行います（Tキー不要）。
-                    try:
-                        # game.turn は start_turn() が呼ばれると 1,2,... と増えるため
-                        # ここでは既にプレイヤーが1ターン以上開始している場合のみ自動開始する。
-                        # auto-start if either the player already had at least one
-                        # started turn OR a caller requested forcing the start after AI
-                        should_auto = getattr(game, 'turn', 0) >= 1 or getattr(game, '_force_start_player_after_ai', False)
-                        if should_auto:
-                            # pending がある、または既に turn_active の場合は自動開始しない
-                            if getattr(game, 'pending', None) is None and not getattr(game, 'turn_active', False):
-                                try:
-                                    start_player_turn("AI終了: 自動でターン開始と1枚ドローを行いました。")
-                                except Exception:
-                                    pass
-                            # Clear the force-start flag so it doesn't persist
-                            try:
-                                if getattr(game, '_force_start_player_after_ai', False):
-                                    delattr(game, '_force_start_player_after_ai')
-                            except Exception:
-                                try:
-                                    if '_force_start_player_after_ai' in game.__dict__:
-                                        del game.__dict__['_force_start_player_after_ai']
-                                except Exception:
-                                    pass
-                    except Exception:
-                        pass
+                # 先読みはここで打ち切る（求まった分はキャッシュに残る）
+                ai_ponderer.cancel()
+                if not AI_WORKER_ENABLED:
+                    ai_make_move()
+                    _after_ai_move()
+                elif not ai_worker.busy:
+                    # ターン開始・カード使用はここで行い、指し手の探索だけをワーカースレッドへ渡す。
+                    # 結果は ai_worker.event_type のイベントで届き、_on_ai_result が適用する。
+                    with profiler.span('ai'):
+                        ai_begin_turn()
+                        pool = _ai_cached_pool()
+                    if pool is not None:
+                        # 先読みが当たった: 探索せずにすぐ指す
+                        with profiler.span('ai'):
+                            ai_apply_choice(game.rng.choice(pool))
+                        _after_ai_move()
+                    else:
+                        # 探索は盤面のコピー上で行う（UI スレッドは描画で実盤面を読み続けるため）
+                        ai_worker.submit(ai_move_pool, _ai_snapshot_board(), key=_ai_position_key())
+        elif AI_PONDER_ENABLED and not cpu_wait and chess_current_turn == 'white' and not game_over:
+            ai_ponder()
 
-        clock.tick(60)
+        profiler.lap('logic')
+        # アニメーション中だけ 60fps、静止中は入力かタイムアウトまでブロック
+        frame_scheduler.wait(clock, 60, active=_ui_is_animating())
 
 
 if __name__ == "__main__":
@@ -7493,4 +7968,8 @@ if __name__ == "__main__":
             globals()['ai_player'] = build_ai_player(DECK_MODE)
     except Exception:
         pass
+    if _log_stream_game is None:
+        start_log_stream()
+    if replay_recorder is None:
+        start_replay_recording()
     main_loop()
\ No newline at end of file
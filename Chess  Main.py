@@ -18,6 +18,11 @@ import subprocess  # 追加
 import json        # 追加
 import time  # 追加
 import random
+import os
+try:
+    from .ai_ponder import MoveCache, Ponderer
+except Exception:
+    from ai_ponder import MoveCache, Ponderer
 
 pygame.init()
 
@@ -988,9 +993,7 @@ running = True  #ゲーム実行中
 
 TURN_CHANGE_EVENT = pygame.USEREVENT + 1  # カスタムイベント定義
 
-def ai_move(pieces):
-    # AI.pyをサブプロセスとして呼び出し、合法手を取得
-    ai_path = "AI.py"
+def _ai_input(pieces, difficulty=None):
     # piecesをdictリストに変換
     pieces_dict = []
     for p in pieces:
@@ -1007,11 +1010,18 @@ def ai_move(pieces):
         "black_in_check": black_in_check
     }
     # include difficulty so AI can adjust strength
-    try:
-        ai_input["difficulty"] = CPU_DIFFICULTY
-    except NameError:
-        # fallback default
-        ai_input["difficulty"] = 3
+    if difficulty is None:
+        try:
+            difficulty = CPU_DIFFICULTY
+        except NameError:
+            # fallback default
+            difficulty = 3
+    ai_input["difficulty"] = difficulty
+    return ai_input
+
+def _run_ai_process(ai_input):
+    # AI.pyをサブプロセスとして呼び出し、合法手を取得
+    ai_path = "AI.py"
     proc = subprocess.Popen(
         [sys.executable, ai_path],
         stdin=subprocess.PIPE,
@@ -1033,6 +1043,68 @@ def ai_move(pieces):
             return None
     return None
 
+# --- AI の先読み（ポンダリング） ---
+# プレイヤー（白）の手番中に、白の着手候補ごとの局面で AI.py を先に走らせて結果をキャッシュしておく。
+# AI.py の入力は駒配置と難易度だけなので、それをキーにすれば予測が当たった局面ではサブプロセスを待たずに指せる。
+# CCB_AI_PONDER=0 で無効。
+AI_PONDER_ENABLED = os.environ.get('CCB_AI_PONDER', '1') != '0'
+ai_move_cache = MoveCache(maxsize=256)
+ai_ponderer = Ponderer(ai_move_cache)
+
+def _ai_cache_key(pieces, difficulty=None):
+    if difficulty is None:
+        difficulty = CPU_DIFFICULTY
+    return (difficulty, tuple(sorted((p.row, p.col, p.name, p.color) for p in pieces)))
+
+def _ai_ponder_positions(snapshot, difficulty):
+    """白の合法手（駒を取る手が先）ごとに、その後の局面の AI.py の指し手を (キー, 指し手) で返す。"""
+    board = []
+    for row, col, name, color, has_moved in snapshot:
+        q = Piece(row, col, name, color)
+        q.has_moved = has_moved
+        board.append(q)
+    values = {'P': 1, 'N': 3, 'B': 3, 'R': 5, 'Q': 9, 'K': 100}
+    replies = []
+    for p in board:
+        if p.color != 'white':
+            continue
+        for move in p.get_valid_moves(board):
+            temp_pieces = []
+            captured = None
+            for q in board:
+                if q is p:
+                    temp_piece = Piece(move[0], move[1], p.name, p.color)
+                    temp_piece.has_moved = True
+                    temp_pieces.append(temp_piece)
+                elif q.row == move[0] and q.col == move[1]:
+                    captured = q  # 取られる駒は除外
+                else:
+                    temp_pieces.append(q)
+            if is_in_check(temp_pieces, 'white'):
+                continue
+            replies.append((-(values.get(captured.name, 0) if captured else 0), temp_pieces))
+    replies.sort(key=lambda r: r[0])
+    for _, temp_pieces in replies:
+        if not any(q.name == 'K' and q.color == 'black' for q in temp_pieces):
+            continue
+        move = _run_ai_process(_ai_input(temp_pieces, difficulty))
+        if move:
+            yield _ai_cache_key(temp_pieces, difficulty), move
+
+def ai_ponder(pieces):
+    """プレイヤーの手番中に毎フレーム呼ぶ。局面が変わっていれば先読みをやり直す。"""
+    key = _ai_cache_key(pieces)
+    if key != ai_ponderer.key:
+        snapshot = [(p.row, p.col, p.name, p.color, p.has_moved) for p in pieces]
+        ai_ponderer.start(_ai_ponder_positions, snapshot, CPU_DIFFICULTY, key=key)
+
+def ai_move(pieces):
+    # 先読み済みの局面ならサブプロセスを起動せずに返す
+    cached = ai_move_cache.get(_ai_cache_key(pieces))
+    if cached is not None:
+        return dict(cached)
+    return _run_ai_process(_ai_input(pieces))
+
 def cpu_make_move(
     pieces,
     get_piece_at,
@@ -1595,6 +1667,8 @@ while running:
         if 'cpu_wait' in globals() and cpu_wait:
             # プレイヤー操作後に設定された待機時間を待つ
             if time.time() - cpu_wait_start >= AI_THINK_DELAY:
+                # 先読みはここで打ち切る（求まった局面はキャッシュに残る）
+                ai_ponderer.cancel()
                 # cpu_make_move関数を呼んでAIの手を反映
                 cpu_make_move(
                     pieces,
@@ -1632,6 +1706,9 @@ while running:
                     # ターン切り替え時にイベントを発火（50ms後に処理）
                     pygame.time.set_timer(TURN_CHANGE_EVENT, 50, loops=1)
             continue
+    elif AI_PONDER_ENABLED and current_turn == 'white' and not game_over:
+        # プレイヤーの考慮中に AI の応手を先読みしておく
+        ai_ponder(pieces)
 
 pygame.quit()
 sys.exit()
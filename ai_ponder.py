@@ -0,0 +1,142 @@
+"""
+Pondering: speculative AI search on the opponent's time, and the move cache it fills.
+
+While the human is deciding, the AI would otherwise sit idle until its own
+turn starts. A Ponderer runs a *job* on a daemon thread during that time: a
+generator that walks the likely human replies and yields ``(key, result)``
+pairs, most likely first. Every pair goes straight into a MoveCache, so
+positions searched before the human commits are available even if the job is
+cancelled half-way::
+
+    ponderer.start(ponder_positions, snapshot, key=root_key)   # human's turn
+    ...
+    ponderer.cancel()                                          # AI's turn
+    hit = cache.get(position_key(board))
+    move = hit if hit is not None else search(board)
+
+The job must only read its own copy of the board (the snapshot); the cache
+key must cover everything the search result depends on, so a stale entry can
+never match a different position. ``key`` passed to ``start`` identifies the
+root position being pondered; starting the same root again is a no-op.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional, Tuple
+import queue
+import threading
+
+
+class MoveCache:
+    """Thread-safe LRU map from position key to search result."""
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class Ponderer:
+    def __init__(self, cache: MoveCache, name: str = 'ai-ponder') -> None:
+        self.cache = cache
+        self.name = name
+        self.key: Any = None
+        self.positions = 0
+        self.last_error: Optional[BaseException] = None
+        self._jobs: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """A job has been started and has neither finished nor been cancelled."""
+        return not self._idle.is_set() and not self._stop.is_set()
+
+    def start(self, job: Callable[..., Iterable[Tuple[Hashable, Any]]], *args: Any, key: Any = None) -> bool:
+        """Ponder `job(*args)` in the background; returns False if `key` is already being pondered."""
+        if key is not None and key == self.key:
+            return False
+        self.cancel()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        self.key = key
+        self._stop = threading.Event()
+        with self._lock:
+            self._pending += 1
+            self._idle.clear()
+        self._jobs.put((self._stop, job, args))
+        return True
+
+    def cancel(self) -> None:
+        """Stop the running job after its current position; results so far stay cached."""
+        self._stop.set()
+        self.key = None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the worker is idle (tests / shutdown)."""
+        return self._idle.wait(timeout)
+
+    def shutdown(self) -> None:
+        self.cancel()
+        if self._thread is not None:
+            self._jobs.put(None)
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                return
+            stop, job, args = item
+            try:
+                if not stop.is_set():
+                    for key, result in job(*args):
+                        if stop.is_set():
+                            break
+                        self.cache.put(key, result)
+                        self.positions += 1
+            except Exception as exc:
+                # pondering is best effort: the normal search still runs on a miss
+                self.last_error = exc
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                    if self._pending == 0:
+                        self._idle.set()
+
+
+__all__ = ["MoveCache", "Ponderer"]
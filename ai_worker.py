@@ -0,0 +1,102 @@
+"""
+Background thread for AI move search with results delivered as pygame events.
+
+The UI used to call the AI synchronously from the main loop, so a slow
+search froze the window. AIWorker runs one job at a time on a daemon thread
+and posts the outcome back with ``pygame.event.post`` (thread-safe), where
+the main loop picks it up like any other event::
+
+    worker.submit(choose_move, key=position_key)
+    ...
+    for ev in events:
+        if ev.type == worker.event_type and worker.accept(ev):
+            apply(ev.result)
+
+Each job carries the worker's generation number; ``cancel()`` (e.g. on game
+restart) bumps the generation so late results of abandoned jobs are dropped,
+both before posting and in ``accept()``. The search itself must not mutate
+shared state; the caller keeps the board unchanged while ``busy`` and can
+compare ``ev.key`` against the current position before applying.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Optional
+import itertools
+import queue
+import threading
+
+import pygame
+
+
+class AIWorker:
+    def __init__(self, event_type: Optional[int] = None, post: Optional[Callable[[Any], Any]] = None) -> None:
+        self.event_type = event_type if event_type is not None else pygame.event.custom_type()
+        self._post = post or pygame.event.post
+        self._jobs: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._current: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def busy(self) -> bool:
+        """A job of the current generation has been submitted and not yet accepted."""
+        return self._current is not None
+
+    def submit(self, fn: Callable[..., Any], *args: Any, key: Any = None) -> int:
+        """Run fn(*args) on the worker thread; returns the job id."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='ai-worker', daemon=True)
+            self._thread.start()
+        with self._lock:
+            job_id = next(self._ids)
+            self._current = job_id
+            self._jobs.put((job_id, self._generation, fn, args, key))
+        return job_id
+
+    def cancel(self) -> None:
+        """Abandon the running/queued job; its result will never be accepted."""
+        with self._lock:
+            self._generation += 1
+            self._current = None
+
+    def accept(self, event: Any) -> bool:
+        """True if `event` is the result of the current job (and marks the worker idle)."""
+        if getattr(event, 'type', None) != self.event_type:
+            return False
+        with self._lock:
+            if event.generation != self._generation or event.job != self._current:
+                return False
+            self._current = None
+        return True
+
+    def shutdown(self) -> None:
+        self.cancel()
+        if self._thread is not None:
+            self._jobs.put(None)
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                return
+            job_id, generation, fn, args, key = item
+            if generation != self._generation:
+                continue
+            try:
+                result, error = fn(*args), None
+            except Exception as exc:
+                result, error = None, exc
+            if generation != self._generation:
+                continue
+            try:
+                self._post(pygame.event.Event(self.event_type, job=job_id, generation=generation,
+                                              result=result, error=error, key=key))
+            except pygame.error:
+                # display/event system shut down while we were thinking
+                return
+
+
+__all__ = ["AIWorker"]
@@ -0,0 +1,680 @@
+"""
+Asset manifest and texture atlases for card and piece images.
+
+Looking up an image used to probe several filename extensions with
+os.path.exists and then os.walk the whole images/ folder on every cache miss,
+and piece images were loaded one file at a time. This module resolves names
+through a manifest (name -> file, built with one directory walk or loaded
+from images/atlas/manifest.json) and packs each image group into one texture
+atlas per requested size, so a resize scales a whole group at once and
+lookups never touch the filesystem.
+
+Groups:
+- 'pieces': Chess_{k,q,r,b,n,p}_{white,black}
+- 'cards':  images whose name is a known card name (passed by the caller)
+
+Other names are still served through the manifest, one cached surface per
+(name, size).
+
+AssetPreloader decodes images and GIF frames on worker threads into raw RGBA
+buffers; the main thread turns them into surfaces (convert_alpha) a few at a
+time via poll(), so the start screen can show progress while loading.
+
+SpriteAnimation keeps all frames of an effect animation in one sheet surface
+with a timing table; playback blits a sub-rect of a copy pre-scaled to the
+board square size instead of smoothscaling a full-size frame every draw.
+
+Offline build (optional, speeds up startup to two image loads):
+    python asset_pipeline.py build [--img-dir images]
+writes images/atlas/manifest.json plus a packed source sheet and rect table
+per group (cards.png/.json, pieces.png/.json), and converts each top-level
+GIF into a sprite sheet plus timing file (<gif stem>.png/.json).
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import argparse
+import bisect
+import itertools
+import json
+import os
+import queue
+import re
+import time
+
+try:
+    import pygame
+except Exception:  # the manifest and packer work without pygame
+    pygame = None
+
+
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp')
+PIECE_RE = re.compile(r'^Chess_([kqrbnp])_(white|black)$')
+ATLAS_DIRNAME = 'atlas'
+MANIFEST_FILENAME = 'manifest.json'
+# scaled atlases kept per group (one per window-dependent size)
+MAX_SIZES_PER_GROUP = 6
+# scaled copies kept for images outside any group
+MAX_SINGLE_IMAGES = 64
+
+Size = Tuple[int, int]
+
+
+# -----------------------------
+# Manifest
+# -----------------------------
+
+def build_manifest(img_dir: str) -> Dict[str, str]:
+    """Map image name (file stem) -> path relative to `img_dir`.
+
+    Files directly in `img_dir` win over files in subfolders; a lower-case
+    alias is added for case-insensitive lookups. The atlas output folder is
+    skipped.
+    """
+    manifest: Dict[str, str] = {}
+    lower: Dict[str, str] = {}
+    if not os.path.isdir(img_dir):
+        return manifest
+    for root, dirs, files in os.walk(img_dir):
+        dirs[:] = sorted(d for d in dirs if d != ATLAS_DIRNAME)
+        for f in sorted(files):
+            stem, ext = os.path.splitext(f)
+            if ext.lower() not in IMAGE_EXTS:
+                continue
+            rel = os.path.relpath(os.path.join(root, f), img_dir).replace(os.sep, '/')
+            manifest.setdefault(stem, rel)
+            lower.setdefault(stem.lower(), rel)
+    for k, v in lower.items():
+        manifest.setdefault(k, v)
+    return manifest
+
+
+def load_manifest(img_dir: str) -> Dict[str, str]:
+    """Manifest from images/atlas/manifest.json, or built by walking `img_dir`."""
+    path = os.path.join(img_dir, ATLAS_DIRNAME, MANIFEST_FILENAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and isinstance(data.get('images'), dict):
+            return dict(data['images'])
+    except (OSError, ValueError):
+        pass
+    return build_manifest(img_dir)
+
+
+def piece_key(name: str, color: str) -> str:
+    return f"Chess_{name.lower()}_{color}"
+
+
+# -----------------------------
+# Packing
+# -----------------------------
+
+def pack_rects(sizes: Dict[str, Size], max_width: int = 2048, padding: int = 1) -> Tuple[Dict[str, Tuple[int, int, int, int]], Size]:
+    """Shelf-pack rectangles; returns ({name: (x, y, w, h)}, (sheet_w, sheet_h)).
+
+    Items are placed tallest first, left to right, starting a new shelf when
+    the row would exceed `max_width`.
+    """
+    order = sorted(sizes, key=lambda n: (-sizes[n][1], -sizes[n][0], n))
+    rects: Dict[str, Tuple[int, int, int, int]] = {}
+    x = y = shelf_h = sheet_w = 0
+    for name in order:
+        w, h = sizes[name]
+        if x > 0 and x + w > max_width:
+            y += shelf_h + padding
+            x = shelf_h = 0
+        rects[name] = (x, y, w, h)
+        x += w + padding
+        shelf_h = max(shelf_h, h)
+        sheet_w = max(sheet_w, x - padding)
+    return rects, (max(1, sheet_w), max(1, y + shelf_h))
+
+
+class TextureAtlas:
+    """One sheet surface plus named sub-rects; get() returns subsurfaces."""
+
+    def __init__(self, sheet, rects: Dict[str, Tuple[int, int, int, int]]) -> None:
+        self.sheet = sheet
+        self.rects = rects
+        self._subs: Dict[str, object] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.rects
+
+    def get(self, name: str):
+        sub = self._subs.get(name)
+        if sub is None and name in self.rects:
+            sub = self._subs[name] = self.sheet.subsurface(pygame.Rect(self.rects[name]))
+        return sub
+
+    @classmethod
+    def build(cls, images: Dict[str, object], size: Optional[Size] = None, max_width: int = 2048) -> "TextureAtlas":
+        """Pack `images` (optionally all smoothscaled to `size`) into one sheet."""
+        scaled = {}
+        for name, surf in images.items():
+            if size is not None and surf.get_size() != tuple(size):
+                surf = pygame.transform.smoothscale(surf, tuple(size))
+            scaled[name] = surf
+        rects, sheet_size = pack_rects({n: s.get_size() for n, s in scaled.items()}, max_width)
+        sheet = pygame.Surface(sheet_size, pygame.SRCALPHA)
+        for name, surf in scaled.items():
+            sheet.blit(surf, rects[name][:2])
+        return cls(sheet, rects)
+
+    def save(self, png_path: str) -> None:
+        pygame.image.save(self.sheet, png_path)
+        with open(os.path.splitext(png_path)[0] + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'rects': self.rects}, f, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def load(cls, png_path: str) -> Optional["TextureAtlas"]:
+        try:
+            with open(os.path.splitext(png_path)[0] + '.json', 'r', encoding='utf-8') as f:
+                rects = {k: tuple(v) for k, v in json.load(f)['rects'].items()}
+            sheet = pygame.image.load(png_path)
+            try:
+                sheet = sheet.convert_alpha()
+            except Exception:
+                pass
+            return cls(sheet, rects)
+        except (OSError, ValueError, KeyError, pygame.error):
+            return None
+
+
+# -----------------------------
+# Runtime library
+# -----------------------------
+
+class AssetLibrary:
+    """Resolves card/piece images through the manifest and per-size atlases."""
+
+    def __init__(self, img_dir: str, card_names: Iterable[str] = ()) -> None:
+        self.img_dir = img_dir
+        self.manifest = load_manifest(img_dir)
+        self.groups: Dict[str, List[str]] = {
+            'pieces': sorted(k for k in self.manifest if PIECE_RE.match(k)),
+            'cards': sorted({n for n in card_names if n in self.manifest}),
+        }
+        self._group_of = {n: g for g, names in self.groups.items() for n in names}
+        self._sources: Dict[str, object] = {}
+        self._atlases: Dict[str, "OrderedDict[Size, TextureAtlas]"] = {g: OrderedDict() for g in self.groups}
+        self._singles: "OrderedDict[Tuple[str, Size], object]" = OrderedDict()
+        # optional name -> surface hook (e.g. an AssetPreloader result) tried before disk
+        self.prefetched: Optional[Callable[[str], Any]] = None
+
+    def path_for(self, name: str) -> Optional[str]:
+        rel = self.manifest.get(name) or self.manifest.get(name.lower())
+        return os.path.join(self.img_dir, rel) if rel else None
+
+    # ---- sources ----
+    def _load_group_sources(self, group: str) -> None:
+        names = [n for n in self.groups[group] if n not in self._sources]
+        if not names:
+            return
+        packed = TextureAtlas.load(os.path.join(self.img_dir, ATLAS_DIRNAME, f"{group}.png"))
+        for n in names:
+            if packed is not None and n in packed:
+                self._sources[n] = packed.get(n)
+            else:
+                self._sources[n] = self._load_file(n)
+
+    def _load_file(self, name: str):
+        if self.prefetched is not None:
+            surf = self.prefetched(name)
+            if surf is not None:
+                return surf
+        path = self.path_for(name)
+        if path is None:
+            return None
+        try:
+            img = pygame.image.load(path)
+            try:
+                img = img.convert_alpha()
+            except Exception:
+                pass
+            return img
+        except Exception:
+            return None
+
+    def source(self, name: str):
+        """Full-resolution surface for `name` (loaded once), or None."""
+        if name not in self._sources:
+            group = self._group_of.get(name)
+            if group is not None:
+                self._load_group_sources(group)
+            else:
+                self._sources[name] = self._load_file(name)
+        return self._sources.get(name)
+
+    def put_source(self, name: str, surf) -> None:
+        """Adopt a surface decoded elsewhere (see AssetPreloader) as `name`'s source."""
+        self._sources.setdefault(name, surf)
+
+    def pending_sources(self) -> Dict[str, str]:
+        """name -> file path for grouped images whose source is not loaded yet."""
+        out = {}
+        for names in self.groups.values():
+            for n in names:
+                path = self.path_for(n)
+                if n not in self._sources and path is not None:
+                    out[n] = path
+        return out
+
+    def preload(self) -> None:
+        """Load every grouped source image now (e.g. behind the start screen)."""
+        for group in self.groups:
+            self._load_group_sources(group)
+
+    # ---- scaled lookups ----
+    def atlas(self, group: str, size: Size) -> TextureAtlas:
+        size = (int(size[0]), int(size[1]))
+        cache = self._atlases[group]
+        atlas = cache.get(size)
+        if atlas is not None:
+            cache.move_to_end(size)
+            return atlas
+        self._load_group_sources(group)
+        images = {n: self._sources[n] for n in self.groups[group] if self._sources.get(n) is not None}
+        atlas = cache[size] = TextureAtlas.build(images, size)
+        if len(cache) > MAX_SIZES_PER_GROUP:
+            cache.popitem(last=False)
+        return atlas
+
+    def image(self, name: str, size: Size):
+        """`name` scaled to `size`, from its group's atlas when it has one; None if missing."""
+        group = self._group_of.get(name)
+        if group is None:
+            name = name if name in self.manifest else name.lower()
+            group = self._group_of.get(name)
+        if group is not None:
+            return self.atlas(group, size).get(name)
+        key = (name, (int(size[0]), int(size[1])))
+        if key in self._singles:
+            self._singles.move_to_end(key)
+            return self._singles[key]
+        src = self.source(name) if name in self.manifest else None
+        surf = self._singles[key] = pygame.transform.smoothscale(src, key[1]) if src is not None else None
+        if len(self._singles) > MAX_SINGLE_IMAGES:
+            self._singles.popitem(last=False)
+        return surf
+
+    def card(self, name: str, size: Size):
+        return self.image(name, size)
+
+    def piece(self, name: str, color: str, size: Size):
+        return self.image(piece_key(name, color), size)
+
+
+# -----------------------------
+# Sprite-sheet animations
+# -----------------------------
+
+# scaled copies kept per animation (board square size changes only on resize)
+MAX_SCALED_ANIMATIONS = 4
+
+
+def _load_sheet(png_path: str):
+    sheet = pygame.image.load(png_path)
+    try:
+        sheet = sheet.convert_alpha()
+    except pygame.error:
+        pass
+    return sheet
+
+
+def sprite_sheet_path(img_dir: str, gif_path: str) -> str:
+    """Where the offline converter puts the sprite sheet for `gif_path`."""
+    stem = os.path.splitext(os.path.basename(gif_path))[0]
+    return os.path.join(img_dir, ATLAS_DIRNAME, f"{stem}.png")
+
+
+class SpriteAnimation:
+    """Animation frames laid out in a grid on one sheet, plus per-frame durations (ms).
+
+    len(anim) / anim[i] keep the shape of the old list-of-frames caches;
+    draw code should use scaled(size).blit(...) so scaling happens once per
+    size rather than once per frame drawn.
+
+    When `reload` is given (a callable returning the sheet again, as set by
+    load()), the full-resolution sheet is dropped once a scaled copy has been
+    built and reloaded only when another size is asked for.
+    """
+
+    def __init__(self, sheet, frame_size: Size, count: int, durations: Iterable[int], cols: Optional[int] = None,
+                 reload: Optional[Callable[[], Any]] = None) -> None:
+        self._sheet = sheet
+        self.reload = reload
+        self.frame_size = (int(frame_size[0]), int(frame_size[1]))
+        self.count = int(count)
+        self.cols = max(1, int(cols or count))
+        self.durations = [max(1, int(d)) for d in durations] or [1000]
+        self._ends = list(itertools.accumulate(self.durations))
+        self._scaled: "OrderedDict[Size, SpriteAnimation]" = OrderedDict()
+
+    @property
+    def sheet(self):
+        if self._sheet is None and self.reload is not None:
+            self._sheet = self.reload()
+        return self._sheet
+
+    @property
+    def sheet_loaded(self) -> bool:
+        return self._sheet is not None
+
+    # ---- construction ----
+    @classmethod
+    def from_frames(cls, frames: List[object], durations: Iterable[int], size: Optional[Size] = None) -> "SpriteAnimation":
+        """Pack `frames` (optionally scaled to `size`) into a near-square grid sheet."""
+        fw, fh = size or frames[0].get_size()
+        count = len(frames)
+        cols = max(1, int(round(count ** 0.5)))
+        rows = (count + cols - 1) // cols
+        sheet = pygame.Surface((fw * cols, fh * rows), pygame.SRCALPHA)
+        for i, frame in enumerate(frames):
+            if frame.get_size() != (fw, fh):
+                frame = pygame.transform.smoothscale(frame, (fw, fh))
+            sheet.blit(frame, ((i % cols) * fw, (i // cols) * fh))
+        return cls(sheet, (fw, fh), count, durations, cols)
+
+    def save(self, png_path: str) -> None:
+        pygame.image.save(self.sheet, png_path)
+        meta = {'frame_w': self.frame_size[0], 'frame_h': self.frame_size[1],
+                'count': self.count, 'cols': self.cols, 'durations': self.durations}
+        with open(os.path.splitext(png_path)[0] + '.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, png_path: str, sheet=None) -> Optional["SpriteAnimation"]:
+        """Load a converted sheet + timing file; `sheet` may be an already decoded surface."""
+        try:
+            with open(os.path.splitext(png_path)[0] + '.json', 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if sheet is None:
+                sheet = _load_sheet(png_path)
+            return cls(sheet, (meta['frame_w'], meta['frame_h']), meta['count'], meta['durations'], meta.get('cols'),
+                       reload=lambda: _load_sheet(png_path))
+        except (OSError, ValueError, KeyError, pygame.error):
+            return None
+
+    def with_durations(self, durations: Iterable[int]) -> "SpriteAnimation":
+        """Same frames with different timing (e.g. a slowed-down playback).
+
+        A reloadable sheet moves to the returned animation instead of being
+        referenced by both.
+        """
+        anim = SpriteAnimation(self._sheet, self.frame_size, self.count, durations, self.cols, self.reload)
+        if self.reload is not None:
+            self._sheet = None
+        return anim
+
+    # ---- playback ----
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, idx: int):
+        return self.sheet.subsurface(self.frame_rect(idx))
+
+    @property
+    def total_ms(self) -> int:
+        return self._ends[-1]
+
+    def frame_rect(self, idx: int):
+        idx = max(0, min(self.count - 1, int(idx)))
+        fw, fh = self.frame_size
+        return pygame.Rect((idx % self.cols) * fw, (idx // self.cols) * fh, fw, fh)
+
+    def frame_at(self, elapsed_ms: float, loop: bool = False) -> int:
+        """Frame index shown `elapsed_ms` after the start (wrapping when `loop`)."""
+        if loop:
+            elapsed_ms %= self.total_ms
+        idx = bisect.bisect_right(self._ends, elapsed_ms)
+        return min(idx, self.count - 1)
+
+    def scaled(self, size: Size) -> "SpriteAnimation":
+        """This animation with every frame pre-scaled to `size` (cached per size)."""
+        size = (max(1, int(size[0])), max(1, int(size[1])))
+        if size == self.frame_size:
+            return self
+        anim = self._scaled.get(size)
+        if anim is None:
+            sheet = self.sheet
+            frames = [sheet.subsurface(self.frame_rect(i)) for i in range(self.count)]
+            anim = self._scaled[size] = SpriteAnimation.from_frames(frames, self.durations, size)
+            if len(self._scaled) > MAX_SCALED_ANIMATIONS:
+                self._scaled.popitem(last=False)
+            if self.reload is not None:
+                # only needed again to build another size
+                self._sheet = None
+        else:
+            self._scaled.move_to_end(size)
+        return anim
+
+    def blit(self, dest, pos, idx: int) -> None:
+        dest.blit(self.sheet, pos, self.frame_rect(idx))
+
+
+def build_sprite_sheets(img_dir: str) -> Dict[str, str]:
+    """Convert each GIF directly in `img_dir` into images/atlas/<stem>.png + .json."""
+    out_dir = os.path.join(img_dir, ATLAS_DIRNAME)
+    os.makedirs(out_dir, exist_ok=True)
+    written = {}
+    for fn in sorted(os.listdir(img_dir)):
+        if not fn.lower().endswith('.gif'):
+            continue
+        path = os.path.join(img_dir, fn)
+        try:
+            raw_frames, durations = decode_gif(path)
+        except Exception:
+            continue
+        frames = [surface_from_raw(r) for r in raw_frames]
+        if frames:
+            png = sprite_sheet_path(img_dir, path)
+            SpriteAnimation.from_frames(frames, durations).save(png)
+            written[fn] = png
+    return written
+
+
+# -----------------------------
+# Background preloading
+# -----------------------------
+
+RawImage = Tuple[bytes, Size]  # RGBA pixels + size
+
+
+def decode_image(path: str) -> RawImage:
+    """Decode an image file into RGBA bytes (safe to call off the main thread)."""
+    try:
+        from PIL import Image
+        with Image.open(path) as img:
+            img = img.convert('RGBA')
+            return img.tobytes(), img.size
+    except ImportError:
+        surf = pygame.image.load(path)
+        return pygame.image.tostring(surf, 'RGBA'), surf.get_size()
+
+
+def decode_gif(path: str) -> Tuple[List[RawImage], List[int]]:
+    """Decode every GIF frame into RGBA bytes; returns (frames, durations_ms)."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return [decode_image(path)], [1000]
+    frames: List[RawImage] = []
+    durations: List[int] = []
+    with Image.open(path) as img:
+        for i in range(getattr(img, 'n_frames', 1)):
+            img.seek(i)
+            frame = img.convert('RGBA')
+            frames.append((frame.tobytes(), frame.size))
+            durations.append(img.info.get('duration', 100))
+    return frames, durations
+
+
+def surface_from_raw(raw: RawImage):
+    """Main-thread half of loading: RGBA bytes -> display-format surface."""
+    data, size = raw
+    surf = pygame.image.frombuffer(data, size, 'RGBA')
+    try:
+        return surf.convert_alpha()
+    except pygame.error:  # no display mode yet
+        return surf.copy()
+
+
+class AssetPreloader:
+    """Decode assets on worker threads; finish them on the main thread.
+
+    add(key, path, kind) queues a job ('image' -> Surface, 'gif' ->
+    (frames, durations)). poll() converts finished jobs within a time budget
+    and calls their on_ready callbacks; result(key) returns a job's value,
+    finishing it immediately (waiting for its worker if needed) when asked
+    for before poll() got to it. Failed jobs resolve to None.
+    """
+
+    def __init__(self, workers: int = 2) -> None:
+        self.workers = workers
+        self._jobs: Dict[Any, Tuple[str, str, Optional[Callable[[Any], None]]]] = {}
+        self._futures: Dict[Any, Future] = {}
+        self._results: Dict[Any, Any] = {}
+        self._ready: "queue.Queue[Any]" = queue.Queue()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def add(self, key: Any, path: str, kind: str = 'image', on_ready: Optional[Callable[[Any], None]] = None) -> None:
+        if key in self._jobs:
+            return
+        self._jobs[key] = (path, kind, on_ready)
+        if self._executor is not None:
+            self._submit(key)
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='asset-loader')
+            for key in self._jobs:
+                self._submit(key)
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    def _submit(self, key: Any) -> None:
+        path, kind, _cb = self._jobs[key]
+        fn = decode_gif if kind == 'gif' else decode_image
+        fut = self._executor.submit(fn, path)
+        fut.add_done_callback(lambda _f, k=key: self._ready.put(k))
+        self._futures[key] = fut
+
+    def _finish(self, key: Any) -> Any:
+        if key in self._results:
+            return self._results[key]
+        _path, kind, on_ready = self._jobs[key]
+        try:
+            raw = self._futures[key].result()
+            if kind == 'gif':
+                value = ([surface_from_raw(f) for f in raw[0]], list(raw[1]))
+            else:
+                value = surface_from_raw(raw)
+        except Exception:
+            value = None
+        self._results[key] = value
+        if on_ready is not None and value is not None:
+            on_ready(value)
+        return value
+
+    def poll(self, budget: float = 0.004) -> int:
+        """Finish ready jobs for up to `budget` seconds; returns how many were finished."""
+        deadline = time.perf_counter() + budget
+        n = 0
+        while True:
+            try:
+                key = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            if key not in self._results:
+                self._finish(key)
+                n += 1
+            if time.perf_counter() >= deadline:
+                break
+        return n
+
+    def knows(self, key: Any) -> bool:
+        return key in self._jobs
+
+    def take(self, key: Any, default: Any = None) -> Any:
+        """Like result(), but stops holding the value (its job still counts as done)."""
+        if key not in self._jobs:
+            return default
+        value = self.result(key)
+        self._results[key] = None
+        return value
+
+    def result(self, key: Any, default: Any = None) -> Any:
+        """The finished value for `key` (blocking on its worker); `default` if never added."""
+        if key not in self._jobs:
+            return default
+        if key not in self._futures:
+            self.start()
+        return self._finish(key)
+
+    @property
+    def total(self) -> int:
+        return len(self._jobs)
+
+    @property
+    def completed(self) -> int:
+        return len(self._results)
+
+    def progress(self) -> float:
+        return 1.0 if not self._jobs else len(self._results) / len(self._jobs)
+
+    def done(self) -> bool:
+        return len(self._results) >= len(self._jobs)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_offline(img_dir: str, card_names: Iterable[str] = ()) -> Dict[str, str]:
+    """Write the manifest and packed per-group source sheets under images/atlas/."""
+    out_dir = os.path.join(img_dir, ATLAS_DIRNAME)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = build_manifest(img_dir)
+    with open(os.path.join(out_dir, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump({'images': manifest}, f, ensure_ascii=False, indent=1)
+    lib = AssetLibrary(img_dir, card_names)
+    written = {}
+    for group, names in lib.groups.items():
+        images = {n: lib._load_file(n) for n in names}
+        images = {n: s for n, s in images.items() if s is not None}
+        if images:
+            png = os.path.join(out_dir, f"{group}.png")
+            TextureAtlas.build(images).save(png)
+            written[group] = png
+    written.update(build_sprite_sheets(img_dir))
+    return written
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Build the image manifest and packed texture atlases.")
+    ap.add_argument('command', choices=['build', 'manifest'])
+    ap.add_argument('--img-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images'))
+    args = ap.parse_args(argv)
+    if args.command == 'manifest':
+        print(json.dumps(build_manifest(args.img_dir), ensure_ascii=False, indent=1))
+        return
+    try:
+        from card_core import CARD_REGISTRY
+        card_names = [s.name for s in CARD_REGISTRY.values()]
+    except Exception:
+        card_names = []
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    for group, path in build_offline(args.img_dir, card_names).items():
+        print(f"{group}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Frame-time benchmark for the Card Game play screen.
+
+Loads `Card Game.py` headlessly (SDL dummy video driver) and times draw_panel():
+
+- rescale: the background is smoothscaled every frame (the old behaviour,
+  reproduced by dropping the background cache before each frame);
+- cached:  the size-keyed background cache is used;
+- idle:    render_frame() with nothing changing (dirty-rect renderer).
+
+Usage:
+    python bench_frame_time.py --frames 120 --size 1600x900
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+import statistics
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_card_game():
+    spec = importlib.util.spec_from_file_location('card_game_bench', os.path.join(HERE, 'Card Game.py'))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    if mod.__dict__.get('game') is None:
+        mod.game = mod.new_game_with_mode(mod.DECK_MODE)
+    if mod.__dict__.get('ai_player') is None:
+        mod.ai_player = mod.build_ai_player(mod.DECK_MODE)
+    return mod
+
+
+def _time_frames(fn, frames: int):
+    out = []
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000.0)
+    return out
+
+
+def _summary(name: str, ms):
+    ms = sorted(ms)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    return f"{name:8s} mean {statistics.mean(ms):7.2f} ms   p50 {statistics.median(ms):7.2f} ms   p95 {p95:7.2f} ms"
+
+
+def run(frames: int = 120, size=(1200, 800)):
+    cg = load_card_game()
+    import pygame
+    cg.W, cg.H = size
+    cg.screen = pygame.display.set_mode(size, pygame.RESIZABLE)
+    cg.turn_telop_msg = None
+    cg.draw_panel()  # warm up image/font caches
+
+    def rescale_frame():
+        cg.invalidate_background_cache()
+        cg.draw_panel()
+
+    results = {
+        'rescale': _time_frames(rescale_frame, frames),
+        'cached': _time_frames(cg.draw_panel, frames),
+    }
+    cg.render_frame()
+    results['idle'] = _time_frames(cg.render_frame, frames)
+    return results
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Time Card Game frames with and without the background cache.")
+    ap.add_argument('--frames', type=int, default=120)
+    ap.add_argument('--size', default='1200x800', help="window size WxH")
+    args = ap.parse_args(argv)
+    w, h = (int(v) for v in args.size.lower().split('x'))
+    results = run(args.frames, (w, h))
+    print(f"{args.frames} frames at {w}x{h}")
+    for name, ms in results.items():
+        print(_summary(name, ms))
+
+
+if __name__ == "__main__":
+    main()
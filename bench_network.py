@@ -0,0 +1,116 @@
+"""
+Loopback throughput benchmark for the network framing layer.
+
+A sender thread writes N small messages back to back over a loopback TCP
+connection (so many messages arrive per recv); the receiver decodes them
+with:
+
+- legacy: ``buffer += data`` + ``buffer.split(b"\\n", 1)`` per message (the old
+  NetworkManager._recv_loop);
+- line:   FrameReader('line') with recv_into into a reusable buffer;
+- length: FrameReader('length') with 4-byte length prefixes.
+
+Only framing is timed (payloads are not JSON-decoded), so the numbers show
+the cost of splitting the byte stream. A second table times encoding plus
+decoding one ``move`` message with each net_protocol encoding (json / bin1).
+
+Usage:
+    python bench_network.py --messages 200000 --size 48
+"""
+from __future__ import annotations
+
+from typing import Callable, Dict
+import argparse
+import socket
+import threading
+import time
+
+try:
+    from .net_framing import FrameReader, encode_frame
+    from .net_protocol import PROTOCOLS, decode_payload, encode_payload
+except Exception:
+    from net_framing import FrameReader, encode_frame
+    from net_protocol import PROTOCOLS, decode_payload, encode_payload
+
+
+def _legacy_receive(conn: socket.socket, count: int) -> int:
+    buffer = b""
+    got = 0
+    while got < count:
+        data = conn.recv(4096)
+        if not data:
+            break
+        buffer += data
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            got += 1
+    return got
+
+
+def _framed_receive(mode: str) -> Callable[[socket.socket, int], int]:
+    def receive(conn: socket.socket, count: int) -> int:
+        reader = FrameReader(mode)
+        got = 0
+        while got < count:
+            if reader.recv_into(conn) == 0:
+                break
+            for _ in reader.frames():
+                got += 1
+        return got
+    return receive
+
+
+RECEIVERS: Dict[str, Callable[[socket.socket, int], int]] = {
+    'legacy': _legacy_receive,
+    'line': _framed_receive('line'),
+    'length': _framed_receive('length'),
+}
+
+
+def run_one(name: str, messages: int, size: int) -> Dict[str, float]:
+    mode = 'length' if name == 'length' else 'line'
+    payload = encode_frame(b"x" * size, mode)
+    blob = payload * messages
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    sender = socket.create_connection(listener.getsockname())
+    conn, _ = listener.accept()
+    t = threading.Thread(target=sender.sendall, args=(blob,), daemon=True)
+    t0 = time.perf_counter()
+    t.start()
+    got = RECEIVERS[name](conn, messages)
+    dt = time.perf_counter() - t0
+    t.join()
+    for s in (sender, conn, listener):
+        s.close()
+    assert got == messages, (name, got)
+    return {'seconds': dt, 'msgs_per_s': messages / dt, 'mb_per_s': len(blob) / dt / 1e6}
+
+
+def run_codec(protocol: str, messages: int) -> Dict[str, float]:
+    move = {"type": "move", "from": [6, 4], "to": [4, 4], "promotion": None, "seq": 41}
+    t0 = time.perf_counter()
+    for _ in range(messages):
+        decode_payload(encode_payload(move, protocol))
+    dt = time.perf_counter() - t0
+    return {'bytes': len(encode_payload(move, protocol)), 'msgs_per_s': messages / dt}
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Benchmark message framing over loopback TCP.")
+    ap.add_argument('--messages', type=int, default=200000)
+    ap.add_argument('--size', type=int, default=48, help="payload bytes per message")
+    args = ap.parse_args(argv)
+    print(f"{args.messages} messages x {args.size} bytes over loopback")
+    for name in RECEIVERS:
+        r = run_one(name, args.messages, args.size)
+        print(f"{name:7s} {r['seconds']:7.3f} s  {r['msgs_per_s']:12,.0f} msg/s  {r['mb_per_s']:8.1f} MB/s")
+    print("move message, encode + decode")
+    for protocol in PROTOCOLS:
+        r = run_codec(protocol, args.messages)
+        print(f"{protocol:7s} {r['bytes']:4d} bytes  {r['msgs_per_s']:12,.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
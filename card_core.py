@@ -18,8 +18,16 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from typing import Callable, List, Optional, Tuple, Literal, Dict, Any
+import base64
 import random
 
+try:
+    from .game_log import GameLog
+    from .status_scheduler import StatusScheduler, StatusTimer, TimedEntry, TimedStatusMap
+except Exception:
+    from game_log import GameLog
+    from status_scheduler import StatusScheduler, StatusTimer, TimedEntry, TimedStatusMap
+
 
 # -----------------------------
 # Data models
@@ -29,6 +37,26 @@ EffectFn = Callable[["Game", "PlayerState"], str]
 PrecheckFn = Callable[["Game", "PlayerState"], Optional[str]]  # None: OK, str: error message
 
 
+def _engine_piece(piece_id: Any) -> Any:
+    """chess_engine piece whose id() is `piece_id`, or None."""
+    try:
+        from . import chess_engine as chess
+    except Exception:
+        try:
+            import chess_engine as chess
+        except Exception:
+            return None
+    for p in getattr(chess, 'pieces', []) or []:
+        if id(p) == piece_id:
+            return p
+    return None
+
+
+def _piece_color(piece_id: Any) -> Optional[str]:
+    # resolved once when a freeze is scheduled, not on every turn end
+    return getattr(_engine_piece(piece_id), 'color', None)
+
+
 @dataclass
 class PendingAction:
     """Represents a UI-required follow-up action (e.g., choose a card to discard).
@@ -66,6 +94,16 @@ class Card:
     cost: int
     effect: EffectFn
     precheck: Optional[PrecheckFn] = None
+    # Registry ID (see CARD_REGISTRY); resolved from the name when omitted.
+    card_id: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.card_id:
+            self.card_id = card_id_for_name(self.name)
+        if self.precheck is None:
+            spec = CARD_REGISTRY.get(self.card_id)
+            if spec is not None:
+                self.precheck = spec.precheck
 
     def can_play(self, player: "PlayerState") -> bool:
         return self.cost <= player.pp_current
@@ -74,9 +112,11 @@ class Card:
 @dataclass
 class Deck:
     cards: List[Card] = field(default_factory=list)
+    # Per-game RNG (see Game.rng); None falls back to the shared `random` module.
+    rng: Optional[random.Random] = field(default=None, repr=False, compare=False)
 
-    def shuffle(self) -> None:
-        random.shuffle(self.cards)
+    def shuffle(self, rng: Optional[random.Random] = None) -> None:
+        (rng or self.rng or random).shuffle(self.cards)
 
     def draw(self) -> Optional[Card]:
         if not self.cards:
@@ -124,9 +164,17 @@ class PlayerState:
 class Game:
     player: PlayerState
     turn: int = 0
-    log: List[str] = field(default_factory=list)
+    # Per-game RNG used by decks, card effects and the AI so that seeded
+    # games are reproducible and parallel simulations don't interfere.
+    rng: random.Random = field(default_factory=random.Random, repr=False, compare=False)
+    # Seed `rng` was created from (None when unseeded); see reseed
+    seed: Optional[int] = field(default=None, compare=False)
+    # Bounded, structured event log (list-compatible; see game_log.GameLog)
+    log: GameLog = field(default_factory=GameLog)
     pending: Optional[PendingAction] = None
     # Placeholders for chess integration
+    # Expiry clocks/heap for the timed statuses below (see decay_statuses)
+    statuses: StatusScheduler = field(default_factory=StatusScheduler, repr=False, compare=False)
     # blocked_tiles maps tile -> list of {'owner': 'white'|'black', 'turns': int}
     blocked_tiles: Dict[Any, List[Dict[str, Any]]] = field(default_factory=dict)
     frozen_pieces: Dict[Any, int] = field(default_factory=dict)  # piece_id -> turns left
@@ -143,6 +191,56 @@ class Game:
     ai_consecutive_turns: int = 0
     # AI-specific single-move jump flag (暴風) stored here so card effects can set it
     ai_next_move_can_jump: bool = False
+    # Observers notified of game events (e.g. replay recording).
+    # Signature: fn(kind, data) with kind in 'turn', 'ai_turn', 'play', 'card',
+    # 'pending', 'decay', 'expire'.
+    listeners: List[Callable[[str, Dict[str, Any]], None]] = field(default_factory=list)
+
+    def emit(self, event: str, **data: Any) -> None:
+        for fn in list(self.listeners):
+            try:
+                fn(event, data)
+            except Exception:
+                # observers must never break the game flow
+                pass
+
+    def __post_init__(self) -> None:
+        # Accept a legacy list of strings and bind the turn counter so every
+        # log event is stamped with the turn it happened in.
+        if not isinstance(self.log, GameLog):
+            legacy = list(self.log or [])
+            self.log = GameLog()
+            self.log.extend(legacy)
+        self.log.turn_source = lambda: self.turn
+        if self.player.deck.rng is None:
+            self.player.deck.rng = self.rng
+        # Timed statuses are backed by the scheduler: frozen_pieces reads the
+        # turns left from its timers, blocked-tile entries are TimedEntry dicts.
+        frozen = dict(self.frozen_pieces or {})
+        blocked = dict(self.blocked_tiles or {})
+        # a piece whose owner can't be resolved is not thawed by either side's turn end
+        self.frozen_pieces = TimedStatusMap(self.statuses, 'freeze', owner_of=_piece_color, strict_owner=True)
+        self.frozen_pieces.update(frozen)
+        self.blocked_tiles = {}
+        for tile, entries in blocked.items():
+            for e in entries if isinstance(entries, list) else [{'owner': self.blocked_tiles_owner.get(tile), 'turns': entries}]:
+                self.add_blocked_tile(tile, e.get('owner'), int(e.get('turns', 0)))
+
+    def resolve_pending(self, **choice: Any) -> None:
+        """Clear the pending UI follow-up action and notify observers.
+
+        The resolution itself happens in the UI; `choice` describes what was
+        picked (hand index, yes/no, ...) and is passed on with the event.
+        """
+        prev = self.pending
+        self.pending = None
+        if prev is not None:
+            self.emit('pending', kind=prev.kind, **choice)
+
+    def reseed(self, seed: Optional[int]) -> None:
+        """Reseed the game RNG (shared with decks that use it)."""
+        self.rng.seed(seed)
+        self.seed = seed
 
     # ---- draw helper with hand limit ----
     def draw_to_hand(self, n: int = 1) -> List[Tuple[Optional[Card], bool]]:
@@ -160,7 +258,7 @@ class Game:
             if len(self.player.hand.cards) >= self.player.hand_limit:
                 # overflow -> send to graveyard
                 self.player.graveyard.append(c)
-                self.log.append(f"手札上限{self.player.hand_limit}のため『{c.name}』は墓地へ。")
+                self.log.record('draw', f"手札上限{self.player.hand_limit}のため『{c.name}』は墓地へ。", actor='white', card=c.name)
                 results.append((c, False))
             else:
                 self.player.hand.add(c)
@@ -172,12 +270,15 @@ class Game:
 
     # Helper for blocked tiles: add an entry without overwriting existing ones.
     def add_blocked_tile(self, tile: Any, owner: str, turns: int) -> None:
+        timer = self.statuses.schedule('block', tile, owner, int(turns))
+        entry = TimedEntry(self.statuses, timer)
+        timer.payload = entry
         try:
             lst = self.blocked_tiles.get(tile)
-            if lst is None:
+            if not isinstance(lst, list):
                 lst = []
                 self.blocked_tiles[tile] = lst
-            lst.append({'owner': owner, 'turns': int(turns)})
+            lst.append(entry)
             # keep legacy owner mapping for convenience (first entry wins)
             try:
                 self.blocked_tiles_owner[tile] = lst[0].get('owner')
@@ -186,11 +287,20 @@ class Game:
         except Exception:
             try:
                 # fallback: if structure unexpected, overwrite
-                self.blocked_tiles[tile] = [{'owner': owner, 'turns': int(turns)}]
+                self.blocked_tiles[tile] = [entry]
                 self.blocked_tiles_owner[tile] = owner
             except Exception:
                 pass
 
+    def clear_statuses(self) -> None:
+        """Remove every frozen piece and blocked tile and cancel their timers."""
+        self.frozen_pieces.clear()
+        for entries in self.blocked_tiles.values():
+            for e in entries if isinstance(entries, list) else []:
+                self.statuses.cancel(getattr(e, 'timer', None))
+        self.blocked_tiles.clear()
+        self.blocked_tiles_owner.clear()
+
     def get_blocked_entries(self, tile: Any) -> List[Dict[str, Any]]:
         return list(self.blocked_tiles.get(tile, []) or [])
 
@@ -207,7 +317,7 @@ class Game:
         """Initial draw of 4 cards at battle start and PP reset."""
         self.player.reset_pp()
         self.draw_to_hand(4)
-        self.log.append("バトル開始: 手札を4枚引き、PPを最大まで回復しました。")
+        self.log.record('turn', "バトル開始: 手札を4枚引き、PPを最大まで回復しました。", actor='white')
 
     def start_turn(self) -> None:
         """At the start of each turn: draw 1 and restore PP to max."""
@@ -223,117 +333,82 @@ class Game:
         self.player_moved_this_turn = False
 
         res = self.draw_to_hand(1)
+        self.emit('turn', turn=self.turn)
         if not res or res[0][0] is None:
-            self.log.append(f"ターン{self.turn}開始: 山札が空。PPを{self.player.pp_max}に回復。")
+            self.log.record('turn', f"ターン{self.turn}開始: 山札が空。PPを{self.player.pp_max}に回復。", actor='white')
         else:
             c, added = res[0]
             if added:
-                self.log.append(f"ターン{self.turn}開始: 『{c.name}』を1枚ドロー。PPを{self.player.pp_max}に回復。")
+                self.log.record('turn', f"ターン{self.turn}開始: 『{c.name}』を1枚ドロー。PPを{self.player.pp_max}に回復。", actor='white', card=c.name)
             else:
-                self.log.append(f"ターン{self.turn}開始: 手札上限のため『{c.name}』は墓地へ。PPを{self.player.pp_max}に回復。")
+                self.log.record('turn', f"ターン{self.turn}開始: 手札上限のため『{c.name}』は墓地へ。PPを{self.player.pp_max}に回復。", actor='white', card=c.name)
+
 
+    def start_ai_turn(self, player: PlayerState) -> Optional[Card]:
+        """At the start of the AI's turn: restore PP and draw 1 if the hand has room."""
+        player.reset_pp()
+        drawn = None
+        if len(player.hand.cards) < player.hand_limit:
+            drawn = player.deck.draw()
+            if drawn:
+                player.hand.add(drawn)
+        self.emit('ai_turn')
+        return drawn
 
     def decay_statuses(self, ended_color: Optional[str] = None) -> None:
-        """Decay time-limited statuses (blocked_tiles, frozen_pieces) by 1 turn.
+        """Count one turn end for time-limited statuses (blocked_tiles, frozen_pieces).
 
         If `ended_color` is provided ('white' or 'black'), only statuses that
-        apply to that color are decremented. This ensures that a freeze applied
+        apply to that color count down. This ensures that a freeze applied
         to a player piece is decremented at the end of that player's turn, not
         immediately when the opponent finishes their move.
 
-        If `ended_color` is None, behave like the legacy behavior and decrement
-        all status counters.
+        If `ended_color` is None, behave like the legacy behavior and count
+        down all statuses.
+
+        Only the statuses that expire are touched: the scheduler advances the
+        owner's clock and pops due timers; each expiry is logged and emitted
+        as an 'expire' event.
         """
-        # Decay blocked tiles: only decrement tiles that belong to the color
-        # whose turn just ended (if provided).
-        # New representation: blocked_tiles[tile] -> list of entries
-        for k in list(self.blocked_tiles.keys()):
-            entries = self.blocked_tiles.get(k) or []
-            # filter by ended_color if provided: only decrement entries that
-            # apply to the color whose turn ended (legacy behavior)
-            changed = False
-            for e in list(entries):
-                try:
-                    owner = e.get('owner')
-                    if ended_color is not None and owner is not None and owner != ended_color:
-                        # skip decrementing this entry
-                        continue
-                    e['turns'] = int(e.get('turns', 0)) - 1
-                    changed = True
-                except Exception:
-                    continue
-            # remove expired entries
-            new_entries = [e for e in entries if int(e.get('turns', 0)) > 0]
-            if new_entries:
-                self.blocked_tiles[k] = new_entries
-                # keep legacy owner mapping to the first active entry's owner
-                try:
-                    self.blocked_tiles_owner[k] = new_entries[0].get('owner')
-                except Exception:
-                    pass
-            else:
-                try:
-                    del self.blocked_tiles[k]
-                except Exception:
-                    pass
-                try:
-                    if k in self.blocked_tiles_owner:
-                        del self.blocked_tiles_owner[k]
-                except Exception:
-                    pass
-        # Decay frozen pieces: we need to look up the engine piece for each id
-        # and only decrement if its color matches ended_color (when provided).
-        for k in list(self.frozen_pieces.keys()):
+        self.emit('decay', ended_color=ended_color)
+        for timer in self.statuses.advance(ended_color):
+            if timer.kind == 'block':
+                self._expire_blocked_tile(timer)
+            elif timer.kind == 'freeze':
+                self._expire_frozen_piece(timer)
+
+    def _expire_blocked_tile(self, timer: StatusTimer) -> None:
+        tile = timer.key
+        entries = self.blocked_tiles.get(tile)
+        if not isinstance(entries, list) or not any(e is timer.payload for e in entries):
+            return  # entry was removed by other means
+        entries = [e for e in entries if e is not timer.payload]
+        if entries:
+            self.blocked_tiles[tile] = entries
+            # keep legacy owner mapping to the first active entry's owner
+            self.blocked_tiles_owner[tile] = entries[0].get('owner')
+        else:
+            del self.blocked_tiles[tile]
+            self.blocked_tiles_owner.pop(tile, None)
+        self.log.record('status', f"封鎖解除: {tile}", actor=timer.owner, coords=[tile])
+        self.emit('expire', status='block', tile=tile, owner=timer.owner)
+
+    def _expire_frozen_piece(self, timer: StatusTimer) -> None:
+        if not self.frozen_pieces.expire(timer):
+            return  # re-frozen or unfrozen since this timer started
+        piece = timer.payload if timer.payload is not None else _engine_piece(timer.key)
+        # Clear transient attribute on the actual piece object
+        if piece is not None and hasattr(piece, 'frozen_turns'):
             try:
-                # If ended_color given, find piece and skip if colors don't match
-                if ended_color is not None:
-                    try:
-                        try:
-                            from . import chess_engine as chess
-                        except Exception:
-                            import chess_engine as chess
-                        found = None
-                        for p in getattr(chess, 'pieces', []) or []:
-                            if id(p) == k:
-                                found = p
-                                break
-                        if found is None:
-                            # If the id doesn't match, try to skip decrementing
-                            # because we can't determine ownership reliably.
-                            continue
-                        if getattr(found, 'color', None) != ended_color:
-                            # not the color whose turn ended -> skip
-                            continue
-                    except Exception:
-                        # conservative: if lookup fails, skip decrement
-                        continue
-                # decrement
-                self.frozen_pieces[k] -= 1
+                delattr(piece, 'frozen_turns')
             except Exception:
-                continue
-            if self.frozen_pieces[k] <= 0:
-                # Clear transient attribute on the actual piece object
-                try:
-                    try:
-                        from . import chess_engine as chess
-                    except Exception:
-                        import chess_engine as chess
-                    for p in getattr(chess, 'pieces', []) or []:
-                        if id(p) == k and hasattr(p, 'frozen_turns'):
-                            try:
-                                delattr(p, 'frozen_turns')
-                            except Exception:
-                                try:
-                                    del p.frozen_turns
-                                except Exception:
-                                    pass
-                            break
-                except Exception:
-                    pass
-                try:
-                    del self.frozen_pieces[k]
-                except Exception:
-                    pass
+                pass
+        coords = None
+        if piece is not None and getattr(piece, 'row', None) is not None:
+            coords = [(piece.row, piece.col)]
+        name = getattr(piece, 'name', None) if piece is not None else None
+        self.log.record('status', f"凍結解除: {name or '駒'}", actor=timer.owner, coords=coords)
+        self.emit('expire', status='freeze', piece_id=timer.key, owner=timer.owner)
 
     # ---- helpers to apply status effects with iron-wall checks ----
     def apply_blocked_tile(self, coord, turns: int, applies_to: str = 'black', source_color: Optional[str] = None, source_card_name: Optional[str] = None) -> bool:
@@ -350,7 +425,7 @@ class Game:
                     # consume iron wall instead of applying
                     human.iron_wall_active = False
                     try:
-                        self.log.append(f"鉄壁: 敵の効果 {source_card_name or ''} を防ぎました。")
+                        self.log.record('status', f"鉄壁: 敵の効果 {source_card_name or ''} を防ぎました。", actor='white', card=source_card_name, coords=[coord])
                     except Exception:
                         pass
                     return False
@@ -362,22 +437,16 @@ class Game:
                     except Exception:
                         setattr(self, 'ai_iron_wall_active', False)
                     try:
-                        self.log.append(f"鉄壁(敵): プレイヤーの効果 {source_card_name or ''} を防ぎました。")
+                        self.log.record('status', f"鉄壁(敵): プレイヤーの効果 {source_card_name or ''} を防ぎました。", actor='black', card=source_card_name, coords=[coord])
                     except Exception:
                         pass
                     return False
         except Exception:
             pass
 
-        # Apply the block
-        try:
-            self.blocked_tiles[coord] = turns
-            try:
-                self.blocked_tiles_owner[coord] = applies_to
-            except Exception:
-                pass
-        except Exception:
-            self.blocked_tiles[coord] = turns
+        # Apply the block using the list-of-entries representation that
+        # decay_statuses / is_tile_blocked_for expect.
+        self.add_blocked_tile(coord, applies_to, turns)
         return True
 
     def apply_freeze_piece(self, piece_obj, turns: int, target_color: Optional[str] = None, source_color: Optional[str] = None, source_card_name: Optional[str] = None) -> bool:
@@ -398,7 +467,7 @@ class Game:
                 if getattr(human, 'iron_wall_active', False) and source_color is not None and source_color != 'white':
                     human.iron_wall_active = False
                     try:
-                        self.log.append(f"鉄壁: 敵の効果 {source_card_name or ''} を防ぎました。")
+                        self.log.record('status', f"鉄壁: 敵の効果 {source_card_name or ''} を防ぎました。", actor='white', card=source_card_name)
                     except Exception:
                         pass
                     return False
@@ -409,24 +478,128 @@ class Game:
                     except Exception:
                         setattr(self, 'ai_iron_wall_active', False)
                     try:
-                        self.log.append(f"鉄壁(敵): プレイヤーの効果 {source_card_name or ''} を防ぎました。")
+                        self.log.record('status', f"鉄壁(敵): プレイヤーの効果 {source_card_name or ''} を防ぎました。", actor='black', card=source_card_name)
                     except Exception:
                         pass
                     return False
         except Exception:
             pass
 
-        # Apply freeze using id-based map
-        try:
-            self.frozen_pieces[id(piece_obj)] = turns
-        except Exception:
-            self.frozen_pieces[id(piece_obj)] = turns
+        # Apply freeze using id-based map; the timer counts down on the target's turn ends
+        if target_color is None:
+            target_color = _piece_color(id(piece_obj))
+        self.frozen_pieces.start(id(piece_obj), turns, target_color, payload=piece_obj)
         try:
             setattr(piece_obj, 'frozen_turns', turns)
         except Exception:
             pass
         return True
 
+    # ---- pre-play hooks (dispatched by card ID; see _PLAYER_PREPLAY / _AI_PREPLAY) ----
+    # A hook returns (success, message) when it fully handled the play, or
+    # None to continue with the normal spend-PP / resolve-effect path.
+
+    def _confirm_before_play(self, confirm_id: str, message: str, hand_index: int) -> Tuple[bool, str]:
+        self.pending = PendingAction(
+            kind="confirm",
+            info={
+                "id": confirm_id,
+                "message": message,
+                "yes_label": "はい(Y)",
+                "no_label": "いいえ(N)",
+                "hand_index": hand_index,  # カードの位置を保存
+            },
+        )
+        return True, "確認待ち"
+
+    def _preplay_grave_roulette(self, card: Card, hand_index: int) -> Optional[Tuple[bool, str]]:
+        # 墓地ルーレット専用: 墓地が空なら確認を先に出す（カード未消費）
+        if self.player.graveyard:
+            return None
+        return self._confirm_before_play(
+            "confirm_grave_roulette_empty",
+            "墓地から回収できるカードがありません。\n使用しますか？",
+            hand_index,
+        )
+
+    def _preplay_lightning(self, card: Card, hand_index: int) -> Optional[Tuple[bool, str]]:
+        # 迅雷: 2回目以降の使用は上書きで追加ターン数が増えないため、警告を出す（カード未消費）
+        if getattr(self, 'player_consecutive_turns', 0) < 1:
+            return None
+        return self._confirm_before_play(
+            "confirm_second_lightning_overwrite",
+            "すでに『迅雷』は使用しています。\n再度使用しても何も起きません。\nそれでも使用しますか？",
+            hand_index,
+        )
+
+    def _preplay_storm(self, card: Card, hand_index: int) -> Optional[Tuple[bool, str]]:
+        # 暴風: 2回目以降の使用は上書きで効果が増えないため、警告を出す（カード未消費）
+        if not getattr(self.player, 'next_move_can_jump', False):
+            return None
+        return self._confirm_before_play(
+            "confirm_second_storm_overwrite",
+            "すでに『暴風』の効果が有効です。\n再度使用しても効果を上書きするだけです。\nそれでも使用しますか？",
+            hand_index,
+        )
+
+    def _preplay_heat(self, card: Card, hand_index: int) -> Optional[Tuple[bool, str]]:
+        # 灼熱: カード消費前に二択を表示（カード未消費）
+        self.pending = PendingAction(
+            kind="heat_choice",
+            info={
+                "turns": 2,
+                "max_tiles": 3,
+                "hand_index": hand_index,  # カードの位置を保存
+                "note": "Choose: unfreeze one own frozen piece OR block 1-3 tiles for opponent.",
+            },
+        )
+        return True, "灼熱: 自分の凍結駒を解除するか、3マス封鎖をするか選択してください。"
+
+    def _preplay_alchemy(self, card: Card, hand_index: int) -> Optional[Tuple[bool, str]]:
+        # 錬成: まず錬成カードを墓地に送り、1枚ドローして、その後手札から1枚捨てる処理
+        # PPを消費して錬成カードを墓地に送る
+        assert self.player.spend_pp(card.cost)
+        self.player.hand.remove_at(hand_index)
+        self.player.graveyard.append(card)
+
+        # 1枚ドロー
+        drawn_card = self.player.deck.draw()
+        if drawn_card:
+            self.player.hand.add(drawn_card)
+            msg = f"『{card.name}』（コスト{card.cost}）を使用。山札から『{drawn_card.name}』を引きました。PPは{self.player.pp_current}/{self.player.pp_max}。"
+        else:
+            msg = f"『{card.name}』（コスト{card.cost}）を使用。山札が空です。PPは{self.player.pp_current}/{self.player.pp_max}。"
+
+        self.log.record('card', msg, actor='white', card=card.name)
+
+        # その後、手札から1枚捨てる処理を保留
+        self.pending = PendingAction(
+            kind="discard",
+            info={
+                "count": 1,
+                "is_alchemy": True,  # 錬成の捨てる処理であることを示す
+                "drawn_card_name": drawn_card.name if drawn_card else None,  # 引いたカード名を保存
+                "note": f"錬成で引いたカード『{drawn_card.name if drawn_card else 'なし'}』を含めて手札から1枚選んで墓地に捨ててください。",
+            },
+        )
+        self.emit('card', side='white', index=hand_index, name=card.name)
+        return True, msg + " 手札から1枚選んで墓地に捨ててください。"
+
+    def _ai_preplay_alchemy(self, player, card: Card, hand_index: int) -> Optional[Tuple[bool, str]]:
+        # 錬成 special-case: AI will consume PP and perform immediate discard
+        assert player.spend_pp(card.cost)
+        player.hand.remove_at(hand_index)
+        player.graveyard.append(card)
+        drawn = player.deck.draw()
+        if drawn:
+            player.hand.add(drawn)
+        # AI discards a random card if hand not empty
+        if player.hand.cards:
+            player.hand.remove_at(self.rng.randrange(len(player.hand.cards)))
+        self.log.record('card', "AI: 錬成を使用しました。", actor='black', card=card.name)
+        self.emit('card', side='white' if player is self.player else 'black', index=hand_index, name=card.name)
+        return True, "AI: 錬成を使用しました。"
+
     def play_card(self, hand_index: int) -> Tuple[bool, str]:
         """Attempt to play a card from hand; returns (success, message)."""
         # Block play unless the player's card-game turn is active
@@ -439,91 +612,15 @@ class Game:
         card = self.player.hand.cards[hand_index]
         if not card.can_play(self.player):
             return False, f"PPが不足しています（現在{self.player.pp_current}）。『{card.name}』のコストは{card.cost}です。"
-        
-        # 墓地ルーレット専用: 墓地が空なら確認を先に出す（カード未消費）
-        if card.name == "墓地ルーレット" and not self.player.graveyard:
-            self.pending = PendingAction(
-                kind="confirm",
-                info={
-                    "id": "confirm_grave_roulette_empty",
-                    "message": "墓地から回収できるカードがありません。\n使用しますか？",
-                    "yes_label": "はい(Y)",
-                    "no_label": "いいえ(N)",
-                    "hand_index": hand_index,  # カードの位置を保存
-                },
-            )
-            return True, "確認待ち"
+        self.emit('play', side='white', index=hand_index)
 
-        # 迅雷: 2回目以降の使用は上書きで追加ターン数が増えないため、警告を出す（カード未消費）
-        if card.name == "迅雷" and getattr(self, 'player_consecutive_turns', 0) >= 1:
-            self.pending = PendingAction(
-                kind="confirm",
-                info={
-                    "id": "confirm_second_lightning_overwrite",
-                    "message": "すでに『迅雷』は使用しています。\n再度使用しても何も起きません。\nそれでも使用しますか？",
-                    "yes_label": "はい(Y)",
-                    "no_label": "いいえ(N)",
-                    "hand_index": hand_index,
-                },
-            )
-            return True, "確認待ち"
+        # Per-card pre-play handling (confirmations, choices, alchemy) by registry ID
+        hook = _PLAYER_PREPLAY.get(card.card_id)
+        if hook is not None:
+            handled = hook(self, card, hand_index)
+            if handled is not None:
+                return handled
 
-        # 暴風: 2回目以降の使用は上書きで効果が増えないため、警告を出す（カード未消費）
-        if card.name == "暴風" and getattr(self.player, 'next_move_can_jump', False):
-            self.pending = PendingAction(
-                kind="confirm",
-                info={
-                    "id": "confirm_second_storm_overwrite",
-                    "message": "すでに『暴風』の効果が有効です。\n再度使用しても効果を上書きするだけです。\nそれでも使用しますか？",
-                    "yes_label": "はい(Y)",
-                    "no_label": "いいえ(N)",
-                    "hand_index": hand_index,
-                },
-            )
-            return True, "確認待ち"
-
-        # 灼熱: カード消費前に二択を表示（カード未消費）
-        if card.name == "灼熱":
-            self.pending = PendingAction(
-                kind="heat_choice",
-                info={
-                    "turns": 2,
-                    "max_tiles": 3,
-                    "hand_index": hand_index,  # カードの位置を保存
-                    "note": "Choose: unfreeze one own frozen piece OR block 1-3 tiles for opponent.",
-                },
-            )
-            return True, "灼熱: 自分の凍結駒を解除するか、3マス封鎖をするか選択してください。"
-        
-        # 錬成: まず錬成カードを墓地に送り、1枚ドローして、その後手札から1枚捨てる処理
-        if card.name == "錬成":
-            # PPを消費して錬成カードを墓地に送る
-            assert self.player.spend_pp(card.cost)
-            self.player.hand.remove_at(hand_index)
-            self.player.graveyard.append(card)
-            
-            # 1枚ドロー
-            drawn_card = self.player.deck.draw()
-            if drawn_card:
-                self.player.hand.add(drawn_card)
-                msg = f"『{card.name}』（コスト{card.cost}）を使用。山札から『{drawn_card.name}』を引きました。PPは{self.player.pp_current}/{self.player.pp_max}。"
-            else:
-                msg = f"『{card.name}』（コスト{card.cost}）を使用。山札が空です。PPは{self.player.pp_current}/{self.player.pp_max}。"
-            
-            self.log.append(msg)
-            
-            # その後、手札から1枚捨てる処理を保留
-            self.pending = PendingAction(
-                kind="discard",
-                info={
-                    "count": 1,
-                    "is_alchemy": True,  # 錬成の捨てる処理であることを示す
-                    "drawn_card_name": drawn_card.name if drawn_card else None,  # 引いたカード名を保存
-                    "note": f"錬成で引いたカード『{drawn_card.name if drawn_card else 'なし'}』を含めて手札から1枚選んで墓地に捨ててください。",
-                },
-            )
-            return True, msg + " 手札から1枚選んで墓地に捨ててください。"
-        
         # Optional precheck (e.g., cannot play if graveyard empty)
         if card.precheck is not None:
             err = card.precheck(self, self.player)
@@ -547,7 +644,8 @@ class Game:
         # After resolution, move the used card to graveyard
         self.player.graveyard.append(card)
         msg_full = f"『{card.name}』（コスト{card.cost}）を使用。{msg} PPは{self.player.pp_current}/{self.player.pp_max}。"
-        self.log.append(msg_full)
+        self.log.record('card', msg_full, actor='white', card=card.name)
+        self.emit('card', side='white', index=hand_index, name=card.name)
         return True, msg_full
 
     def play_card_for(self, player, hand_index: int) -> Tuple[bool, str]:
@@ -565,38 +663,20 @@ class Game:
         card = player.hand.cards[hand_index]
         if not card.can_play(player):
             return False, f"PPが不足しています（現在{player.pp_current}）。『{card.name}』のコストは{card.cost}です。"
+        self.emit('play', side='white' if player is self.player else 'black', index=hand_index)
 
-        # For AI, auto-resolve cards that normally create pending actions
-        # Handle 墓地ルーレット: if grave empty, AI will cancel use
-        if card.name == "墓地ルーレット" and not player.graveyard:  # AIのカード使用度改正
-            return False, "AI: 墓地が空のため墓地ルーレットを使いませんでした。"
-
-        # 迅雷: if already active for the side using it, AI will skip using
-        if card.name == "迅雷":
-            # if AI is the actor, check ai_consecutive_turns; otherwise check player_consecutive_turns
-            if player is self.player and getattr(self, 'player_consecutive_turns', 0) >= 1:
-                return False, "AI: 迅雷は既に効果があるため使用しませんでした。"
-            if player is not self.player and getattr(self, 'ai_consecutive_turns', 0) >= 1:
-                return False, "AI: 迅雷は既に効果があるため使用しませんでした。"
-
-        # 暴風: if player's next_move_can_jump already True, skip
-        if card.name == "暴風" and getattr(player, 'next_move_can_jump', False):
-            return False, "AI: 暴風は既に効果があるため使用しませんでした。"
+        # Cards the AI must not waste (already active, nothing to recover, ...)
+        if card.precheck is not None:
+            err = card.precheck(self, player)
+            if err:
+                return False, f"AI: {err}"
 
-        # 錬成 special-case: AI will consume PP and perform immediate discard
-        if card.name == "錬成":
-            assert player.spend_pp(card.cost)
-            player.hand.remove_at(hand_index)
-            player.graveyard.append(card)
-            drawn = player.deck.draw()
-            if drawn:
-                player.hand.add(drawn)
-            # AI discards a random card if hand not empty
-            import random
-            if player.hand.cards:
-                player.hand.remove_at(random.randrange(len(player.hand.cards)))
-            self.log.append(f"AI: 錬成を使用しました。")
-            return True, "AI: 錬成を使用しました。"
+        # For AI, auto-resolve cards that normally create pending actions
+        hook = _AI_PREPLAY.get(card.card_id)
+        if hook is not None:
+            handled = hook(self, player, card, hand_index)
+            if handled is not None:
+                return handled
 
         # Spend PP and resolve general effects
         assert player.spend_pp(card.cost)
@@ -607,7 +687,7 @@ class Game:
         # appears before any auto-resolve logs produced while handling pending
         # actions (e.g. '灼熱' のマス選択や効果適用)。
         try:
-            self.log.append(f"AI: 『{card.name}』を使用しました。")
+            self.log.record('card', f"AI: 『{card.name}』を使用しました。", actor='black', card=card.name)
         except Exception:
             pass
         # If effect created pending (unlikely for AI), try to auto-resolve simple kinds
@@ -755,7 +835,7 @@ class Game:
                             placed = len(applied)
                             if placed:
                                 try:
-                                    self.log.append(f"AI: 灼熱で封鎖マスを適用しました: {to_place}")
+                                    self.log.record('status', f"AI: 灼熱で封鎖マスを適用しました: {to_place}", actor='black', card=card.name, coords=applied)
                                 except Exception:
                                     pass
                         if placed > 0:
@@ -832,6 +912,7 @@ class Game:
                 self.pending = None
         # move to graveyard
         player.graveyard.append(card)
+        self.emit('card', side='white' if player is self.player else 'black', index=hand_index, name=card.name)
         # Return a descriptive message; do NOT append another usage log here
         # because we already logged the AI usage above.
         return True, f"AI: 『{card.name}』を使用しました。 {msg}"
@@ -866,7 +947,7 @@ def eff_placeholder_extra_move(game: Game, player: PlayerState) -> str:
     return "チェスの追加手番を付与（仮）。"
 
 
-def make_sample_deck() -> Deck:
+def make_sample_deck(rng: Optional[random.Random] = None) -> Deck:
     """Create a tiny sample deck for demo purposes."""
     pool = [
         Card("Quick Draw", 0, eff_draw1),
@@ -878,15 +959,16 @@ def make_sample_deck() -> Deck:
         Card("Quick Draw", 0, eff_draw1),
         Card("Meditate", 1, eff_gain_pp1),
     ]
-    random.shuffle(pool)
-    return Deck(pool)
+    (rng or random).shuffle(pool)
+    return Deck(pool, rng=rng)
 
 
-def new_game_with_sample_deck() -> Game:
-    deck = make_sample_deck()
+def new_game_with_sample_deck(seed: Optional[int] = None) -> Game:
+    rng = random.Random(seed)
+    deck = make_sample_deck(rng)
     deck.shuffle()
     player = PlayerState(deck=deck)
-    game = Game(player=player)
+    game = Game(player=player, rng=rng, seed=seed)
     game.setup_battle()
     return game
 
@@ -1020,7 +1102,7 @@ def eff_graveyard_roulette(game: Game, player: PlayerState) -> str:
     if not player.graveyard:
         # 墓地が空の場合は何もしない（確認はplay_card内で行われる）
         return "墓地が空です。"
-    idx = random.randrange(len(player.graveyard))
+    idx = game.rng.randrange(len(player.graveyard))
     card = player.graveyard.pop(idx)
     player.hand.add(card)
     return f"墓地から『{card.name}』を回収。"
@@ -1038,8 +1120,7 @@ def eff_leech_pp2(game: Game, player: PlayerState) -> str:
 
 def eff_risky_gamble(game: Game, player: PlayerState) -> str:
     """命がけのギャンブル(3): 25%の確率で自分のルーク・キング以外の駒がクイーンに変わる。外れたら相手側が変わる。自ターンスキップ。"""
-    import random
-    success = random.random() < 0.25  # 25%の確率
+    success = game.rng.random() < 0.25  # 25%の確率
     
     if success:
         # 当たり: 自分のルークとキング以外の駒をクイーンに変更
@@ -1101,50 +1182,202 @@ def eff_hand_discard(game: Game, player: PlayerState) -> str:
 
 
 # ---- name normalization to avoid legacy/encoding variants ----
+_NAME_ALIASES: Dict[str, str] = {
+    "掠取": "\u6442\u53d6",  # ensure canonical '摂取'
+}
+
+
 def _normalize_card_name(name: str) -> str:
     """Normalize legacy or variant names to canonical ones.
 
-    Currently consolidates '掠取' -> '摂取'.
+    Consolidates aliases ('掠取' -> '摂取') and collapses whitespace,
+    including fullwidth spaces, so saved decks match registry names.
     """
-    mapping = {
-        "掠取": "\u6442\u53d6",  # ensure canonical '摂取'
-    }
-    return mapping.get(name, name)
-
-
-def make_rule_cards_deck() -> Deck:
-    """Create a deck containing the cards listed in the provided table."""
-    kinds = [
-        Card("灼熱", 2, eff_heat_block_tile),
-        Card("氷結", 2, eff_freeze_piece),
-        Card("暴風", 3, eff_storm_jump_once),
-        Card("迅雷", 3, eff_lightning_two_actions),
-        Card("2ドロー", 1, eff_draw2),
-        Card("錬成", 0, eff_alchemy),
-        # 墓地ルーレットは空でも使用可能にし、UIで確認を促す
-        Card("墓地ルーレット", 1, eff_graveyard_roulette),
-        Card("\u6442\u53d6", 1, eff_leech_pp2),
-        # ★以下の4枚はデッキビルド専用（ルールデッキには含めない）
-        # Card("命がけのギャンブル", 3, eff_risky_gamble),
-        # Card("負けるわけないだろwww", 4, eff_no_lose),
-        # Card("鉄壁", 2, eff_iron_wall),
-        # Card("ハンです☆", 2, eff_hand_discard),
-    ]
-    pool = []
-    for c in kinds:
-        pool.extend([Card(c.name, c.cost, c.effect, getattr(c, 'precheck', None)) for _ in range(3)])
-    # Normalize any legacy variants just in case
-    for c in pool:
-        c.name = _normalize_card_name(c.name)
-    random.shuffle(pool)
-    return Deck(pool)
-
-
-def new_game_with_rule_deck() -> Game:
-    deck = make_rule_cards_deck()
+    s = " ".join(str(name).replace("\u3000", " ").split())
+    return _NAME_ALIASES.get(s, s)
+
+
+# -----------------------------
+# Card registry
+# -----------------------------
+
+# Stable integer IDs. These are written into compact deck codes, so never
+# renumber an existing card; append new ones instead.
+CARD_HEAT = 1
+CARD_FREEZE = 2
+CARD_STORM = 3
+CARD_LIGHTNING = 4
+CARD_DRAW2 = 5
+CARD_ALCHEMY = 6
+CARD_GRAVE_ROULETTE = 7
+CARD_LEECH = 8
+CARD_GAMBLE = 9
+CARD_NO_LOSE = 10
+CARD_IRON_WALL = 11
+CARD_HAND_DISCARD = 12
+CARD_QUICK_DRAW = 13
+CARD_MEDITATE = 14
+CARD_TACTICAL_SURGE = 15
+
+
+def pre_graveyard_not_empty(game: Game, player: PlayerState) -> Optional[str]:
+    """墓地ルーレット: 回収できるカードが無ければ使わない。"""
+    return None if player.graveyard else "墓地が空のため墓地ルーレットを使いませんでした。"
+
+
+def pre_lightning_inactive(game: Game, player: PlayerState) -> Optional[str]:
+    """迅雷: 既に連続ターンが残っていれば使わない（上書きで増えないため）。"""
+    counter = 'player_consecutive_turns' if player is game.player else 'ai_consecutive_turns'
+    return "迅雷は既に効果があるため使用しませんでした。" if getattr(game, counter, 0) >= 1 else None
+
+
+def pre_storm_inactive(game: Game, player: PlayerState) -> Optional[str]:
+    """暴風: 跳躍が既に有効なら使わない（上書きで増えないため）。"""
+    return "暴風は既に効果があるため使用しませんでした。" if getattr(player, 'next_move_can_jump', False) else None
+
+
+@dataclass(frozen=True)
+class CardSpec:
+    """Static definition of one card kind; Card instances are minted from it.
+
+    precheck refuses a play that would be wasted (checked for the AI before
+    anything is spent; the player gets a confirmation from the pre-play hook
+    instead). ai_priority orders the CPU's card preference (higher first,
+    0 = never preferred); ai_target tells the CPU what the card needs
+    ('piece', 'tile' or None).
+    """
+    card_id: int
+    name: str
+    cost: int
+    effect: EffectFn
+    precheck: Optional[PrecheckFn] = None
+    in_rule_deck: bool = False
+    in_deck_builder: bool = True
+    ai_priority: int = 0
+    ai_target: Optional[str] = None
+
+    def make(self) -> Card:
+        return Card(self.name, self.cost, self.effect, self.precheck, card_id=self.card_id)
+
+
+_CARD_SPECS: Tuple[CardSpec, ...] = (
+    CardSpec(CARD_HEAT, "灼熱", 2, eff_heat_block_tile, in_rule_deck=True, ai_priority=5, ai_target="tile"),
+    CardSpec(CARD_FREEZE, "氷結", 2, eff_freeze_piece, in_rule_deck=True, ai_priority=6, ai_target="piece"),
+    CardSpec(CARD_STORM, "暴風", 3, eff_storm_jump_once, pre_storm_inactive, in_rule_deck=True, ai_priority=4),
+    CardSpec(CARD_LIGHTNING, "迅雷", 3, eff_lightning_two_actions, pre_lightning_inactive, in_rule_deck=True, ai_priority=3),
+    CardSpec(CARD_DRAW2, "2ドロー", 1, eff_draw2, in_rule_deck=True, ai_priority=2),
+    CardSpec(CARD_ALCHEMY, "錬成", 0, eff_alchemy, in_rule_deck=True, ai_priority=1),
+    # 墓地ルーレットはプレイヤーなら空でも確認の上で使用可能（AI は使わない）
+    CardSpec(CARD_GRAVE_ROULETTE, "墓地ルーレット", 1, eff_graveyard_roulette, pre_graveyard_not_empty, in_rule_deck=True),
+    CardSpec(CARD_LEECH, "\u6442\u53d6", 1, eff_leech_pp2, in_rule_deck=True),
+    # デッキビルド専用（ルールデッキには含めない）
+    CardSpec(CARD_GAMBLE, "命がけのギャンブル", 3, eff_risky_gamble),
+    CardSpec(CARD_NO_LOSE, "負けるわけないだろwww", 4, eff_no_lose),
+    CardSpec(CARD_IRON_WALL, "鉄壁", 2, eff_iron_wall),
+    CardSpec(CARD_HAND_DISCARD, "ハンです☆", 2, eff_hand_discard),
+    # sample deck
+    CardSpec(CARD_QUICK_DRAW, "Quick Draw", 0, eff_draw1, in_deck_builder=False),
+    CardSpec(CARD_MEDITATE, "Meditate", 1, eff_gain_pp1, in_deck_builder=False),
+    CardSpec(CARD_TACTICAL_SURGE, "Tactical Surge", 2, eff_placeholder_extra_move, in_deck_builder=False),
+)
+
+CARD_REGISTRY: Dict[int, CardSpec] = {s.card_id: s for s in _CARD_SPECS}
+_NAME_TO_ID: Dict[str, int] = {s.name: s.card_id for s in _CARD_SPECS}
+_NAME_TO_ID.update({alias: _NAME_TO_ID[canon] for alias, canon in _NAME_ALIASES.items()})
+
+
+def card_id_for_name(name: str) -> int:
+    """Registry ID for a card name (aliases and spacing variants accepted); 0 if unknown."""
+    cid = _NAME_TO_ID.get(name)
+    if cid is None:
+        cid = _NAME_TO_ID.get(_normalize_card_name(name), 0)
+    return cid
+
+
+def card_spec(key) -> Optional[CardSpec]:
+    """Look up a CardSpec by integer ID or by name."""
+    if isinstance(key, int):
+        return CARD_REGISTRY.get(key)
+    return CARD_REGISTRY.get(card_id_for_name(key))
+
+
+def card_from_id(card_id: int) -> Optional[Card]:
+    """Create a fresh Card instance by registry ID; returns None for unknown IDs."""
+    spec = CARD_REGISTRY.get(card_id)
+    return spec.make() if spec is not None else None
+
+
+def card_from_name(name: str) -> Optional[Card]:
+    """Create a fresh Card instance by name; returns None for unknown names."""
+    return card_from_id(card_id_for_name(name))
+
+
+def ai_card_preference() -> List[int]:
+    """Card IDs the CPU prefers to play, most preferred first."""
+    ranked = sorted((s for s in _CARD_SPECS if s.ai_priority > 0), key=lambda s: -s.ai_priority)
+    return [s.card_id for s in ranked]
+
+
+def encode_deck(cards) -> bytes:
+    """Serialize a deck (Cards, names or IDs) to one byte per card.
+
+    Cards that are not in the registry are dropped.
+    """
+    out = bytearray()
+    for c in cards:
+        if isinstance(c, int):
+            cid = c
+        elif isinstance(c, Card):
+            cid = c.card_id or card_id_for_name(c.name)
+        else:
+            cid = card_id_for_name(c)
+        if cid in CARD_REGISTRY:
+            out.append(cid)
+    return bytes(out)
+
+
+def decode_deck(data: bytes) -> List[Card]:
+    """Inverse of encode_deck(); unknown IDs are skipped."""
+    return [CARD_REGISTRY[b].make() for b in data if b in CARD_REGISTRY]
+
+
+def encode_deck_code(cards) -> str:
+    """Text form of encode_deck() suitable for JSON files and sharing."""
+    return base64.urlsafe_b64encode(encode_deck(cards)).decode("ascii").rstrip("=")
+
+
+def decode_deck_code(code: str) -> List[Card]:
+    """Inverse of encode_deck_code()."""
+    code = code.strip()
+    return decode_deck(base64.urlsafe_b64decode(code + "=" * (-len(code) % 4)))
+
+
+# card ID -> pre-play hook used by Game.play_card (human) / Game.play_card_for (AI)
+_PLAYER_PREPLAY: Dict[int, Callable[..., Optional[Tuple[bool, str]]]] = {
+    CARD_GRAVE_ROULETTE: Game._preplay_grave_roulette,
+    CARD_LIGHTNING: Game._preplay_lightning,
+    CARD_STORM: Game._preplay_storm,
+    CARD_HEAT: Game._preplay_heat,
+    CARD_ALCHEMY: Game._preplay_alchemy,
+}
+_AI_PREPLAY: Dict[int, Callable[..., Optional[Tuple[bool, str]]]] = {
+    CARD_ALCHEMY: Game._ai_preplay_alchemy,
+}
+
+
+def make_rule_cards_deck(rng: Optional[random.Random] = None) -> Deck:
+    """Create a deck with three copies of every rule-deck card in the registry."""
+    pool = [s.make() for s in _CARD_SPECS if s.in_rule_deck for _ in range(3)]
+    (rng or random).shuffle(pool)
+    return Deck(pool, rng=rng)
+
+
+def new_game_with_rule_deck(seed: Optional[int] = None) -> Game:
+    rng = random.Random(seed)
+    deck = make_rule_cards_deck(rng)
     deck.shuffle()
     player = PlayerState(deck=deck)
-    game = Game(player=player)
+    game = Game(player=player, rng=rng, seed=seed)
     game.setup_battle()
     return game
 
@@ -1155,6 +1388,17 @@ __all__ = [
     "Hand",
     "PlayerState",
     "Game",
+    "CardSpec",
+    "CARD_REGISTRY",
+    "card_id_for_name",
+    "card_spec",
+    "card_from_id",
+    "card_from_name",
+    "ai_card_preference",
+    "encode_deck",
+    "decode_deck",
+    "encode_deck_code",
+    "decode_deck_code",
     "new_game_with_sample_deck",
     "new_game_with_rule_deck",
 ]
@@ -1,12 +1,25 @@
 # Chess engine (Piece-class based) adapted from Chess Main implementation
 from __future__ import annotations
-from typing import List, Optional, Tuple
+from typing import Callable, List, Optional, Tuple
 
 # Module-level state
 pieces: List["Piece"] = []
 en_passant_target: Optional[Tuple[int,int]] = None
 promotion_pending: Optional[dict] = None  # {'piece': Piece, 'color': str}
 
+# Observers called after every applied move / promotion (e.g. replay recording).
+# Signature: fn(kind, info) where kind is 'move' or 'promote'.
+move_listeners: List[Callable[[str, dict], None]] = []
+
+
+def _notify(kind: str, info: dict) -> None:
+    for fn in list(move_listeners):
+        try:
+            fn(kind, info)
+        except Exception:
+            # observers must never break move application
+            pass
+
 
 def _get_piece_at(pcs: List["Piece"], row: int, col: int) -> Optional["Piece"]:
     if row is None or col is None or not (0 <= row < 8 and 0 <= col < 8):
@@ -17,8 +30,8 @@ def _get_piece_at(pcs: List["Piece"], row: int, col: int) -> Optional["Piece"]:
     return None
 
 
-def get_piece_at(row: int, col: int) -> Optional["Piece"]:
-    return _get_piece_at(pieces, row, col)
+def get_piece_at(row: int, col: int, pcs: Optional[List["Piece"]] = None) -> Optional["Piece"]:
+    return _get_piece_at(pieces if pcs is None else pcs, row, col)
 
 
 class Piece:
@@ -205,11 +218,12 @@ def create_pieces() -> List[Piece]:
 pieces = create_pieces()
 
 
-def simulate_move(src_piece: Piece, to_r: int, to_c: int) -> List[Piece]:
+def simulate_move(src_piece: Piece, to_r: int, to_c: int, pcs: Optional[List[Piece]] = None) -> List[Piece]:
     # Build a new piece list representing the position after moving src_piece to (to_r,to_c)
+    # (on `pcs` when given, e.g. a speculative board, otherwise on the live board)
     new_list: List[Piece] = []
     # remove captured piece at destination
-    for p in pieces:
+    for p in (pieces if pcs is None else pcs):
         if p.row == to_r and p.col == to_c and p is not src_piece:
             continue
         if p is src_piece:
@@ -358,3 +372,30 @@ def apply_move(piece: Piece, to_r: int, to_c: int) -> None:
                     promotion_pending = {'piece': src, 'color': src.get('color') if isinstance(src, dict) else None}
                 except Exception:
                     promotion_pending = {'piece': src, 'color': None}
+
+    if move_listeners:
+        _notify('move', {
+            'from': (from_r, from_c),
+            'to': (to_r, to_c),
+            'name': getattr(src, 'name', None),
+            'color': getattr(src, 'color', None),
+        })
+
+
+def complete_promotion(name: str) -> Optional["Piece"]:
+    """Resolve the pending promotion by turning the pawn into `name` ('Q','R','B','N')."""
+    global promotion_pending
+    if promotion_pending is None:
+        return None
+    piece = promotion_pending.get('piece')
+    promotion_pending = None
+    if piece is None:
+        return None
+    piece.name = name
+    if move_listeners:
+        _notify('promote', {
+            'at': (getattr(piece, 'row', None), getattr(piece, 'col', None)),
+            'name': name,
+            'color': getattr(piece, 'color', None),
+        })
+    return piece
@@ -1,38 +1,106 @@
 
+import os
 import socket
 import threading
-import queue
 import json
 import time
+from contextlib import contextmanager
+
+try:
+    from .net_framing import FrameReader, encode_frame
+    from .net_metrics import LinkMetrics, MeteredQueue
+    from .net_protocol import DEFAULT_PROTOCOLS, ProtocolState, decode_payload
+except Exception:
+    from net_framing import FrameReader, encode_frame
+    from net_metrics import LinkMetrics, MeteredQueue
+    from net_protocol import DEFAULT_PROTOCOLS, ProtocolState, decode_payload
+
+
+# ハートビート（ping）の間隔[秒]。0 で無効
+HEARTBEAT_INTERVAL = 2.0
+# この回数分の間隔 pong が返らなければ {"type": "peer_unresponsive"} を通知する
+HEARTBEAT_MISSES = 3
+# 設定すると計測値（net_metrics.LinkMetrics.snapshot）をハートビートごとに JSONL で追記する
+METRICS_JSONL = os.environ.get('CCB_NET_METRICS') or None
+
+
+def encode_message(message, framing='line') -> bytes:
+    """1メッセージを1フレームにする（既定は NDJSON の1行＝改行付き UTF-8）。"""
+    return encode_frame(json.dumps(message, ensure_ascii=False).encode('utf-8'), framing)
+
+
+def decode_message(line: bytes):
+    """NDJSON の1行をメッセージに戻す。JSON でない行は {"type": "raw"} として返す。"""
+    try:
+        return json.loads(line.decode('utf-8'))
+    except Exception:
+        # 互換性のため、旧形式(str(dict))も許容してbest-effortでevalを使わずにパース
+        txt = line.decode('utf-8', errors='ignore').strip()
+        # かなり安全側に: 先頭/末尾が{}や[]でないものは文字列として扱う
+        if (txt.startswith('{') and txt.endswith('}')) or (txt.startswith('[') and txt.endswith(']')):
+            try:
+                return json.loads(txt.replace("'", '"'))
+            except Exception:
+                return {"type": "raw", "data": txt}
+        return {"type": "raw", "data": txt}
+
 
 class NetworkManager:
     """
     安全・安定化したネットワーク管理クラス
     - ホスト/クライアント両対応（is_hostで切替）
-    - JSON + 改行区切り (NDJSON) でシリアライズ
+    - JSON + 改行区切り (NDJSON) でシリアライズ（framing='length' で4バイト長プレフィックス）
+    - hello で protocols を提示し、双方が bin1 に対応していれば move/card/moved を
+      struct のバイナリで送る（net_protocol 参照。旧版の相手とは NDJSON のまま）
+    - 受信は再利用バッファへの recv_into + net_framing.FrameReader（バースト受信でもコピーは線形）
     - 受信は専用スレッドで行い、queue に積む
     - タイムアウト/例外処理/切断検知を実装
+    - 送信は TCP_NODELAY（Nagle 無効）＋送信キュー。send() は積むだけで、送信スレッドが起きた時点で
+      溜まっている分をまとめて1回の sendall で送る（待ち時間は足さないので単発の指し手は即送信）。
+      カード解決の連続メッセージなどは with batch(): の中で送ると、ブロックを抜けたときに1回で出る。
+      ターンの区切りでは flush() で送信完了まで待てる
+    - ping/pong ハートビートで RTT・ジッタを計測し、送受信量と recv_queue の滞留
+      （深さ・待ち時間）と合わせて self.metrics に集計（snapshot() / dump()）。
+      pong が返らなくなったら {"type": "peer_unresponsive"} を recv_queue に積む
     既存コードと互換性のある public API:
       - __init__(host='localhost', port=50007, is_host=True)
       - start()
       - send(message: dict|list|str|int|float|bool|None)
+      - batch() / flush(timeout=1.0)
       - close()
       - recv_queue (queue.Queue): 受信メッセージを取り出す
     """
-    def __init__(self, host='localhost', port=50007, is_host=True, connect_timeout=5.0, retry=10):
+    def __init__(self, host='localhost', port=50007, is_host=True, connect_timeout=5.0, retry=10, framing='line',
+                 protocols=DEFAULT_PROTOCOLS, heartbeat=HEARTBEAT_INTERVAL, metrics_path=METRICS_JSONL):
         self.host = host
         self.port = port
         self.is_host = is_host
         self.sock = None        # listening socket (host only)
         self.conn = None        # connected socket
-        self.recv_queue = queue.Queue()
+        self.metrics = LinkMetrics(jsonl_path=metrics_path)
+        self.recv_queue = MeteredQueue(self.metrics)
         self.running = False
         self._recv_thread = None
         self._accept_thread = None
         self._connect_timeout = connect_timeout
         self._retry = retry
         self._send_lock = threading.Lock()
+        # 送信キュー（エンコード済みフレーム）。_send_lock で保護し、送信スレッドへは _send_cond で通知
+        self._send_cond = threading.Condition(self._send_lock)
+        self._out = []
+        self._queued = 0        # これまでに積んだメッセージ数
+        self._written = 0       # そのうち sendall し終えた数
+        self._hold = 0          # batch() の入れ子数。0 に戻るまで送信スレッドは待つ
+        self._flush_now = False   # flush(): batch() 中でもすぐ送る
+        self._writer_conn = None  # 送信スレッドが担当している接続（終了後は None）
         self.last_error = None
+        # 'line' (NDJSON) / 'length' (4バイト長 + 本文)。両端で同じ値にする（握手後は交渉結果に従う）
+        self.framing = framing
+        self.protocol = ProtocolState(protocols, framing)
+        self.heartbeat = heartbeat
+        # 相手が ping に答えるか（hello / welcome / resumed の "heartbeat"。旧版の相手には ping を送らない）
+        self._peer_heartbeat = False
+        self._stop = threading.Event()
 
     def start(self):
         if self.is_host:
@@ -62,13 +130,10 @@ class NetworkManager:
             while self.running and self.conn is None:
                 try:
                     conn, addr = self.sock.accept()
-                    self.conn = conn
-                    self.conn.settimeout(1.0)
-                    # 受信開始
-                    self._recv_thread = threading.Thread(target=self._recv_loop, daemon=True)
-                    self._recv_thread.start()
+                    conn.settimeout(1.0)
+                    self._attach(conn)
                     # 相手に握手メッセージ
-                    self.send({"type": "hello", "role": "host"})
+                    self.send(self._hello("host"))
                     break
                 except socket.timeout:
                     continue
@@ -91,53 +156,64 @@ class NetworkManager:
                 s.settimeout(self._connect_timeout)
                 s.connect((self.host, self.port))
                 s.settimeout(1.0)
-                self.conn = s
-                # 受信開始
-                self._recv_thread = threading.Thread(target=self._recv_loop, daemon=True)
-                self._recv_thread.start()
+                self._attach(s)
                 # 握手
-                self.send({"type": "hello", "role": "client"})
+                self.send(self._hello("client"))
                 return
             except Exception as e:
                 self.last_error = f'接続リトライ{attempts}: {e}'
                 print(self.last_error)
                 time.sleep(1.0)
 
+    def _attach(self, conn):
+        """接続済みソケットを使い始める（TCP_NODELAY、送信・受信スレッドの開始）。"""
+        try:
+            # 小さなメッセージを Nagle で溜めない（まとめるのは送信キューの役目）
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass
+        with self._send_cond:
+            self._out = []
+            self._writer_conn = conn
+        self.conn = conn
+        threading.Thread(target=self._send_loop, args=(conn,), daemon=True).start()
+        # 受信開始
+        self._recv_thread = threading.Thread(target=self._recv_loop, daemon=True)
+        self._recv_thread.start()
+
+    def _hello(self, role):
+        return dict({"type": "hello", "role": role, "heartbeat": True}, **self.protocol.hello_fields())
+
     # --- Common recv loop ---
     def _recv_loop(self):
-        buffer = b""
+        reader = FrameReader(self.framing)
+        if self.heartbeat > 0:
+            threading.Thread(target=self._heartbeat_loop, args=(self.conn,), daemon=True).start()
         try:
             while self.running and self.conn:
                 try:
-                    data = self.conn.recv(4096)
-                    if not data:
-                        # 相手が切断
-                        self.recv_queue.put({"type": "disconnect"})
+                    n = reader.recv_into(self.conn)
+                    if n == 0:
+                        # 相手が切断（close() による shutdown なら通知しない）
+                        if self.running:
+                            self.recv_queue.put({"type": "disconnect"})
                         break
-                    buffer += data
-                    while b"\n" in buffer:
-                        line, buffer = buffer.split(b"\n", 1)
-                        if not line:
-                            continue
-                        try:
-                            msg = json.loads(line.decode('utf-8'))
-                        except Exception:
-                            # 互換性のため、旧形式(str(dict))も許容してbest-effortでevalを使わずにパース
-                            txt = line.decode('utf-8', errors='ignore').strip()
-                            # かなり安全側に: 先頭/末尾が{}や[]でないものは文字列として扱う
-                            if (txt.startswith('{') and txt.endswith('}')) or (txt.startswith('[') and txt.endswith(']')):
-                                try:
-                                    msg = json.loads(txt.replace("'", '"'))
-                                except Exception:
-                                    msg = {"type": "raw", "data": txt}
-                            else:
-                                msg = {"type": "raw", "data": txt}
-                        self.recv_queue.put(msg)
+                    self.metrics.on_recv(n, 0)
+                    while True:
+                        # 相手がまだ形式を切り替えうる間は1行ずつ（切替通知の後ろは新形式のバイト列）
+                        batch = reader.frames(1 if self.protocol.recv_may_switch else None)
+                        if not batch:
+                            break
+                        for frame in batch:
+                            if frame:
+                                self._handle_frame(frame, reader)
                 except socket.timeout:
                     continue
         except Exception as e:
-            self.last_error = f'recvエラー: {e}'
-            print(self.last_error)
+            # close() 後のエラーは正常終了として扱う
+            if self.running:
+                self.last_error = f'recvエラー: {e}'
+                print(self.last_error)
         finally:
             # クリーンアップ
             if self.conn:
@@ -151,33 +227,172 @@ class NetworkManager:
                     pass
             self.conn = None
             self.running = False
+            with self._send_cond:
+                self._send_cond.notify_all()
             # テスト用
 
+    def _handle_frame(self, frame, reader):
+        msg = decode_payload(frame)
+        self.metrics.on_recv(0)
+        kind = msg.get("type") if isinstance(msg, dict) else None
+        if kind == "proto":
+            # 相手の送信形式の切替通知（アプリには渡さない）
+            if self.protocol.on_proto(msg):
+                reader.mode = self.protocol.recv_framing
+            return
+        if kind == "ping":
+            self.send({"type": "pong", "id": msg.get("id")})
+            return
+        if kind == "pong":
+            self.metrics.on_pong(msg)
+            return
+        if kind in ("hello", "welcome", "resumed"):
+            # ゲームサーバーは hello ではなく welcome / resumed で heartbeat を知らせてくる
+            self._peer_heartbeat = self._peer_heartbeat or bool(msg.get("heartbeat"))
+        if kind == "hello":
+            marker = self.protocol.on_peer_hello(msg)
+            if marker is not None:
+                self._switch_send(marker)
+        self.recv_queue.put(msg)
+
+    def _heartbeat_loop(self, conn):
+        """接続中、heartbeat 秒ごとに ping を送り、無応答の検知と計測値のダンプを行う。"""
+        interval = self.heartbeat
+        flagged = False
+        while not self._stop.wait(interval):
+            if not self.running or self.conn is not conn:
+                break
+            if self._peer_heartbeat:
+                silent = self.metrics.unanswered_for()
+                if silent > interval * HEARTBEAT_MISSES:
+                    if not flagged:
+                        flagged = True
+                        self.recv_queue.put({"type": "peer_unresponsive", "seconds": round(silent, 3)})
+                else:
+                    flagged = False
+                self.send(self.metrics.ping())
+            if self.metrics.jsonl_path:
+                self.metrics.dump()
+
+    def _switch_send(self, marker):
+        if not self.conn:
+            return
+        try:
+            with self._send_lock:
+                # 通知は旧形式で積み、以降に積むものから新形式（キューの順序どおりに届く）
+                self._enqueue(self.protocol.encode(marker))
+                self.protocol.switch_send(marker)
+        except Exception as e:
+            self.last_error = f'送信エラー: {e}'
+            print(self.last_error)
+
+    def _enqueue(self, data):
+        # _send_lock を持った状態で呼ぶ
+        if not self._out:
+            self._send_cond.notify_all()
+        self._out.append(data)
+        self._queued += 1
+
+    def _send_loop(self, conn):
+        """送信スレッド: キューに溜まったフレームをまとめて1回の sendall で送る。"""
+        cond = self._send_cond
+        try:
+            while True:
+                with cond:
+                    # 起きた時点で溜まっている分をすべて取る（タイマーで待たない）
+                    while ((not self._out or (self._hold and not self._flush_now))
+                           and self.conn is conn and self.running):
+                        cond.wait(1.0)
+                    if not self._out:
+                        break
+                    chunks, self._out = self._out, []
+                    self._flush_now = False
+                conn.sendall(chunks[0] if len(chunks) == 1 else b"".join(chunks))
+                self.metrics.on_write()
+                with cond:
+                    self._written += len(chunks)
+                    cond.notify_all()
+        except Exception as e:
+            self.last_error = f'送信エラー: {e}'
+            print(self.last_error)
+        finally:
+            with cond:
+                if self._writer_conn is conn:
+                    self._writer_conn = None
+                    self._out = []
+                cond.notify_all()
+
     # --- Send ---
     def send(self, message):
+        """message を送信キューに積む（送信は送信スレッド。batch() の外なら待たずに送られる）。"""
         conn = self.conn
         if not conn:
             return False
         try:
             with self._send_lock:
-                payload = json.dumps(message, ensure_ascii=False).encode('utf-8') + b"\n"
-                conn.sendall(payload)
+                if self._writer_conn is not conn:
+                    return False
+                data = self.protocol.encode(message)
+                self._enqueue(data)
+            self.metrics.on_send(len(data))
             return True
         except Exception as e:
             self.last_error = f'送信エラー: {e}'
             print(self.last_error)
             return False
 
+    @contextmanager
+    def batch(self):
+        """ブロック内の send() をまとめて、抜けたときに1回の sendall で送る（カード解決の連続メッセージなど）。"""
+        with self._send_cond:
+            self._hold += 1
+        try:
+            yield self
+        finally:
+            with self._send_cond:
+                self._hold -= 1
+                if not self._hold:
+                    self._send_cond.notify_all()
+
+    def flush(self, timeout=1.0):
+        """ここまでに積んだメッセージをすぐ送り、ソケットに書き終えるまで待つ（ターンの区切りなど）。
+
+        timeout 秒以内に書き終えれば True。接続がない・送信に失敗した場合は False。
+        """
+        cond = self._send_cond
+        with cond:
+            target = self._queued
+            if self._written >= target:
+                return True
+            conn = self._writer_conn
+            self._flush_now = True
+            cond.notify_all()
+            cond.wait_for(lambda: self._written >= target or self._writer_conn is not conn, timeout)
+            return self._written >= target
+
     def close(self):
+        # 積んである分は送ってから閉じる
+        if self.conn:
+            self.flush(1.0)
         self.running = False
+        self._stop.set()
+        with self._send_cond:
+            self._send_cond.notify_all()
+        self.metrics.close()
         # close order: conn then sock
-        if self.conn:
+        conn = self.conn
+        if conn:
+            # 先に shutdown して受信スレッドを抜けさせ、終わってから fd を閉じる
+            # （recv_into 中に close すると EBADF になる）
             try:
-                self.conn.shutdown(socket.SHUT_RDWR)
+                conn.shutdown(socket.SHUT_RDWR)
             except Exception:
                 pass
+            t = self._recv_thread
+            if t is not None and t is not threading.current_thread():
+                t.join(2.0)
             try:
-                self.conn.close()
+                conn.close()
             except Exception:
                 pass
             self.conn = None
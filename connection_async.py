@@ -0,0 +1,396 @@
+import asyncio
+import threading
+
+try:
+    from .connection import HEARTBEAT_INTERVAL, HEARTBEAT_MISSES, METRICS_JSONL
+    from .net_framing import LENGTH_PREFIX, MAX_FRAME, FrameError
+    from .net_metrics import LinkMetrics, MeteredQueue
+    from .net_protocol import DEFAULT_PROTOCOLS, ProtocolState, decode_payload
+    from .state_sync import StateMirror
+except Exception:
+    from connection import HEARTBEAT_INTERVAL, HEARTBEAT_MISSES, METRICS_JSONL
+    from net_framing import LENGTH_PREFIX, MAX_FRAME, FrameError
+    from net_metrics import LinkMetrics, MeteredQueue
+    from net_protocol import DEFAULT_PROTOCOLS, ProtocolState, decode_payload
+    from state_sync import StateMirror
+
+
+# 1行（1メッセージ）の上限。asyncio の既定 64KiB ではデッキ送信などで足りない
+LINE_LIMIT = MAX_FRAME
+# 切断後にセッション再開を試みる秒数（game_server.RESUME_GRACE に合わせる）と再試行間隔
+RESUME_WINDOW = 30.0
+RESUME_RETRY_INTERVAL = 0.5
+
+
+async def read_frame(reader, framing='line'):
+    """次の1フレームの本文（区切り・長さを除く）を返す。相手が切断していれば None。"""
+    if framing == 'length':
+        try:
+            head = await reader.readexactly(LENGTH_PREFIX.size)
+        except asyncio.IncompleteReadError as e:
+            if not e.partial:
+                return None
+            raise
+        (n,) = LENGTH_PREFIX.unpack(head)
+        if n > MAX_FRAME:
+            raise FrameError(f"frame too large: {n}")
+        return await reader.readexactly(n)
+    line = await reader.readline()
+    if not line:
+        return None
+    return line[:-1] if line.endswith(b"\n") else line
+
+
+class EventLoopThread:
+    """
+    asyncio のイベントループを1本のデーモンスレッドで回す。
+    接続ごとにスレッドを作らず、同じプロセス内の全 AsyncNetworkManager がこのループを共有する。
+      - submit(coro): ループ上でコルーチンを実行（concurrent.futures.Future を返す）
+      - call_soon(fn, *args): ループ上で fn を呼ぶ（どのスレッドからでも可）
+    """
+    def __init__(self, name='net-loop'):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def in_loop_thread(self):
+        return threading.get_ident() == self._thread.ident
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, fn, *args):
+        if self.in_loop_thread():
+            fn(*args)
+        else:
+            self.loop.call_soon_threadsafe(fn, *args)
+
+    def stop(self):
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=1.0)
+
+
+_shared_loop = None
+_shared_lock = threading.Lock()
+
+
+def shared_loop():
+    """プロセス共有のネットワーク用イベントループ（初回呼び出しで起動）。"""
+    global _shared_loop
+    with _shared_lock:
+        if _shared_loop is None or not _shared_loop._thread.is_alive():
+            _shared_loop = EventLoopThread()
+        return _shared_loop
+
+
+class AsyncNetworkManager:
+    """
+    asyncio ストリームで動く NetworkManager（connection.NetworkManager と同じ public API）
+      - __init__(host='localhost', port=50007, is_host=True)
+      - start()
+      - send(message)
+      - close()
+      - recv_queue (queue.Queue): 受信メッセージを取り出す
+    accept / 接続リトライ / 受信はすべて共有イベントループ上のタスクで行い、ポーリング用の
+    タイムアウトを持たないので、切断検知と close() は即座に反映される。
+    pygame 側への橋渡し: recv_queue はスレッドセーフ。event_type を渡すと受信のたびに
+    その型の pygame イベントを post するので、イベント待ちで止まっているメインループもすぐ起きる。
+    送信形式は hello の protocols で交渉する（net_protocol。双方 bin1 なら move/card/moved はバイナリ）。
+    クライアントとして game_server に繋いだ場合、接続が切れても resume_window 秒のあいだ
+    セッショントークンで再接続し、取りこぼしたメッセージだけを受け取り直す
+    （recv_queue には {"type": "reconnecting"} → {"type": "resumed", ...} が届く。
+    諦めたときだけ {"type": "disconnect"}）。再接続中の send() は False を返す。
+    pong が返らなくなった（{"type": "peer_unresponsive"}）ときも、再開できるセッションがあれば
+    自分から接続を切って再接続する（Wi-Fi 切替などで半開きになった接続は EOF が来ないため）。
+    計測（ping/pong の RTT・ジッタ、送受信量、recv_queue の滞留）は connection.NetworkManager と同じく
+    self.metrics に集まる。
+    game_server の snapshot / delta は self.state（state_sync.StateMirror）に適用してから recv_queue に渡す。
+    連番の抜けやハッシュ不一致で食い違ったら自動で {"type": "resync"} を送り、次の snapshot で復旧する。
+    """
+    def __init__(self, host='localhost', port=50007, is_host=True, connect_timeout=5.0, retry=10,
+                 event_type=None, loop=None, hello=None, framing='line', protocols=DEFAULT_PROTOCOLS,
+                 resume_window=RESUME_WINDOW, heartbeat=HEARTBEAT_INTERVAL, metrics_path=METRICS_JSONL):
+        self.host = host
+        self.port = port
+        self.is_host = is_host
+        self.metrics = LinkMetrics(jsonl_path=metrics_path)
+        self.recv_queue = MeteredQueue(self.metrics)
+        self.running = False
+        self.last_error = None
+        self.event_type = event_type
+        # 握手メッセージに足す項目（game_server への {"room": ...} など）
+        self.hello = dict(hello or {})
+        # 'line' (NDJSON) / 'length' (4バイト長 + 本文)。両端で同じ値にする（握手後は交渉結果に従う）
+        self.framing = framing
+        self._protocols = tuple(protocols)
+        self.protocol = ProtocolState(protocols, framing)
+        # game_server の welcome で受け取るセッショントークンと、受信済みメッセージの通し番号
+        self.session = None
+        self.seq = 0
+        # サーバの公開状態のミラー（snapshot / delta を適用）と、resync の応答待ちか
+        self.state = StateMirror()
+        self._resync_pending = False
+        # 切断後、この秒数のあいだ再接続（セッション再開）を試みる。0 で無効
+        self.resume_window = resume_window
+        self.heartbeat = heartbeat
+        # 相手が ping に答えるか（hello / welcome の "heartbeat"）
+        self._peer_heartbeat = False
+        self._connect_timeout = connect_timeout
+        self._retry = retry
+        self._loop_thread = loop
+        self._task = None
+        self._server = None
+        self._writer = None
+        self._listening = threading.Event()
+
+    @property
+    def connected(self):
+        return self._writer is not None
+
+    def start(self):
+        if self._loop_thread is None:
+            self._loop_thread = shared_loop()
+        self.running = True
+        self._loop_thread.call_soon(self._spawn)
+
+    def wait_listening(self, timeout=None):
+        """ホスト: bind が終わるまで待つ（port=0 のとき実際のポートが self.port に入る）。"""
+        return self._listening.wait(timeout)
+
+    def _spawn(self):
+        if self.running:
+            self._task = asyncio.ensure_future(self._main())
+
+    async def _main(self):
+        try:
+            if self.is_host:
+                await self._run_host()
+            else:
+                await self._run_client()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await self._cleanup()
+
+    # --- Host side ---
+    async def _run_host(self):
+        accepted = asyncio.get_running_loop().create_future()
+
+        def on_client(reader, writer):
+            if accepted.done():
+                # listen(1) 相当: 2人目以降は受け付けない
+                writer.close()
+                return
+            accepted.set_result((reader, writer))
+
+        try:
+            self._server = await asyncio.start_server(on_client, self.host, self.port, limit=LINE_LIMIT)
+        except Exception as e:
+            self.last_error = f'ホスト初期化エラー: {e}'
+            print(self.last_error)
+            self._listening.set()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._listening.set()
+        reader, writer = await accepted
+        self._server.close()
+        if await self._serve(reader, writer, "host"):
+            self._deliver({"type": "disconnect"})
+
+    # --- Client side ---
+    async def _run_client(self):
+        loop = asyncio.get_running_loop()
+        attempts = 0
+        lost = False
+        deadline = None     # 切断後の再接続の締め切り（loop.time()）
+        while self.running:
+            if deadline is None and 0 < self._retry <= attempts:
+                break
+            if deadline is not None and loop.time() >= deadline:
+                break
+            attempts += 1
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port, limit=LINE_LIMIT), self._connect_timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                self.last_error = f'接続リトライ{attempts}: {e}'
+                print(self.last_error)
+                await asyncio.sleep(1.0 if deadline is None else RESUME_RETRY_INTERVAL)
+                continue
+            lost = await self._serve(reader, writer, "client")
+            if not lost or self.session is None or self.resume_window <= 0:
+                break
+            # サーバが席を保持している間に、セッショントークンと受信済み seq で再接続する
+            deadline = loop.time() + self.resume_window
+            self._deliver({"type": "reconnecting", "grace": self.resume_window})
+        if lost:
+            self._deliver({"type": "disconnect"})
+
+    # --- Common recv loop ---
+    async def _serve(self, reader, writer, role):
+        """1本の接続を読み切る。相手側の切断・通信エラーなら True（close() による中断は CancelledError）。"""
+        self._writer = writer
+        # 接続ごとに形式を交渉し直す
+        self.protocol = ProtocolState(self._protocols, self.framing)
+        # 相手に握手メッセージ
+        hello = dict({"type": "hello", "role": role, "heartbeat": True, **self.protocol.hello_fields()},
+                     **self.hello)
+        if self.session is not None:
+            hello.update(session=self.session, last_seq=self.seq)
+        self.send(hello)
+        self._peer_heartbeat = False
+        beat = asyncio.ensure_future(self._heartbeat(writer)) if self.heartbeat > 0 else None
+        try:
+            while True:
+                frame = await read_frame(reader, self.protocol.recv_framing)
+                if frame is None:
+                    # 相手が切断
+                    return True
+                # 長さプレフィックス/改行のぶんも含めて数える
+                self.metrics.on_recv(len(frame) + (4 if self.protocol.recv_framing == 'length' else 1))
+                if frame:
+                    self._on_frame(frame)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            self.last_error = f'recvエラー: {e}'
+            print(self.last_error)
+            return True
+        finally:
+            if beat is not None:
+                beat.cancel()
+            if self._writer is writer:
+                self._writer = None
+            writer.close()
+
+    async def _heartbeat(self, writer):
+        """接続中、heartbeat 秒ごとに ping を送り、無応答の検知と計測値のダンプを行う。"""
+        interval = self.heartbeat
+        flagged = False
+        while True:
+            await asyncio.sleep(interval)
+            if self._peer_heartbeat:
+                silent = self.metrics.unanswered_for()
+                if silent > interval * HEARTBEAT_MISSES:
+                    if not flagged:
+                        flagged = True
+                        self._deliver({"type": "peer_unresponsive", "seconds": round(silent, 3)})
+                        if self.session is not None and self.resume_window > 0:
+                            # 半開きの接続は EOF が来ないので自分から切り、セッション再開を始める
+                            writer.transport.abort()
+                            return
+                else:
+                    flagged = False
+                self._write(self.metrics.ping())
+            if self.metrics.jsonl_path:
+                self.metrics.dump()
+
+    def _on_frame(self, frame):
+        msg = decode_payload(frame)
+        kind = msg.get("type") if isinstance(msg, dict) else None
+        if kind == "proto":
+            # 相手の送信形式の切替通知（アプリには渡さない）。次のフレームから新形式で読む
+            self.protocol.on_proto(msg)
+            return
+        if kind == "ping":
+            self._write({"type": "pong", "id": msg.get("id")})
+            return
+        if kind == "pong":
+            self.metrics.on_pong(msg)
+            return
+        if kind in ("hello", "welcome", "resumed"):
+            self._peer_heartbeat = self._peer_heartbeat or bool(msg.get("heartbeat"))
+        if kind in ("welcome", "resumed"):
+            # game_server のセッション: 以降のメッセージは seq+1, seq+2, ... と数える
+            if kind == "welcome":
+                self.state = StateMirror()
+                self._resync_pending = False
+            self.session = msg.get("session", self.session)
+            self.seq = msg.get("seq", self.seq)
+        elif kind == "error" and msg.get("reason") == "unknown_session":
+            self.session = None
+        elif kind != "hello":
+            self.seq += 1
+        if kind in ("snapshot", "delta"):
+            self._sync(msg)
+        if kind == "hello":
+            marker = self.protocol.on_peer_hello(msg)
+            if marker is not None:
+                # 通知は旧形式で送り、以降の送信から新形式（送信はすべてループ上なので順序が保たれる）
+                self._write(marker)
+                self.protocol.switch_send(marker)
+        self._deliver(msg)
+
+    def _sync(self, msg):
+        if msg.get("type") == "snapshot":
+            self._resync_pending = False
+        if self.state.apply(msg):
+            self._resync_pending = False
+        elif not self._resync_pending:
+            # 食い違いはその場で検出できるので、snapshot が届くまで1回だけ要求する
+            self._resync_pending = True
+            self._write(self.state.resync_request())
+
+    def _deliver(self, msg):
+        self.recv_queue.put(msg)
+        if self.event_type is not None:
+            try:
+                import pygame
+                pygame.event.post(pygame.event.Event(self.event_type, message=msg))
+            except Exception:
+                # pygame 未初期化（サーバ/テスト）ならキューだけで十分
+                pass
+
+    async def _cleanup(self):
+        self.running = False
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        self._listening.set()
+
+    # --- Send ---
+    def send(self, message):
+        if self._writer is None:
+            return False
+        # 符号化もループ上で行う（握手後の形式切替と送信順を揃えるため）
+        self._loop_thread.call_soon(self._write, message)
+        return True
+
+    def _write(self, message):
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            return
+        try:
+            data = self.protocol.encode(message)
+            writer.write(data)
+            self.metrics.on_send(len(data))
+        except Exception as e:
+            self.last_error = f'送信エラー: {e}'
+            print(self.last_error)
+
+    def close(self, timeout=1.0):
+        self.running = False
+        if self._loop_thread is None:
+            return
+        done = threading.Event()
+
+        def cancel():
+            if self._task is not None and not self._task.done():
+                self._task.add_done_callback(lambda _t: done.set())
+                self._task.cancel()
+            else:
+                done.set()
+
+        self._loop_thread.call_soon(cancel)
+        if not self._loop_thread.in_loop_thread():
+            done.wait(timeout)
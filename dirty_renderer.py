@@ -0,0 +1,128 @@
+"""
+Dirty-rectangle frame renderer for the pygame UI.
+
+The main loop used to repaint and flip the whole window every frame. The
+DirtyRenderer instead collects the screen regions that changed since the last
+frame (named layers such as 'board', 'hand', 'log', or raw rects) and, only
+when something is dirty, repaints with the surface clipped to those regions
+and pushes just those rects with ``pygame.display.update(rects)``. A frame in
+which nothing changed costs no drawing at all.
+
+Changes are detected three ways:
+- explicit ``invalidate()`` calls (input events, resizes);
+- ``track(signature)``: any change in a cheap tuple of render-relevant state
+  invalidates the whole frame;
+- ``animate(rects)``: regions with time-based content (GIFs, telops) are
+  redrawn every frame while active and once more after they stop.
+
+A periodic full refresh is kept as a safety net for state that is not part
+of the signature.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import time
+
+import pygame
+
+
+class DirtyRenderer:
+    def __init__(self, full_refresh_interval: float = 1.0) -> None:
+        self.full_refresh_interval = full_refresh_interval
+        self.regions: Dict[str, pygame.Rect] = {}
+        self._size: Optional[tuple] = None
+        self._dirty: List[pygame.Rect] = []
+        self._full = True
+        self._signature: Any = None
+        self._animated: List[pygame.Rect] = []
+        self._animated_full = False
+        self._last_full = 0.0
+        # counters for profiling / tests
+        self.frames_drawn = 0
+        self.frames_skipped = 0
+
+    # ---- invalidation ----
+    def set_regions(self, size, regions: Dict[str, Any]) -> None:
+        """Register named layer rects for the current window `size`."""
+        size = tuple(size)
+        if size != self._size:
+            self._size = size
+            self._full = True
+        self.regions = {k: pygame.Rect(v) for k, v in regions.items()}
+
+    def invalidate(self, *names: str) -> None:
+        """Mark named regions dirty; with no names the whole frame is dirty."""
+        if not names:
+            self._full = True
+            return
+        for n in names:
+            r = self.regions.get(n)
+            if r is None:
+                self._full = True
+            else:
+                self._dirty.append(r)
+
+    def invalidate_rect(self, rect) -> None:
+        self._dirty.append(pygame.Rect(rect))
+
+    def track(self, signature: Any) -> None:
+        """Invalidate the whole frame when `signature` differs from last frame's."""
+        if signature != self._signature:
+            self._signature = signature
+            self._full = True
+
+    def animate(self, rects: Optional[Iterable[Any]]) -> None:
+        """Regions with time-based content this frame; None means the whole frame."""
+        if rects is None:
+            self._full = True
+            current: List[pygame.Rect] = []
+        else:
+            current = [pygame.Rect(r) for r in rects]
+            self._dirty.extend(current)
+            if self._animated_full:
+                # a full-frame animation (e.g. a telop) just ended: erase it everywhere
+                self._full = True
+        # regions that stopped animating need one more repaint to erase them
+        self._dirty.extend(r for r in self._animated if r not in current)
+        self._animated = current
+        self._animated_full = rects is None
+
+    # ---- drawing ----
+    def pending_rects(self, surface: pygame.Surface, now: Optional[float] = None) -> List[pygame.Rect]:
+        now = time.time() if now is None else now
+        if self._full or now - self._last_full >= self.full_refresh_interval:
+            return [surface.get_rect()]
+        bounds = surface.get_rect()
+        rects = [r.clip(bounds) for r in self._dirty]
+        return [r for r in rects if r.width > 0 and r.height > 0]
+
+    def render(self, surface: pygame.Surface, draw_fn: Callable[[], Any], now: Optional[float] = None) -> List[pygame.Rect]:
+        """Repaint the dirty regions with `draw_fn` and update them on screen.
+
+        Returns the rects pushed to the display ([] when nothing was dirty).
+        """
+        now = time.time() if now is None else now
+        rects = self.pending_rects(surface, now)
+        self._dirty = []
+        if not rects:
+            self.frames_skipped += 1
+            return []
+        full = len(rects) == 1 and rects[0] == surface.get_rect()
+        if full:
+            self._full = False
+            self._last_full = now
+            draw_fn()
+            pygame.display.flip()
+        else:
+            clip = rects[0].unionall(rects[1:])
+            surface.set_clip(clip)
+            try:
+                draw_fn()
+            finally:
+                surface.set_clip(None)
+            pygame.display.update(rects)
+        self.frames_drawn += 1
+        return rects
+
+
+__all__ = ["DirtyRenderer"]
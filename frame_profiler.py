@@ -0,0 +1,214 @@
+"""
+Per-frame timing for the pygame UI: phases, spans, overlay and JSONL sink.
+
+Two kinds of measurements are collected for each frame:
+
+- phases (``lap(name)``): consecutive sections that partition the frame.
+  Each lap records the time since the previous lap, so the phases of a
+  frame add up to its total (events, draw.*, present, logic, ...).
+- spans (``span(name)`` / ``@timed(name)``): inclusive timings of hot
+  calls that may happen anywhere in the frame (move generation, AI, asset
+  loads, text rendering), with a call count. Re-entrant calls of the same
+  span are only counted once.
+
+When the profiler is disabled every hook is a single attribute check; span()
+returns a shared no-op context manager. Only the thread that created the
+profiler (the UI thread) is measured; calls from worker threads run untimed.
+
+Finished frames go to a rolling history used by ``draw_overlay`` and, when a
+path is given, are appended to a JSONL file (one object per frame).
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, TextIO
+import functools
+import json
+import threading
+import time
+
+import pygame
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> bool:
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('prof', 'name', 't0')
+
+    def __init__(self, prof: "FrameProfiler", name: str) -> None:
+        self.prof = prof
+        self.name = name
+        self.t0 = 0.0
+
+    def __enter__(self) -> None:
+        self.t0 = self.prof._enter(self.name)
+
+    def __exit__(self, *exc: Any) -> bool:
+        self.prof._exit(self.name, self.t0)
+        return False
+
+
+class FrameProfiler:
+    def __init__(self, enabled: bool = False, jsonl_path: Optional[str] = None, history: int = 120) -> None:
+        self.enabled = enabled
+        self.jsonl_path = jsonl_path
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self.frame_no = 0
+        self._sink: Optional[TextIO] = None
+        self._frame_start: Optional[float] = None
+        self._last_lap = 0.0
+        self._phases: Dict[str, float] = {}
+        self._spans: Dict[str, float] = {}
+        self._calls: Dict[str, int] = {}
+        self._active: Dict[str, int] = {}
+        self._thread_id = threading.get_ident()
+
+    # ---- control ----
+    def toggle(self) -> bool:
+        self.enabled = not self.enabled
+        self._frame_start = None
+        if not self.enabled:
+            self.close()
+        return self.enabled
+
+    def close(self) -> None:
+        if self._sink is not None:
+            try:
+                self._sink.close()
+            finally:
+                self._sink = None
+
+    # ---- frame boundaries ----
+    def next_frame(self) -> None:
+        """Close the running frame (its tail becomes the 'idle' phase) and start a new one."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self._phases['idle'] = self._phases.get('idle', 0.0) + (now - self._last_lap)
+            self._finish(now)
+        self._frame_start = self._last_lap = now
+        self._phases, self._spans, self._calls = {}, {}, {}
+
+    def lap(self, name: str) -> None:
+        """Charge the time since the previous lap to phase `name`."""
+        if not self.enabled or self._frame_start is None:
+            return
+        now = time.perf_counter()
+        self._phases[name] = self._phases.get(name, 0.0) + (now - self._last_lap)
+        self._last_lap = now
+
+    # ---- spans ----
+    def span(self, name: str):
+        if not self.enabled or threading.get_ident() != self._thread_id:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name: str) -> Callable[[Callable], Callable]:
+        """Decorator form of span(); checks `enabled` on every call."""
+        def deco(fn: Callable) -> Callable:
+            @functools.wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not self.enabled or threading.get_ident() != self._thread_id:
+                    return fn(*args, **kwargs)
+                t0 = self._enter(name)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self._exit(name, t0)
+            return wrapper
+        return deco
+
+    def _enter(self, name: str) -> float:
+        self._active[name] = self._active.get(name, 0) + 1
+        return time.perf_counter()
+
+    def _exit(self, name: str, t0: float) -> None:
+        depth = self._active.get(name, 1) - 1
+        self._active[name] = depth
+        if depth == 0:
+            self._spans[name] = self._spans.get(name, 0.0) + (time.perf_counter() - t0)
+            self._calls[name] = self._calls.get(name, 0) + 1
+
+    # ---- output ----
+    def _finish(self, now: float) -> None:
+        self.frame_no += 1
+        rec = {
+            'frame': self.frame_no,
+            't': time.time(),
+            'total_ms': round((now - self._frame_start) * 1000.0, 3),
+            'phases': {k: round(v * 1000.0, 3) for k, v in self._phases.items()},
+            'spans': {k: round(v * 1000.0, 3) for k, v in self._spans.items()},
+            'calls': dict(self._calls),
+        }
+        self.history.append(rec)
+        if self.jsonl_path:
+            try:
+                if self._sink is None:
+                    self._sink = open(self.jsonl_path, 'a', encoding='utf-8', buffering=1)
+                self._sink.write(json.dumps(rec) + '\n')
+            except OSError:
+                self.jsonl_path = None
+
+    def summary(self) -> Dict[str, Any]:
+        """Averages over the frame history (ms), worst frame and FPS."""
+        frames: List[Dict[str, Any]] = list(self.history)
+        if not frames:
+            return {'frames': 0, 'fps': 0.0, 'avg_ms': 0.0, 'max_ms': 0.0, 'phases': {}, 'spans': {}}
+        n = len(frames)
+        phases: Dict[str, float] = {}
+        spans: Dict[str, float] = {}
+        for rec in frames:
+            for k, v in rec['phases'].items():
+                phases[k] = phases.get(k, 0.0) + v
+            for k, v in rec['spans'].items():
+                spans[k] = spans.get(k, 0.0) + v
+        totals = [rec['total_ms'] for rec in frames]
+        avg = sum(totals) / n
+        return {
+            'frames': n,
+            'fps': 1000.0 / avg if avg > 0 else 0.0,
+            'avg_ms': avg,
+            'max_ms': max(totals),
+            'phases': {k: v / n for k, v in sorted(phases.items(), key=lambda kv: -kv[1])},
+            'spans': {k: v / n for k, v in sorted(spans.items(), key=lambda kv: -kv[1])},
+        }
+
+    OVERLAY_POS = (8, 8)
+
+    def overlay_rect(self, font, max_lines: int = 16):
+        line_h = font.get_linesize()
+        return pygame.Rect(self.OVERLAY_POS[0], self.OVERLAY_POS[1], 260, 8 + line_h * max_lines)
+
+    def draw_overlay(self, surface, font, max_lines: int = 16) -> None:
+        """Draw FPS, frame time and per-phase / per-span averages in the top-left corner."""
+        if not self.enabled:
+            return
+        s = self.summary()
+        lines = [f"FPS {s['fps']:5.1f}  avg {s['avg_ms']:6.2f} ms  max {s['max_ms']:6.2f}"]
+        lines += [f"  {k:<14s}{v:7.2f} ms" for k, v in s['phases'].items()]
+        lines += [f"* {k:<14s}{v:7.2f} ms" for k, v in s['spans'].items()]
+        lines = lines[:max_lines]
+        rect = self.overlay_rect(font, max_lines)
+        rect.height = 8 + font.get_linesize() * len(lines)
+        bg = pygame.Surface(rect.size, pygame.SRCALPHA)
+        bg.fill((0, 0, 0, 170))
+        surface.blit(bg, rect.topleft)
+        y = rect.y + 4
+        for line in lines:
+            surface.blit(font.render(line, True, (120, 255, 120)), (rect.x + 6, y))
+            y += font.get_linesize()
+
+
+__all__ = ["FrameProfiler"]
@@ -0,0 +1,61 @@
+"""
+Adaptive frame pacing for pygame screen loops.
+
+The UI loops used to run at a fixed rate (``clock.tick(60)`` / ``tick(30)``)
+even while nothing on screen could change. FrameScheduler keeps the fixed
+rate only while the caller reports something animating; otherwise it blocks
+in ``pygame.event.wait`` until input arrives or ``idle_timeout`` elapses, so
+an idle screen wakes a few times per second instead of 30-60 times.
+
+Loops keep their shape::
+
+    while True:
+        for ev in scheduler.get():      # instead of pygame.event.get()
+            ...
+        draw(); pygame.display.flip()
+        scheduler.wait(clock, 30, active=animating)   # instead of clock.tick(30)
+
+The event that ends an idle wait is held back and returned first by the next
+``get()``, so event order is preserved.
+"""
+from __future__ import annotations
+
+from typing import List
+
+import pygame
+
+
+class FrameScheduler:
+    def __init__(self, idle_timeout: float = 0.25, enabled: bool = True) -> None:
+        self.idle_timeout = idle_timeout
+        self.enabled = enabled
+        self._held: List[pygame.event.Event] = []
+        # counters for profiling / tests
+        self.active_frames = 0
+        self.idle_waits = 0
+
+    def get(self) -> List[pygame.event.Event]:
+        """Pending events, starting with any event that ended the last idle wait."""
+        events = self._held + pygame.event.get()
+        self._held = []
+        return events
+
+    def wait(self, clock: pygame.time.Clock, fps: int, active: bool = False) -> None:
+        """Pace the loop: tick at `fps` while `active`, else sleep until input or timeout."""
+        if active or not self.enabled:
+            self.active_frames += 1
+            clock.tick(fps)
+            return
+        if self._held or pygame.event.peek():
+            # input is already waiting: handle it right away
+            clock.tick()
+            return
+        self.idle_waits += 1
+        ev = pygame.event.wait(max(1, int(self.idle_timeout * 1000)))
+        if ev.type != pygame.NOEVENT:
+            self._held.append(ev)
+        # restart the clock so the next active frame is not measured from before the wait
+        clock.tick()
+
+
+__all__ = ["FrameScheduler"]
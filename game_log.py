@@ -0,0 +1,218 @@
+"""
+Structured, bounded game log for the chess-card-battle project.
+
+`Game.log` used to be a plain list of Japanese strings that grew for the
+whole match. This module replaces it with a ring buffer of typed event
+records (turn, actor, card, coordinates) while staying compatible with the
+list-style usage spread across the UI and test scripts:
+
+- `log.append("text")` still works and infers actor/card/coords from the text.
+- iterating, `len()`, indexing and slicing yield the plain text lines.
+- `log.record(kind, text, ...)` stores an explicitly structured event.
+
+Optionally every event can be streamed to a JSONL file (one JSON object per
+line) so a full match history survives even though the in-memory buffer is
+bounded.
+
+This file is pure Python and UI-agnostic so it can be tested independently.
+"""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
+import json
+import re
+import time
+
+
+DEFAULT_MAXLEN = 500
+
+# 『カード名』 and (row,col) patterns used to enrich plain-text log lines.
+_CARD_RE = re.compile(r"『([^』]+)』")
+_COORD_RE = re.compile(r"\((\d)\s*,\s*(\d)\)")
+
+
+@dataclass
+class LogEvent:
+    """A single structured log entry.
+
+    - seq: monotonically increasing sequence number (never reused)
+    - turn: card-game turn number when the event was recorded
+    - kind: coarse category ('text', 'card', 'draw', 'move', 'status', ...)
+    - actor: 'white' (player), 'black' (AI) or None when unknown
+    - card: card name involved, if any
+    - coords: list of (row, col) board squares involved, if any
+    """
+    seq: int
+    turn: int
+    kind: str
+    text: str
+    actor: Optional[str] = None
+    card: Optional[str] = None
+    coords: Optional[List[Tuple[int, int]]] = None
+    ts: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        if self.coords is not None:
+            d['coords'] = [list(c) for c in self.coords]
+        return d
+
+    def __str__(self) -> str:
+        return self.text
+
+
+def _infer_fields(text: str) -> Dict[str, Any]:
+    """Best-effort extraction of actor/card/coords from a legacy text line."""
+    out: Dict[str, Any] = {}
+    if text.startswith("AI"):
+        out['actor'] = 'black'
+    m = _CARD_RE.search(text)
+    if m:
+        out['card'] = m.group(1)
+    coords = [(int(r), int(c)) for r, c in _COORD_RE.findall(text)]
+    if coords:
+        out['coords'] = coords
+    return out
+
+
+class GameLog:
+    """Bounded ring buffer of `LogEvent` records with list-compatible access.
+
+    Only the newest `maxlen` events are kept in memory. `total` counts every
+    event ever recorded, and `next_seq` can be used as a stable bookmark
+    (unlike list indices, which shift once the buffer starts dropping).
+    """
+
+    def __init__(self, maxlen: int = DEFAULT_MAXLEN, stream_path: Optional[str] = None):
+        self._events: Deque[LogEvent] = deque(maxlen=maxlen)
+        self._next_seq = 0
+        self._stream = None
+        # Callable returning the current turn; bound by Game.__post_init__.
+        self.turn_source: Optional[Callable[[], int]] = None
+        if stream_path:
+            self.open_stream(stream_path)
+
+    # ---- recording ----
+    def record(self, kind: str, text: str, actor: Optional[str] = None, card: Optional[str] = None,
+               coords: Optional[List[Tuple[int, int]]] = None) -> LogEvent:
+        turn = 0
+        if self.turn_source is not None:
+            try:
+                turn = int(self.turn_source())
+            except Exception:
+                turn = 0
+        ev = LogEvent(
+            seq=self._next_seq,
+            turn=turn,
+            kind=kind,
+            text=str(text),
+            actor=actor,
+            card=card,
+            coords=[tuple(c) for c in coords] if coords else None,
+            ts=time.time(),
+        )
+        self._next_seq += 1
+        self._events.append(ev)
+        if self._stream is not None:
+            try:
+                self._stream.write(json.dumps(ev.to_dict(), ensure_ascii=False) + "\n")
+            except Exception:
+                # streaming is optional; never break the game because of it
+                self.close_stream()
+        return ev
+
+    def append(self, item: Union[str, LogEvent]) -> None:
+        """List-compatible append. Plain strings become 'text' events."""
+        if isinstance(item, LogEvent):
+            self.record(item.kind, item.text, actor=item.actor, card=item.card, coords=item.coords)
+            return
+        text = str(item)
+        self.record('text', text, **_infer_fields(text))
+
+    def extend(self, items) -> None:
+        for it in items:
+            self.append(it)
+
+    def clear(self) -> None:
+        self._events.clear()
+
+    def discard(self, predicate: Callable[[LogEvent], bool]) -> int:
+        """Remove buffered events matching `predicate`; returns the count removed."""
+        kept = [e for e in self._events if not predicate(e)]
+        removed = len(self._events) - len(kept)
+        if removed:
+            self._events.clear()
+            self._events.extend(kept)
+        return removed
+
+    # ---- structured access ----
+    @property
+    def maxlen(self) -> Optional[int]:
+        return self._events.maxlen
+
+    @property
+    def next_seq(self) -> int:
+        return self._next_seq
+
+    @property
+    def total(self) -> int:
+        """Number of events recorded since creation (including dropped ones)."""
+        return self._next_seq
+
+    def events(self) -> List[LogEvent]:
+        return list(self._events)
+
+    def since(self, seq: int) -> List[LogEvent]:
+        return [e for e in self._events if e.seq >= seq]
+
+    def tail(self, n: int) -> List[LogEvent]:
+        if n <= 0:
+            return []
+        if n >= len(self._events):
+            return list(self._events)
+        return [self._events[i] for i in range(len(self._events) - n, len(self._events))]
+
+    def iter_newest(self) -> Iterator[LogEvent]:
+        """Iterate from the newest event backwards (used for lazy rendering)."""
+        return reversed(self._events)
+
+    # ---- JSONL streaming ----
+    def open_stream(self, path: str) -> None:
+        self.close_stream()
+        self._stream = open(path, 'a', encoding='utf-8', buffering=1)
+
+    def close_stream(self) -> None:
+        s = self._stream
+        self._stream = None
+        if s is not None:
+            try:
+                s.close()
+            except Exception:
+                pass
+
+    # ---- list compatibility (text view) ----
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __iter__(self) -> Iterator[str]:
+        return (e.text for e in list(self._events))
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [e.text for e in list(self._events)[idx]]
+        return self._events[idx].text
+
+    def __bool__(self) -> bool:
+        return bool(self._events)
+
+    def __repr__(self) -> str:
+        return f"GameLog(len={len(self._events)}, total={self._next_seq}, maxlen={self.maxlen})"
+
+
+__all__ = [
+    "LogEvent",
+    "GameLog",
+    "DEFAULT_MAXLEN",
+]
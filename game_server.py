@@ -0,0 +1,723 @@
+"""
+Headless, authoritative multi-room server for card chess.
+
+One asyncio event loop hosts every connection and every room; there is no
+thread per socket or per match. Each Room owns a card_core.Game (white's
+cards and the shared statuses), black's PlayerState and its own chess board,
+and is the only place where moves and card plays are validated and applied.
+Clients send intents and render whatever the server broadcasts.
+
+chess_engine keeps its board in module globals. A room swaps its board in
+(``RoomBoard.active()``) only for the synchronous duration of one request;
+the loop never awaits while a board is active, so rooms cannot see each
+other's pieces.
+
+Wire format: NDJSON, the same messages as connection.NetworkManager. A
+client whose hello offers ``"protocols": ["bin1", ...]`` is switched to the
+compact binary encoding for move/card/moved in both directions (see
+net_protocol); other messages stay JSON inside length-prefixed frames.
+
+client -> server
+    {"type": "hello", "room": "<id>"?}       join a room (auto-match if omitted)
+    {"type": "hello", "session": t, "last_seq": n}   resume after a dropped connection
+    {"type": "hello", "room": "<id>", "spectate": true}   watch a room
+    {"type": "move", "from": [r, c], "to": [r, c], "promotion": "Q"?}
+    {"type": "card", "index": i}             play a card from your hand
+    {"type": "resync", "seq": n}             ask for a full snapshot (state hash mismatch)
+    {"type": "ping", "id": n}                heartbeat, answered with pong {id} (not numbered)
+server -> client
+    welcome {room, seat, session, seq}  resumed {room, seat, session, seq, replayed}
+    start {room, seed}  turn {color, turn, extra}
+    hand {cards, pp, pp_max} (to the owner only)
+    card {color, card_id, name, log}  moved {color, from, to, promotion, seq}
+    game_over {winner, reason}  opponent_left  error {reason}
+    opponent_disconnected {seat, grace}  opponent_resumed {seat}
+    snapshot {seq, hash, data}  delta {seq, set, del, hash}  (state_sync)
+
+After every action the room broadcasts one ``delta`` of its public state
+(board, statuses, PP, card counts) with the running state hash, plus a
+compressed full ``snapshot`` at the start and every SNAPSHOT_INTERVAL
+deltas; a client whose StateMirror diverges sends ``resync``.
+
+Reconnects: messages after ``welcome`` are numbered implicitly (the n-th
+message to a seat is seq n) and the last OUTBOX_LIMIT are kept per seat. If
+a player's connection drops mid-match the seat is held for RESUME_GRACE
+seconds; a new connection whose hello carries the session token and the last
+seq it received gets ``resumed`` (with ``seq`` = the number it continues
+from) followed by the missed messages, or a fresh snapshot and hand when the
+outbox no longer reaches back that far. After the grace window the match is
+abandoned as before. A resume does not wait for the server to notice the old
+connection die (a half-open socket after a Wi-Fi change may never report
+EOF): the old connection is aborted and its session taken over. Connections
+that have pinged and then stay silent for IDLE_TIMEOUT seconds (clients ping
+every couple of seconds) are dropped, which starts the grace window; clients
+that never ping are not subject to the check.
+
+Spectators get every broadcast (not hands), a snapshot when they join
+mid-match, and may only ping or resync. Each broadcast is encoded once per
+wire format for players and spectators together; every spectator drains a
+bounded queue of those shared payloads at its own pace (see Spectator), so
+hundreds of watchers never delay the players' writes.
+
+Cards are played with Game.play_card_for for both seats, so follow-up
+choices (discard, target tile, ...) are resolved on the server the same way
+the AI resolves them; anything left pending is dropped, as in headless_sim.
+Moves follow Card Game.py's rules for the card flags: after 暴風 the mover's
+next move may hop one piece, and 迅雷 keeps the turn (``turn`` with
+``extra: true``, no draw or PP reset) until its counter is used up. Only the
+requested piece is validated; mate / stalemate is found with an early-exit
+"any legal move" search (headless_sim.has_legal_move).
+
+Usage:
+    python game_server.py --host 0.0.0.0 --port 50007
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+import argparse
+import asyncio
+import itertools
+import random
+import secrets
+
+try:
+    from . import chess_engine as chess
+    from .card_core import PlayerState, make_rule_cards_deck, new_game_with_rule_deck
+    from .connection_async import LINE_LIMIT, read_frame
+    from .headless_sim import end_move, has_legal_move, is_legal_move
+    from .net_protocol import DEFAULT_PROTOCOLS, ProtocolState, decode_payload
+    from .state_sync import SyncState, public_state
+except Exception:
+    import chess_engine as chess
+    from card_core import PlayerState, make_rule_cards_deck, new_game_with_rule_deck
+    from connection_async import LINE_LIMIT, read_frame
+    from headless_sim import end_move, has_legal_move, is_legal_move
+    from net_protocol import DEFAULT_PROTOCOLS, ProtocolState, decode_payload
+    from state_sync import SyncState, public_state
+
+
+SEATS = ('white', 'black')
+PROMOTIONS = ('Q', 'R', 'B', 'N')
+# seconds a dropped player's seat is held for a reconnect
+RESUME_GRACE = 30.0
+# a pinging connection that sends nothing (clients ping every HEARTBEAT_INTERVAL) for this long is
+# treated as dropped: its seat is detached and held for RESUME_GRACE. 0 disables the check
+IDLE_TIMEOUT = 20.0
+# messages kept per session for replay after a reconnect
+OUTBOX_LIMIT = 256
+# messages a spectator may fall behind before its backlog is replaced by a snapshot
+SPECTATOR_QUEUE_LIMIT = 64
+# consecutive snapshot catch-ups before a spectator that never drains is disconnected
+SPECTATOR_MAX_RESETS = 3
+
+
+class RoomBoard:
+    """One room's chess_engine state (pieces, en passant square, pending promotion)."""
+
+    def __init__(self) -> None:
+        self.pieces = chess.create_pieces()
+        self.en_passant_target = None
+        self.promotion_pending = None
+
+    @contextmanager
+    def active(self) -> Iterator[None]:
+        saved = (chess.pieces, chess.en_passant_target, chess.promotion_pending)
+        chess.pieces = self.pieces
+        chess.en_passant_target = self.en_passant_target
+        chess.promotion_pending = self.promotion_pending
+        try:
+            yield
+        finally:
+            self.pieces = chess.pieces
+            self.en_passant_target = chess.en_passant_target
+            self.promotion_pending = chess.promotion_pending
+            chess.pieces, chess.en_passant_target, chess.promotion_pending = saved
+
+
+class Session:
+    """
+    One seat's connection. Writes are buffered by the transport; the server never blocks on a slow peer.
+
+    Every message after ``welcome`` is numbered implicitly (the n-th message
+    sent is seq n; TCP keeps the order, so no seq goes on the wire) and kept
+    in a bounded outbox, so a client that reconnects with its session token
+    and the last seq it received gets just the messages it missed.
+    """
+
+    def __init__(self, server: "GameServer", reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.server = server
+        self.reader = reader
+        self.writer: Optional[asyncio.StreamWriter] = writer
+        self.room: Optional[Room] = None
+        self.seat: Optional[str] = None
+        self.watching: Optional[Spectator] = None
+        self.protocol = ProtocolState(server.protocols)
+        self.token = secrets.token_urlsafe(16)
+        self.sent = 0
+        self.outbox: Deque[Tuple[int, Any]] = deque(maxlen=server.outbox_limit)
+        self.expiry: Optional[asyncio.TimerHandle] = None
+        self.last_seen = asyncio.get_running_loop().time() if writer is not None else 0.0
+        # set by the first ping: only heartbeating connections are reaped when silent
+        self.pinging = False
+
+    @property
+    def connected(self) -> bool:
+        return self.writer is not None
+
+    def send(self, message: Any, payloads: Optional[Dict[Any, bytes]] = None) -> None:
+        """Number, keep and (if connected) write `message`; `payloads` caches encodings across recipients."""
+        self.sent += 1
+        self.outbox.append((self.sent, message))
+        self.control(message, payloads)
+
+    def control(self, message: Any, payloads: Optional[Dict[Any, bytes]] = None) -> None:
+        """Write `message` without numbering it (handshake / resume replies)."""
+        writer = self.writer
+        if writer is None or writer.is_closing():
+            return
+        writer.write(self.encode(message, payloads))
+
+    def encode(self, message: Any, payloads: Optional[Dict[Any, bytes]] = None) -> bytes:
+        if payloads is None:
+            return self.protocol.encode(message)
+        fmt = (self.protocol.send_protocol, self.protocol.send_framing)
+        payload = payloads.get(fmt)
+        if payload is None:
+            payload = payloads[fmt] = self.protocol.encode(message)
+        return payload
+
+    def missed(self, last_seq: int) -> Optional[List[Any]]:
+        """Messages after `last_seq`, or None if some of them already fell out of the outbox."""
+        if last_seq >= self.sent:
+            return []
+        if not self.outbox or self.outbox[0][0] > last_seq + 1:
+            return None
+        return [m for seq, m in self.outbox if seq > last_seq]
+
+    def adopt(self, old: "Session") -> None:
+        """Take over a disconnected session's seat, token and message log (resume)."""
+        self.room, self.seat = old.room, old.seat
+        self.token, self.sent, self.outbox = old.token, old.sent, old.outbox
+        if self.room is not None and self.seat is not None:
+            self.room.seats[self.seat] = self
+        old.room = old.seat = None
+
+
+class Spectator:
+    """
+    A watcher of one room, fed through a bounded queue drained by its own task.
+
+    Players' messages are written straight to their transports; a spectator's
+    are queued here and written with ``await drain()``, so a slow watcher only
+    ever waits on its own socket. Once it is ``limit`` messages behind, the
+    backlog is replaced by one state snapshot (deltas continue from it); a
+    watcher that needs ``max_resets`` such catch-ups in a row is disconnected.
+    """
+
+    def __init__(self, session: Session, room: "Room", limit: int = SPECTATOR_QUEUE_LIMIT,
+                 max_resets: int = SPECTATOR_MAX_RESETS) -> None:
+        self.session = session
+        self.room = room
+        self.limit = limit
+        self.max_resets = max_resets
+        self.queue: Deque[bytes] = deque()
+        self.resets = 0
+        self.dropped = False
+        self._ready = asyncio.Event()
+        self._task = asyncio.ensure_future(self._pump())
+
+    def offer(self, payload: bytes) -> None:
+        if self.dropped:
+            return
+        if len(self.queue) >= self.limit:
+            self.resets += 1
+            if self.resets > self.max_resets:
+                self.drop()
+                return
+            # the snapshot already contains whatever `payload` would have changed
+            self.queue.clear()
+            self.queue.append(self.session.encode(self.room.sync.snapshot()))
+        else:
+            self.queue.append(payload)
+        self._ready.set()
+
+    def offer_snapshot(self) -> None:
+        if self.room.started:
+            self.offer(self.session.encode(self.room.sync.snapshot()))
+
+    async def _pump(self) -> None:
+        writer = self.session.writer
+        try:
+            while writer is not None and not writer.is_closing():
+                await self._ready.wait()
+                self._ready.clear()
+                while self.queue:
+                    writer.write(self.queue.popleft())
+                    await writer.drain()
+                self.resets = 0
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    def drop(self) -> None:
+        self.dropped = True
+        self.queue.clear()
+        self.room.spectators.discard(self)
+        self._task.cancel()
+        writer = self.session.writer
+        if writer is not None and not writer.is_closing():
+            writer.write(self.session.encode({"type": "error", "reason": "too_slow"}))
+            writer.close()
+
+    def close(self) -> None:
+        self.room.spectators.discard(self)
+        self._task.cancel()
+
+
+class Room:
+    def __init__(self, room_id: str, seed: Optional[int] = None) -> None:
+        self.room_id = room_id
+        self.seed = seed if seed is not None else random.randrange(2 ** 31)
+        self.board = RoomBoard()
+        self.game = new_game_with_rule_deck(self.seed)
+        self.black = PlayerState(deck=make_rule_cards_deck(self.game.rng))
+        for _ in range(4):
+            self.black.hand.add(self.black.deck.draw())
+        self.seats: Dict[str, Optional[Session]] = {s: None for s in SEATS}
+        self.turn_color = 'white'
+        self.started = False
+        self.winner: Optional[str] = None
+        self.over_reason: Optional[str] = None
+        self.moves = 0
+        self.sync = SyncState()
+        self.spectators: Set[Spectator] = set()
+
+    # ---- membership ----
+    @property
+    def full(self) -> bool:
+        return all(self.seats[s] is not None for s in SEATS)
+
+    @property
+    def over(self) -> bool:
+        return self.over_reason is not None
+
+    def join(self, session: Session) -> Optional[str]:
+        for seat in SEATS:
+            if self.seats[seat] is None:
+                self.seats[seat] = session
+                session.room, session.seat = self, seat
+                return seat
+        return None
+
+    def leave(self, session: Session) -> None:
+        if session.seat is not None and self.seats.get(session.seat) is session:
+            self.seats[session.seat] = None
+        session.room = session.seat = None
+        if self.started and not self.over:
+            self.over_reason = 'abandoned'
+            self.broadcast({"type": "opponent_left"})
+
+    def broadcast(self, message: Any, exclude: Optional[Session] = None) -> None:
+        # serialized once per wire format, not once per recipient (players and spectators alike)
+        payloads: Dict[Any, bytes] = {}
+        for s in self.seats.values():
+            if s is not None and s is not exclude:
+                s.send(message, payloads)
+        for spectator in list(self.spectators):
+            spectator.offer(spectator.session.encode(message, payloads))
+
+    def player_for(self, color: str) -> PlayerState:
+        return self.game.player if color == 'white' else self.black
+
+    def send_hand(self, color: str) -> None:
+        session = self.seats.get(color)
+        if session is None:
+            return
+        p = self.player_for(color)
+        session.send({"type": "hand", "cards": [c.card_id for c in p.hand.cards],
+                      "pp": p.pp_current, "pp_max": p.pp_max})
+
+    # ---- game flow ----
+    def start(self) -> None:
+        self.started = True
+        self.broadcast({"type": "start", "room": self.room_id, "seed": self.seed})
+        with self.board.active():
+            self._begin_turn('white')
+            self.sync.update(public_state(self.game, self.black, self.turn_color))
+        self.broadcast(self.sync.snapshot())
+
+    def _publish(self) -> None:
+        """Broadcast the state delta of the last action (and a periodic snapshot). Board must be active."""
+        delta = self.sync.update(public_state(self.game, self.black, self.turn_color))
+        if delta is not None:
+            self.broadcast(delta)
+        snapshot = self.sync.periodic_snapshot()
+        if snapshot is not None:
+            self.broadcast(snapshot)
+
+    def _begin_turn(self, color: str, extra: bool = False) -> None:
+        """Start `color`'s turn (draw + PP) and end the match if it has no legal move. Board must be active.
+
+        `extra` is a 迅雷 continuation: the same side moves again without the draw / PP reset.
+        """
+        self.turn_color = color
+        if not extra:
+            if color == 'white':
+                self.game.start_turn()
+            else:
+                self.black.reset_pp()
+                if len(self.black.hand.cards) < self.black.hand_limit:
+                    self.black.hand.add(self.black.deck.draw())
+        if not has_legal_move(self.game, color):
+            other = 'black' if color == 'white' else 'white'
+            if chess.is_in_check(chess.pieces, color):
+                self._finish(other, 'checkmate')
+            else:
+                self._finish(None, 'no_moves')
+            return
+        self.broadcast({"type": "turn", "color": color, "turn": self.game.turn, "extra": extra})
+        self.send_hand(color)
+
+    def _finish(self, winner: Optional[str], reason: str) -> None:
+        self.winner, self.over_reason = winner, reason
+        self.broadcast({"type": "game_over", "winner": winner, "reason": reason})
+
+    def _check_turn(self, session: Session) -> Optional[str]:
+        if not self.started:
+            return 'not_started'
+        if self.over:
+            return 'game_over'
+        if session.seat != self.turn_color:
+            return 'not_your_turn'
+        return None
+
+    def play_card(self, session: Session, index: Any) -> Optional[str]:
+        """Validate and apply a card play; returns an error reason or None."""
+        err = self._check_turn(session)
+        if err:
+            return err
+        player = self.player_for(session.seat)
+        if not isinstance(index, int) or not (0 <= index < len(player.hand.cards)):
+            return 'bad_card_index'
+        card = player.hand.cards[index]
+        game = self.game
+        with self.board.active():
+            prev = game.turn_active
+            game.turn_active = True
+            try:
+                ok, msg = game.play_card_for(player, index)
+            finally:
+                game.turn_active = prev
+                game.pending = None
+            if not ok:
+                return msg
+            self.broadcast({"type": "card", "color": session.seat, "card_id": card.card_id,
+                            "name": card.name, "log": msg})
+            self._publish()
+        self.send_hand(session.seat)
+        return None
+
+    def move(self, session: Session, src: Any, dst: Any, promotion: Any = None) -> Optional[str]:
+        """Validate and apply a move; returns an error reason or None."""
+        err = self._check_turn(session)
+        if err:
+            return err
+        try:
+            fr, fc = (int(v) for v in src)
+            tr, tc = (int(v) for v in dst)
+        except (TypeError, ValueError):
+            return 'bad_move'
+        color = session.seat
+        with self.board.active():
+            picked = chess.get_piece_at(fr, fc)
+            if picked is None or picked.color != color or not is_legal_move(self.game, picked, (tr, tc)):
+                return 'illegal_move'
+            chess.apply_move(picked, tr, tc)
+            promoted = None
+            if chess.promotion_pending is not None:
+                promoted = promotion if promotion in PROMOTIONS else 'Q'
+                chess.complete_promotion(promoted)
+            self.moves += 1
+            extra = end_move(self.game, color)
+            if not extra:
+                self.game.decay_statuses(color)
+            self.broadcast({"type": "moved", "color": color, "from": [fr, fc], "to": [tr, tc],
+                            "promotion": promoted, "seq": self.moves})
+            if extra:
+                self._begin_turn(color, extra=True)
+            else:
+                self._begin_turn('black' if color == 'white' else 'white')
+            self._publish()
+        return None
+
+
+class GameServer:
+    """Accepts clients, matches them into rooms and dispatches their requests."""
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 50007, seed: Optional[int] = None,
+                 protocols: Sequence[str] = DEFAULT_PROTOCOLS, grace: float = RESUME_GRACE,
+                 outbox_limit: int = OUTBOX_LIMIT, max_spectators: int = 1000,
+                 spectator_queue: int = SPECTATOR_QUEUE_LIMIT, idle_timeout: float = IDLE_TIMEOUT) -> None:
+        self.host = host
+        self.port = port
+        self.protocols = tuple(protocols)
+        self.grace = grace
+        self.outbox_limit = outbox_limit
+        self.max_spectators = max_spectators
+        self.spectator_queue = spectator_queue
+        self.idle_timeout = idle_timeout
+        self._reaper: Optional[asyncio.Task] = None
+        # token -> session whose connection dropped during a match (seat held for `grace` seconds)
+        self.detached: Dict[str, Session] = {}
+        self.rooms: Dict[str, Room] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._room_ids = itertools.count(1)
+        self._rng = random.Random(seed)
+        self.sessions: List[Session] = []
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._on_client, self.host, self.port, limit=LINE_LIMIT)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.idle_timeout > 0:
+            self._reaper = asyncio.ensure_future(self._reap_idle())
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for session in list(self.detached.values()):
+            if session.expiry is not None:
+                session.expiry.cancel()
+        self.detached.clear()
+        for s in list(self.sessions):
+            if s.writer is not None:
+                s.writer.close()
+
+    # ---- rooms ----
+    def _room_for(self, room_id: Any) -> Room:
+        if room_id is not None:
+            room_id = str(room_id)
+            room = self.rooms.get(room_id)
+            if room is None:
+                room = self.rooms[room_id] = Room(room_id, self._rng.randrange(2 ** 31))
+            return room
+        for room in self.rooms.values():
+            if not room.started and not room.full:
+                return room
+        room_id = f"r{next(self._room_ids)}"
+        room = self.rooms[room_id] = Room(room_id, self._rng.randrange(2 ** 31))
+        return room
+
+    def _drop_room_if_empty(self, room: Room) -> None:
+        if all(s is None for s in room.seats.values()):
+            self.rooms.pop(room.room_id, None)
+            for spectator in list(room.spectators):
+                spectator.close()
+                if spectator.session.writer is not None:
+                    spectator.session.writer.close()
+
+    def _watch(self, session: Session, room_id: Any) -> None:
+        room = self.rooms.get(str(room_id)) if room_id is not None else None
+        if room is None:
+            session.control({"type": "error", "reason": "no_such_room", "request": "hello"})
+            return
+        if len(room.spectators) >= self.max_spectators:
+            session.control({"type": "error", "reason": "room_full", "request": "hello"})
+            return
+        spectator = Spectator(session, room, self.spectator_queue)
+        session.watching = spectator
+        room.spectators.add(spectator)
+        session.control({"type": "welcome", "room": room.room_id, "seat": "spectator", "heartbeat": True})
+        if room.started:
+            spectator.offer(session.encode({"type": "start", "room": room.room_id, "seed": room.seed}))
+            spectator.offer_snapshot()
+
+    # ---- connections ----
+    async def _on_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session = Session(self, reader, writer)
+        self.sessions.append(session)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                frame = await read_frame(reader, session.protocol.recv_framing)
+                if frame is None:
+                    break
+                session.last_seen = loop.time()
+                if frame:
+                    msg = decode_payload(frame)
+                    if isinstance(msg, dict) and msg.get('type') == 'proto':
+                        session.protocol.on_proto(msg)
+                        continue
+                    self.handle(session, msg)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.sessions.remove(session)
+            if session.watching is not None:
+                session.watching.close()
+            session.writer = None
+            room = session.room
+            if room is not None:
+                if self.grace > 0 and room.started and not room.over:
+                    self._detach(session)
+                else:
+                    room.leave(session)
+                    self._drop_room_if_empty(room)
+            writer.close()
+
+    async def _reap_idle(self) -> None:
+        """Drop pinging connections that went silent (half-open after a network change) so their seats detach."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.idle_timeout / 4)
+            cutoff = loop.time() - self.idle_timeout
+            for session in list(self.sessions):
+                if session.writer is not None and session.pinging and session.last_seen < cutoff:
+                    # abort, not close: a half-open peer never takes the buffered bytes close() waits for
+                    session.writer.transport.abort()
+
+    # ---- reconnect ----
+    def _detach(self, session: Session) -> None:
+        """Hold a dropped player's seat; messages keep going into its outbox."""
+        self.detached[session.token] = session
+        session.expiry = asyncio.get_running_loop().call_later(self.grace, self._expire, session)
+        session.room.broadcast({"type": "opponent_disconnected", "seat": session.seat, "grace": self.grace},
+                               exclude=session)
+
+    def _expire(self, session: Session) -> None:
+        if self.detached.get(session.token) is not session:
+            return
+        del self.detached[session.token]
+        room = session.room
+        if room is not None:
+            room.leave(session)
+            self._drop_room_if_empty(room)
+
+    def _resume(self, session: Session, token: Any, last_seq: Any) -> None:
+        old = self.detached.pop(str(token), None)
+        if old is None:
+            old = self._stale(session, str(token))
+        if old is None or old.room is None:
+            session.control({"type": "error", "reason": "unknown_session", "request": "hello"})
+            if session.writer is not None:
+                session.writer.close()
+            return
+        if old.expiry is not None:
+            old.expiry.cancel()
+        session.adopt(old)
+        room = session.room
+        info = {"type": "resumed", "room": room.room_id, "seat": session.seat, "session": session.token,
+                "heartbeat": True}
+        missed = session.missed(last_seq if isinstance(last_seq, int) else 0)
+        if missed is None:
+            # too far behind for the outbox: continue from a fresh snapshot instead
+            session.control(dict(info, seq=session.sent, replayed=False))
+            if room.started:
+                session.send(room.sync.snapshot())
+                room.send_hand(session.seat)
+        else:
+            session.control(dict(info, seq=session.sent - len(missed), replayed=len(missed)))
+            for message in missed:
+                session.control(message)
+        room.broadcast({"type": "opponent_resumed", "seat": session.seat}, exclude=session)
+
+    def _stale(self, session: Session, token: str) -> Optional[Session]:
+        """A seated session with `token` whose connection has not noticed the drop yet; its writer is aborted."""
+        for old in self.sessions:
+            if old is not session and old.token == token and old.room is not None and old.seat is not None:
+                writer, old.writer = old.writer, None
+                if writer is not None:
+                    writer.transport.abort()
+                return old
+        return None
+
+    def handle(self, session: Session, msg: Any) -> None:
+        """Dispatch one client message (synchronously, on the loop thread)."""
+        if not isinstance(msg, dict):
+            session.send({"type": "error", "reason": "bad_message"})
+            return
+        kind = msg.get('type')
+        room = session.room
+        if kind == 'ping':
+            # heartbeat: answered outside the numbered message stream
+            session.pinging = True
+            session.control({"type": "pong", "id": msg.get('id')})
+            return
+        if kind == 'hello':
+            if room is not None or session.watching is not None:
+                return
+            marker = session.protocol.on_peer_hello(msg)
+            if marker is not None:
+                session.control(marker)
+                session.protocol.switch_send(marker)
+            if msg.get('spectate'):
+                self._watch(session, msg.get('room'))
+                return
+            if msg.get('session') is not None:
+                self._resume(session, msg['session'], msg.get('last_seq'))
+                return
+            room = self._room_for(msg.get('room'))
+            seat = room.join(session)
+            if seat is None:
+                session.send({"type": "error", "reason": "room_full"})
+                return
+            session.control({"type": "welcome", "room": room.room_id, "seat": seat,
+                             "session": session.token, "seq": session.sent, "heartbeat": True})
+            if room.full and not room.started:
+                room.start()
+            return
+        if session.watching is not None:
+            if kind == 'resync':
+                session.watching.offer_snapshot()
+            else:
+                session.watching.offer(session.encode({"type": "error", "reason": "spectator", "request": kind}))
+            return
+        if room is None:
+            session.send({"type": "error", "reason": "not_in_room"})
+            return
+        if kind == 'resync':
+            if room.started:
+                session.send(room.sync.snapshot())
+            return
+        if kind == 'move':
+            err = room.move(session, msg.get('from'), msg.get('to'), msg.get('promotion'))
+        elif kind == 'card':
+            err = room.play_card(session, msg.get('index'))
+        else:
+            err = 'unknown_type'
+        if err:
+            session.send({"type": "error", "reason": err, "request": kind})
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Run the authoritative card-chess room server.")
+    ap.add_argument('--host', default='0.0.0.0')
+    ap.add_argument('--port', type=int, default=50007)
+    ap.add_argument('--seed', type=int, default=None, help="seed for room seeds (reproducible matches)")
+    args = ap.parse_args(argv)
+    server = GameServer(args.host, args.port, seed=args.seed)
+
+    async def run() -> None:
+        await server.start()
+        print(f"card chess server listening on {args.host}:{server.port}")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
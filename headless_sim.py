@@ -0,0 +1,275 @@
+"""
+Headless, seeded match runner for the chess-card-battle project.
+
+Plays complete card-chess matches without pygame: both sides draw and play
+cards through card_core (pending actions are auto-resolved the same way the
+AI does in play_card_for), white picks random legal moves and black uses
+AI.choose_move. Every random decision comes from the per-game RNG created
+from the match seed, so a seed always reproduces the same match.
+
+chess_engine keeps its board in module globals, so matches inside one
+process run sequentially; batches are distributed across worker processes.
+
+Usage:
+    python headless_sim.py --games 8 --seed 100 --workers 4 --difficulty 2
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import argparse
+import json
+import multiprocessing
+import time
+
+try:
+    from . import chess_engine as chess
+    from . import AI as ai
+    from .card_core import PlayerState, make_rule_cards_deck, new_game_with_rule_deck
+except Exception:
+    import chess_engine as chess
+    import AI as ai
+    from card_core import PlayerState, make_rule_cards_deck, new_game_with_rule_deck
+
+
+DEFAULT_MAX_PLIES = 200
+CARD_PLAY_RATE = 0.5
+
+
+def _tile_blocked(game, tile, color: str) -> bool:
+    entries = game.blocked_tiles.get(tile)
+    if entries is None:
+        return False
+    if isinstance(entries, list):
+        return game.is_tile_blocked_for(tile, color)
+    # legacy int form: owner kept in blocked_tiles_owner
+    return game.blocked_tiles_owner.get(tile) == color and int(entries) > 0
+
+
+def _can_jump(game, color: str) -> bool:
+    # 暴風: white's flag lives on the human PlayerState, black's on the game (as in Card Game.py)
+    if color == 'white':
+        return bool(getattr(game.player, 'next_move_can_jump', False))
+    return bool(getattr(game, 'ai_next_move_can_jump', False))
+
+
+def _jump_moves(piece, pcs) -> List[Tuple[int, int]]:
+    """Extra destinations under 暴風: a pawn hops its blocked front square, a slider hops its first blocker."""
+    out = []
+    r, c, color = piece.row, piece.col, piece.color
+
+    def free_for(rr, cc):
+        if not (0 <= rr < 8 and 0 <= cc < 8):
+            return False
+        p = chess.get_piece_at(rr, cc, pcs)
+        return p is None or p.color != color
+
+    if piece.name == 'P':
+        d = -1 if color == 'white' else 1
+        if chess.get_piece_at(r + d, c, pcs) is not None and free_for(r + 2 * d, c):
+            out.append((r + 2 * d, c))
+    elif piece.name in ('B', 'R', 'Q'):
+        dirs = []
+        if piece.name in ('B', 'Q'):
+            dirs += [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+        if piece.name in ('R', 'Q'):
+            dirs += [(-1, 0), (1, 0), (0, -1), (0, 1)]
+        for dr, dc in dirs:
+            step = 1
+            while 0 <= r + dr * step < 8 and 0 <= c + dc * step < 8:
+                if chess.get_piece_at(r + dr * step, c + dc * step, pcs) is not None:
+                    if free_for(r + dr * (step + 1), c + dc * (step + 1)):
+                        out.append((r + dr * (step + 1), c + dc * (step + 1)))
+                    break
+                step += 1
+    return out
+
+
+def piece_moves(game, piece) -> List[Tuple[int, int]]:
+    """Pseudo-legal destinations of `piece` on the live board, including 暴風 jumps."""
+    moves = piece.get_valid_moves(chess.pieces)
+    if _can_jump(game, piece.color):
+        moves = moves + [mv for mv in _jump_moves(piece, chess.pieces) if mv not in moves]
+    return moves
+
+
+def _movable(game, piece, mv, color: str) -> bool:
+    if _tile_blocked(game, mv, color):
+        return False
+    return not chess.is_in_check(chess.simulate_move(piece, mv[0], mv[1]), color)
+
+
+def is_legal_move(game, piece, mv) -> bool:
+    """Whether moving `piece` to `mv` is legal, checking only that piece (cheap server-side validation)."""
+    if id(piece) in game.frozen_pieces:
+        return False
+    return mv in piece_moves(game, piece) and _movable(game, piece, mv, piece.color)
+
+
+def has_legal_move(game, color: str) -> bool:
+    """Whether `color` has any legal move; stops at the first one (mate / stalemate detection)."""
+    for p in list(chess.pieces):
+        if p.color != color or id(p) in game.frozen_pieces:
+            continue
+        for mv in piece_moves(game, p):
+            if _movable(game, p, mv, color):
+                return True
+    return False
+
+
+def legal_moves(game, color: str):
+    """Legal (piece, (row, col)) pairs for `color`, honoring freezes, blocked tiles and 暴風 jumps."""
+    out = []
+    for p in list(chess.pieces):
+        if p.color != color or id(p) in game.frozen_pieces:
+            continue
+        for mv in piece_moves(game, p):
+            if _movable(game, p, mv, color):
+                out.append((p, mv))
+    return out
+
+
+def end_move(game, color: str) -> bool:
+    """Consume the mover's one-move flags after a move; True if 迅雷 lets `color` move again."""
+    if color == 'white':
+        game.player.next_move_can_jump = False
+        counter = 'player_consecutive_turns'
+    else:
+        game.ai_next_move_can_jump = False
+        counter = 'ai_consecutive_turns'
+    left = getattr(game, counter, 0)
+    if left > 0:
+        setattr(game, counter, left - 1)
+        return True
+    return False
+
+
+def _maybe_play_card(game, player) -> None:
+    rng = game.rng
+    if not player.hand.cards or rng.random() > CARD_PLAY_RATE:
+        return
+    playable = [i for i, c in enumerate(player.hand.cards) if c.can_play(player)]
+    if not playable:
+        return
+    prev = game.turn_active
+    game.turn_active = True
+    try:
+        game.play_card_for(player, rng.choice(playable))
+    finally:
+        game.turn_active = prev
+        # anything play_card_for could not auto-resolve is dropped
+        game.pending = None
+
+
+def _board_key() -> str:
+    rows = []
+    for r in range(8):
+        row = ''
+        for c in range(8):
+            p = chess.get_piece_at(r, c)
+            row += '.' if p is None else (p.name if p.color == 'white' else p.name.lower())
+        rows.append(row)
+    return '/'.join(rows)
+
+
+def run_match(seed: int, difficulty: int = 2, max_plies: int = DEFAULT_MAX_PLIES) -> Dict[str, Any]:
+    """Play one match from `seed` and return a summary dict."""
+    chess.pieces[:] = chess.create_pieces()
+    chess.en_passant_target = None
+    chess.promotion_pending = None
+
+    game = new_game_with_rule_deck(seed)
+    rng = game.rng
+    ai_player = PlayerState(deck=make_rule_cards_deck(rng))
+    for _ in range(4):
+        ai_player.hand.add(ai_player.deck.draw())
+
+    started = time.perf_counter()
+    winner: Optional[str] = None
+    reason = 'max_plies'
+    plies = 0
+    color = 'white'
+    extra = False
+    while plies < max_plies:
+        # a 迅雷 continuation moves again without the start-of-turn draw / PP reset
+        if not extra:
+            if color == 'white':
+                game.start_turn()
+                _maybe_play_card(game, game.player)
+            else:
+                ai_player.reset_pp()
+                if len(ai_player.hand.cards) < ai_player.hand_limit:
+                    ai_player.hand.add(ai_player.deck.draw())
+                _maybe_play_card(game, ai_player)
+
+        moves = legal_moves(game, color)
+        other = 'black' if color == 'white' else 'white'
+        if not moves:
+            if chess.is_in_check(chess.pieces, color):
+                winner, reason = other, 'checkmate'
+            else:
+                winner, reason = None, 'no_moves'
+            break
+
+        if color == 'white':
+            piece, mv = rng.choice(moves)
+        else:
+            dict_pieces = [{'row': p.row, 'col': p.col, 'name': p.name, 'color': p.color} for p in chess.pieces]
+            choice = ai.choose_move(dict_pieces, chess.is_in_check(chess.pieces, 'black'), difficulty,
+                                    seed=rng.randrange(2 ** 31))
+            picked = None
+            if choice:
+                for p, m in moves:
+                    if (p.row, p.col, m[0], m[1]) == (choice['from_row'], choice['from_col'], choice['to_row'], choice['to_col']):
+                        picked = (p, m)
+                        break
+            piece, mv = picked if picked is not None else rng.choice(moves)
+
+        chess.apply_move(piece, mv[0], mv[1])
+        if chess.promotion_pending is not None:
+            chess.complete_promotion('Q')
+        plies += 1
+        extra = end_move(game, color)
+        if not extra:
+            game.decay_statuses(color)
+            color = other
+
+    return {
+        'seed': seed,
+        'winner': winner,
+        'reason': reason,
+        'plies': plies,
+        'turns': game.turn,
+        'board': _board_key(),
+        'seconds': round(time.perf_counter() - started, 4),
+    }
+
+
+def _run_match_kw(args):
+    seed, kw = args
+    return run_match(seed, **kw)
+
+
+def run_batch(seeds: Iterable[int], workers: int = 1, **kw: Any) -> List[Dict[str, Any]]:
+    """Run one match per seed; results are returned in seed order."""
+    jobs = [(s, kw) for s in seeds]
+    if workers <= 1:
+        return [_run_match_kw(j) for j in jobs]
+    with multiprocessing.Pool(workers) as pool:
+        return pool.map(_run_match_kw, jobs)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Run seeded headless card-chess matches.")
+    ap.add_argument('--games', type=int, default=4)
+    ap.add_argument('--seed', type=int, default=0, help="seed of the first game; game i uses seed+i")
+    ap.add_argument('--workers', type=int, default=1)
+    ap.add_argument('--difficulty', type=int, default=2)
+    ap.add_argument('--max-plies', type=int, default=DEFAULT_MAX_PLIES)
+    args = ap.parse_args(argv)
+    seeds = range(args.seed, args.seed + args.games)
+    for res in run_batch(seeds, workers=args.workers, difficulty=args.difficulty, max_plies=args.max_plies):
+        print(json.dumps(res, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,11 @@ import threading
 import json
 import queue
 
+try:
+    from .net_framing import FrameReader, encode_frame
+except Exception:
+    from net_framing import FrameReader, encode_frame
+
 pygame.init()
 WIDTH, HEIGHT = 640, 640
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
@@ -40,19 +45,22 @@ def move_piece(piece, to_row, to_col):
 
 def send_message(sock, data):
     try:
+        # 1メッセージ = JSON 1行（受信側は改行で区切る）
         json_data = json.dumps(data)
-        sock.sendall(json_data.encode(ENCODING))
+        sock.sendall(encode_frame(json_data.encode(ENCODING)))
     except Exception as e:
         print("送信エラー:", e)
 
 def recv_thread(sock):
+    # recv 1回 = 1メッセージとは限らない（分割・連結される）ので、改行区切りで切り出す
+    reader = FrameReader('line')
     while True:
         try:
-            data = sock.recv(BUFFER_SIZE)
-            if not data:
+            if reader.recv_into(sock, BUFFER_SIZE) == 0:
                 break
-            message = json.loads(data.decode(ENCODING))
-            recv_queue.put(message)
+            for frame in reader.frames():
+                if frame:
+                    recv_queue.put(json.loads(frame.decode(ENCODING)))
         except:
             break
 
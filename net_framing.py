@@ -0,0 +1,149 @@
+"""
+Stream framing for the network layer: newline-delimited or length-prefixed.
+
+The old receive loops did ``buffer += data`` on an immutable ``bytes`` and
+``buffer.split(b"\\n", 1)`` per message, copying the whole remaining buffer for
+every message (quadratic in the burst size), or assumed one ``recv`` call
+returns exactly one message. FrameReader keeps a single growable bytearray:
+
+- ``recv_into(sock)`` receives straight into its free space (no intermediate
+  ``bytes`` object); ``feed(data)`` appends bytes obtained elsewhere;
+- ``frames()`` returns the complete frames and moves a read offset; the
+  unread tail is compacted to the front only when more space is needed, so
+  total copying stays linear in the bytes received. Line mode copies all
+  complete lines in one slice and splits them in C;
+- a partial line is not rescanned when more data arrives.
+
+Two modes:
+
+- ``'line'``:   ``payload + b"\\n"`` (NDJSON, the default wire format);
+- ``'length'``: 4-byte big-endian length + payload (binary-safe).
+
+``mode`` may be changed between ``frames()`` calls (protocol negotiation);
+bytes already buffered are parsed with the new mode. Line mode normally
+returns every complete line at once; while the peer may still announce a
+switch, read with ``frames(limit=1)`` so the bytes after the announcing line
+stay buffered for the new mode (see net_protocol).
+"""
+from __future__ import annotations
+
+from typing import List, Optional
+import struct
+
+LENGTH_PREFIX = struct.Struct('!I')
+MODES = ('line', 'length')
+# Largest accepted frame; a peer that exceeds it is treated as broken.
+MAX_FRAME = 1 << 20
+
+
+def encode_frame(payload: bytes, mode: str = 'line') -> bytes:
+    if mode == 'length':
+        return LENGTH_PREFIX.pack(len(payload)) + payload
+    return payload + b"\n"
+
+
+class FrameError(ValueError):
+    pass
+
+
+class FrameReader:
+    def __init__(self, mode: str = 'line', capacity: int = 65536, max_frame: int = MAX_FRAME) -> None:
+        if mode not in MODES:
+            raise ValueError(f"unknown framing mode: {mode!r}")
+        self.mode = mode
+        self.max_frame = max_frame
+        self._buf = bytearray(capacity)
+        self._start = 0   # first unread byte
+        self._end = 0     # end of received data
+        self._scan = 0    # line mode: no newline in [_start, _scan)
+
+    def __len__(self) -> int:
+        """Bytes buffered but not yet returned as frames."""
+        return self._end - self._start
+
+    def _reserve(self, size: int) -> None:
+        if self._start == self._end:
+            # everything consumed: reuse the buffer from the front
+            self._start = self._end = self._scan = 0
+        if self._end + size <= len(self._buf):
+            return
+        pending = self._end - self._start
+        if self._start:
+            # move the unread tail to the front (one memmove, only when out of space)
+            self._buf[:pending] = self._buf[self._start:self._end]
+            self._scan -= self._start
+            self._start, self._end = 0, pending
+        if pending + size > len(self._buf):
+            self._buf.extend(bytes(max(pending + size, 2 * len(self._buf)) - len(self._buf)))
+
+    def recv_into(self, sock, size: int = 65536) -> int:
+        """Receive up to `size` bytes from `sock` directly into the buffer; returns the count (0 = EOF)."""
+        self._reserve(size)
+        with memoryview(self._buf) as mv:
+            n = sock.recv_into(mv[self._end:self._end + size])
+        self._end += n
+        return n
+
+    def feed(self, data) -> None:
+        n = len(data)
+        self._reserve(n)
+        self._buf[self._end:self._end + n] = data
+        self._end += n
+
+    def frames(self, limit: Optional[int] = None) -> List[bytes]:
+        """Return the complete frames buffered so far (at most `limit`) and consume them."""
+        if self.mode == 'line':
+            if limit is not None:
+                return self._line_frames_limited(limit)
+            return self._line_frames()
+        return self._length_frames(limit)
+
+    def _line_frames_limited(self, limit: int) -> List[bytes]:
+        # used while a mode switch may follow any line: stop after `limit` lines
+        buf = self._buf
+        out: List[bytes] = []
+        while len(out) < limit:
+            nl = buf.find(b"\n", max(self._scan, self._start), self._end)
+            if nl < 0:
+                self._scan = self._end
+                if self._end - self._start > self.max_frame:
+                    raise FrameError("line too long")
+                break
+            out.append(bytes(buf[self._start:nl]))
+            self._start = self._scan = nl + 1
+        return out
+
+    def _line_frames(self) -> List[bytes]:
+        buf, start, end = self._buf, self._start, self._end
+        last = buf.rfind(b"\n", max(self._scan, start), end)
+        if last < 0:
+            self._scan = end
+            if end - start > self.max_frame:
+                raise FrameError("line too long")
+            return []
+        # one copy of all complete lines, split in C
+        with memoryview(buf) as mv:
+            chunk = bytes(mv[start:last])
+        self._start = self._scan = last + 1
+        return chunk.split(b"\n")
+
+    def _length_frames(self, limit: Optional[int] = None) -> List[bytes]:
+        buf, start, end = self._buf, self._start, self._end
+        size = LENGTH_PREFIX.size
+        unpack_from = LENGTH_PREFIX.unpack_from
+        out: List[bytes] = []
+        with memoryview(buf) as mv:
+            while end - start >= size and (limit is None or len(out) < limit):
+                (n,) = unpack_from(buf, start)
+                if n > self.max_frame:
+                    raise FrameError(f"frame too large: {n}")
+                begin = start + size
+                if end - begin < n:
+                    break
+                out.append(bytes(mv[begin:begin + n]))
+                start = begin + n
+        self._start = self._scan = start
+        return out
+
+
+__all__ = ["FrameError", "FrameReader", "MAX_FRAME", "MODES", "encode_frame"]
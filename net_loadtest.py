@@ -0,0 +1,360 @@
+"""
+Loopback load test for the network layer: N clients playing real matches.
+
+A GameServer runs in its own process (so its CPU time can be measured in
+isolation) and N simulated clients connect to it over loopback from one
+asyncio loop in this process, two per room. Each client speaks the same wire
+protocol as AsyncNetworkManager: hello with protocol negotiation, bin1 or
+JSON, length or line framing, state deltas. It follows the match with a
+state_sync.StateMirror and picks its moves from that mirror only:
+
+- ``first``:  the first legal move in board order (fully scripted);
+- ``random``: a random legal move, plus a card play with probability
+  ``card_rate`` at the start of each turn;
+- ``ai``:     black asks AI.choose_move (difficulty 1), white plays ``random``.
+
+A match ends on game_over or after ``max_plies`` moves (both clients count
+the moves and leave together). A client left without a move to try (every
+candidate rejected) leaves the room, which ends its match as well. Matches
+still running when ``timeout`` expires are cancelled and reported as
+unfinished next to the rest of the report. Reported:
+
+- messages sent/received and msgs/s over the whole run;
+- action latency, from sending a move or card to receiving its broadcast
+  (server processing plus two loopback hops; the clients share one loop,
+  so their own move generation is included under load): p50 / p99 / max;
+- server CPU seconds in total, per match and per move.
+
+Usage:
+    python net_loadtest.py --clients 200 --max-plies 60 --policy random
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import time
+
+try:
+    from . import chess_engine as chess
+    from .connection_async import LINE_LIMIT, read_frame
+    from .net_protocol import PROTOCOLS, ProtocolState, decode_payload
+    from .state_sync import StateMirror
+except Exception:
+    import chess_engine as chess
+    from connection_async import LINE_LIMIT, read_frame
+    from net_protocol import PROTOCOLS, ProtocolState, decode_payload
+    from state_sync import StateMirror
+
+
+POLICIES = ('first', 'random', 'ai')
+DEFAULT_MAX_PLIES = 60
+CARD_RATE = 0.3
+
+
+# -----------------------------
+# Server process
+# -----------------------------
+
+def _serve(conn, seed: Optional[int]) -> None:
+    try:
+        from .game_server import GameServer
+    except Exception:
+        from game_server import GameServer
+
+    async def run() -> None:
+        # grace=0: a client leaving ends its match at once
+        server = GameServer('127.0.0.1', 0, seed=seed, grace=0)
+        await server.start()
+        conn.send({'port': server.port, 'cpu': time.process_time()})
+        await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+        conn.send({'cpu': time.process_time()})
+        await server.close()
+
+    asyncio.run(run())
+
+
+class ServerProcess:
+    """GameServer in a child process; ``stop()`` returns the CPU seconds it used while serving."""
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        self._conn, child = multiprocessing.Pipe()
+        self._proc = multiprocessing.Process(target=_serve, args=(child, seed), daemon=True)
+        self._proc.start()
+        ready = self._conn.recv()
+        self.port: int = ready['port']
+        self._cpu0: float = ready['cpu']
+
+    def stop(self) -> float:
+        self._conn.send('stop')
+        cpu = self._conn.recv()['cpu'] - self._cpu0
+        self._proc.join(5.0)
+        return cpu
+
+
+# -----------------------------
+# Move choice from the mirrored state
+# -----------------------------
+
+def _pieces(state: Dict[str, Any]) -> List[chess.Piece]:
+    out = []
+    for key, value in state.items():
+        if key.startswith('p:'):
+            r, c = (int(v) for v in key[2:].split(','))
+            name, color, moved = value
+            p = chess.Piece(r, c, name, color)
+            p.has_moved = moved
+            out.append(p)
+    out.sort(key=lambda p: (p.row, p.col))
+    return out
+
+
+def legal_moves(state: Dict[str, Any], color: str) -> List[Tuple[int, int, int, int]]:
+    """(from_row, from_col, to_row, to_col) moves for `color` in a mirrored state (no en passant)."""
+    pcs = _pieces(state)
+    moves = []
+    for p in pcs:
+        if p.color != color or f"f:{p.row},{p.col}" in state:
+            continue
+        for r, c in p.get_valid_moves(pcs):
+            blocked = state.get(f"x:{r},{c}") or ()
+            if any(owner == color and turns > 0 for owner, turns in blocked):
+                continue
+            if chess.is_in_check(chess.simulate_move(p, r, c, pcs), color):
+                continue
+            moves.append((p.row, p.col, r, c))
+    return moves
+
+
+def _ai_move(state: Dict[str, Any], rng: random.Random) -> Optional[Tuple[int, int, int, int]]:
+    try:
+        from . import AI as ai
+    except Exception:
+        import AI as ai
+    pcs = _pieces(state)
+    dict_pieces = [{'row': p.row, 'col': p.col, 'name': p.name, 'color': p.color} for p in pcs]
+    choice = ai.choose_move(dict_pieces, chess.is_in_check(pcs, 'black'), 1, seed=rng.randrange(2 ** 31))
+    if not choice:
+        return None
+    return choice['from_row'], choice['from_col'], choice['to_row'], choice['to_col']
+
+
+# -----------------------------
+# Client
+# -----------------------------
+
+class LoadClient:
+    def __init__(self, port: int, room: str, policy: str, seed: int, protocols: Sequence[str],
+                 max_plies: int, card_rate: float = CARD_RATE) -> None:
+        self.port = port
+        self.room = room
+        self.policy = policy
+        self.rng = random.Random(seed)
+        self.protocol = ProtocolState(protocols)
+        self.max_plies = max_plies
+        self.card_rate = card_rate
+        self.mirror = StateMirror()
+        self.seat: Optional[str] = None
+        self.hand: List[int] = []
+        self.plies = 0
+        self.sent = self.received = 0
+        self.errors = 0
+        self.latencies: List[float] = []
+        self.result: Optional[str] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._inflight: Optional[Tuple[str, float]] = None     # (kind, send time)
+        self._candidates: List[Tuple[int, int, int, int]] = []
+        self._turn_seen: Optional[int] = None                  # mirror seq already acted on
+        self._carded = False                                   # card tried this turn
+
+    def _send(self, msg: Dict[str, Any]) -> None:
+        self._writer.write(self.protocol.encode(msg))
+        self.sent += 1
+
+    async def run(self) -> None:
+        reader, self._writer = await asyncio.open_connection('127.0.0.1', self.port, limit=LINE_LIMIT)
+        self._send({"type": "hello", "role": "client", "room": self.room, **self.protocol.hello_fields()})
+        try:
+            while self.result is None:
+                frame = await read_frame(reader, self.protocol.recv_framing)
+                if frame is None:
+                    self.result = self.result or 'disconnected'
+                    break
+                self.received += 1
+                self._on_message(decode_payload(frame))
+        finally:
+            self._writer.close()
+
+    def _on_message(self, msg: Any) -> None:
+        kind = msg.get('type') if isinstance(msg, dict) else None
+        if kind == 'proto':
+            self.protocol.on_proto(msg)
+        elif kind == 'welcome':
+            self.seat = msg['seat']
+        elif kind == 'hand':
+            self.hand = msg['cards']
+        elif kind == 'turn':
+            if msg['color'] == self.seat:
+                self._carded = False
+        elif kind in ('snapshot', 'delta'):
+            if not self.mirror.apply(msg):
+                self._send(self.mirror.resync_request())
+            else:
+                self._maybe_act()
+        elif kind == 'moved':
+            self.plies += 1
+            if msg['color'] == self.seat:
+                self._done('move')
+            if self.plies >= self.max_plies:
+                self.result = 'max_plies'
+        elif kind == 'card':
+            if msg['color'] == self.seat:
+                self._done('card')
+        elif kind == 'error':
+            self.errors += 1
+            if self._inflight is not None and msg.get('request') == self._inflight[0]:
+                self._inflight = None
+                self._act()
+        elif kind in ('game_over', 'opponent_left'):
+            self.result = msg.get('reason', kind)
+
+    def _done(self, kind: str) -> None:
+        if self._inflight is not None and self._inflight[0] == kind:
+            self.latencies.append(time.perf_counter() - self._inflight[1])
+            self._inflight = None
+
+    def _maybe_act(self) -> None:
+        # act once per state in which it is our turn (a card play produces another one)
+        if self.seat is None or self.mirror.state.get('color') != self.seat or self._inflight is not None:
+            return
+        if self._turn_seen == self.mirror.seq:
+            return
+        self._turn_seen = self.mirror.seq
+        self._candidates = []
+        self._act()
+
+    def _act(self) -> None:
+        state = self.mirror.state
+        if not self._carded and self.policy != 'first' and self.hand and self.rng.random() < self.card_rate:
+            self._carded = True
+            self._inflight = ('card', time.perf_counter())
+            self._send({"type": "card", "index": self.rng.randrange(len(self.hand))})
+            return
+        self._carded = True
+        if not self._candidates:
+            self._candidates = self._choose(state)
+        if not self._candidates:
+            # nothing left to try: leave (run() closes the connection, which
+            # ends the match) instead of waiting for the timeout
+            self.result = 'no_moves'
+            return
+        fr, fc, tr, tc = self._candidates.pop(0)
+        self._inflight = ('move', time.perf_counter())
+        self._send({"type": "move", "from": [fr, fc], "to": [tr, tc]})
+
+    def _choose(self, state: Dict[str, Any]) -> List[Tuple[int, int, int, int]]:
+        moves = legal_moves(state, self.seat)
+        if self.policy == 'first':
+            return moves
+        self.rng.shuffle(moves)
+        if self.policy == 'ai' and self.seat == 'black':
+            best = _ai_move(state, self.rng)
+            if best is not None:
+                moves.insert(0, best)
+        return moves
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_load(clients: int = 20, max_plies: int = DEFAULT_MAX_PLIES, policy: str = 'random',
+             seed: int = 0, protocols: Sequence[str] = PROTOCOLS, timeout: float = 120.0) -> Dict[str, Any]:
+    """Play clients // 2 concurrent matches against a fresh server process and return the report."""
+    if policy not in POLICIES:
+        raise ValueError(f"unknown policy: {policy!r}")
+    pairs = max(1, clients // 2)
+    server = ServerProcess(seed)
+    try:
+        players = [LoadClient(server.port, f"load{i // 2}", policy, seed * 7919 + i, protocols, max_plies)
+                   for i in range(pairs * 2)]
+
+        async def play() -> List[BaseException]:
+            tasks = [asyncio.create_task(p.run()) for p in players]
+            _done, pending = await asyncio.wait(tasks, timeout=timeout)
+            for t in pending:
+                t.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            return [t.exception() for t in tasks if t not in pending and t.exception() is not None]
+
+        t0 = time.perf_counter()
+        failures = asyncio.run(play())
+        wall = time.perf_counter() - t0
+    finally:
+        cpu = server.stop()
+
+    latencies = sorted(x for p in players for x in p.latencies)
+    sent = sum(p.sent for p in players)
+    received = sum(p.received for p in players)
+    moves = sum(p.plies for p in players[::2])
+    results: Dict[str, int] = {}
+    for p in players[::2]:
+        results[p.result or 'unfinished'] = results.get(p.result or 'unfinished', 0) + 1
+    unfinished = sorted({p.room for p in players if p.result is None})
+    return {
+        'clients': len(players),
+        'matches': pairs,
+        'policy': policy,
+        'protocols': list(protocols),
+        'seconds': round(wall, 3),
+        'moves': moves,
+        'msgs_sent': sent,
+        'msgs_recv': received,
+        'msgs_per_s': round((sent + received) / wall, 1),
+        'latency_p50_ms': _ms(_percentile(latencies, 0.50)),
+        'latency_p99_ms': _ms(_percentile(latencies, 0.99)),
+        'latency_max_ms': _ms(latencies[-1] if latencies else None),
+        'errors': sum(p.errors for p in players),
+        'resyncs': sum(p.mirror.resyncs for p in players),
+        'results': results,
+        'unfinished': unfinished,
+        'client_failures': [repr(e) for e in failures],
+        'server_cpu_s': round(cpu, 3),
+        'server_cpu_per_match_ms': round(cpu / pairs * 1000.0, 2),
+        'server_cpu_per_move_us': round(cpu / moves * 1e6, 1) if moves else None,
+    }
+
+
+def _ms(v: Optional[float]) -> Optional[float]:
+    return None if v is None else round(v * 1000.0, 3)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Load-test the game server with simulated clients over loopback.")
+    ap.add_argument('--clients', type=int, default=20, help="number of clients (two per match)")
+    ap.add_argument('--max-plies', type=int, default=DEFAULT_MAX_PLIES)
+    ap.add_argument('--policy', choices=POLICIES, default='random')
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--protocol', choices=PROTOCOLS, default=None, help="offer only this wire protocol")
+    ap.add_argument('--json', action='store_true', help="print the report as one JSON object")
+    args = ap.parse_args(argv)
+    protocols = (args.protocol,) if args.protocol else PROTOCOLS
+    report = run_load(args.clients, args.max_plies, args.policy, args.seed, protocols)
+    if args.json:
+        print(json.dumps(report))
+        return
+    for k, v in report.items():
+        print(f"{k:24s} {v}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Link metrics for the network managers: heartbeat RTT, jitter, throughput, queueing.
+
+Every connection owns a LinkMetrics. The transport calls ``on_send`` /
+``on_recv`` with byte counts (and ``on_write`` per send syscall, which may
+carry several coalesced messages), and ``ping()`` / ``on_pong()`` around a heartbeat:
+
+    {"type": "ping", "id": n}   ->   {"type": "pong", "id": n}
+
+RTT is measured on the sender's own monotonic clock (the peer only echoes
+the id), so the two machines' clocks never need to agree. From the samples:
+
+- ``srtt`` / ``rttvar``: smoothed RTT and its mean deviation (the TCP
+  estimators, gains 1/8 and 1/4), plus min / max / p50 / p95 over the last
+  ``window`` samples;
+- ``jitter``: RFC 3550 style, J += (|R(i) - R(i-1)| - J) / 16.
+
+MeteredQueue is a drop-in ``queue.Queue`` for ``recv_queue`` that records
+its depth (current and high-water mark) and how long messages wait in it
+before the game loop picks them up. A slow consumer therefore shows up as
+queueing delay, not as network RTT.
+
+``snapshot()`` returns everything as a dict (milliseconds, bytes/s).
+``dump()`` appends it to a JSONL file, like frame_profiler does for frames.
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Deque, Dict, Optional, TextIO, Tuple
+import itertools
+import json
+import queue
+import threading
+import time
+
+
+class LinkMetrics:
+    def __init__(self, window: int = 256, jsonl_path: Optional[str] = None) -> None:
+        self.jsonl_path = jsonl_path
+        self._sink: Optional[TextIO] = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._outstanding: Dict[int, float] = {}
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.started = time.monotonic()
+        self.msgs_sent = self.msgs_recv = 0
+        self.bytes_sent = self.bytes_recv = 0
+        self.pings_sent = self.pongs_recv = 0
+        self.writes = 0         # send syscalls (several queued messages may share one)
+        self.rtt_last: Optional[float] = None
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.jitter = 0.0
+        self.last_recv: Optional[float] = None
+        self.last_pong: Optional[float] = None
+        # recv_queue (MeteredQueue) figures
+        self.queue_depth = 0
+        self.queue_depth_max = 0
+        self.queue_wait_max = 0.0
+        self._queue_wait_total = 0.0
+        self._queue_waits = 0
+        # for per-dump rates
+        self._mark: Tuple[float, int, int] = (self.started, 0, 0)
+
+    # ---- traffic ----
+    def on_send(self, nbytes: int, messages: int = 1) -> None:
+        with self._lock:
+            self.msgs_sent += messages
+            self.bytes_sent += nbytes
+
+    def on_write(self) -> None:
+        with self._lock:
+            self.writes += 1
+
+    def on_recv(self, nbytes: int, messages: int = 1) -> None:
+        with self._lock:
+            self.msgs_recv += messages
+            self.bytes_recv += nbytes
+            self.last_recv = time.monotonic()
+
+    # ---- heartbeat ----
+    def ping(self) -> Dict[str, Any]:
+        """A new ping message; its send time is remembered until the pong arrives."""
+        with self._lock:
+            n = next(self._ids)
+            self._outstanding[n] = time.monotonic()
+            # a lost pong must not leak its entry forever
+            while len(self._outstanding) > 64:
+                self._outstanding.pop(next(iter(self._outstanding)))
+            self.pings_sent += 1
+        return {"type": "ping", "id": n}
+
+    def on_pong(self, msg: Dict[str, Any]) -> Optional[float]:
+        """Record the RTT of a pong; returns it in seconds (None for an unknown id)."""
+        now = time.monotonic()
+        with self._lock:
+            n = msg.get('id')
+            sent = self._outstanding.pop(n, None)
+            if sent is None:
+                return None
+            # older pings still outstanding were lost (pongs come back in order)
+            for old in [k for k in self._outstanding if k < n]:
+                del self._outstanding[old]
+            rtt = now - sent
+            self.pongs_recv += 1
+            self.last_pong = now
+            if self.srtt is None:
+                self.srtt, self.rttvar = rtt, rtt / 2
+            else:
+                self.rttvar += (abs(self.srtt - rtt) - self.rttvar) / 4
+                self.srtt += (rtt - self.srtt) / 8
+            if self.rtt_last is not None:
+                self.jitter += (abs(rtt - self.rtt_last) - self.jitter) / 16
+            self.rtt_last = rtt
+            self._samples.append(rtt)
+        return rtt
+
+    def unanswered_for(self) -> float:
+        """Seconds the oldest outstanding ping has gone without a pong (0 if none)."""
+        with self._lock:
+            if not self._outstanding:
+                return 0.0
+            return time.monotonic() - min(self._outstanding.values())
+
+    # ---- recv_queue ----
+    def on_enqueue(self, depth: int) -> None:
+        self.queue_depth = depth
+        if depth > self.queue_depth_max:
+            self.queue_depth_max = depth
+
+    def on_dequeue(self, depth: int, waited: float) -> None:
+        self.queue_depth = depth
+        self._queue_wait_total += waited
+        self._queue_waits += 1
+        if waited > self.queue_wait_max:
+            self.queue_wait_max = waited
+
+    # ---- output ----
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            samples = sorted(self._samples)
+            t0, sent0, recv0 = self._mark
+            dt = max(now - t0, 1e-9)
+            rec: Dict[str, Any] = {
+                't': time.time(),
+                'uptime_s': round(now - self.started, 3),
+                'msgs_sent': self.msgs_sent, 'msgs_recv': self.msgs_recv,
+                'bytes_sent': self.bytes_sent, 'bytes_recv': self.bytes_recv, 'writes': self.writes,
+                'send_bps': round((self.bytes_sent - sent0) / dt, 1),
+                'recv_bps': round((self.bytes_recv - recv0) / dt, 1),
+                'pings': self.pings_sent, 'pongs': self.pongs_recv,
+                'rtt_ms': _ms(self.rtt_last), 'srtt_ms': _ms(self.srtt), 'rttvar_ms': _ms(self.rttvar),
+                'jitter_ms': _ms(self.jitter),
+                'rtt_min_ms': _ms(samples[0] if samples else None),
+                'rtt_p50_ms': _ms(_percentile(samples, 0.50)),
+                'rtt_p95_ms': _ms(_percentile(samples, 0.95)),
+                'rtt_max_ms': _ms(samples[-1] if samples else None),
+                'queue_depth': self.queue_depth, 'queue_depth_max': self.queue_depth_max,
+                'queue_wait_avg_ms': _ms(self._queue_wait_total / self._queue_waits if self._queue_waits else None),
+                'queue_wait_max_ms': _ms(self.queue_wait_max),
+            }
+            self._mark = (now, self.bytes_sent, self.bytes_recv)
+        return rec
+
+    def dump(self, path: Optional[str] = None) -> Dict[str, Any]:
+        """Append a snapshot to the JSONL file (`path` or the configured one) and return it."""
+        rec = self.snapshot()
+        path = path or self.jsonl_path
+        if path:
+            try:
+                if self._sink is None or self._sink.name != path:
+                    self.close()
+                    self._sink = open(path, 'a', encoding='utf-8', buffering=1)
+                self._sink.write(json.dumps(rec) + '\n')
+            except OSError:
+                self.jsonl_path = None
+        return rec
+
+    def close(self) -> None:
+        if self._sink is not None:
+            try:
+                self._sink.close()
+            except OSError:
+                pass
+            self._sink = None
+
+
+def _ms(v: Optional[float]) -> Optional[float]:
+    return None if v is None else round(v * 1000.0, 3)
+
+
+def _percentile(sorted_samples, q: float) -> Optional[float]:
+    if not sorted_samples:
+        return None
+    return sorted_samples[min(len(sorted_samples) - 1, int(q * len(sorted_samples)))]
+
+
+class MeteredQueue(queue.Queue):
+    """queue.Queue that reports depth and per-item waiting time to a LinkMetrics."""
+
+    def __init__(self, metrics: LinkMetrics, maxsize: int = 0) -> None:
+        self.metrics = metrics
+        super().__init__(maxsize)
+
+    # queue.Queue calls these with its mutex held
+    def _put(self, item: Any) -> None:
+        self.queue.append((time.monotonic(), item))
+        self.metrics.on_enqueue(len(self.queue))
+
+    def _get(self) -> Any:
+        t, item = self.queue.popleft()
+        self.metrics.on_dequeue(len(self.queue), time.monotonic() - t)
+        return item
+
+
+__all__ = ["LinkMetrics", "MeteredQueue"]
@@ -0,0 +1,216 @@
+"""
+Compact binary encoding for the hot network messages, negotiated in ``hello``.
+
+Every message used to be UTF-8 JSON, so a move of four small integers cost
+~100 bytes and a JSON parse. Protocol ``bin1`` packs the frequent messages
+with ``struct`` and keeps JSON for everything else:
+
+=========  ====  ==========================================================
+message    op    layout (network byte order)
+=========  ====  ==========================================================
+move       0x01  op u8, seq u32, from u8, to u8, promotion u8      (8 bytes)
+card       0x02  op u8, seq u32, card_id u16, index u8, n u8, n x square u8
+                 (6 + 2 bytes for a targetless play)
+moved      0x03  op u8, seq u32, color u8, from u8, to u8, promotion u8
+=========  ====  ==========================================================
+
+A square is ``row * 8 + col``; promotion is 0 (none) or 1-4 for Q/R/B/N; an
+absent hand index is 255 and an absent card_id 65535. A message whose fields don't fit the schema (extra
+keys, out-of-range values) falls back to JSON, so nothing is ever lost.
+Binary payloads start with an opcode byte < 0x20, which no JSON text does,
+so one stream can carry both and ``decode_payload`` tells them apart.
+
+Binary payloads may contain newlines, so ``bin1`` is sent with length-prefixed
+framing. Negotiation (ProtocolState), independently for each direction:
+
+1. both sides send ``hello`` (line-framed JSON) with ``"protocols": [...]``;
+2. on the peer's hello, a side picks the first of its own protocols that the
+   peer offered; for anything but ``json`` it sends one more line-framed
+   ``{"type": "proto", "use": "bin1", "framing": "length"}`` and switches its
+   sending side;
+3. on ``proto`` the receiver switches its FrameReader to the announced
+   framing for every following byte. ``proto`` is not delivered to the app.
+
+A peer whose hello has no ``protocols`` (older builds) keeps plain NDJSON.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Sequence
+import json
+import struct
+
+try:
+    from .net_framing import encode_frame
+except Exception:
+    from net_framing import encode_frame
+
+
+PROTOCOL_JSON = 'json'
+PROTOCOL_BIN1 = 'bin1'
+PROTOCOLS = (PROTOCOL_BIN1, PROTOCOL_JSON)
+# offered by default, in order of preference
+DEFAULT_PROTOCOLS = PROTOCOLS
+
+OP_MOVE = 0x01
+OP_CARD = 0x02
+OP_MOVED = 0x03
+
+_MOVE = struct.Struct('!BIBBB')
+_CARD = struct.Struct('!BIHBB')
+_MOVED = struct.Struct('!BIBBBB')
+
+_PROMOTIONS = (None, 'Q', 'R', 'B', 'N')
+_COLORS = ('white', 'black')
+_MOVE_KEYS = frozenset(('type', 'from', 'to', 'promotion', 'seq'))
+_CARD_KEYS = frozenset(('type', 'card_id', 'index', 'targets', 'seq'))
+_MOVED_KEYS = frozenset(('type', 'color', 'from', 'to', 'promotion', 'seq'))
+_NO_INDEX = 255
+_NO_CARD = 0xFFFF
+
+
+def _square(v: Any) -> int:
+    r, c = v
+    if type(r) is not int or type(c) is not int or not (0 <= r < 8 and 0 <= c < 8):
+        raise ValueError(v)
+    return r * 8 + c
+
+
+def _unsquare(b: int) -> list:
+    return [b >> 3, b & 7]
+
+
+def _seq(msg: Dict[str, Any]) -> int:
+    seq = msg.get('seq', 0)
+    if type(seq) is not int or not (0 <= seq < 2 ** 32):
+        raise ValueError(seq)
+    return seq
+
+
+def _optional_int(v: Any, absent: int) -> int:
+    # `absent` encodes None, so real values must stay below it
+    if v is None:
+        return absent
+    if type(v) is not int or not (0 <= v < absent):
+        raise ValueError(v)
+    return v
+
+
+def encode_binary(msg: Any) -> Optional[bytes]:
+    """bin1 payload for `msg`, or None if it has no binary form."""
+    if not isinstance(msg, dict):
+        return None
+    kind = msg.get('type')
+    keys = msg.keys()
+    try:
+        if kind == 'move' and keys <= _MOVE_KEYS:
+            return _MOVE.pack(OP_MOVE, _seq(msg), _square(msg['from']), _square(msg['to']),
+                              _PROMOTIONS.index(msg.get('promotion')))
+        if kind == 'card' and keys <= _CARD_KEYS:
+            targets = [_square(t) for t in msg.get('targets') or ()]
+            index = _optional_int(msg.get('index'), _NO_INDEX)
+            card_id = _optional_int(msg.get('card_id'), _NO_CARD)
+            if len(targets) > 255:
+                return None
+            return _CARD.pack(OP_CARD, _seq(msg), card_id, index, len(targets)) + bytes(targets)
+        if kind == 'moved' and keys <= _MOVED_KEYS:
+            return _MOVED.pack(OP_MOVED, _seq(msg), _COLORS.index(msg['color']), _square(msg['from']),
+                               _square(msg['to']), _PROMOTIONS.index(msg.get('promotion')))
+    except (KeyError, ValueError, TypeError, struct.error):
+        return None
+    return None
+
+
+def decode_binary(payload: bytes) -> Dict[str, Any]:
+    op = payload[0]
+    if op == OP_MOVE:
+        _, seq, fr, to, promo = _MOVE.unpack(payload)
+        return {'type': 'move', 'from': _unsquare(fr), 'to': _unsquare(to),
+                'promotion': _PROMOTIONS[promo], 'seq': seq}
+    if op == OP_CARD:
+        _, seq, card_id, index, n = _CARD.unpack_from(payload)
+        targets = payload[_CARD.size:_CARD.size + n]
+        return {'type': 'card', 'card_id': None if card_id == _NO_CARD else card_id,
+                'index': None if index == _NO_INDEX else index,
+                'targets': [_unsquare(b) for b in targets], 'seq': seq}
+    if op == OP_MOVED:
+        _, seq, color, fr, to, promo = _MOVED.unpack(payload)
+        return {'type': 'moved', 'color': _COLORS[color], 'from': _unsquare(fr), 'to': _unsquare(to),
+                'promotion': _PROMOTIONS[promo], 'seq': seq}
+    raise ValueError(f"unknown opcode {op:#x}")
+
+
+def encode_payload(msg: Any, protocol: str = PROTOCOL_JSON) -> bytes:
+    if protocol == PROTOCOL_BIN1:
+        payload = encode_binary(msg)
+        if payload is not None:
+            return payload
+    return json.dumps(msg, ensure_ascii=False).encode('utf-8')
+
+
+def decode_payload(payload: bytes) -> Any:
+    if payload and payload[0] < 0x20:
+        try:
+            return decode_binary(payload)
+        except (ValueError, IndexError, struct.error):
+            return {"type": "raw", "data": payload.hex()}
+    try:
+        return json.loads(payload)
+    except ValueError:
+        pass
+    # lenient legacy parse (and {"type": "raw"} for anything else)
+    try:
+        from .connection import decode_message
+    except Exception:
+        from connection import decode_message
+    return decode_message(payload)
+
+
+class ProtocolState:
+    """Per-connection negotiation state and the encoder for the sending side."""
+
+    def __init__(self, offered: Sequence[str] = DEFAULT_PROTOCOLS, framing: str = 'line') -> None:
+        self.offered = tuple(p for p in offered if p in PROTOCOLS) or (PROTOCOL_JSON,)
+        self.send_protocol = PROTOCOL_JSON
+        self.send_framing = framing
+        self.recv_protocol = PROTOCOL_JSON
+        self.recv_framing = framing
+
+    def hello_fields(self) -> Dict[str, Any]:
+        return {"protocols": list(self.offered)}
+
+    @property
+    def recv_may_switch(self) -> bool:
+        """The peer may still announce a switch, so line frames must be read one at a time."""
+        return self.recv_framing == 'line' and any(p != PROTOCOL_JSON for p in self.offered)
+
+    def on_peer_hello(self, msg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The `proto` marker to send (then call switch_send), or None to stay on NDJSON."""
+        theirs = msg.get('protocols')
+        if not isinstance(theirs, list) or self.send_protocol != PROTOCOL_JSON:
+            return None
+        for p in self.offered:
+            if p in theirs:
+                if p == PROTOCOL_JSON:
+                    return None
+                return {"type": "proto", "use": p, "framing": "length"}
+        return None
+
+    def switch_send(self, marker: Dict[str, Any]) -> None:
+        self.send_protocol = marker['use']
+        self.send_framing = marker['framing']
+
+    def on_proto(self, msg: Dict[str, Any]) -> bool:
+        use, framing = msg.get('use'), msg.get('framing')
+        if use not in self.offered or framing not in ('line', 'length'):
+            return False
+        self.recv_protocol, self.recv_framing = use, framing
+        return True
+
+    def encode(self, msg: Any) -> bytes:
+        return encode_frame(encode_payload(msg, self.send_protocol), self.send_framing)
+
+
+__all__ = [
+    "DEFAULT_PROTOCOLS", "PROTOCOLS", "PROTOCOL_BIN1", "PROTOCOL_JSON", "ProtocolState",
+    "decode_binary", "decode_payload", "encode_binary", "encode_payload",
+]
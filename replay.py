@@ -0,0 +1,509 @@
+"""
+Replay recording and headless playback for the chess-card-battle project.
+
+A replay is a JSONL file (optionally gzip-compressed when the path ends with
+`.gz`). The first line is a header carrying the format version and the RNG
+seed; every following line is one event:
+
+- 'move'     : chess move applied through chess_engine.apply_move
+- 'promote'  : pawn promotion resolved through chess_engine.complete_promotion
+- 'turn'     : the player's card-game turn started (Game.start_turn)
+- 'ai_turn'  : the AI's turn started (Game.start_ai_turn)
+- 'card'     : a card played by either side: side and hand index, plus the
+               RNG draws the card's resolution consumed ('r')
+- 'pending'  : a UI follow-up action (discard, tile/piece target, ...)
+               resolved, with the choice that was made
+- 'decay'    : time-limited statuses decayed at the end of a side's turn
+- 'keyframe' : full snapshot of board + card state, written every
+               `keyframe_interval` turns
+
+Only inputs are recorded between keyframes; playback re-applies them through
+the engine. Card plays are re-run with their recorded RNG draws fed back in,
+so draws the UI makes in between (AI choices, ...) do not shift them.
+Pending resolutions live in the UI and cannot be re-run headless, so each one
+is followed by a keyframe. Anything else the UI changes outside the engine is
+corrected at the next keyframe.
+
+Lines are buffered and flushed on keyframes and on close.
+
+`ReplayPlayer.seek(turn)` restores the nearest keyframe at or before `turn`
+and re-applies only the events after it, so seeking costs O(keyframe
+interval) instead of O(game length).
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional
+import bisect
+import gzip
+import json
+import random
+
+try:
+    from . import chess_engine as chess
+    from .card_core import Deck, Game, Hand, PlayerState, card_from_name
+except Exception:
+    import chess_engine as chess
+    from card_core import Deck, Game, Hand, PlayerState, card_from_name
+
+
+REPLAY_VERSION = 2
+DEFAULT_KEYFRAME_INTERVAL = 5
+
+_PLAYER_FLAGS = ('pp_current', 'pp_max', 'next_move_can_jump', 'extra_moves_this_turn', 'iron_wall_active')
+_GAME_FLAGS = ('turn', 'player_moved_this_turn', 'turn_active', 'player_consecutive_turns',
+               'ai_consecutive_turns', 'ai_next_move_can_jump', 'ai_iron_wall_active')
+
+
+def _open(path: str, mode: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+# -----------------------------
+# Snapshots
+# -----------------------------
+
+def _player_state(p: Optional[PlayerState]) -> Optional[Dict[str, Any]]:
+    if p is None:
+        return None
+    d: Dict[str, Any] = {
+        'hand': [c.name for c in p.hand.cards],
+        'deck': [c.name for c in p.deck.cards],
+        'grave': [c.name for c in p.graveyard],
+    }
+    for k in _PLAYER_FLAGS:
+        if hasattr(p, k):
+            d[k] = getattr(p, k)
+    return d
+
+
+def snapshot_cards(game: Game, ai_player: Optional[PlayerState] = None) -> Dict[str, Any]:
+    """Compact card-side state: both players' cards/PP plus statuses."""
+    frozen = []
+    for p in chess.pieces:
+        turns = game.frozen_pieces.get(id(p))
+        if turns is not None:
+            frozen.append([p.row, p.col, turns])
+    blocked = []
+    for tile, entries in game.blocked_tiles.items():
+        if isinstance(entries, list):
+            for e in entries:
+                blocked.append([tile[0], tile[1], e.get('owner'), int(e.get('turns', 0))])
+        else:
+            # legacy int form written by apply_blocked_tile
+            blocked.append([tile[0], tile[1], game.blocked_tiles_owner.get(tile), int(entries)])
+    d: Dict[str, Any] = {
+        'white': _player_state(game.player),
+        'black': _player_state(ai_player),
+        'frozen': frozen,
+        'blocked': blocked,
+    }
+    for k in _GAME_FLAGS:
+        if hasattr(game, k):
+            d[k] = getattr(game, k)
+    return d
+
+
+def snapshot_board() -> Dict[str, Any]:
+    return {
+        'pieces': [[p.row, p.col, p.name, p.color, bool(p.has_moved)] for p in chess.pieces],
+        'ep': list(chess.en_passant_target) if chess.en_passant_target is not None else None,
+    }
+
+
+def _cards(names: List[str]) -> List[Any]:
+    out = []
+    for n in names:
+        c = card_from_name(n)
+        if c is not None:
+            out.append(c)
+    return out
+
+
+def _restore_player(p: PlayerState, d: Dict[str, Any]) -> None:
+    p.hand = Hand(_cards(d.get('hand', [])))
+    p.deck = Deck(_cards(d.get('deck', [])))
+    p.graveyard = _cards(d.get('grave', []))
+    for k in _PLAYER_FLAGS:
+        if k in d:
+            setattr(p, k, d[k])
+
+
+def restore_board(d: Dict[str, Any]) -> None:
+    pcs = []
+    for r, c, name, color, moved in d.get('pieces', []):
+        p = chess.Piece(r, c, name, color)
+        p.has_moved = moved
+        pcs.append(p)
+    chess.pieces[:] = pcs
+    ep = d.get('ep')
+    chess.en_passant_target = tuple(ep) if ep is not None else None
+    chess.promotion_pending = None
+
+
+def restore_cards(game: Game, ai_player: Optional[PlayerState], d: Dict[str, Any]) -> None:
+    if d.get('white') is not None:
+        _restore_player(game.player, d['white'])
+    if ai_player is not None and d.get('black') is not None:
+        _restore_player(ai_player, d['black'])
+    for k in _GAME_FLAGS:
+        if k in d:
+            setattr(game, k, d[k])
+    # statuses: frozen pieces are keyed by id() of the current engine pieces
+    for p in chess.pieces:
+        if hasattr(p, 'frozen_turns'):
+            del p.frozen_turns
+    game.clear_statuses()
+    for r, c, turns in d.get('frozen', []):
+        p = chess.get_piece_at(r, c)
+        if p is not None:
+            game.frozen_pieces[id(p)] = turns
+            p.frozen_turns = turns
+    for r, c, owner, turns in d.get('blocked', []):
+        game.add_blocked_tile((r, c), owner, turns)
+
+
+# -----------------------------
+# Recording
+# -----------------------------
+
+class _DrawTap:
+    """Records the values drawn from a random.Random instance.
+
+    Every method of random.Random (choice, randrange, shuffle, ...) goes
+    through `random()` or `getrandbits()`, so shadowing those two on the
+    instance sees every draw. `tape` is None while not recording.
+    """
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.tape: Optional[List[Any]] = None
+        real_random, real_bits = rng.random, rng.getrandbits
+
+        def _random() -> float:
+            v = real_random()
+            if self.tape is not None:
+                self.tape.append(v)
+            return v
+
+        def _getrandbits(k: int) -> int:
+            v = real_bits(k)
+            if self.tape is not None:
+                self.tape.append(v)
+            return v
+
+        rng.random = _random
+        rng.getrandbits = _getrandbits
+
+    def remove(self) -> None:
+        for name in ('random', 'getrandbits'):
+            self.rng.__dict__.pop(name, None)
+
+
+class _DrawFeed:
+    """Context manager feeding recorded draws back into a random.Random.
+
+    Falls back to the real generator once the recorded draws run out.
+    """
+
+    def __init__(self, rng: random.Random, draws: List[Any]):
+        self.rng = rng
+        self.draws = list(draws)
+
+    def __enter__(self) -> "_DrawFeed":
+        it = iter(self.draws)
+        real_random, real_bits = self.rng.random, self.rng.getrandbits
+        missing = object()
+
+        def _random() -> float:
+            v = next(it, missing)
+            return real_random() if v is missing else v
+
+        def _getrandbits(k: int) -> int:
+            v = next(it, missing)
+            return real_bits(k) if v is missing else v
+
+        self.rng.random = _random
+        self.rng.getrandbits = _getrandbits
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        for name in ('random', 'getrandbits'):
+            self.rng.__dict__.pop(name, None)
+
+
+class ReplayRecorder:
+    """Append-only replay writer hooked into a Game and chess_engine.
+
+    `ai_player_source` is a callable returning the AI PlayerState (the UI
+    keeps it in a module global that may be replaced between battles).
+    """
+
+    def __init__(self, path: str, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL, seed: Optional[int] = None):
+        self.path = path
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2 ** 31)
+        self._fh = None
+        self._game: Optional[Game] = None
+        self._ai_source: Callable[[], Optional[PlayerState]] = lambda: None
+        self._tap: Optional[_DrawTap] = None
+        self._n = 0
+        self._last_keyframe_turn: Optional[int] = None
+
+    # ---- lifecycle ----
+    def attach(self, game: Game, ai_player_source: Optional[Callable[[], Optional[PlayerState]]] = None) -> None:
+        self.detach()
+        self._game = game
+        if ai_player_source is not None:
+            self._ai_source = ai_player_source
+        self._fh = _open(self.path, 'w')
+        # A game created from a known seed keeps playing from it (the header
+        # records that seed); otherwise seed it so the match can be reproduced
+        if game.seed is not None:
+            self.seed = game.seed
+        else:
+            game.reseed(self.seed)
+        self._tap = _DrawTap(game.rng)
+        self._write({'t': 'header', 'v': REPLAY_VERSION, 'seed': self.seed, 'kf': self.keyframe_interval})
+        game.listeners.append(self._on_game_event)
+        chess.move_listeners.append(self._on_chess_event)
+        self.write_keyframe()
+
+    def detach(self) -> None:
+        if self._game is not None:
+            try:
+                self._game.listeners.remove(self._on_game_event)
+            except ValueError:
+                pass
+        try:
+            chess.move_listeners.remove(self._on_chess_event)
+        except ValueError:
+            pass
+        if self._tap is not None:
+            self._tap.remove()
+            self._tap = None
+        self._game = None
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            except Exception:
+                pass
+            self._fh = None
+
+    close = detach
+
+    # ---- writing ----
+    def _write(self, ev: Dict[str, Any]) -> None:
+        if self._fh is None:
+            return
+        self._fh.write(json.dumps(ev, ensure_ascii=False, separators=(',', ':')) + "\n")
+
+    def _event(self, t: str, **data: Any) -> None:
+        game = self._game
+        ev = {'t': t, 'n': self._n, 'turn': getattr(game, 'turn', 0) if game is not None else 0}
+        ev.update(data)
+        self._n += 1
+        self._write(ev)
+
+    def write_keyframe(self) -> None:
+        game = self._game
+        if game is None:
+            return
+        self._last_keyframe_turn = game.turn
+        self._event('keyframe', board=snapshot_board(), cards=snapshot_cards(game, self._ai_source()))
+        if self._fh is not None:
+            self._fh.flush()
+
+    # ---- listeners ----
+    def _on_chess_event(self, kind: str, info: dict) -> None:
+        if kind == 'move':
+            self._event('move', f=list(info['from']), to=list(info['to']))
+        elif kind == 'promote':
+            self._event('promote', at=list(info['at']), name=info['name'])
+
+    def _on_game_event(self, kind: str, data: Dict[str, Any]) -> None:
+        game = self._game
+        if game is None:
+            return
+        tap = self._tap
+        if kind == 'play':
+            # draws from here to the 'card' event belong to the card
+            if tap is not None:
+                tap.tape = []
+        elif kind == 'card':
+            draws = tap.tape if tap is not None else None
+            if tap is not None:
+                tap.tape = None
+            ev: Dict[str, Any] = {'side': data.get('side'), 'idx': data.get('index')}
+            if draws:
+                ev['r'] = draws
+            self._event('card', **ev)
+        elif kind == 'turn':
+            if self._last_keyframe_turn is None or game.turn - self._last_keyframe_turn >= self.keyframe_interval:
+                self.write_keyframe()
+            else:
+                self._event('turn')
+        elif kind == 'ai_turn':
+            self._event('ai_turn')
+        elif kind == 'decay':
+            self._event('decay', color=data.get('ended_color'))
+        elif kind == 'pending':
+            choice = {k: v for k, v in data.items() if k != 'kind'}
+            self._event('pending', kind=data.get('kind'), choice=choice)
+            # the resolution ran in the UI; its result is only in the keyframe
+            self.write_keyframe()
+
+
+# -----------------------------
+# Playback
+# -----------------------------
+
+def load_replay(path: str):
+    """Return (header, events) read from a replay file."""
+    header: Dict[str, Any] = {}
+    events: List[Dict[str, Any]] = []
+    with _open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            ev = json.loads(line)
+            if ev.get('t') == 'header':
+                header = ev
+            else:
+                events.append(ev)
+    return header, events
+
+
+class ReplayPlayer:
+    """Headless replay player driving chess_engine's module state.
+
+    Owns its own Game and AI PlayerState; after `seek(turn)` they (and
+    `chess_engine.pieces`) reflect the match at the end of that turn.
+    """
+
+    def __init__(self, path: str):
+        self.header, self.events = load_replay(path)
+        self.seed = self.header.get('seed')
+        self.game = Game(player=PlayerState(deck=Deck()))
+        self.game.reseed(self.seed)
+        self.ai_player = PlayerState(deck=Deck())
+        # indices of keyframes and their turns (sorted by position == by turn)
+        self._kf_idx = [i for i, ev in enumerate(self.events) if ev['t'] == 'keyframe']
+        self._kf_turns = [self.events[i]['turn'] for i in self._kf_idx]
+        self.position = 0  # index of the next event to apply
+        if self._kf_idx:
+            self._restore(self._kf_idx[0])
+
+    @property
+    def turn(self) -> int:
+        return self.game.turn
+
+    @property
+    def last_turn(self) -> int:
+        return self.events[-1]['turn'] if self.events else 0
+
+    def _restore(self, kf_pos: int) -> None:
+        ev = self.events[kf_pos]
+        restore_board(ev['board'])
+        restore_cards(self.game, self.ai_player, ev['cards'])
+        self.game.pending = None
+        self.position = kf_pos + 1
+
+    def _play_card(self, ev: Dict[str, Any]) -> None:
+        game = self.game
+        # the guards passed when this was recorded; the UI flips these flags
+        # outside the engine, so do not let them reject the re-run
+        prev_active = game.turn_active
+        game.turn_active = True
+        game.pending = None
+        with _DrawFeed(game.rng, ev.get('r', [])):
+            if ev.get('side') == 'black':
+                game.play_card_for(self.ai_player, ev['idx'])
+            else:
+                game.play_card(ev['idx'])
+        game.turn_active = prev_active
+
+    def _apply(self, ev: Dict[str, Any]) -> None:
+        t = ev['t']
+        if t == 'move':
+            p = chess.get_piece_at(*ev['f'])
+            if p is not None:
+                chess.apply_move(p, ev['to'][0], ev['to'][1])
+        elif t == 'promote':
+            if chess.promotion_pending is None:
+                p = chess.get_piece_at(*ev['at'])
+                if p is not None:
+                    chess.promotion_pending = {'piece': p, 'color': p.color}
+            chess.complete_promotion(ev['name'])
+        elif t == 'card':
+            self._play_card(ev)
+        elif t == 'turn':
+            self.game.start_turn()
+        elif t == 'ai_turn':
+            self.game.start_ai_turn(self.ai_player)
+        elif t == 'pending':
+            self.game.pending = None
+        elif t == 'decay':
+            self.game.decay_statuses(ev.get('color'))
+
+    def step(self) -> Optional[Dict[str, Any]]:
+        """Apply the next event; returns it, or None at the end."""
+        if self.position >= len(self.events):
+            return None
+        ev = self.events[self.position]
+        self.position += 1
+        if ev['t'] == 'keyframe':
+            self._restore(self.position - 1)
+        else:
+            self._apply(ev)
+        return ev
+
+    def seek(self, turn: int) -> int:
+        """Fast-forward to the end of `turn`; returns the number of events applied."""
+        k = bisect.bisect_right(self._kf_turns, turn) - 1
+        if k < 0:
+            k = 0
+        if not self._kf_idx:
+            return 0
+        self._restore(self._kf_idx[k])
+        applied = 0
+        while self.position < len(self.events):
+            ev = self.events[self.position]
+            if ev['turn'] > turn:
+                break
+            self.step()
+            applied += 1
+        return applied
+
+
+__all__ = [
+    "REPLAY_VERSION",
+    "ReplayRecorder",
+    "ReplayPlayer",
+    "load_replay",
+    "snapshot_board",
+    "snapshot_cards",
+    "restore_board",
+    "restore_cards",
+]
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("usage: python replay.py <replay.jsonl[.gz]> [turn]")
+        sys.exit(1)
+    rp = ReplayPlayer(sys.argv[1])
+    target = int(sys.argv[2]) if len(sys.argv) > 2 else rp.last_turn
+    n = rp.seek(target)
+    print(f"turn {rp.turn} (applied {n} events after keyframe)")
+    for r in range(8):
+        row = ''
+        for c in range(8):
+            p = chess.get_piece_at(r, c)
+            row += (p.name if p.color == 'white' else p.name.lower()) if p else '.'
+        print(row)
+    print('hand:', [c.name for c in rp.game.player.hand.cards])
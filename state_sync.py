@@ -0,0 +1,212 @@
+"""
+Delta state synchronization with an incremental state hash.
+
+The authoritative side (game_server.Room) describes the public match state
+as a flat mapping of short keys to JSON values:
+
+- ``p:r,c``       piece on (r, c): [name, color, has_moved]
+- ``ep``          en passant target or None
+- ``f:r,c``       frozen piece on (r, c): remaining turns
+- ``x:r,c``       blocked tile: [[owner, turns], ...]
+- ``w:<flag>``    white's PP / flags and hand/deck/graveyard sizes (``b:`` for black)
+- ``g:<flag>``    game flags (turn, consecutive turns, ...), ``color`` = side to move
+
+Hands are private and are not part of it; each player already receives its
+own full hand in ``hand`` messages.
+
+After every action the server diffs the new mapping against the previous
+one and broadcasts only the changed keys::
+
+    {"type": "delta", "seq": n, "set": {key: value}, "del": [key], "hash": h}
+
+``hash`` is a Zobrist-style 64-bit XOR of per-entry digests, so both sides
+update it in O(changed keys) rather than rehashing the whole state. Every
+``SNAPSHOT_INTERVAL`` deltas (and on request) a full snapshot follows::
+
+    {"type": "snapshot", "seq": n, "hash": h, "data": base64(zlib(json(state)))}
+
+StateMirror is the receiving side: it applies deltas, and as soon as a
+sequence gap or a hash mismatch shows up it reports divergence; the client
+then sends ``{"type": "resync", "seq": n}`` and the server answers with a
+snapshot. A desync is therefore caught on the action that caused it rather
+than turns later as an "illegal" move.
+"""
+from __future__ import annotations
+
+from hashlib import blake2b
+from typing import Any, Dict, Optional, Tuple
+import base64
+import json
+import zlib
+
+try:
+    from .card_core import Game, PlayerState
+    from .replay import snapshot_board, snapshot_cards
+except Exception:
+    from card_core import Game, PlayerState
+    from replay import snapshot_board, snapshot_cards
+
+
+# full snapshot after this many deltas, so a silent divergence cannot outlive it
+SNAPSHOT_INTERVAL = 20
+
+
+def _canonical(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def entry_hash(key: str, value: Any) -> int:
+    h = blake2b(key.encode('utf-8') + b'\0' + _canonical(value), digest_size=8)
+    return int.from_bytes(h.digest(), 'big')
+
+
+def state_hash(state: Dict[str, Any]) -> int:
+    h = 0
+    for k, v in state.items():
+        h ^= entry_hash(k, v)
+    return h
+
+
+def format_hash(h: int) -> str:
+    return f"{h:016x}"
+
+
+def public_state(game: Game, black: Optional[PlayerState], turn_color: str) -> Dict[str, Any]:
+    """Flat public state of a match. The match's board must be active in chess_engine."""
+    board = snapshot_board()
+    cards = snapshot_cards(game, black)
+    state: Dict[str, Any] = {'ep': board['ep'], 'color': turn_color}
+    for r, c, name, color, moved in board['pieces']:
+        state[f"p:{r},{c}"] = [name, color, moved]
+    for r, c, turns in cards['frozen']:
+        state[f"f:{r},{c}"] = turns
+    for r, c, owner, turns in cards['blocked']:
+        state.setdefault(f"x:{r},{c}", []).append([owner, turns])
+    for prefix, side in (('w', 'white'), ('b', 'black')):
+        d = cards.get(side)
+        if d is None:
+            continue
+        for k, v in d.items():
+            if isinstance(v, list):
+                state[f"{prefix}:{k}"] = len(v)
+            else:
+                state[f"{prefix}:{k}"] = v
+    for k, v in cards.items():
+        if k not in ('white', 'black', 'frozen', 'blocked'):
+            state[f"g:{k}"] = v
+    return state
+
+
+def encode_snapshot(state: Dict[str, Any]) -> str:
+    return base64.b64encode(zlib.compress(_canonical(state), 6)).decode('ascii')
+
+
+def decode_snapshot(data: str) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(base64.b64decode(data)))
+
+
+class SyncState:
+    """Sender side: the last published state, its hash and the delta sequence number."""
+
+    def __init__(self, snapshot_interval: int = SNAPSHOT_INTERVAL) -> None:
+        self.state: Dict[str, Any] = {}
+        self.hash = 0
+        self.seq = 0
+        self.snapshot_interval = snapshot_interval
+        self._since_snapshot = 0
+
+    def update(self, new: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Diff `new` against the published state; returns a delta message or None if nothing changed."""
+        old = self.state
+        changed: Dict[str, Any] = {}
+        h = self.hash
+        for k, v in new.items():
+            if k not in old:
+                changed[k] = v
+                h ^= entry_hash(k, v)
+            elif old[k] != v:
+                changed[k] = v
+                h ^= entry_hash(k, old[k]) ^ entry_hash(k, v)
+        removed = [k for k in old if k not in new]
+        for k in removed:
+            h ^= entry_hash(k, old[k])
+        if not changed and not removed:
+            return None
+        self.state = dict(new)
+        self.hash = h
+        self.seq += 1
+        self._since_snapshot += 1
+        return {"type": "delta", "seq": self.seq, "set": changed, "del": removed, "hash": format_hash(h)}
+
+    def periodic_snapshot(self) -> Optional[Dict[str, Any]]:
+        """A snapshot message if `snapshot_interval` deltas went out since the last one."""
+        if self._since_snapshot < self.snapshot_interval:
+            return None
+        self._since_snapshot = 0
+        return self.snapshot()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"type": "snapshot", "seq": self.seq, "hash": format_hash(self.hash),
+                "data": encode_snapshot(self.state)}
+
+
+class StateMirror:
+    """Receiver side: applies delta/snapshot messages and detects divergence."""
+
+    def __init__(self) -> None:
+        self.state: Dict[str, Any] = {}
+        self.hash = 0
+        self.seq = 0
+        self.synced = False
+        self.resyncs = 0
+
+    def apply(self, msg: Dict[str, Any]) -> bool:
+        """Apply a delta or snapshot; returns whether the mirror is (still) in sync."""
+        kind = msg.get('type')
+        if kind == 'snapshot':
+            state = decode_snapshot(msg['data'])
+            self.state, self.hash, self.seq = state, state_hash(state), msg['seq']
+            self.synced = format_hash(self.hash) == msg.get('hash')
+            return self.synced
+        if kind != 'delta' or not self.synced:
+            return self.synced
+        if msg.get('seq') != self.seq + 1:
+            # a delta was lost or reordered: everything after it is unusable
+            self.synced = False
+            return False
+        h, state = self.hash, self.state
+        for k in msg.get('del', ()):
+            if k in state:
+                h ^= entry_hash(k, state.pop(k))
+        for k, v in msg.get('set', {}).items():
+            if k in state:
+                h ^= entry_hash(k, state[k])
+            state[k] = v
+            h ^= entry_hash(k, v)
+        self.hash, self.seq = h, msg['seq']
+        self.synced = format_hash(h) == msg.get('hash')
+        return self.synced
+
+    def set(self, key: str, value: Any) -> None:
+        """Change one entry locally (client-side prediction); the next delta's hash verifies it."""
+        self.discard(key)
+        self.state[key] = value
+        self.hash ^= entry_hash(key, value)
+
+    def discard(self, key: str) -> None:
+        if key in self.state:
+            self.hash ^= entry_hash(key, self.state.pop(key))
+
+    def resync_request(self) -> Dict[str, Any]:
+        self.resyncs += 1
+        return {"type": "resync", "seq": self.seq}
+
+    def piece_at(self, row: int, col: int) -> Optional[Tuple[str, str, bool]]:
+        v = self.state.get(f"p:{row},{col}")
+        return tuple(v) if v is not None else None
+
+
+__all__ = [
+    "SNAPSHOT_INTERVAL", "StateMirror", "SyncState", "decode_snapshot", "encode_snapshot",
+    "entry_hash", "format_hash", "public_state", "state_hash",
+]
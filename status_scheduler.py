@@ -0,0 +1,192 @@
+"""
+Turn-based expiry scheduling for timed status effects.
+
+Timed statuses (frozen pieces, blocked tiles) count down only at the end of
+their owner's turn. Instead of decrementing every counter on every turn end,
+StatusScheduler keeps one turn clock per owner ('white', 'black', and None for
+statuses that count down on every turn end) and a min-heap of expiry ticks per
+clock. Timers whose owner could not be resolved run on the UNRESOLVED clock,
+which only ticks when every clock does (``advance(None)``). Ending a turn advances the clocks and pops only the timers that are due;
+the remaining turns of any status are derived as ``expires - clock``.
+
+TimedStatusMap and TimedEntry expose timers through the plain shapes the rest
+of the code already reads (``frozen_pieces[id] -> turns left`` and blocked-tile
+entry dicts with 'owner' / 'turns').
+
+This file is pure Python and UI-agnostic so it can be tested independently.
+"""
+from __future__ import annotations
+
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import heapq
+import itertools
+
+# clock of owner-less timers that must not count down on a single side's turn end
+UNRESOLVED = 'unresolved'
+
+
+class StatusTimer:
+    """One scheduled status; `payload` is free for the owner of the status."""
+    __slots__ = ('kind', 'key', 'owner', 'clock', 'expires', 'seq', 'payload', 'active')
+
+    def __init__(self, kind: str, key: Any, owner: Optional[str], expires: int, seq: int, payload: Any = None,
+                 clock: Optional[str] = None):
+        self.kind = kind
+        self.key = key
+        self.owner = owner
+        self.clock = owner if clock is None else clock
+        self.expires = expires
+        self.seq = seq
+        self.payload = payload
+        self.active = True
+
+    def __repr__(self) -> str:
+        return f"StatusTimer({self.kind!r}, {self.key!r}, owner={self.owner!r}, expires={self.expires})"
+
+
+class StatusScheduler:
+    """Per-owner turn clocks with a min-heap of expiry ticks for each clock."""
+
+    def __init__(self) -> None:
+        self._clocks: Dict[Optional[str], int] = {}
+        self._heaps: Dict[Optional[str], List[Tuple[int, int, StatusTimer]]] = {}
+        self._seq = itertools.count()
+        self._active = 0
+
+    def __len__(self) -> int:
+        return self._active
+
+    def now(self, owner: Optional[str]) -> int:
+        return self._clocks.get(owner, 0)
+
+    def schedule(self, kind: str, key: Any, owner: Optional[str], turns: int, payload: Any = None,
+                 every_turn: bool = True) -> StatusTimer:
+        """Start a timer that expires after `turns` turn ends of `owner`.
+
+        An owner-less timer counts down on every turn end, or with
+        `every_turn=False` only when every clock ticks.
+        """
+        seq = next(self._seq)
+        clock = UNRESOLVED if owner is None and not every_turn else owner
+        timer = StatusTimer(kind, key, owner, self.now(clock) + int(turns), seq, payload, clock)
+        heapq.heappush(self._heaps.setdefault(clock, []), (timer.expires, seq, timer))
+        self._active += 1
+        return timer
+
+    def cancel(self, timer: Optional[StatusTimer]) -> None:
+        # lazy deletion: the heap slot is dropped when it reaches the top
+        if timer is not None and timer.active:
+            timer.active = False
+            self._active -= 1
+
+    def turns_left(self, timer: StatusTimer) -> int:
+        if not timer.active:
+            return 0
+        return max(0, timer.expires - self.now(timer.clock))
+
+    def advance(self, ended_color: Optional[str] = None) -> List[StatusTimer]:
+        """Count one turn end and return the timers that expired, oldest first.
+
+        With `ended_color` only that owner's clock (and the owner-less clock)
+        ticks; with None every clock ticks, UNRESOLVED included.
+        """
+        owners = list(self._heaps) if ended_color is None else [ended_color, None]
+        expired: List[StatusTimer] = []
+        for owner in owners:
+            clock = self._clocks.get(owner, 0) + 1
+            self._clocks[owner] = clock
+            heap = self._heaps.get(owner)
+            while heap and heap[0][0] <= clock:
+                timer = heapq.heappop(heap)[2]
+                if timer.active:
+                    timer.active = False
+                    self._active -= 1
+                    expired.append(timer)
+        expired.sort(key=lambda t: t.seq)
+        return expired
+
+
+class TimedStatusMap(MutableMapping):
+    """Mapping of key -> turns left, backed by timers of one `kind`.
+
+    Assigning ``m[key] = turns`` (re)starts the key's timer; `owner_of(key)`
+    decides whose turn ends count it down. With `strict_owner`, keys whose
+    owner is None only count down when every clock ticks.
+    """
+
+    def __init__(self, scheduler: StatusScheduler, kind: str,
+                 owner_of: Optional[Callable[[Any], Optional[str]]] = None, strict_owner: bool = False) -> None:
+        self._sched = scheduler
+        self._kind = kind
+        self._owner_of = owner_of
+        self._strict_owner = strict_owner
+        self._timers: Dict[Any, StatusTimer] = {}
+
+    def start(self, key: Any, turns: int, owner: Optional[str], payload: Any = None) -> StatusTimer:
+        self._sched.cancel(self._timers.get(key))
+        timer = self._sched.schedule(self._kind, key, owner, turns, payload, every_turn=not self._strict_owner)
+        self._timers[key] = timer
+        return timer
+
+    def timer(self, key: Any) -> Optional[StatusTimer]:
+        return self._timers.get(key)
+
+    def expire(self, timer: StatusTimer) -> bool:
+        """Drop `timer`'s key if it is still the current timer for it."""
+        if self._timers.get(timer.key) is timer:
+            del self._timers[timer.key]
+            return True
+        return False
+
+    def __getitem__(self, key: Any) -> int:
+        return self._sched.turns_left(self._timers[key])
+
+    def __setitem__(self, key: Any, turns: int) -> None:
+        owner = self._owner_of(key) if self._owner_of is not None else None
+        self.start(key, turns, owner)
+
+    def __delitem__(self, key: Any) -> None:
+        self._sched.cancel(self._timers.pop(key))
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(list(self._timers))
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def clear(self) -> None:
+        for timer in self._timers.values():
+            self._sched.cancel(timer)
+        self._timers.clear()
+
+    def __repr__(self) -> str:
+        return f"TimedStatusMap({dict(self.items())!r})"
+
+
+class TimedEntry(dict):
+    """Status entry dict whose 'turns' value is read live from its timer."""
+
+    def __init__(self, scheduler: StatusScheduler, timer: StatusTimer, **fields: Any) -> None:
+        super().__init__(owner=timer.owner, turns=scheduler.turns_left(timer), **fields)
+        self.scheduler = scheduler
+        self.timer = timer
+
+    def __getitem__(self, k: Any) -> Any:
+        if k == 'turns':
+            return self.scheduler.turns_left(self.timer)
+        return super().__getitem__(k)
+
+    def get(self, k: Any, default: Any = None) -> Any:
+        if k == 'turns':
+            return self.scheduler.turns_left(self.timer)
+        return super().get(k, default)
+
+
+__all__ = [
+    "UNRESOLVED",
+    "StatusTimer",
+    "StatusScheduler",
+    "TimedStatusMap",
+    "TimedEntry",
+]
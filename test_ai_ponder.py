@@ -0,0 +1,47 @@
+import threading
+
+from ai_ponder import MoveCache, Ponderer
+
+
+def test_move_cache_is_lru_and_counts_hits():
+    cache = MoveCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1          # 'a' becomes most recent
+    cache.put('c', 3)                   # evicts 'b'
+    assert 'b' not in cache and cache.get('c') == 3
+    assert cache.get('b', 'miss') == 'miss'
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_ponderer_fills_cache_and_stops_on_cancel():
+    cache = MoveCache()
+    ponderer = Ponderer(cache)
+    main = threading.get_ident()
+
+    def replies(n):
+        for i in range(n):
+            yield ('pos', i), threading.get_ident() != main
+
+    assert ponderer.start(replies, 3, key='root')
+    assert not ponderer.start(replies, 3, key='root')   # same root: already pondered
+    assert ponderer.wait(2.0)
+    assert [cache.get(('pos', i)) for i in range(3)] == [True, True, True]
+
+    gate = threading.Event()
+    first = threading.Event()
+
+    def slow():
+        yield 'first', 1
+        first.set()
+        gate.wait(2.0)
+        yield 'second', 2
+
+    ponderer.start(slow, key='other')
+    assert first.wait(2.0)
+    ponderer.cancel()
+    gate.set()
+    assert ponderer.wait(2.0)
+    assert cache.get('first') == 1 and 'second' not in cache
+    assert ponderer.last_error is None
+    ponderer.shutdown()
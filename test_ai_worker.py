@@ -0,0 +1,75 @@
+import importlib.util
+import os
+import threading
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from ai_worker import AIWorker
+
+
+def _wait_for(worker, timeout=2.0):
+    ev = pygame.event.wait(int(timeout * 1000))
+    while ev.type != worker.event_type and ev.type != pygame.NOEVENT:
+        ev = pygame.event.wait(int(timeout * 1000))
+    return ev
+
+
+def test_result_arrives_as_event_from_worker_thread():
+    pygame.display.init()
+    pygame.display.set_mode((10, 10))
+    pygame.event.clear()
+    worker = AIWorker()
+    main = threading.get_ident()
+    worker.submit(lambda a, b: (a + b, threading.get_ident() != main), 2, 3, key='pos')
+    assert worker.busy
+    ev = _wait_for(worker)
+    assert worker.accept(ev)
+    assert ev.result == (5, True) and ev.key == 'pos' and ev.error is None
+    assert not worker.busy
+    worker.shutdown()
+
+
+def test_cancelled_job_result_is_not_accepted():
+    pygame.display.init()
+    pygame.display.set_mode((10, 10))
+    pygame.event.clear()
+    gate = threading.Event()
+    posted = []
+    worker = AIWorker(post=posted.append)
+    worker.submit(gate.wait)
+    worker.cancel()
+    gate.set()
+    job = worker.submit(lambda: 'fresh')
+    for _ in range(200):
+        if posted:
+            break
+        threading.Event().wait(0.01)
+    assert [e.result for e in posted] == ['fresh']
+    assert posted[0].job == job and worker.accept(posted[0])
+    worker.shutdown()
+
+
+def test_card_game_searches_a_board_copy_and_picks_on_the_live_board(monkeypatch):
+    here = os.path.dirname(os.path.abspath(__file__))
+    spec = importlib.util.spec_from_file_location('card_game_ai', os.path.join(here, 'Card Game.py'))
+    cg = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(cg)
+    # chess_engine's board is shared with the other tests in this process
+    monkeypatch.setattr(cg.chess, 'pieces', cg.chess.create_pieces())
+    monkeypatch.setattr(cg.chess, 'en_passant_target', None)
+    live = list(cg.chess.pieces)
+    snapshot = cg._ai_snapshot_board()
+    pool = cg.ai_move_pool(snapshot)
+    assert pool and all(q not in live for q, _ in pool)
+    assert [(cg.chess.get_piece_at(q.row, q.col), mv) for q, mv in pool] == cg.ai_move_pool()
+
+    applied = []
+    cg.cpu_wait, cg.game_over = True, False
+    cg.ai_apply_choice = applied.append
+    cg._after_ai_move = lambda: None
+    cg._on_ai_result(pygame.event.Event(cg.ai_worker.event_type, result=pool, error=None,
+                                        key=cg._ai_position_key()))
+    piece, mv = applied[0]
+    assert piece in live and (piece, mv) in cg.ai_move_pool()
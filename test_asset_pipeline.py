@@ -0,0 +1,132 @@
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+import asset_pipeline as ap
+
+
+def test_pack_rects_do_not_overlap():
+    sizes = {f"c{i}": (30 + i, 40) for i in range(10)}
+    rects, (sw, sh) = ap.pack_rects(sizes, max_width=120)
+    boxes = [pygame.Rect(r) for r in rects.values()]
+    assert all(b.right <= sw and b.bottom <= sh for b in boxes)
+    assert not any(a.colliderect(b) for i, a in enumerate(boxes) for b in boxes[i + 1:])
+
+
+def test_manifest_prefers_top_level_and_lowercase(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "Heat.png").write_bytes(b"")
+    (tmp_path / "sub" / "Heat.png").write_bytes(b"")
+    (tmp_path / "notes.txt").write_text("x")
+    m = ap.build_manifest(str(tmp_path))
+    assert m["Heat"] == "Heat.png"
+    assert m["heat"] == "Heat.png"
+    assert "notes" not in m
+
+
+def test_library_serves_pieces_from_one_atlas_per_size(tmp_path):
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    for color in ("white", "black"):
+        for n, rgb in (("k", (255, 0, 0)), ("q", (0, 255, 0))):
+            surf = pygame.Surface((8, 8))
+            surf.fill(rgb)
+            pygame.image.save(surf, str(tmp_path / f"Chess_{n}_{color}.png"))
+    lib = ap.AssetLibrary(str(tmp_path))
+    k = lib.piece('K', 'white', (20, 20))
+    q = lib.piece('Q', 'black', (20, 20))
+    assert k.get_size() == (20, 20)
+    assert k.get_parent() is q.get_parent()
+    assert k.get_at((10, 10))[:3] == (255, 0, 0)
+    assert lib.piece('K', 'white', (20, 20)) is k
+    assert lib.piece('P', 'white', (20, 20)) is None
+
+
+def test_library_lru_bounds_sizes_and_single_images(tmp_path):
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    surf = pygame.Surface((8, 8))
+    pygame.image.save(surf, str(tmp_path / "Chess_k_white.png"))
+    pygame.image.save(surf, str(tmp_path / "bg.png"))
+    lib = ap.AssetLibrary(str(tmp_path))
+    first = lib.piece('K', 'white', (10, 10))
+    for s in range(11, 11 + ap.MAX_SIZES_PER_GROUP):
+        lib.piece('K', 'white', (s, s))
+    assert len(lib._atlases['pieces']) == ap.MAX_SIZES_PER_GROUP
+    # the evicted size is rebuilt on a new sheet, not served from a stale one
+    assert lib.piece('K', 'white', (10, 10)).get_parent() is not first.get_parent()
+    for s in range(1, ap.MAX_SINGLE_IMAGES + 5):
+        lib.image('bg', (s, s))
+    assert len(lib._singles) == ap.MAX_SINGLE_IMAGES
+
+
+def test_preloader_decodes_off_thread_and_reports_progress(tmp_path):
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    surf = pygame.Surface((6, 4))
+    surf.fill((10, 20, 30))
+    path = str(tmp_path / "a.png")
+    pygame.image.save(surf, path)
+    got = []
+    pre = ap.AssetPreloader(workers=1)
+    pre.add('a', path, on_ready=got.append)
+    pre.add('missing', str(tmp_path / "nope.png"))
+    assert pre.progress() == 0.0
+    pre.start()
+    img = pre.result('a')
+    assert img.get_size() == (6, 4) and img.get_at((0, 0))[:3] == (10, 20, 30)
+    assert got == [img]
+    assert pre.result('missing') is None
+    assert pre.done() and pre.progress() == 1.0
+    assert pre.result('unknown', 'x') == 'x'
+    pre.shutdown()
+
+
+def test_sprite_animation_timing_scaling_and_roundtrip(tmp_path):
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    frames = []
+    for rgb in ((255, 0, 0), (0, 255, 0), (0, 0, 255)):
+        f = pygame.Surface((10, 10), pygame.SRCALPHA)
+        f.fill(rgb + (255,))
+        frames.append(f)
+    anim = ap.SpriteAnimation.from_frames(frames, [100, 50, 100])
+    assert len(anim) == 3 and anim.total_ms == 250
+    assert [anim.frame_at(t) for t in (0, 99, 100, 149, 150, 999)] == [0, 0, 1, 1, 2, 2]
+    assert anim.frame_at(260, loop=True) == 0
+    small = anim.scaled((4, 4))
+    assert small is anim.scaled((4, 4)) and small.frame_size == (4, 4)
+    dest = pygame.Surface((4, 4), pygame.SRCALPHA)
+    small.blit(dest, (0, 0), 1)
+    r, g, b = dest.get_at((2, 2))[:3]
+    assert g > 240 and r < 10 and b < 10
+    png = str(tmp_path / "fx.png")
+    anim.save(png)
+    loaded = ap.SpriteAnimation.load(png)
+    assert loaded.durations == [100, 50, 100] and loaded[2].get_at((5, 5))[:3] == (0, 0, 255)
+
+
+def test_sprite_animation_drops_and_reloads_its_source_sheet(tmp_path):
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    frames = []
+    for rgb in ((255, 0, 0), (0, 255, 0)):
+        f = pygame.Surface((10, 10), pygame.SRCALPHA)
+        f.fill(rgb + (255,))
+        frames.append(f)
+    png = str(tmp_path / "fx.png")
+    ap.SpriteAnimation.from_frames(frames, [100, 100]).save(png)
+    anim = ap.SpriteAnimation.load(png).with_durations([250, 250])
+    assert anim.total_ms == 500 and anim.sheet_loaded
+    small = anim.scaled((4, 4))
+    assert not anim.sheet_loaded
+    assert anim.scaled((4, 4)) is small and not anim.sheet_loaded
+    # a new size reloads the PNG, builds the copy and drops the sheet again
+    big = anim.scaled((6, 6))
+    assert big.frame_size == (6, 6) and not anim.sheet_loaded
+    dest = pygame.Surface((6, 6), pygame.SRCALPHA)
+    big.blit(dest, (0, 0), 1)
+    r, g, b = dest.get_at((3, 3))[:3]
+    assert g > 240 and r < 10 and b < 10
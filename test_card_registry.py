@@ -0,0 +1,62 @@
+import card_core as cc
+
+
+def test_names_and_aliases_resolve_to_ids():
+    assert cc.card_id_for_name('迅雷') == cc.CARD_LIGHTNING
+    assert cc.card_id_for_name('掠取') == cc.CARD_LEECH
+    assert cc.card_id_for_name('　鉄壁 ') == cc.CARD_IRON_WALL
+    assert cc.card_id_for_name('unknown') == 0
+    assert cc.Card('暴風', 3, cc.eff_storm_jump_once).card_id == cc.CARD_STORM
+
+
+def test_rule_deck_built_from_registry():
+    deck = cc.make_rule_cards_deck()
+    ids = sorted(c.card_id for c in deck.cards)
+    rule_ids = [s.card_id for s in cc.CARD_REGISTRY.values() if s.in_rule_deck]
+    assert ids == sorted(rule_ids * 3)
+
+
+def test_deck_code_round_trip():
+    names = ['灼熱', '命がけのギャンブル', 'ハンです☆', '掠取', 'nope']
+    code = cc.encode_deck_code(names)
+    cards = cc.decode_deck_code(code)
+    assert [c.name for c in cards] == ['灼熱', '命がけのギャンブル', 'ハンです☆', '摂取']
+    assert cc.decode_deck(cc.encode_deck(cards)) == cards
+
+
+def test_preplay_dispatch_by_id():
+    game = cc.new_game_with_rule_deck(seed=1)
+    game.start_turn()
+    game.player.hand.cards.append(cc.card_from_id(cc.CARD_HEAT))
+    ok, _ = game.play_card(len(game.player.hand.cards) - 1)
+    assert ok and game.pending.kind == 'heat_choice'
+    game.pending = None
+    game.player.graveyard.clear()
+    ai = cc.PlayerState(deck=cc.make_rule_cards_deck())
+    ai.hand.cards.append(cc.card_from_id(cc.CARD_GRAVE_ROULETTE))
+    ok, msg = game.play_card_for(ai, 0)
+    assert not ok and '墓地' in msg
+
+
+def test_prechecks_come_from_the_registry():
+    game = cc.new_game_with_rule_deck(seed=1)
+    game.start_turn()
+    ai = cc.PlayerState(deck=cc.make_rule_cards_deck())
+    ai.next_move_can_jump = True
+    ai.hand.cards = [cc.Card('暴風', 3, cc.eff_storm_jump_once), cc.card_from_id(cc.CARD_LIGHTNING)]
+    assert ai.hand.cards[0].precheck is cc.pre_storm_inactive
+    ok, msg = game.play_card_for(ai, 0)
+    assert not ok and '暴風' in msg and ai.pp_current == ai.pp_max
+    game.ai_consecutive_turns = 1
+    assert not game.play_card_for(ai, 1)[0]
+    # the player is asked instead of refused
+    game.player.next_move_can_jump = True
+    game.player.hand.cards.append(cc.card_from_id(cc.CARD_STORM))
+    ok, _ = game.play_card(len(game.player.hand.cards) - 1)
+    assert ok and game.pending.kind == 'confirm'
+
+
+def test_ai_preference_and_deck_builder_come_from_the_registry():
+    assert cc.ai_card_preference()[0] == cc.CARD_FREEZE
+    builder = [s.name for s in cc.CARD_REGISTRY.values() if s.in_deck_builder]
+    assert 'ハンです☆' in builder and 'Quick Draw' not in builder
@@ -0,0 +1,63 @@
+import socket
+import time
+
+from connection import NetworkManager, decode_message
+
+
+def _host_and_raw_peer(**kwargs):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    host = NetworkManager('127.0.0.1', port, is_host=True, heartbeat=0, **kwargs)
+    host.start()
+    for _ in range(100):
+        try:
+            peer = socket.create_connection(('127.0.0.1', port), timeout=2.0)
+            break
+        except OSError:
+            time.sleep(0.01)
+    for _ in range(200):
+        if host.conn is not None and host.metrics.writes:
+            break
+        time.sleep(0.01)
+    return host, peer
+
+
+def _read_lines(peer, count):
+    data = b""
+    while data.count(b"\n") < count:
+        data += peer.recv(65536)
+    return [decode_message(line) for line in data.split(b"\n")[:count]]
+
+
+def test_batched_messages_share_one_write_and_flush_waits():
+    host, peer = _host_and_raw_peer()
+    assert host.conn.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+    writes = host.metrics.writes
+    with host.batch():
+        for i in range(5):
+            assert host.send({"type": "log", "i": i})
+        time.sleep(0.05)
+        assert host.metrics.writes == writes          # held until the block ends
+    assert host.flush(2.0)
+    assert host.metrics.writes == writes + 1
+    msgs = _read_lines(peer, 6)
+    assert msgs[0]["type"] == "hello" and [m["i"] for m in msgs[1:]] == [0, 1, 2, 3, 4]
+    peer.close()
+    host.close()
+
+
+def test_single_send_goes_out_without_waiting_and_close_flushes(capsys):
+    host, peer = _host_and_raw_peer()
+    _read_lines(peer, 1)
+    peer.settimeout(1.0)
+    t0 = time.perf_counter()
+    host.send({"type": "move", "from": [6, 4], "to": [4, 4]})
+    assert _read_lines(peer, 1)[0]["type"] == "move"
+    assert time.perf_counter() - t0 < 0.05
+    host.send({"type": "bye"})
+    host.close()
+    assert _read_lines(peer, 1) == [{"type": "bye"}]
+    assert not host.send({"type": "late"}) and host.flush(0.1)
+    assert host.recv_queue.empty() and "recv" not in capsys.readouterr().out
+    peer.close()
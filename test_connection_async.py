@@ -0,0 +1,45 @@
+import time
+
+from connection_async import AsyncNetworkManager
+
+
+def _get(q, timeout=2.0):
+    return q.get(timeout=timeout)
+
+
+def _pair():
+    host = AsyncNetworkManager(host='127.0.0.1', port=0, is_host=True)
+    host.start()
+    assert host.wait_listening(2.0) and host.port != 0
+    client = AsyncNetworkManager(host='127.0.0.1', port=host.port, is_host=False)
+    client.start()
+    assert _get(host.recv_queue)["role"] == "client"
+    assert _get(client.recv_queue)["role"] == "host"
+    return host, client
+
+
+def test_host_and_client_exchange_messages_on_one_loop():
+    host, client = _pair()
+    assert host._loop_thread is client._loop_thread
+    client.send({"type": "move", "from": [6, 4], "to": [4, 4]})
+    client.send({"type": "card", "name": "炎上"})
+    move = _get(host.recv_queue)
+    assert (move["type"], move["from"], move["to"]) == ("move", [6, 4], [4, 4])
+    assert _get(host.recv_queue)["name"] == "炎上"
+    host.send([1, 2, 3])
+    assert _get(client.recv_queue) == [1, 2, 3]
+    host.close()
+    client.close()
+
+
+def test_close_is_seen_by_peer_without_polling_delay():
+    host, client = _pair()
+    t0 = time.perf_counter()
+    client.close()
+    assert _get(host.recv_queue) == {"type": "disconnect"}
+    assert time.perf_counter() - t0 < 0.5
+    for _ in range(100):
+        if not host.running:
+            break
+        time.sleep(0.01)
+    assert not host.running and not host.send({"type": "ping"})
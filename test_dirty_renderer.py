@@ -0,0 +1,62 @@
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from dirty_renderer import DirtyRenderer
+
+
+def _setup():
+    pygame.display.init()
+    surf = pygame.display.set_mode((200, 100))
+    r = DirtyRenderer(full_refresh_interval=60.0)
+    r.set_regions((200, 100), {'board': (0, 0, 100, 100), 'log': (100, 0, 100, 100)})
+    return surf, r
+
+
+def test_idle_frames_draw_nothing():
+    surf, r = _setup()
+    calls = []
+    draw = lambda: calls.append(1)
+    r.track(('state', 1))
+    assert r.render(surf, draw, now=0.0) == [surf.get_rect()]
+    for t in range(1, 5):
+        r.track(('state', 1))
+        r.animate([])
+        assert r.render(surf, draw, now=float(t)) == []
+    assert len(calls) == 1 and r.frames_skipped == 4
+    r.track(('state', 2))
+    assert r.render(surf, draw, now=5.0) == [surf.get_rect()]
+
+
+def test_partial_repaint_is_clipped_to_dirty_regions():
+    surf, r = _setup()
+    r.render(surf, lambda: surf.fill((0, 0, 0)), now=0.0)
+    r.invalidate('log')
+    rects = r.render(surf, lambda: surf.fill((255, 0, 0)), now=1.0)
+    assert rects == [pygame.Rect(100, 0, 100, 100)]
+    assert surf.get_at((150, 50))[:3] == (255, 0, 0)
+    assert surf.get_at((50, 50))[:3] == (0, 0, 0)
+    assert surf.get_clip() == surf.get_rect()
+
+
+def test_stopped_animation_is_repainted_once():
+    surf, r = _setup()
+    r.render(surf, lambda: None, now=0.0)
+    r.animate([(10, 10, 20, 20)])
+    assert r.render(surf, lambda: None, now=1.0) == [pygame.Rect(10, 10, 20, 20)]
+    r.animate([])
+    assert r.render(surf, lambda: None, now=2.0) == [pygame.Rect(10, 10, 20, 20)]
+    r.animate([])
+    assert r.render(surf, lambda: None, now=3.0) == []
+
+
+def test_full_frame_animation_end_triggers_full_repaint():
+    surface, r = _setup()
+    r.render(surface, lambda: None, now=1.0)
+    r.animate(None)
+    assert r.pending_rects(surface, now=2.0) == [surface.get_rect()]
+    r.render(surface, lambda: None, now=2.0)
+    r.animate([])
+    assert r.pending_rects(surface, now=3.0) == [surface.get_rect()]
@@ -0,0 +1,41 @@
+import json
+
+from frame_profiler import FrameProfiler
+
+
+def test_disabled_profiler_records_nothing():
+    prof = FrameProfiler()
+    calls = []
+    work = prof.timed('work')(lambda x: calls.append(x) or x)
+    prof.next_frame()
+    with prof.span('a'):
+        prof.lap('phase')
+    assert work(3) == 3 and calls == [3]
+    prof.next_frame()
+    assert prof.frame_no == 0 and not prof.history
+
+
+def test_laps_partition_frame_and_spans_count_outermost_call(tmp_path):
+    path = tmp_path / "frames.jsonl"
+    prof = FrameProfiler(enabled=True, jsonl_path=str(path))
+
+    @prof.timed('movegen')
+    def gen(n):
+        return 0 if n == 0 else gen(n - 1) + 1
+
+    prof.next_frame()
+    gen(3)
+    prof.lap('events')
+    with prof.span('text'):
+        pass
+    prof.lap('draw')
+    prof.next_frame()
+    prof.close()
+
+    rec = prof.history[-1]
+    assert list(rec['phases']) == ['events', 'draw', 'idle']
+    assert abs(sum(rec['phases'].values()) - rec['total_ms']) < 0.05
+    assert rec['calls'] == {'movegen': 1, 'text': 1}
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1 and json.loads(lines[0])['frame'] == 1
+    assert prof.summary()['frames'] == 1
@@ -0,0 +1,42 @@
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from frame_scheduler import FrameScheduler
+
+
+def test_idle_wait_blocks_until_timeout_and_keeps_event_order():
+    pygame.display.init()
+    pygame.display.set_mode((10, 10))
+    pygame.event.clear()
+    clock = pygame.time.Clock()
+    sched = FrameScheduler(idle_timeout=0.05)
+
+    t0 = time.perf_counter()
+    sched.wait(clock, 60)
+    assert time.perf_counter() - t0 >= 0.04
+    assert sched.idle_waits == 1
+
+    pygame.event.post(pygame.event.Event(pygame.USEREVENT, n=1))
+    pygame.event.post(pygame.event.Event(pygame.USEREVENT, n=2))
+    sched.wait(clock, 60)  # input already queued: returns immediately
+    assert [e.n for e in sched.get() if e.type == pygame.USEREVENT] == [1, 2]
+
+    sched.wait(clock, 60, active=True)
+    assert sched.active_frames == 1
+
+
+def test_event_that_ends_idle_wait_is_returned_by_get():
+    pygame.display.init()
+    pygame.display.set_mode((10, 10))
+    pygame.event.clear()
+    clock = pygame.time.Clock()
+    sched = FrameScheduler(idle_timeout=2.0)
+    pygame.time.set_timer(pygame.USEREVENT + 1, 20, loops=1)
+    t0 = time.perf_counter()
+    sched.wait(clock, 30)
+    assert time.perf_counter() - t0 < 1.0
+    assert [e.type for e in sched.get()][:1] == [pygame.USEREVENT + 1]
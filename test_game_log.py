@@ -0,0 +1,92 @@
+import importlib.util
+import json
+import os
+import tempfile
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import card_core as cc
+from game_log import GameLog
+
+
+def test_ring_buffer_bounds_memory():
+    log = GameLog(maxlen=5)
+    for i in range(12):
+        log.append(f"line {i}")
+    assert len(log) == 5
+    assert log.total == 12
+    assert log[-1] == "line 11"
+    assert log[:2] == ["line 7", "line 8"]
+
+
+def test_text_lines_are_enriched():
+    log = GameLog()
+    log.append("AI: 氷結で相手の駒 N を (5,2) に 1 ターン凍結しました。")
+    log.append("『灼熱』（コスト2）を使用。")
+    a, b = log.events()
+    assert a.actor == 'black' and a.coords == [(5, 2)]
+    assert b.card == '灼熱'
+
+
+def test_game_stamps_turn_and_records_card_play():
+    game = cc.new_game_with_rule_deck()
+    assert isinstance(game.log, GameLog)
+    game.start_turn()
+    game.player.hand.cards.append(cc.Card('2ドロー', 1, cc.eff_draw2))
+    ok, _ = game.play_card(len(game.player.hand.cards) - 1)
+    assert ok
+    ev = game.log.events()[-1]
+    assert ev.kind == 'card' and ev.card == '2ドロー' and ev.turn == game.turn
+
+
+def test_discard_since_bookmark():
+    log = GameLog()
+    log.append("keep")
+    mark = log.next_seq
+    log.append("ドロー: A")
+    log.append("ターン2開始")
+    log.discard(lambda e: e.seq >= mark and e.text.startswith("ドロー:"))
+    assert list(log) == ["keep", "ターン2開始"]
+
+
+def test_jsonl_stream():
+    fd, path = tempfile.mkstemp(suffix='.jsonl')
+    os.close(fd)
+    try:
+        log = GameLog(maxlen=2, stream_path=path)
+        for i in range(4):
+            log.record('text', f"e{i}", actor='white', coords=[(i, i)])
+        log.close_stream()
+        with open(path, encoding='utf-8') as f:
+            rows = [json.loads(l) for l in f]
+        assert [r['text'] for r in rows] == ["e0", "e1", "e2", "e3"]
+        assert rows[3]['coords'] == [[3, 3]]
+    finally:
+        os.remove(path)
+
+
+def test_card_game_streams_each_battle_log_to_ccb_log_jsonl(monkeypatch):
+    here = os.path.dirname(os.path.abspath(__file__))
+    spec = importlib.util.spec_from_file_location('card_game_log', os.path.join(here, 'Card Game.py'))
+    cg = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(cg)
+    fd, path = tempfile.mkstemp(suffix='.jsonl')
+    os.close(fd)
+    try:
+        monkeypatch.setattr(cg, 'LOG_JSONL', path)
+        first = cc.new_game_with_rule_deck(seed=1)
+        monkeypatch.setattr(cg, 'game', first)
+        cg.start_log_stream()
+        first.log.append("first battle")
+        second = cc.new_game_with_rule_deck(seed=2)
+        monkeypatch.setattr(cg, 'game', second)
+        cg.start_log_stream()      # a restart closes the previous battle's stream
+        first.log.append("not streamed")
+        second.log.append("second battle")
+        second.log.close_stream()
+        with open(path, encoding='utf-8') as fh:
+            texts = [json.loads(line)['text'] for line in fh]
+        assert texts == ["first battle", "second battle"]
+    finally:
+        os.remove(path)
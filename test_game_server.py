@@ -0,0 +1,353 @@
+import asyncio
+import json
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import chess_engine as chess
+import connection
+from connection_async import AsyncNetworkManager, shared_loop
+from game_server import GameServer, Room, Session, Spectator
+from state_sync import StateMirror
+
+
+async def _client(port, room=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    hello = {"type": "hello", "role": "client"}
+    if room is not None:
+        hello["room"] = room
+    writer.write((json.dumps(hello) + "\n").encode())
+    return reader, writer
+
+
+async def _next(reader, kind):
+    while True:
+        msg = json.loads(await asyncio.wait_for(reader.readline(), 2.0))
+        if msg.get("type") == kind:
+            return msg
+
+
+def _send(writer, msg):
+    writer.write((json.dumps(msg) + "\n").encode())
+
+
+def test_rooms_validate_moves_and_stay_isolated():
+    async def scenario():
+        server = GameServer('127.0.0.1', 0, seed=7, grace=0)
+        await server.start()
+        (wr, ww), (br, bw) = await _client(server.port, 'a'), await _client(server.port, 'a')
+        (w2r, w2w), (b2r, b2w) = await _client(server.port, 'b'), await _client(server.port, 'b')
+        assert (await _next(wr, "welcome"))["seat"] == "white"
+        assert (await _next(br, "welcome"))["seat"] == "black"
+        await _next(wr, "start")
+        assert (await _next(wr, "turn"))["color"] == "white"
+        assert isinstance((await _next(wr, "hand"))["cards"], list)
+
+        _send(bw, {"type": "move", "from": [1, 4], "to": [3, 4]})
+        assert (await _next(br, "error"))["reason"] == "not_your_turn"
+        _send(ww, {"type": "move", "from": [6, 4], "to": [3, 4]})
+        assert (await _next(wr, "error"))["reason"] == "illegal_move"
+        _send(ww, {"type": "move", "from": [6, 4], "to": [4, 4]})
+        moved = await _next(br, "moved")
+        assert moved["from"] == [6, 4] and moved["to"] == [4, 4]
+        assert (await _next(br, "turn"))["color"] == "black"
+
+        room_a, room_b = server.rooms['a'], server.rooms['b']
+        assert {(p.row, p.col) for p in room_a.board.pieces} != {(p.row, p.col) for p in room_b.board.pieces}
+        assert room_b.turn_color == 'white' and room_a.turn_color == 'black'
+        # the module board is untouched between requests
+        assert chess.get_piece_at(4, 4, room_a.board.pieces).name == 'P'
+
+        bw.close()
+        assert (await _next(wr, "opponent_left"))["type"] == "opponent_left"
+        for w in (ww, w2w, b2w):
+            w.close()
+        await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_async_network_manager_joins_a_room():
+    server = GameServer('127.0.0.1', 0, seed=1)
+    shared_loop().submit(server.start()).result(2.0)
+    a = AsyncNetworkManager('127.0.0.1', server.port, is_host=False, hello={"room": "x"})
+    b = AsyncNetworkManager('127.0.0.1', server.port, is_host=False, hello={"room": "x"})
+    a.start()
+    b.start()
+    seen = []
+    while "start" not in seen:
+        seen.append(a.recv_queue.get(timeout=2.0).get("type"))
+    assert seen[0] == "welcome"
+    a.close()
+    b.close()
+    shared_loop().submit(server.close()).result(2.0)
+
+
+def test_state_deltas_keep_a_mirror_in_sync_and_resync_repairs_it():
+    async def scenario():
+        server = GameServer('127.0.0.1', 0, seed=3)
+        await server.start()
+        (wr, ww), (br, bw) = await _client(server.port), await _client(server.port)
+        mirror = StateMirror()
+        assert mirror.apply(await _next(br, "snapshot"))
+        assert mirror.piece_at(6, 4) == ("P", "white", False)
+
+        _send(ww, {"type": "move", "from": [6, 4], "to": [4, 4]})
+        delta = await _next(br, "delta")
+        assert mirror.apply(delta) and mirror.state["color"] == "black"
+        assert set(delta["del"]) == {"p:6,4"} and delta["set"]["p:4,4"] == ["P", "white", True]
+        assert len(json.dumps(delta)) < 250
+
+        # a wrong local prediction is caught on the very next delta and repaired by a snapshot
+        mirror.set("p:0,0", ["Q", "black", False])
+        _send(bw, {"type": "move", "from": [1, 4], "to": [3, 4]})
+        assert not mirror.apply(await _next(br, "delta"))
+        _send(bw, mirror.resync_request())
+        assert mirror.apply(await _next(br, "snapshot"))
+        assert mirror.state == server.rooms["r1"].sync.state and mirror.piece_at(0, 0)[0] == "R"
+
+        for w in (ww, bw):
+            w.close()
+        await server.close()
+
+    asyncio.run(scenario())
+
+
+def _until(q, kind, timeout=2.0):
+    while True:
+        msg = q.get(timeout=timeout)
+        if isinstance(msg, dict) and msg.get("type") == kind:
+            return msg
+
+
+def test_dropped_client_resumes_and_gets_only_missed_messages():
+    loop = shared_loop()
+    server = GameServer('127.0.0.1', 0, seed=5, grace=5.0)
+    loop.submit(server.start()).result(2.0)
+    white = AsyncNetworkManager('127.0.0.1', server.port, is_host=False, hello={"room": "x"})
+    white.start()
+    assert _until(white.recv_queue, "welcome")["seat"] == "white"
+    black = AsyncNetworkManager('127.0.0.1', server.port, is_host=False, hello={"room": "x"})
+    black.start()
+    assert _until(black.recv_queue, "turn")["color"] == "white"
+    room = server.rooms["x"]
+
+    def drop_black_then_move():
+        # black's link dies; white's move goes out while black is away
+        room.seats["black"].writer.transport.abort()
+        server.handle(room.seats["white"], {"type": "move", "from": [6, 4], "to": [4, 4]})
+
+    loop.call_soon(drop_black_then_move)
+    assert _until(black.recv_queue, "reconnecting")["grace"] == 30.0
+    resumed = _until(black.recv_queue, "resumed")
+    assert resumed["seat"] == "black" and resumed["replayed"] >= 3
+    assert _until(black.recv_queue, "moved")["to"] == [4, 4]
+    assert _until(black.recv_queue, "turn")["color"] == "black"
+    assert _until(white.recv_queue, "opponent_resumed")["seat"] == "black"
+    assert black.seq == room.seats["black"].sent and not server.detached
+
+    black.send({"type": "move", "from": [1, 4], "to": [3, 4]})
+    assert _until(white.recv_queue, "moved")["to"] == [3, 4]
+    for m in (white, black):
+        m.close()
+    loop.submit(server.close()).result(2.0)
+
+
+def test_resume_takes_over_a_half_open_session_and_idle_links_are_dropped():
+    async def scenario():
+        server = GameServer('127.0.0.1', 0, seed=2, grace=5.0, idle_timeout=0.3)
+        await server.start()
+        (wr, ww), (br, bw) = await _client(server.port, 'h'), await _client(server.port, 'h')
+        token = (await _next(br, "welcome"))["session"]
+        await _next(br, "turn")
+        # the old link still looks alive to the server when black reconnects
+        nr, nw = await asyncio.open_connection('127.0.0.1', server.port)
+        _send(nw, {"type": "hello", "session": token, "last_seq": 0})
+        resumed = await _next(nr, "resumed")
+        assert resumed["seat"] == "black" and not server.detached
+        for w in (ww, nw):
+            _send(w, {"type": "ping", "id": 1})
+        await asyncio.wait_for(br.read(), 2.0)                         # stale connection aborted
+        assert br.at_eof()
+        assert server.rooms['h'].seats['black'].writer is not None
+
+        # after one ping each, both players go silent: they are dropped and their seats held, not abandoned
+        await _next(wr, "opponent_resumed")
+        await asyncio.wait_for(nr.read(), 2.0)
+        assert nr.at_eof()
+        assert server.rooms['h'].seats['black'].token in server.detached
+        for w in (ww, bw, nw):
+            w.close()
+        await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_threaded_client_heartbeats_through_a_short_idle_timeout():
+    loop = shared_loop()
+    server = GameServer('127.0.0.1', 0, seed=7, grace=5.0, idle_timeout=0.6)
+    loop.submit(server.start()).result(2.0)
+    client = connection.NetworkManager('127.0.0.1', server.port, is_host=False, heartbeat=0.1, metrics_path=None)
+    client.start()
+    assert _until(client.recv_queue, "welcome")["heartbeat"] is True
+    time.sleep(1.5)
+    session = next(s for s in server.sessions if s.seat == "white")
+    assert session.pinging and session.writer is not None
+    kinds = []
+    while not client.recv_queue.empty():
+        kinds.append(client.recv_queue.get_nowait().get("type"))
+    assert "disconnect" not in kinds
+    client.close()
+    loop.submit(server.close()).result(2.0)
+
+
+def test_unanswered_pings_make_the_client_reconnect_and_resume():
+    loop = shared_loop()
+    server = GameServer('127.0.0.1', 0, seed=6, grace=5.0)
+    loop.submit(server.start()).result(2.0)
+    handle = server.handle
+    mute = set()
+
+    def handle_without_pongs(session, msg):
+        if session in mute and isinstance(msg, dict) and msg.get("type") == "ping":
+            return
+        handle(session, msg)
+
+    server.handle = handle_without_pongs
+    white = AsyncNetworkManager('127.0.0.1', server.port, is_host=False, hello={"room": "p"}, heartbeat=0.05)
+    white.start()
+    _until(white.recv_queue, "welcome")
+    black = AsyncNetworkManager('127.0.0.1', server.port, is_host=False, hello={"room": "p"})
+    black.start()
+    _until(white.recv_queue, "turn")
+    mute.add(server.rooms["p"].seats["white"])
+    assert _until(white.recv_queue, "peer_unresponsive")["seconds"] > 0.15
+    _until(white.recv_queue, "reconnecting")
+    assert _until(white.recv_queue, "resumed")["seat"] == "white"
+    for m in (white, black):
+        m.close()
+    loop.submit(server.close()).result(2.0)
+
+
+def test_client_transport_mirrors_state_and_resyncs_on_divergence():
+    loop = shared_loop()
+    server = GameServer('127.0.0.1', 0, seed=8)
+    loop.submit(server.start()).result(2.0)
+    white = AsyncNetworkManager('127.0.0.1', server.port, is_host=False, hello={"room": "m"})
+    black = AsyncNetworkManager('127.0.0.1', server.port, is_host=False, hello={"room": "m"})
+    white.start()
+    _until(white.recv_queue, "welcome")
+    black.start()
+    _until(black.recv_queue, "snapshot")
+    assert black.state.synced and black.state.piece_at(6, 4) == ("P", "white", False)
+
+    # corrupt black's mirror; the next delta's hash exposes it and a resync repairs it
+    async def corrupt():
+        black.state.set("p:0,0", ["Q", "black", False])
+
+    loop.submit(corrupt()).result(2.0)
+    white.send({"type": "move", "from": [6, 4], "to": [4, 4]})
+    _until(black.recv_queue, "delta")
+    _until(black.recv_queue, "snapshot")
+    room = server.rooms["m"]
+    assert black.state.synced and black.state.resyncs == 1
+    assert black.state.state == room.sync.state and black.state.piece_at(4, 4) == ("P", "white", True)
+    for m in (white, black):
+        m.close()
+    loop.submit(server.close()).result(2.0)
+
+
+def test_outbox_gap_falls_back_to_snapshot():
+    session = Session.__new__(Session)
+    session.sent, session.outbox = 10, deque([(9, "a"), (10, "b")], maxlen=2)
+    assert session.missed(8) == ["a", "b"] and session.missed(10) == []
+    assert session.missed(7) is None
+
+
+def test_spectators_share_one_encoding_and_follow_the_match():
+    async def scenario():
+        server = GameServer('127.0.0.1', 0, seed=9)
+        await server.start()
+        (wr, ww), (br, bw) = await _client(server.port, 's'), await _client(server.port, 's')
+        await _next(br, "turn")
+        watchers = []
+        for _ in range(100):
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+            _send(writer, {"type": "hello", "room": "s", "spectate": True})
+            watchers.append((reader, writer))
+        for reader, _ in watchers:
+            assert (await _next(reader, "welcome"))["seat"] == "spectator"
+            await _next(reader, "snapshot")
+        assert len(server.rooms["s"].spectators) == 100
+
+        _send(ww, {"type": "move", "from": [6, 3], "to": [4, 3]})
+        assert (await _next(br, "moved"))["to"] == [4, 3]
+        for reader, _ in watchers:
+            assert (await _next(reader, "moved"))["to"] == [4, 3]
+        _send(watchers[0][1], {"type": "move", "from": [1, 3], "to": [3, 3]})
+        assert (await _next(watchers[0][0], "error"))["reason"] == "spectator"
+
+        for _, w in watchers + [(wr, ww), (br, bw)]:
+            w.close()
+        await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_slow_spectator_gets_a_snapshot_then_is_dropped():
+    class StuckWriter:
+        def __init__(self):
+            self.written, self.closed = [], False
+
+        def write(self, data):
+            self.written.append(data)
+
+        async def drain(self):
+            await asyncio.Event().wait()    # the watcher never reads
+
+        def is_closing(self):
+            return self.closed
+
+        def close(self):
+            self.closed = True
+
+    async def scenario():
+        server = GameServer(seed=2)
+        room = server._room_for('slow')
+        for _ in range(2):
+            room.join(Session(server, None, StuckWriter()))
+        room.start()
+        watcher = Session(server, None, StuckWriter())
+        spectator = Spectator(watcher, room, limit=4, max_resets=2)
+        room.spectators.add(spectator)
+        await asyncio.sleep(0)
+        for i in range(6):
+            room.broadcast({"type": "chat", "n": i})
+            await asyncio.sleep(0)
+        # one payload is stuck in drain(), four wait; the 6th turns the backlog into a snapshot
+        assert len(spectator.queue) == 1 and b'"snapshot"' in spectator.queue[0]
+        for i in range(10):
+            room.broadcast({"type": "chat", "n": i})
+        assert spectator.dropped and watcher.writer.closed and spectator not in room.spectators
+        # the players were never held up
+        assert all(len(s.writer.written) >= 16 for s in room.seats.values())
+
+    asyncio.run(scenario())
+
+
+def test_storm_jump_and_lightning_extra_move_are_applied():
+    server = SimpleNamespace(protocols=('json',), outbox_limit=8)
+    room = Room('r', seed=3)
+    white, black = Session(server, None, None), Session(server, None, None)
+    for seat, session in (('white', white), ('black', black)):
+        room.seats[seat], session.room, session.seat = session, room, seat
+    room.start()
+    room.game.player.next_move_can_jump = True
+    room.game.player_consecutive_turns = 1
+    assert room.move(white, [7, 0], [5, 0]) is None          # the rook hops its own pawn
+    assert room.turn_color == 'white' and room.game.player_consecutive_turns == 0
+    turns = [m for _, m in white.outbox if m.get("type") == "turn"]
+    assert turns[-1] == {"type": "turn", "color": "white", "turn": room.game.turn, "extra": True}
+    assert room.move(white, [7, 7], [5, 7]) == 'illegal_move'  # the jump was used up
+    assert room.move(white, [6, 4], [4, 4]) is None
+    assert room.turn_color == 'black'
@@ -0,0 +1,36 @@
+import card_core as cc
+import headless_sim
+
+
+def _strip_timing(res):
+    return {k: v for k, v in res.items() if k != 'seconds'}
+
+
+def test_same_seed_same_match():
+    a = headless_sim.run_match(42, max_plies=40)
+    b = headless_sim.run_match(42, max_plies=40)
+    assert _strip_timing(a) == _strip_timing(b)
+
+
+def test_batch_matches_serial_runs():
+    seeds = [3, 4]
+    batch = headless_sim.run_batch(seeds, workers=1, max_plies=30)
+    assert [_strip_timing(r) for r in batch] == [_strip_timing(headless_sim.run_match(s, max_plies=30)) for s in seeds]
+
+
+def test_seeded_games_share_deck_order():
+    g1 = cc.new_game_with_rule_deck(seed=5)
+    g2 = cc.new_game_with_rule_deck(seed=5)
+    assert [c.name for c in g1.player.deck.cards] == [c.name for c in g2.player.deck.cards]
+    assert [c.name for c in g1.player.hand.cards] == [c.name for c in g2.player.hand.cards]
+
+
+def test_ai_seed_is_per_call():
+    import AI
+    import chess_engine as chess
+    pieces = [{'row': p.row, 'col': p.col, 'name': p.name, 'color': p.color} for p in chess.create_pieces()]
+    first = AI.choose_move(pieces, False, 1, seed=5)
+    # an unseeded call in between must not disturb a later seeded one
+    AI.choose_move(pieces, False, 1)
+    assert AI.choose_move(pieces, False, 1, seed=5) == first
+    assert not hasattr(AI, 'rng')
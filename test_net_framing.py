@@ -0,0 +1,56 @@
+import random
+import socket
+
+import pytest
+
+from net_framing import FrameError, FrameReader, encode_frame
+
+
+@pytest.mark.parametrize("mode", ["line", "length"])
+def test_frames_survive_arbitrary_chunking(mode):
+    payloads = [b'{"type": "move"}', b"", "炎上".encode("utf-8"), b"x" * 5000]
+    if mode == "length":
+        payloads.append(b"binary\n\x00\xff")
+    else:
+        payloads = [p for p in payloads if p]
+    stream = b"".join(encode_frame(p, mode) for p in payloads)
+    rng = random.Random(3)
+    reader = FrameReader(mode, capacity=64)
+    got = []
+    i = 0
+    while i < len(stream):
+        n = rng.randint(1, 700)
+        reader.feed(stream[i:i + n])
+        got.extend(reader.frames())
+        i += n
+    assert got == payloads and len(reader) == 0
+
+
+def test_recv_into_reads_a_burst_from_a_socket():
+    a, b = socket.socketpair()
+    try:
+        a.sendall(b"".join(encode_frame(b"%d" % i) for i in range(1000)) + b"tail")
+        reader = FrameReader("line", capacity=128)
+        got = []
+        while len(got) < 1000:
+            assert reader.recv_into(b, 1024) > 0
+            got.extend(reader.frames())
+        assert got == [b"%d" % i for i in range(1000)]
+        # the partial frame stays buffered
+        while len(reader) < 4:
+            reader.recv_into(b, 1024)
+        assert reader.frames() == [] and len(reader) == 4
+    finally:
+        a.close()
+        b.close()
+
+
+def test_oversized_frames_are_rejected():
+    reader = FrameReader("length", max_frame=16)
+    reader.feed(encode_frame(b"x" * 17, "length"))
+    with pytest.raises(FrameError):
+        reader.frames()
+    reader = FrameReader("line", max_frame=16)
+    reader.feed(b"y" * 40)
+    with pytest.raises(FrameError):
+        reader.frames()
@@ -0,0 +1,34 @@
+import net_loadtest
+
+
+def test_scripted_matches_over_loopback():
+    report = net_loadtest.run_load(clients=4, max_plies=10, policy='first', seed=1, timeout=60.0)
+    assert report['matches'] == 2 and report['moves'] == 20
+    assert report['results'] == {'max_plies': 2}
+    assert report['unfinished'] == [] and report['client_failures'] == []
+    assert report['errors'] == 0 and report['resyncs'] == 0
+    assert report['latency_p50_ms'] <= report['latency_p99_ms']
+    assert report['server_cpu_s'] > 0
+
+
+def test_legal_moves_respect_frozen_pieces():
+    state = {'p:7,4': ['K', 'white', False], 'p:6,4': ['P', 'white', False], 'p:0,4': ['K', 'black', False]}
+    moves = net_loadtest.legal_moves(state, 'white')
+    assert (6, 4, 4, 4) in moves
+    state['f:6,4'] = 1
+    assert all(m[:2] != (6, 4) for m in net_loadtest.legal_moves(state, 'white'))
+
+
+def test_timeout_still_reports_and_names_unfinished_matches():
+    report = net_loadtest.run_load(clients=4, max_plies=10 ** 6, policy='first', seed=1, timeout=1.0)
+    assert report['results'] == {'unfinished': 2}
+    assert report['unfinished'] == ['load0', 'load1']
+    assert report['moves'] > 0
+
+
+def test_client_without_candidates_leaves():
+    client = net_loadtest.LoadClient(0, 'r', 'first', 1, net_loadtest.PROTOCOLS, 10)
+    client.seat = 'white'
+    client.mirror.state.update({'p:0,4': ['K', 'black', False]})
+    client._act()
+    assert client.result == 'no_moves'
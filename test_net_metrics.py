@@ -0,0 +1,53 @@
+import json
+import socket
+import time
+
+from connection import NetworkManager
+from net_metrics import LinkMetrics, MeteredQueue
+
+
+def test_rtt_jitter_and_queue_wait_are_tracked():
+    m = LinkMetrics()
+    for _ in range(3):
+        ping = m.ping()
+        time.sleep(0.01)
+        assert m.on_pong({"type": "pong", "id": ping["id"]}) >= 0.01
+    assert m.on_pong({"type": "pong", "id": 999}) is None
+    lost = m.ping()
+    time.sleep(0.02)
+    assert m.unanswered_for() >= 0.02
+    m.on_pong({"type": "pong", "id": m.ping()["id"]})       # answers a newer ping: `lost` is dropped
+    assert m.unanswered_for() == 0.0 and lost["id"] not in m._outstanding
+
+    q = MeteredQueue(m)
+    q.put("a")
+    q.put("b")
+    time.sleep(0.01)
+    assert q.get() == "a" and q.get_nowait() == "b" and q.empty()
+    snap = m.snapshot()
+    assert snap["pongs"] == 4 and snap["srtt_ms"] > 0 and snap["jitter_ms"] >= 0
+    assert snap["rtt_p50_ms"] >= 10.0
+    assert snap["queue_depth_max"] == 2 and snap["queue_depth"] == 0 and snap["queue_wait_max_ms"] >= 10.0
+
+
+def test_network_manager_heartbeat_measures_rtt_and_dumps(tmp_path):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    path = str(tmp_path / "net.jsonl")
+    host = NetworkManager('127.0.0.1', port, is_host=True, heartbeat=0.05, metrics_path=path)
+    host.start()
+    client = NetworkManager('127.0.0.1', port, is_host=False, heartbeat=0.05)
+    client.start()
+    assert host.recv_queue.get(timeout=2.0)["heartbeat"] is True
+    for _ in range(200):
+        if host.metrics.pongs_recv >= 3 and client.metrics.pongs_recv >= 3:
+            break
+        time.sleep(0.01)
+    snap = host.metrics.snapshot()
+    assert snap["pongs"] >= 3 and snap["rtt_ms"] is not None and snap["bytes_recv"] > 0
+    assert host.recv_queue.empty()          # ping/pong never reach the game loop
+    client.close()
+    host.close()
+    lines = [json.loads(line) for line in open(path, encoding='utf-8')]
+    assert lines and "srtt_ms" in lines[-1]
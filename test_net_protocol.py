@@ -0,0 +1,64 @@
+import socket
+import time
+
+from connection import NetworkManager
+from connection_async import AsyncNetworkManager
+from net_protocol import ProtocolState, decode_payload, encode_payload
+
+
+def _get(q, timeout=2.0):
+    return q.get(timeout=timeout)
+
+
+def test_binary_encoding_round_trips_and_falls_back_to_json():
+    move = {"type": "move", "from": [6, 4], "to": [7, 4], "promotion": "N", "seq": 70000}
+    card = {"type": "card", "card_id": 12, "index": None, "targets": [[3, 3], [0, 7]], "seq": 5}
+    moved = {"type": "moved", "color": "black", "from": [1, 0], "to": [0, 1], "promotion": None, "seq": 9}
+    for msg in (move, card, moved):
+        payload = encode_payload(msg, 'bin1')
+        assert payload[0] < 0x20 and decode_payload(payload) == msg
+    assert len(encode_payload(move, 'bin1')) < 10
+    assert len(encode_payload({"type": "card", "index": 2}, 'bin1')) < 10
+    # off-schema messages (extra keys, off-board squares, other types) stay JSON
+    for msg in ({"type": "move", "from": [6, 4], "to": [4, 4], "note": "x"},
+                {"type": "move", "from": [9, 4], "to": [4, 4]},
+                {"type": "card", "name": "炎上"}, [1, 2, 3]):
+        payload = encode_payload(msg, 'bin1')
+        assert payload == encode_payload(msg, 'json') and decode_payload(payload) == msg
+
+
+def test_negotiation_picks_a_shared_protocol_per_direction():
+    a, b = ProtocolState(), ProtocolState(['json'])
+    assert b.on_peer_hello({"type": "hello", **a.hello_fields()}) is None
+    assert a.on_peer_hello({"type": "hello", **b.hello_fields()}) is None
+    assert a.on_peer_hello({"type": "hello"}) is None       # older peer: NDJSON
+    marker = a.on_peer_hello({"type": "hello", **ProtocolState().hello_fields()})
+    assert marker == {"type": "proto", "use": "bin1", "framing": "length"}
+
+
+def test_threaded_and_async_managers_switch_to_binary():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    host = NetworkManager('127.0.0.1', port, is_host=True)
+    host.start()
+    client = AsyncNetworkManager('127.0.0.1', port, is_host=False)
+    client.start()
+    assert _get(host.recv_queue)["protocols"] == ["bin1", "json"]
+    assert _get(client.recv_queue)["role"] == "host"
+    for _ in range(200):
+        if host.protocol.recv_framing == client.protocol.recv_framing == 'length':
+            break
+        time.sleep(0.01)
+    assert host.protocol.send_protocol == client.protocol.send_protocol == 'bin1'
+    # a burst: binary moves mixed with JSON messages, several per recv
+    for i in range(50):
+        client.send({"type": "move", "from": [6, i % 8], "to": [5, i % 8], "seq": i})
+        client.send({"type": "chat", "text": f"\n{i}"})
+    got = [_get(host.recv_queue) for _ in range(100)]
+    assert [m["seq"] for m in got[::2]] == list(range(50))
+    assert [m["text"] for m in got[1::2]] == [f"\n{i}" for i in range(50)]
+    host.send({"type": "card", "index": 1})
+    assert _get(client.recv_queue) == {"type": "card", "card_id": None, "index": 1, "targets": [], "seq": 0}
+    client.close()
+    host.close()
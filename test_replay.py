@@ -0,0 +1,141 @@
+import os
+import tempfile
+
+import card_core as cc
+import chess_engine as chess
+from replay import ReplayPlayer, ReplayRecorder, load_replay, snapshot_board, snapshot_cards
+
+
+def _play_recorded_match(path, keyframe_interval=2):
+    chess.pieces[:] = chess.create_pieces()
+    chess.en_passant_target = None
+    chess.promotion_pending = None
+    game = cc.new_game_with_rule_deck()
+    ai = cc.PlayerState(deck=cc.make_rule_cards_deck())
+    # one '摂取' on top of the deck for every turn, so each turn draws one
+    game.player.deck.cards[:0] = [cc.card_from_name('摂取') for _ in range(4)]
+    rec = ReplayRecorder(path, keyframe_interval=keyframe_interval, seed=1234)
+    rec.attach(game, lambda: ai)
+    moves = [((6, 4), (4, 4)), ((1, 4), (3, 4)), ((7, 6), (5, 5)), ((0, 1), (2, 2)),
+             ((7, 5), (4, 2)), ((1, 3), (2, 3)), ((6, 3), (5, 3)), ((0, 2), (4, 6))]
+    expected = {}
+    for i in range(0, len(moves), 2):
+        game.start_turn()
+        names = [c.name for c in game.player.hand.cards]
+        assert game.play_card(names.index('摂取'))[0]
+        for (fr, fc), (tr, tc) in moves[i:i + 2]:
+            chess.apply_move(chess.get_piece_at(fr, fc), tr, tc)
+        game.decay_statuses('black')
+        expected[game.turn] = (snapshot_board(), snapshot_cards(game, ai))
+    rec.close()
+    return expected
+
+
+def test_seek_reproduces_every_turn():
+    fd, path = tempfile.mkstemp(suffix='.jsonl.gz')
+    os.close(fd)
+    try:
+        expected = _play_recorded_match(path)
+        rp = ReplayPlayer(path)
+        assert rp.seed == 1234
+        # seek out of order to exercise keyframe restore
+        for turn in sorted(expected, reverse=True):
+            rp.seek(turn)
+            board, cards = expected[turn]
+            assert snapshot_board() == board
+            assert snapshot_cards(rp.game, rp.ai_player) == cards
+    finally:
+        os.remove(path)
+
+
+def test_seek_cost_bounded_by_keyframe_interval():
+    fd, path = tempfile.mkstemp(suffix='.jsonl')
+    os.close(fd)
+    try:
+        _play_recorded_match(path, keyframe_interval=1)
+        rp = ReplayPlayer(path)
+        # with a keyframe every turn only that turn's events are re-applied
+        per_turn = max(sum(1 for e in rp.events if e['turn'] == t) for t in range(1, rp.last_turn + 1))
+        assert rp.seek(rp.last_turn) <= per_turn
+    finally:
+        os.remove(path)
+
+
+def test_events_between_keyframes_carry_inputs_only():
+    fd, path = tempfile.mkstemp(suffix='.jsonl')
+    os.close(fd)
+    try:
+        _play_recorded_match(path, keyframe_interval=10)
+        _, events = load_replay(path)
+        kinds = [e['t'] for e in events]
+        assert kinds.count('keyframe') == 1 and 'card' in kinds and 'turn' in kinds
+        assert all('cards' not in e for e in events if e['t'] != 'keyframe')
+    finally:
+        os.remove(path)
+
+
+def test_card_draws_are_fed_back_and_pending_writes_a_keyframe():
+    fd, path = tempfile.mkstemp(suffix='.jsonl')
+    os.close(fd)
+    try:
+        chess.pieces[:] = chess.create_pieces()
+        chess.en_passant_target = None
+        game = cc.new_game_with_rule_deck()
+        ai = cc.PlayerState(deck=cc.make_rule_cards_deck())
+        ai.graveyard = [cc.card_from_name(n) for n in ('摂取', '暴風', '迅雷', '鉄壁')]
+        ai.hand.cards = [cc.card_from_name('墓地ルーレット')]
+        rec = ReplayRecorder(path, keyframe_interval=10, seed=7)
+        rec.attach(game, lambda: ai)
+        game.start_turn()
+        game.start_ai_turn(ai)
+        # draws made by the UI around the card must not shift the card's own
+        for _ in range(3):
+            game.rng.random()
+        assert game.play_card_for(ai, 0)[0]
+        game.rng.choice([1, 2, 3])
+        cards_after_card = snapshot_cards(game, ai)
+        # a UI-resolved follow-up: the choice is logged and a keyframe follows
+        game.pending = cc.PendingAction(kind='discard', info={})
+        game.player.graveyard.append(game.player.hand.remove_at(0))
+        game.resolve_pending(index=0)
+        expected = snapshot_cards(game, ai)
+        rec.close()
+
+        _, events = load_replay(path)
+        kinds = [e['t'] for e in events]
+        assert kinds[:4] == ['keyframe', 'turn', 'ai_turn', 'card']
+        assert kinds[4:] == ['pending', 'keyframe']
+        assert events[3]['r'] and events[4]['choice'] == {'index': 0}
+
+        rp = ReplayPlayer(path)
+        for _ in range(4):
+            rp.step()
+        assert snapshot_cards(rp.game, rp.ai_player) == cards_after_card
+        rp.step()
+        rp.step()
+        assert snapshot_cards(rp.game, rp.ai_player) == expected
+    finally:
+        os.remove(path)
+
+
+def test_recording_a_seeded_game_keeps_its_seed():
+    def play(record):
+        game = cc.new_game_with_rule_deck(seed=99)
+        rec = None
+        if record:
+            fd, path = tempfile.mkstemp(suffix='.jsonl')
+            os.close(fd)
+            rec = ReplayRecorder(path)
+            rec.attach(game)
+        for _ in range(3):
+            game.start_turn()
+        draws = [game.rng.random() for _ in range(5)]
+        result = ([c.name for c in game.player.hand.cards], [c.name for c in game.player.deck.cards], draws)
+        if rec is not None:
+            rec.close()
+            header, _ = load_replay(path)
+            os.remove(path)
+            assert header['seed'] == 99
+        return result
+
+    assert play(record=True) == play(record=False)
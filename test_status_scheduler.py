@@ -0,0 +1,68 @@
+import card_core as cc
+import chess_engine as chess
+from status_scheduler import StatusScheduler
+
+
+def test_only_due_timers_pop():
+    s = StatusScheduler()
+    a = s.schedule('freeze', 1, 'white', 1)
+    b = s.schedule('block', (3, 3), 'black', 2)
+    assert s.advance('black') == []
+    assert s.turns_left(b) == 1 and s.turns_left(a) == 1
+    assert s.advance('white') == [a]
+    s.cancel(b)
+    assert s.advance(None) == [] and len(s) == 0
+
+
+def test_unresolved_owner_only_counts_down_when_every_clock_ticks():
+    s = StatusScheduler()
+    shared = s.schedule('block', (2, 2), None, 2)
+    strict = s.schedule('freeze', 9, None, 2, every_turn=False)
+    assert s.advance('white') == [] and s.advance('black') == [shared]
+    assert s.turns_left(strict) == 2
+    assert s.advance(None) == [] and s.advance(None) == [strict]
+
+
+def test_freeze_of_an_unknown_piece_is_not_decayed_by_either_side():
+    chess.pieces[:] = chess.create_pieces()
+    game = cc.new_game_with_rule_deck(seed=1)
+    game.frozen_pieces[12345] = 1      # id that matches no engine piece
+    for color in ('white', 'black', 'white'):
+        game.decay_statuses(color)
+    assert game.frozen_pieces[12345] == 1
+    game.decay_statuses()
+    assert 12345 not in game.frozen_pieces
+
+
+def test_blocked_tile_counts_down_on_owner_turn_end():
+    game = cc.new_game_with_rule_deck(seed=1)
+    events = []
+    game.listeners.append(lambda kind, data: events.append((kind, data)))
+    game.add_blocked_tile((4, 4), 'black', 2)
+    game.add_blocked_tile((4, 4), 'white', 1)
+    game.decay_statuses('black')
+    assert [e.get('turns') for e in game.blocked_tiles[(4, 4)]] == [1, 1]
+    game.decay_statuses('white')
+    assert game.get_blocked_entries((4, 4))[0]['owner'] == 'black'
+    assert game.blocked_tiles_owner[(4, 4)] == 'black'
+    game.decay_statuses('black')
+    assert (4, 4) not in game.blocked_tiles and (4, 4) not in game.blocked_tiles_owner
+    assert [d['owner'] for k, d in events if k == 'expire'] == ['white', 'black']
+
+
+def test_freeze_expires_and_clears_piece_attribute():
+    chess.pieces[:] = chess.create_pieces()
+    game = cc.new_game_with_rule_deck(seed=1)
+    knight = chess.get_piece_at(7, 1)
+    assert game.apply_freeze_piece(knight, 1, source_color='black')
+    game.decay_statuses('black')
+    assert game.frozen_pieces.get(id(knight), 0) == 1
+    game.decay_statuses('white')
+    assert id(knight) not in game.frozen_pieces
+    assert not hasattr(knight, 'frozen_turns')
+    # a direct assignment resolves the owner from the engine piece
+    game.frozen_pieces[id(knight)] = 1
+    del game.frozen_pieces[id(knight)]
+    game.frozen_pieces[id(knight)] = 2
+    game.decay_statuses('white')
+    assert game.frozen_pieces[id(knight)] == 1
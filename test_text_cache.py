@@ -0,0 +1,60 @@
+import importlib.util
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope='module')
+def cg():
+    spec = importlib.util.spec_from_file_location('card_game_text', os.path.join(HERE, 'Card Game.py'))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def test_rendered_text_is_reused(cg):
+    a = cg.render_text(cg.FONT, "ターン: 3", (20, 20, 20))
+    b = cg.render_text(cg.FONT, "ターン: 3", (20, 20, 20))
+    c = cg.render_text(cg.FONT, "ターン: 3", (20, 20, 21))
+    assert a is b and a is not c
+    spaced = cg.render_text(cg.FONT, "PP", (0, 0, 0), letter_spacing=3)
+    assert spaced.get_width() == sum(cg.glyph_advance(cg.FONT, ch) for ch in "PP") + 6
+
+
+def test_text_cache_is_bounded(cg, monkeypatch):
+    monkeypatch.setattr(cg, 'TEXT_CACHE_SIZE', 8)
+    for i in range(20):
+        cg.render_text(cg.FONT, f"line {i}", (0, 0, 0))
+    assert len(cg._text_cache) <= 8
+
+
+def test_wrap_text_respects_width(cg):
+    text = "『灼熱』（コスト2）を使用。封鎖: (3, 4) を 2 ターン封鎖 (対象: black)" * 3
+    lines = cg.wrap_text(text, 200)
+    assert "".join(lines) == text
+    assert all(sum(cg.glyph_advance(cg.FONT, ch) for ch in ln) <= 200 for ln in lines if len(ln) > 1)
+
+
+def test_fonts_are_built_once_per_key(cg, monkeypatch):
+    built = []
+    real_sysfont = cg.pygame.font.SysFont
+
+    def counting_sysfont(name, size, bold=False, italic=False):
+        built.append((size, bold))
+        return real_sysfont(name, size, bold=bold, italic=italic)
+
+    monkeypatch.setattr(cg.pygame.font, 'SysFont', counting_sysfont)
+    monkeypatch.setattr(cg, 'FONT_CACHE', {})
+    monkeypatch.setattr(cg, '_text_cache', cg.OrderedDict())
+    for _ in range(5):
+        for size, bold in ((27, False), (27, True), (31, False)):
+            font = cg.get_font(size, bold=bold)
+            assert font is cg.get_font(size, bold=bold)
+            cg.render_text(font, "ターン: 3", (20, 20, 20))
+            cg.render_text(font, "PP", (0, 0, 0), letter_spacing=2)
+    assert sorted(built) == [(27, False), (27, True), (31, False)]